@@ -34,6 +34,26 @@ class LiveDashboardAPIView(APIView):
         })
 
 
+class PaymentLatencyAPIView(APIView):
+    permission_classes = [IsAdminUser, HasAppPermission]
+    required_permission = 'view_reports'
+
+    @custom_extend_schema(
+        resource_name='PaymentLatency',
+        status_codes=[ResponseStatusCodes.OK, ResponseStatusCodes.UNAUTHORIZED, ResponseStatusCodes.FORBIDDEN],
+        summary='Payment latency percentiles per phase, gateway and day',
+        tags=['Admin - Dashboard'],
+        operation_id='admin_dashboard_payment_latency',
+    )
+    def get(self, request):
+        try:
+            days = int(request.query_params.get('days', 7))
+        except (TypeError, ValueError):
+            days = 7
+        gateway = request.query_params.get('gateway') or None
+        return Response(DashboardService.get_payment_latency(days=days, gateway=gateway))
+
+
 class SystemHealthAPIView(APIView):
     permission_classes = [IsAdminUser, HasAppPermission]
     required_permission = 'view_reports'
@@ -1,10 +1,12 @@
 from django.urls import path
 from apps.admin_panel.api.dashboard.dashboard_apis import (
     LiveDashboardAPIView,
+    PaymentLatencyAPIView,
     SystemHealthAPIView,
 )
 
 urlpatterns = [
     path('live/', LiveDashboardAPIView.as_view(), name='dashboard-live'),
+    path('payment-latency/', PaymentLatencyAPIView.as_view(), name='dashboard-payment-latency'),
     path('health/', SystemHealthAPIView.as_view(), name='system-health'),
 ]
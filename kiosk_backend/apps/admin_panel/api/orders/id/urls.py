@@ -3,9 +3,11 @@ from apps.admin_panel.api.orders.id.orders_id_apis import (
     AdminOrderRetrieveAPIView,
     AdminOrderUpdateStatusAPIView
 )
+from apps.admin_panel.api.orders.print_apis import AdminOrderPrintStatusAPIView
 
 urlpatterns = [
     path('', AdminOrderRetrieveAPIView.as_view(), name='admin-order-retrieve'),
+    path('print-status/', AdminOrderPrintStatusAPIView.as_view(), name='admin-order-print-status'),
     path('update-status/', AdminOrderUpdateStatusAPIView.as_view(), name='admin-order-update-status'),
 ]
 
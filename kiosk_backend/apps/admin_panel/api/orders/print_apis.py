@@ -0,0 +1,74 @@
+"""
+API endpoints for printer station and per-order print status (Admin only).
+"""
+from rest_framework import generics, status
+from rest_framework.response import Response
+from apps.orders.models import Order
+from apps.orders.selectors.print_selector import PrintSelector
+from apps.admin_panel.api.permissions import IsAdminUser, HasAppPermission
+from apps.core.api.schema import custom_extend_schema
+from apps.core.api.schema import ResponseStatusCodes
+
+
+class PrinterStationStatusAPIView(generics.GenericAPIView):
+    """
+    API endpoint for printer station status (Admin only).
+
+    GET: Queue depth, recent printed/failed counts and last error per station
+    """
+    permission_classes = [IsAdminUser, HasAppPermission]
+    required_permission = 'view_orders'
+
+    @custom_extend_schema(
+        resource_name="PrinterStationStatus",
+        status_codes=[
+            ResponseStatusCodes.OK,
+            ResponseStatusCodes.UNAUTHORIZED,
+            ResponseStatusCodes.FORBIDDEN,
+        ],
+        summary="Printer Station Status (Admin)",
+        description="Per-station print queue status (queued, printing, printed/failed in the last `hours`, last error).",
+        tags=["Admin - Orders"],
+        operation_id="admin_printer_station_status",
+    )
+    def get(self, request):
+        try:
+            hours = max(int(request.query_params.get('hours', 24)), 1)
+        except (TypeError, ValueError):
+            hours = 24
+        return Response(
+            data={'stations': PrintSelector.get_station_status(hours=hours)},
+            status=status.HTTP_200_OK,
+        )
+
+
+class AdminOrderPrintStatusAPIView(generics.GenericAPIView):
+    """
+    API endpoint for an order's print status per station (Admin only).
+    """
+    queryset = Order.objects.all()
+    permission_classes = [IsAdminUser, HasAppPermission]
+    required_permission = 'view_orders'
+
+    @custom_extend_schema(
+        resource_name="AdminOrderPrintStatus",
+        status_codes=[
+            ResponseStatusCodes.OK,
+            ResponseStatusCodes.NOT_FOUND,
+            ResponseStatusCodes.UNAUTHORIZED,
+            ResponseStatusCodes.FORBIDDEN,
+        ],
+        summary="Order Print Status (Admin)",
+        description="Latest print job of the order on each printer station (receipt and kitchen tickets).",
+        tags=["Admin - Orders"],
+        operation_id="admin_orders_print_status",
+    )
+    def get(self, request, pk):
+        order = self.get_object()
+        return Response(
+            data={
+                'order_number': order.order_number,
+                'stations': PrintSelector.get_order_print_status(order),
+            },
+            status=status.HTTP_200_OK,
+        )
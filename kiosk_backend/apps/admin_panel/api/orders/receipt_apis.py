@@ -1,11 +1,15 @@
 """
-API endpoint for reprinting receipts (Admin only).
+API endpoints for reprinting receipts and fetching archived receipt images (Admin only).
 """
+from django.conf import settings
 from rest_framework import generics, status
 from rest_framework.response import Response
+from apps.orders.models import PrintJob, PrinterStation
 from apps.orders.selectors.order_selector import OrderSelector
 from apps.orders.services.receipt_service import ReceiptService
 from apps.orders.services.print_service import PrintService
+from apps.orders.services.print_job_service import PrintJobService
+from apps.orders.services.receipt_archive_service import ReceiptArchiveService
 from apps.admin_panel.api.permissions import IsAdminUser, HasAppPermission
 from apps.core.api.schema import custom_extend_schema
 from apps.core.api.schema import ResponseStatusCodes
@@ -72,24 +76,46 @@ class ReceiptReprintAPIView(generics.GenericAPIView):
         # Generate receipt image
         receipt_image = PrintService.generate_receipt_image(receipt_data, width=576)
         
-        # Save image and get URL
+        # Archive image (compact, deduplicated) and get URL
         image_url = PrintService.save_receipt_image(
-            receipt_image, order_number, request, suffix='customer'
+            receipt_image, order, receipt_data, request, copy_label='فاکتور مشتری'
         )
         
-        # Print both customer + seller copies
-        print_success = PrintService.print_receipt(order)
+        # Print both customer + seller copies on the receipt stations
+        # (through the print worker when queued; kitchen tickets are not repeated)
+        print_queued = False
+        stations = []
+        if getattr(settings, 'PRINT_QUEUE_ENABLED', True):
+            jobs = PrintJobService.reprint(order)
+            print_success = bool(jobs) and all(job.status == PrintJob.STATUS_PRINTED for job in jobs)
+            print_queued = any(not job.is_final for job in jobs)
+            stations = [
+                {
+                    'station': job.station.name if job.station else None,
+                    'printer': job.printer,
+                    'status': job.status,
+                }
+                for job in jobs
+            ]
+        else:
+            print_success = PrintService.print_receipt(
+                order, ticket_types=[PrinterStation.TICKET_RECEIPT]
+            )
         
+        if print_success:
+            print_status, print_message = 'success', 'هر دو فاکتور (مشتری و فروشنده) به پرینتر ارسال شد'
+        elif print_queued:
+            print_status, print_message = 'queued', 'فاکتورها در صف چاپ قرار گرفتند'
+        else:
+            print_status, print_message = 'failed', 'ارسال فاکتورها به پرینتر ناموفق بود'
+
         response_data = {
             **receipt_data,
             'image_url': image_url,
             'copies': ['فاکتور مشتری', 'فاکتور فروشنده'],
-            'print_status': 'success' if print_success else 'failed',
-            'print_message': (
-                'هر دو فاکتور (مشتری و فروشنده) به پرینتر ارسال شد'
-                if print_success
-                else 'ارسال فاکتورها به پرینتر ناموفق بود'
-            ),
+            'print_status': print_status,
+            'print_message': print_message,
+            'stations': stations,
         }
         
         return Response(
@@ -97,3 +123,72 @@ class ReceiptReprintAPIView(generics.GenericAPIView):
             status=status.HTTP_200_OK
         )
 
+
+
+class ReceiptImageAPIView(generics.GenericAPIView):
+    """
+    API endpoint for an order's archived receipt image (Admin only).
+
+    GET: Returns the image URL, rendering it again when the archive sweeper
+    has already removed it
+    """
+    permission_classes = [IsAdminUser, HasAppPermission]
+    required_permission = 'view_orders'
+
+    @custom_extend_schema(
+        resource_name="ReceiptImage",
+        status_codes=[
+            ResponseStatusCodes.OK,
+            ResponseStatusCodes.NOT_FOUND,
+            ResponseStatusCodes.BAD_REQUEST,
+            ResponseStatusCodes.UNAUTHORIZED,
+            ResponseStatusCodes.FORBIDDEN,
+        ],
+        summary="Receipt Image (Admin)",
+        description="Archived receipt image URL for a paid order; old images are regenerated on demand. Optional `copy` query parameter selects the copy label (default: customer copy).",
+        tags=["Admin - Orders"],
+        operation_id="admin_receipt_image",
+    )
+    def get(self, request, order_number: str):
+        """
+        Return the receipt image URL of an order.
+
+        Args:
+            request: HTTP request object
+            order_number: Order number
+
+        Returns:
+            Response: Image URL and whether it was regenerated
+        """
+        order = OrderSelector.get_order_by_number(order_number)
+
+        if not order:
+            return Response(
+                data={
+                    'error': 'Order not found',
+                    'message': f'Order with number {order_number} does not exist'
+                },
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        if order.payment_status != 'paid':
+            return Response(
+                data={
+                    'error': 'No receipt',
+                    'message': 'Receipts only exist for paid orders'
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        copy_label = request.query_params.get('copy', 'فاکتور مشتری')
+        image_url, regenerated = ReceiptArchiveService.get_image_url(order, copy_label, request)
+
+        return Response(
+            data={
+                'order_number': order.order_number,
+                'copy_label': copy_label.strip(),
+                'image_url': image_url,
+                'regenerated': regenerated,
+            },
+            status=status.HTTP_200_OK
+        )
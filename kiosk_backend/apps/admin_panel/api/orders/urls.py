@@ -1,10 +1,13 @@
 from django.urls import path, include
 from apps.admin_panel.api.orders.orders_apis import AdminOrderListAPIView
-from apps.admin_panel.api.orders.receipt_apis import ReceiptReprintAPIView
+from apps.admin_panel.api.orders.receipt_apis import ReceiptReprintAPIView, ReceiptImageAPIView
+from apps.admin_panel.api.orders.print_apis import PrinterStationStatusAPIView
 
 urlpatterns = [
     path('', AdminOrderListAPIView.as_view(), name='admin-order-list'),
     path('<int:pk>/', include('apps.admin_panel.api.orders.id.urls')),
+    path('print-stations/', PrinterStationStatusAPIView.as_view(), name='admin-printer-station-status'),
     path('receipt/<str:order_number>/reprint/', ReceiptReprintAPIView.as_view(), name='admin-receipt-reprint'),
+    path('receipt/<str:order_number>/image/', ReceiptImageAPIView.as_view(), name='admin-receipt-image'),
 ]
 
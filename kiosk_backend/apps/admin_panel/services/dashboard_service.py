@@ -1,4 +1,4 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from datetime import datetime, time, timedelta
 
 from django.db.models import Sum, Count, Avg, F, ExpressionWrapper, IntegerField
@@ -6,11 +6,16 @@ from django.db.models.functions import ExtractHour, TruncDate
 from django.utils import timezone
 
 from apps.orders.models import Order, OrderItem
+from apps.payment.selectors.payment_trace_selector import PaymentTraceSelector
+from apps.payment.tracing import PaymentTracer
 
 
 class DashboardService:
     """Operational dashboard metrics for the kiosk admin."""
 
+    # Upper bounds (ms) of the payment latency histogram buckets; one overflow bucket follows
+    LATENCY_BUCKETS_MS = (250, 500, 1000, 2500, 5000, 10000, 20000, 30000, 60000, 120000)
+
     @staticmethod
     def _day_range(day):
         start = timezone.make_aware(datetime.combine(day, time.min))
@@ -190,3 +195,116 @@ class DashboardService:
                 'orders': int(row['orders'] or 0) if row else 0,
             })
         return {'days': days, 'points': points}
+
+    @staticmethod
+    def _latency_stats(samples: List[int]) -> Dict[str, Any]:
+        """Nearest-rank p50/p95/p99 and max of millisecond samples."""
+        if not samples:
+            return {'count': 0, 'p50': None, 'p95': None, 'p99': None, 'max': None}
+        ordered = sorted(samples)
+
+        def pct(p: int) -> int:
+            rank = max(-(-p * len(ordered) // 100), 1)
+            return ordered[min(rank, len(ordered)) - 1]
+
+        return {'count': len(ordered), 'p50': pct(50), 'p95': pct(95), 'p99': pct(99), 'max': ordered[-1]}
+
+    @staticmethod
+    def _latency_histogram(samples: List[int]) -> List[int]:
+        counts = [0] * (len(DashboardService.LATENCY_BUCKETS_MS) + 1)
+        for ms in samples:
+            index = next(
+                (i for i, bound in enumerate(DashboardService.LATENCY_BUCKETS_MS) if ms <= bound),
+                len(DashboardService.LATENCY_BUCKETS_MS),
+            )
+            counts[index] += 1
+        return counts
+
+    @staticmethod
+    def get_payment_latency(days: int = 7, gateway: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Payment latency from PaymentTrace rows, per gateway and per day.
+
+        Every trace is split into segments (PaymentTracer.segments) and the
+        segments are summed into terminal / network / backend groups, so a
+        slow p95 can be pinned on the POS (card + bank), the link to it, or
+        the kiosk backend (queue, DB commit, print enqueue).
+
+        Args:
+            days: Days back from today (1-30)
+            gateway: Only this gateway class name (e.g. POSPaymentGateway)
+
+        Returns:
+            Dict[str, Any]: p50/p95/p99 per gateway (total, groups, segments,
+            histogram) and per day
+        """
+        days = max(1, min(int(days or 7), 30))
+        since_date = timezone.localdate() - timedelta(days=days - 1)
+        start = timezone.make_aware(datetime.combine(since_date, time.min))
+
+        per_gateway: Dict[str, Dict[str, Any]] = {}
+        per_day: Dict[tuple, Dict[str, List[int]]] = {}
+        for row in PaymentTraceSelector.get_traces_since(start, gateway_name=gateway):
+            segments = PaymentTracer.segments(row['phases'] or {}, row['total_ms'])
+            groups = {
+                group: sum(segments[phase] for phase in phases if phase in segments)
+                for group, phases in PaymentTracer.PHASE_GROUPS.items()
+                if any(phase in segments for phase in phases)
+            }
+            bucket = per_gateway.setdefault(row['gateway_name'], {
+                'outcomes': {},
+                'total': [],
+                'groups': {},
+                'segments': {},
+            })
+            bucket['outcomes'][row['outcome']] = bucket['outcomes'].get(row['outcome'], 0) + 1
+            bucket['total'].append(row['total_ms'])
+            for name, ms in groups.items():
+                bucket['groups'].setdefault(name, []).append(ms)
+            for name, ms in segments.items():
+                bucket['segments'].setdefault(name, []).append(ms)
+
+            day_key = (timezone.localtime(row['started_at']).date(), row['gateway_name'])
+            day = per_day.setdefault(day_key, {'total': []})
+            day['total'].append(row['total_ms'])
+            for name, ms in groups.items():
+                day.setdefault(name, []).append(ms)
+
+        stats = DashboardService._latency_stats
+        return {
+            'days': days,
+            'gateway': gateway or None,
+            'phases': list(PaymentTracer.PHASES) + ['finish'],
+            'groups': {name: list(phases) for name, phases in PaymentTracer.PHASE_GROUPS.items()},
+            'buckets_ms': list(DashboardService.LATENCY_BUCKETS_MS),
+            'gateways': [
+                {
+                    'gateway': name,
+                    'count': len(bucket['total']),
+                    'outcomes': bucket['outcomes'],
+                    'total': stats(bucket['total']),
+                    'groups': {group: stats(samples) for group, samples in bucket['groups'].items()},
+                    'segments': {
+                        phase: stats(bucket['segments'][phase])
+                        for phase in list(PaymentTracer.PHASES) + ['finish']
+                        if phase in bucket['segments']
+                    },
+                    'histogram': DashboardService._latency_histogram(bucket['total']),
+                }
+                for name, bucket in sorted(per_gateway.items())
+            ],
+            'daily': [
+                {
+                    'date': day.isoformat(),
+                    'gateway': name,
+                    'count': len(samples['total']),
+                    'total': stats(samples['total']),
+                    'groups': {
+                        group: stats(samples[group])
+                        for group in PaymentTracer.PHASE_GROUPS
+                        if group in samples
+                    },
+                }
+                for (day, name), samples in sorted(per_day.items())
+            ],
+        }
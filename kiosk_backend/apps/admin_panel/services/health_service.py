@@ -3,10 +3,11 @@ import socket
 import time
 
 from django.conf import settings
+from django.utils import timezone
 
 
 class HealthMonitorService:
-    """Probe POS, network printer, and Bale bot health."""
+    """Probe POS, network printer, printer stations and Bale bot health."""
 
     @staticmethod
     def _tcp_probe(host: str, port: int, timeout: float = 2.0) -> Dict[str, Any]:
@@ -60,6 +61,9 @@ class HealthMonitorService:
                 'message': 'درگاه پرداخت در حالت mock است',
             }
 
+        if gateway in ('bridge', 'pos_bridge', 'dll_bridge'):
+            return HealthMonitorService.check_pos_bridge(cfg)
+
         host = (
             cfg.get('POS_TCP_HOST')
             or cfg.get('tcp_host')
@@ -70,10 +74,114 @@ class HealthMonitorService:
             or cfg.get('tcp_port')
             or 1362
         )
-        result = HealthMonitorService._tcp_probe(host, port, timeout=2.0)
+        if gateway == 'pos' and getattr(settings, 'PAYMENT_ASYNC_MODE', False):
+            return HealthMonitorService.check_pos_worker(host, port)
+
+        connection = None
+        if gateway == 'pos':
+            from apps.payment.gateway.pos.connection_manager import POSConnectionManager
+
+            connection = POSConnectionManager.for_device(host, port).state()
+        if connection and connection['state'] in ('ready', 'in_use'):
+            # A second client may be refused while the warm connection is open
+            result = {
+                'ok': True,
+                'status': 'ok',
+                'latency_ms': connection['last_connect_ms'],
+                'host': host,
+                'port': port,
+                'error': None,
+            }
+        else:
+            result = HealthMonitorService._tcp_probe(host, port, timeout=2.0)
         result['message'] = 'کارتخوان در دسترس است' if result['ok'] else 'اتصال به کارتخوان برقرار نشد'
+        if connection:
+            result['connection'] = connection
+        return result
+
+    @staticmethod
+    def check_pos_worker(host: str, port: int) -> Dict[str, Any]:
+        """
+        POS health in async mode, from the payment_worker heartbeat. The POS
+        is not probed: the worker holds the device's only connection and a
+        second client would be refused or disturb it.
+        """
+        from apps.payment.services.payment_job_service import PaymentJobService
+
+        heartbeat = PaymentJobService.latest_heartbeat()
+        interval = float(getattr(settings, 'PAYMENT_WORKER_HEARTBEAT_SECONDS', 5) or 5)
+        result = {
+            'ok': False,
+            'status': 'down',
+            'latency_ms': None,
+            'host': host,
+            'port': port,
+            'error': None,
+        }
+        if heartbeat is None:
+            result['message'] = 'payment_worker اجرا نشده است'
+            return result
+
+        age = (timezone.now() - heartbeat.beat_at).total_seconds()
+        connection = heartbeat.connection_state or {}
+        # A running payment blocks the loop until the POS answers
+        max_age = (
+            float(getattr(settings, 'PAYMENT_JOB_STALE_SECONDS', 300) or 300)
+            if heartbeat.busy else max(interval * 3, 15.0)
+        )
+        result.update({
+            'worker': heartbeat.worker_name,
+            'heartbeat_age': round(age, 1),
+            'busy': heartbeat.busy,
+            'connection': connection,
+        })
+        if age > max_age:
+            result['error'] = f'last heartbeat {round(age)}s ago'
+            result['message'] = 'payment_worker پاسخ نمی‌دهد'
+            return result
+        if connection.get('state') == 'error':
+            result['error'] = connection.get('last_error') or None
+            result['message'] = 'اتصال به کارتخوان برقرار نشد'
+            return result
+        result.update({
+            'ok': True,
+            'status': 'ok',
+            'latency_ms': connection.get('last_connect_ms'),
+            'message': (
+                'کارتخوان در حال انجام تراکنش است' if heartbeat.busy
+                else 'کارتخوان در دسترس است'
+            ),
+        })
         return result
 
+    @staticmethod
+    def check_pos_bridge(cfg: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        POS health as seen by PosBridge. The POS itself is not probed: the
+        bridge DLL holds the device session and keeps its own health
+        snapshot fresh, so this is one pooled HTTP call.
+        """
+        from apps.payment.gateway.bridge import BridgePaymentGateway
+
+        state = BridgePaymentGateway(cfg).connection_state()
+        ok = state.get('pos_ok', False)
+        messages = {
+            'unreachable': 'بریج پوز در دسترس نیست',
+            'in_use': 'کارتخوان در حال انجام تراکنش است',
+        }
+        return {
+            'ok': ok,
+            'status': 'ok' if ok else ('down' if state['state'] in ('unreachable', 'error') else state['state']),
+            'latency_ms': state.get('latency_ms'),
+            'host': state.get('bridge_url'),
+            'port': None,
+            'error': state.get('last_error') or None,
+            'message': messages.get(state['state']) or (
+                'کارتخوان در دسترس است' if ok else 'اتصال به کارتخوان برقرار نشد'
+            ),
+            'connection': state,
+        }
+
     @staticmethod
     def check_printer() -> Dict[str, Any]:
         enabled = bool(getattr(settings, 'PRINTER_ENABLED', False))
@@ -93,6 +201,35 @@ class HealthMonitorService:
         result['message'] = 'چاپگر در دسترس است' if result['ok'] else 'اتصال به چاپگر برقرار نشد'
         return result
 
+    @staticmethod
+    def check_printer_stations() -> Dict[str, Any]:
+        """
+        Print queue state per configured station. Stations are not probed
+        over TCP: port-9100 printers take one client, which is usually the
+        print worker's pooled connection.
+        """
+        from apps.orders.selectors.print_selector import PrintSelector
+
+        stations = PrintSelector.get_station_status()
+        failing = [s['name'] for s in stations if s['status'] == 'failing']
+        if not stations:
+            status = 'not_configured'
+        elif failing:
+            status = 'degraded'
+        else:
+            status = 'ok'
+        return {
+            'ok': not failing,
+            'status': status,
+            'failing': failing,
+            'stations': stations,
+            'message': (
+                f"خطای چاپ در ایستگاه: {'، '.join(failing)}" if failing
+                else 'ایستگاه‌های چاپ سالم هستند' if stations
+                else 'ایستگاه چاپ تعریف نشده؛ چاپگر پیش‌فرض استفاده می‌شود'
+            ),
+        }
+
     @staticmethod
     def check_bale() -> Dict[str, Any]:
         from apps.bale_bot.services.config_service import BaleConfigService
@@ -116,9 +253,10 @@ class HealthMonitorService:
         pos = HealthMonitorService.check_pos()
         printer = HealthMonitorService.check_printer()
         bale = HealthMonitorService.check_bale()
-        components = {'pos': pos, 'printer': printer, 'bale': bale}
+        stations = HealthMonitorService.check_printer_stations()
+        components = {'pos': pos, 'printer': printer, 'printer_stations': stations, 'bale': bale}
         overall = 'ok'
-        if not pos.get('ok') or not printer.get('ok') or not bale.get('ok'):
+        if not pos.get('ok') or not printer.get('ok') or not bale.get('ok') or not stations.get('ok'):
             # disabled printer/bale mock shouldn't force critical if intentional
             critical = []
             if not pos.get('ok') and pos.get('status') not in ('mock',):
@@ -131,6 +269,6 @@ class HealthMonitorService:
 
         return {
             'overall': overall,
-            'checked_at': __import__('django.utils.timezone', fromlist=['timezone']).timezone.now().isoformat(),
+            'checked_at': timezone.now().isoformat(),
             'components': components,
         }
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from apps.core.models.settings import SiteSettings
+from apps.core.models.receipt_counter import ReceiptCounter
 
 
 @admin.register(SiteSettings)
@@ -38,8 +39,6 @@ class SiteSettingsAdmin(admin.ModelAdmin):
                 'dine_in_enabled',
                 'takeaway_enabled',
                 'receipt_number_mode',
-                'last_receipt_number',
-                'receipt_number_date',
             )
         }),
         ('اطلاعات تماس', {
@@ -50,7 +49,7 @@ class SiteSettingsAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
-    readonly_fields = ['created_at', 'updated_at', 'last_receipt_number', 'receipt_number_date']
+    readonly_fields = ['created_at', 'updated_at']
     
     def has_add_permission(self, request):
         # فقط یک رکورد مجاز است
@@ -61,3 +60,18 @@ class SiteSettingsAdmin(admin.ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         # حذف مجاز نیست
         return False
+
+
+@admin.register(ReceiptCounter)
+class ReceiptCounterAdmin(admin.ModelAdmin):
+    """
+    نمایش شمارنده شماره فیش (ریست از پنل مدیریت سایت انجام می‌شود)
+    """
+    list_display = ['last_number', 'counter_date', 'updated_at']
+    readonly_fields = ['last_number', 'counter_date', 'updated_at']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
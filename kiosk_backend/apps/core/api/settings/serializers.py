@@ -2,6 +2,8 @@ import re
 
 from rest_framework import serializers
 from apps.core.models.settings import SiteSettings
+from apps.core.models.receipt_counter import ReceiptCounter
+from apps.products.models import StockRevision
 
 
 _HEX_RE = re.compile(r'^#[0-9A-Fa-f]{6}$')
@@ -37,6 +39,7 @@ class SiteSettingsSerializer(serializers.ModelSerializer):
     """
     logo_url = serializers.SerializerMethodField()
     landing_background_url = serializers.SerializerMethodField()
+    last_receipt_number = serializers.SerializerMethodField()
     next_receipt_number = serializers.SerializerMethodField()
     active_receipt_template = serializers.SerializerMethodField()
 
@@ -112,8 +115,11 @@ class SiteSettingsSerializer(serializers.ModelSerializer):
     def get_landing_background_url(self, obj):
         return _media_url(obj.landing_background)
 
+    def get_last_receipt_number(self, obj):
+        return ReceiptCounter.current().last_number
+
     def get_next_receipt_number(self, obj):
-        return obj.effective_next_receipt_number()
+        return ReceiptCounter.effective_next_number()
 
     def get_active_receipt_template(self, obj):
         return obj.resolve_receipt_template()
@@ -126,6 +132,7 @@ class SiteSettingsPublicSerializer(serializers.ModelSerializer):
     """
     logo_url = serializers.SerializerMethodField()
     landing_background_url = serializers.SerializerMethodField()
+    stock_revision = serializers.SerializerMethodField()
 
     class Meta:
         model = SiteSettings
@@ -160,6 +167,7 @@ class SiteSettingsPublicSerializer(serializers.ModelSerializer):
             'takeaway_enabled',
             'cart_layout',
             'catalog_revision',
+            'stock_revision',
         ]
 
     def get_logo_url(self, obj):
@@ -167,3 +175,7 @@ class SiteSettingsPublicSerializer(serializers.ModelSerializer):
 
     def get_landing_background_url(self, obj):
         return _media_url(obj.landing_background)
+
+    def get_stock_revision(self, obj) -> int:
+        # Separate channel: sales bump this, not catalog_revision
+        return StockRevision.current()
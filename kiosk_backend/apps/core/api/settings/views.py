@@ -5,6 +5,7 @@ from rest_framework.permissions import AllowAny
 from apps.admin_panel.api.permissions import IsAdminUser, MethodAppPermission, HasAppPermission
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from apps.core.models.settings import SiteSettings
+from apps.core.models.receipt_counter import ReceiptCounter
 from apps.core.api.settings.serializers import (
     SiteSettingsSerializer,
     SiteSettingsPublicSerializer
@@ -24,9 +25,9 @@ class SiteSettingsPublicAPIView(generics.RetrieveAPIView):
     
     def get_object(self):
         """
-        برگرداندن تنظیمات سایت (یا ایجاد یک رکورد پیش‌فرض)
+        برگرداندن تنظیمات سایت از کش پروسه (یا ایجاد یک رکورد پیش‌فرض)
         """
-        return SiteSettings.get_settings()
+        return SiteSettings.get_cached()
     
     @custom_extend_schema(
         resource_name="SiteSettingsPublic",
@@ -147,7 +148,7 @@ class ResetReceiptNumberAPIView(APIView):
         except (TypeError, ValueError):
             start_from = 0
 
-        last_number = SiteSettings.reset_receipt_number(start_from=start_from)
+        last_number = ReceiptCounter.reset(start_from=start_from)
         settings_obj = SiteSettings.get_settings()
         LogService.log_info(
             'settings',
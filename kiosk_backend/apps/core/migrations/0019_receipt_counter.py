@@ -0,0 +1,68 @@
+from django.db import migrations, models
+
+
+def copy_counter_from_settings(apps, schema_editor):
+    SiteSettings = apps.get_model('core', 'SiteSettings')
+    ReceiptCounter = apps.get_model('core', 'ReceiptCounter')
+
+    row = SiteSettings.objects.filter(pk=1).values('last_receipt_number', 'receipt_number_date').first()
+    ReceiptCounter.objects.update_or_create(
+        pk=1,
+        defaults={
+            'last_number': (row or {}).get('last_receipt_number') or 0,
+            'counter_date': (row or {}).get('receipt_number_date'),
+        },
+    )
+
+
+def copy_counter_to_settings(apps, schema_editor):
+    SiteSettings = apps.get_model('core', 'SiteSettings')
+    ReceiptCounter = apps.get_model('core', 'ReceiptCounter')
+
+    counter = ReceiptCounter.objects.filter(pk=1).first()
+    if counter is not None:
+        SiteSettings.objects.filter(pk=1).update(
+            last_receipt_number=counter.last_number,
+            receipt_number_date=counter.counter_date,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_fulfillment_choice_enabled'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReceiptCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_number', models.PositiveIntegerField(
+                    default=0,
+                    help_text='آخرین شماره فیش تخصیص‌داده‌شده؛ فیش بعدی این مقدار + ۱ است',
+                    verbose_name='آخرین شماره فیش',
+                )),
+                ('counter_date', models.DateField(
+                    blank=True,
+                    null=True,
+                    help_text='آخرین روزی که شماره فیش برای آن تخصیص داده شده (برای ریست روزانه اتوماتیک)',
+                    verbose_name='تاریخ شمارنده فیش',
+                )),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='تاریخ بروزرسانی')),
+            ],
+            options={
+                'verbose_name': 'شمارنده شماره فیش',
+                'verbose_name_plural': 'شمارنده شماره فیش',
+            },
+        ),
+        migrations.RunPython(copy_counter_from_settings, copy_counter_to_settings),
+        migrations.RemoveField(
+            model_name='sitesettings',
+            name='last_receipt_number',
+        ),
+        migrations.RemoveField(
+            model_name='sitesettings',
+            name='receipt_number_date',
+        ),
+    ]
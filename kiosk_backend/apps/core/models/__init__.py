@@ -1,6 +1,7 @@
 from .base import TimeStampedModel
 from .settings import SiteSettings
+from .receipt_counter import ReceiptCounter
 from .landing_analytics import LandingEvent
 
-__all__ = ['TimeStampedModel', 'SiteSettings', 'LandingEvent']
+__all__ = ['TimeStampedModel', 'SiteSettings', 'ReceiptCounter', 'LandingEvent']
 
@@ -0,0 +1,108 @@
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+
+
+class ReceiptCounter(models.Model):
+    """
+    شمارنده پایدار شماره فیش (یک رکورد)
+
+    جدا از SiteSettings نگه داشته می‌شود تا تخصیص شماره در تراکنش پرداخت
+    با ویرایش تنظیمات یا تغییر نسخه کاتالوگ روی یک سطر قفل نشود.
+    حالت ریست (دستی/اتوماتیک) همچنان از SiteSettings.receipt_number_mode خوانده می‌شود.
+    """
+    last_number = models.PositiveIntegerField(
+        default=0,
+        verbose_name='آخرین شماره فیش',
+        help_text='آخرین شماره فیش تخصیص‌داده‌شده؛ فیش بعدی این مقدار + ۱ است'
+    )
+    counter_date = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name='تاریخ شمارنده فیش',
+        help_text='آخرین روزی که شماره فیش برای آن تخصیص داده شده (برای ریست روزانه اتوماتیک)'
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='تاریخ بروزرسانی')
+
+    class Meta:
+        verbose_name = 'شمارنده شماره فیش'
+        verbose_name_plural = 'شمارنده شماره فیش'
+
+    def __str__(self):
+        return f'شماره فیش: {self.last_number}'
+
+    def save(self, *args, **kwargs):
+        self.pk = 1
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def current(cls) -> 'ReceiptCounter':
+        counter, _ = cls.objects.get_or_create(pk=1)
+        return counter
+
+    @classmethod
+    def _local_today(cls):
+        from django.utils import timezone
+        return timezone.localdate()
+
+    @classmethod
+    def _resets_daily(cls) -> bool:
+        from apps.core.models.settings import SiteSettings
+
+        mode = SiteSettings.objects.filter(pk=1).values_list('receipt_number_mode', flat=True).first()
+        return mode == SiteSettings.RECEIPT_NUMBER_MODE_AUTOMATIC
+
+    @classmethod
+    def effective_next_number(cls) -> int:
+        """Next number that would be allocated (without mutating)."""
+        counter = cls.current()
+        if (
+            cls._resets_daily()
+            and counter.counter_date is not None
+            and counter.counter_date < cls._local_today()
+        ):
+            return 1
+        return (counter.last_number or 0) + 1
+
+    @classmethod
+    def allocate(cls) -> int:
+        """
+        Allocate the next receipt number with one conditional UPDATE.
+
+        Must run inside the transaction that marks the order as paid: the row
+        lock is held until commit, so a rolled-back payment never burns a
+        number and the sequence stays gap-free.
+        Manual: only resets via reset().
+        Automatic: resets to 1 when the local calendar day changes.
+
+        Returns:
+            int: Allocated receipt number
+        """
+        today = cls._local_today()
+        if cls._resets_daily():
+            next_number = Case(
+                When(counter_date__lt=today, then=Value(1)),
+                default=F('last_number') + 1,
+                output_field=models.PositiveIntegerField(),
+            )
+        else:
+            next_number = F('last_number') + 1
+
+        with transaction.atomic():
+            updated = cls.objects.filter(pk=1).update(last_number=next_number, counter_date=today)
+            if not updated:
+                cls.current()
+                cls.objects.filter(pk=1).update(last_number=next_number, counter_date=today)
+            return cls.objects.filter(pk=1).values_list('last_number', flat=True).get()
+
+    @classmethod
+    def reset(cls, start_from: int = 0) -> int:
+        """
+        Reset receipt counter. Next allocated number will be start_from + 1.
+        """
+        if start_from < 0:
+            start_from = 0
+        counter = cls.current()
+        counter.last_number = start_from
+        counter.counter_date = cls._local_today()
+        counter.save(update_fields=['last_number', 'counter_date', 'updated_at'])
+        return counter.last_number
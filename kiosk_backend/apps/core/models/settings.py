@@ -1,7 +1,19 @@
+import threading
+import time
+
 from django.db import models, transaction
 from django.core.validators import FileExtensionValidator
 
 
+class _SettingsCache:
+    """Process-local holder for the SiteSettings singleton (see get_cached)."""
+
+    lock = threading.Lock()
+    obj = None
+    stamp = None
+    checked_at = 0.0
+
+
 class SiteSettings(models.Model):
     """
     تنظیمات سایت - شامل نام، لوگو، کپی رایت و غیره
@@ -281,13 +293,6 @@ class SiteSettings(models.Model):
         help_text='با هر تغییر محصول/دسته افزایش می‌یابد؛ کiosk با این عدد کش منو را تازه می‌کند'
     )
 
-    # شمارنده پایدار شماره فیش (با ری‌استارت سیستم ریست نمی‌شود)
-    last_receipt_number = models.PositiveIntegerField(
-        default=0,
-        verbose_name='آخرین شماره فیش',
-        help_text='آخرین شماره فیش تخصیص‌داده‌شده؛ فیش بعدی این مقدار + ۱ است'
-    )
-
     RECEIPT_NUMBER_MODE_MANUAL = 'manual'
     RECEIPT_NUMBER_MODE_AUTOMATIC = 'automatic'
     RECEIPT_NUMBER_MODE_CHOICES = [
@@ -301,12 +306,6 @@ class SiteSettings(models.Model):
         verbose_name='حالت شماره فیش',
         help_text='دستی: فقط با ریست دستی از ۱ شروع می‌شود. اتوماتیک: با عوض شدن روز از ۱ شروع می‌شود.'
     )
-    receipt_number_date = models.DateField(
-        null=True,
-        blank=True,
-        verbose_name='تاریخ شمارنده فیش',
-        help_text='آخرین روزی که شماره فیش برای آن تخصیص داده شده (برای ریست روزانه اتوماتیک)'
-    )
     
     # متادیتا
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='تاریخ ایجاد')
@@ -326,13 +325,45 @@ class SiteSettings(models.Model):
             SiteSettings.objects.all().delete()
         # ID را 1 تنظیم کن
         self.pk = 1
-        if (
-            self.receipt_number_mode == self.RECEIPT_NUMBER_MODE_AUTOMATIC
-            and self.receipt_number_date is None
-        ):
-            self.receipt_number_date = self._local_today()
         super().save(*args, **kwargs)
+        # Other processes notice the new updated_at stamp on their next check
+        self.invalidate_cache()
     
+    @classmethod
+    def invalidate_cache(cls) -> None:
+        with _SettingsCache.lock:
+            _SettingsCache.obj = None
+            _SettingsCache.stamp = None
+            _SettingsCache.checked_at = 0.0
+
+    @classmethod
+    def get_cached(cls):
+        """
+        Read-only settings from process memory.
+
+        The singleton is re-validated at most every SITE_SETTINGS_CACHE_TTL
+        seconds with a one-column `updated_at` lookup and reloaded only when
+        that stamp changed (admin edit in any process). Callers that modify
+        and save settings must use get_settings() instead.
+        """
+        from django.conf import settings as django_settings
+
+        ttl = float(getattr(django_settings, 'SITE_SETTINGS_CACHE_TTL', 5.0) or 0)
+        now = time.monotonic()
+        cached = _SettingsCache.obj
+        if cached is not None and now - _SettingsCache.checked_at < ttl:
+            return cached
+
+        stamp = cls.objects.filter(pk=1).values_list('updated_at', flat=True).first()
+        if cached is None or stamp is None or stamp != _SettingsCache.stamp:
+            cached = cls.get_settings()
+            stamp = cached.updated_at
+        with _SettingsCache.lock:
+            _SettingsCache.obj = cached
+            _SettingsCache.stamp = stamp
+            _SettingsCache.checked_at = now
+        return cached
+
     @classmethod
     def get_settings(cls):
         """
@@ -357,9 +388,7 @@ class SiteSettings(models.Model):
                 'takeaway_enabled': True,
                 'fulfillment_choice_enabled': True,
                 'catalog_revision': 0,
-                'last_receipt_number': 0,
                 'receipt_number_mode': cls.RECEIPT_NUMBER_MODE_MANUAL,
-                'receipt_number_date': None,
             }
         )
         return settings
@@ -450,61 +479,3 @@ class SiteSettings(models.Model):
     def _local_today(cls):
         from django.utils import timezone
         return timezone.localdate()
-
-    def effective_next_receipt_number(self) -> int:
-        """Next number that would be allocated (without mutating)."""
-        if (
-            self.receipt_number_mode == self.RECEIPT_NUMBER_MODE_AUTOMATIC
-            and self.receipt_number_date is not None
-            and self.receipt_number_date < self._local_today()
-        ):
-            return 1
-        return (self.last_receipt_number or 0) + 1
-
-    @classmethod
-    def allocate_next_receipt_number(cls) -> int:
-        """
-        Atomically allocate the next persistent receipt number.
-        Manual: only resets via reset_receipt_number().
-        Automatic: resets to 1 when the local calendar day changes.
-        """
-        today = cls._local_today()
-        with transaction.atomic():
-            settings = cls.objects.select_for_update().filter(pk=1).first()
-            if settings is None:
-                settings = cls.get_settings()
-                settings = cls.objects.select_for_update().get(pk=1)
-
-            if (
-                settings.receipt_number_mode == cls.RECEIPT_NUMBER_MODE_AUTOMATIC
-                and settings.receipt_number_date is not None
-                and settings.receipt_number_date < today
-            ):
-                settings.last_receipt_number = 0
-
-            settings.last_receipt_number += 1
-            settings.receipt_number_date = today
-            settings.save(
-                update_fields=['last_receipt_number', 'receipt_number_date', 'updated_at']
-            )
-            return settings.last_receipt_number
-    @classmethod
-    def reset_receipt_number(cls, start_from: int = 0) -> int:
-        """
-        Reset receipt counter. Next allocated number will be start_from + 1.
-        """
-        if start_from < 0:
-            start_from = 0
-        today = cls._local_today()
-        with transaction.atomic():
-            settings = cls.objects.select_for_update().filter(pk=1).first()
-            if settings is None:
-                settings = cls.get_settings()
-                settings = cls.objects.select_for_update().get(pk=1)
-            settings.last_receipt_number = start_from
-            settings.receipt_number_date = today
-            settings.save(
-                update_fields=['last_receipt_number', 'receipt_number_date', 'updated_at']
-            )
-            return settings.last_receipt_number
-
@@ -1,3 +1,75 @@
-from django.test import TestCase
+import itertools
+import multiprocessing
+import random
+from unittest import mock
 
-# Create your tests here.
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from apps.core.utils import number_generator
+from apps.core.utils.number_generator import SequenceNumberGenerator
+
+
+def _generate_numbers(count, queue):
+    generator = SequenceNumberGenerator('ORD')
+    queue.put([generator.next() for _ in range(count)])
+
+
+class SequenceNumberGeneratorTests(SimpleTestCase):
+    @staticmethod
+    def _suffix(node_id, pid, counter):
+        with override_settings(NUMBER_GENERATOR_NODE_ID=node_id), \
+                mock.patch.object(number_generator.os, 'getpid', return_value=pid):
+            generator = SequenceNumberGenerator('ORD')
+            generator._reset_for_process(pid)
+            generator._counter = counter - 1
+            return generator.next().rsplit('-', 1)[1]
+
+    def test_segments_are_fixed_width(self):
+        # Values at every width boundary of the old variable-width format
+        nodes = ['1', '1Z', 'Z1', 'ZZZZ']
+        pids = [1, 35, 36, 36 ** 4 - 1, 36 ** 4, 36 ** 4 + 1, 4 * 1024 * 1024]
+        counters = [1, 36, 36 ** 4 - 1, 36 ** 4, 36 ** 4 + 1]
+        suffixes = {}
+        for node_id, pid, counter in itertools.product(nodes, pids, counters):
+            suffix = self._suffix(node_id, pid, counter)
+            self.assertEqual(suffix[:4], node_id.rjust(4, '0'))
+            self.assertNotIn(suffix, suffixes, f'{(node_id, pid, counter)} repeats {suffixes.get(suffix)}')
+            suffixes[suffix] = (node_id, pid, counter)
+
+    def test_random_tuples_never_share_a_suffix(self):
+        rng = random.Random(8)
+        seen = {}
+        for _ in range(5000):
+            key = (
+                rng.choice(['', '7', 'K1', 'AB12']),
+                rng.randrange(1, 4 * 1024 * 1024),
+                rng.choice([rng.randrange(1, 50), rng.randrange(36 ** 4 - 50, 36 ** 4 + 50)]),
+            )
+            suffix = self._suffix(*key)
+            self.assertEqual(seen.setdefault(suffix, key), key)
+
+    def test_many_processes_generate_unique_numbers(self):
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        processes = [context.Process(target=_generate_numbers, args=(500, queue)) for _ in range(16)]
+        for process in processes:
+            process.start()
+        numbers = [number for _ in processes for number in queue.get(timeout=30)]
+        for process in processes:
+            process.join(timeout=30)
+        self.assertEqual(len(numbers), 16 * 500)
+        self.assertEqual(len(set(numbers)), len(numbers))
+
+    def test_generator_reseeds_after_fork(self):
+        generator = SequenceNumberGenerator('INV')
+        with mock.patch.object(number_generator.os, 'getpid', return_value=100):
+            parent = generator.next()
+        with mock.patch.object(number_generator.os, 'getpid', return_value=101):
+            child = generator.next()
+        self.assertNotEqual(parent.rsplit('-', 1)[1][4:9], child.rsplit('-', 1)[1][4:9])
+
+    @override_settings(NUMBER_GENERATOR_NODE_ID='KIOSK1')
+    def test_too_long_node_id_is_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            SequenceNumberGenerator('ORD').next()
@@ -1,8 +1,10 @@
 from .validators import validate_positive_number
 from .decorators import log_action
+from .number_generator import SequenceNumberGenerator
 
 __all__ = [
     'validate_positive_number',
     'log_action',
+    'SequenceNumberGenerator',
 ]
 
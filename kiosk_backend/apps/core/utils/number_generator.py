@@ -0,0 +1,91 @@
+import hashlib
+import os
+import socket
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+
+_BASE36 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+# Fixed segment widths, so node + pid always take the same 9 characters and
+# the variable-length counter can only be the tail (no two tuples concatenate
+# to the same string)
+NODE_WIDTH = 4      # 36**4 ≈ 1.7M node ids
+PID_WIDTH = 5       # 36**5 ≈ 60M > Linux PID_MAX_LIMIT (2**22)
+COUNTER_WIDTH = 4   # minimum; grows past 36**4 numbers per process
+
+
+def _to_base36(value: int, width: int = 0) -> str:
+    digits = ''
+    while True:
+        value, rem = divmod(value, 36)
+        digits = _BASE36[rem] + digits
+        if not value:
+            break
+    return digits.rjust(width, '0')
+
+
+def _fixed_base36(value: int, width: int) -> str:
+    digits = _to_base36(value, width)
+    if len(digits) != width:
+        raise ValueError(f'{value} does not fit in {width} base36 digits')
+    return digits
+
+
+def _default_node_id() -> str:
+    """Four base36 chars: NUMBER_GENERATOR_NODE_ID, else derived from the host name."""
+    from django.conf import settings
+
+    configured = str(getattr(settings, 'NUMBER_GENERATOR_NODE_ID', '') or '').strip().upper()
+    configured = ''.join(ch for ch in configured if ch in _BASE36)
+    if configured:
+        if len(configured) > NODE_WIDTH:
+            raise ImproperlyConfigured(f'NUMBER_GENERATOR_NODE_ID must be at most {NODE_WIDTH} base36 characters')
+        return configured.rjust(NODE_WIDTH, '0')
+    digest = hashlib.sha1(socket.gethostname().encode('utf-8')).digest()
+    return _fixed_base36(int.from_bytes(digest[:8], 'big') % (36 ** NODE_WIDTH), NODE_WIDTH)
+
+
+class SequenceNumberGenerator:
+    """
+    Unique, sortable document numbers without a database round-trip.
+
+    Format: PREFIX-YYYYMMDDHHMMSS-NNNNPPPPPCCCC
+        NNNN node id (host), PPPPP process id, CCCC+ per-process counter
+        (base36; node and pid fixed width, the counter grows at the end).
+
+    Node + pid identify the process and the counter never repeats inside it,
+    so two workers (or two kiosks hitting the same second) cannot produce the
+    same value. The counter is re-seeded after fork, when the pid changes.
+    Hosts sharing a database need distinct NUMBER_GENERATOR_NODE_ID values
+    (derived ids are a hash of the host name and can collide).
+    """
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._pid = None
+        self._process_tag = ''
+        self._counter = 0
+
+    def _reset_for_process(self, pid: int) -> None:
+        self._pid = pid
+        self._process_tag = f'{_default_node_id()}{_fixed_base36(pid, PID_WIDTH)}'
+        self._counter = 0
+
+    def next(self) -> str:
+        pid = os.getpid()
+        with self._lock:
+            if pid != self._pid:
+                self._reset_for_process(pid)
+            self._counter += 1
+            counter = self._counter
+            process_tag = self._process_tag
+        timestamp = timezone.now().strftime('%Y%m%d%H%M%S')
+        return f'{self.prefix}-{timestamp}-{process_tag}{_to_base36(counter, COUNTER_WIDTH)}'
+
+
+order_numbers = SequenceNumberGenerator('ORD')
+invoice_numbers = SequenceNumberGenerator('INV')
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from apps.orders.models import Order, OrderItem, Invoice
+from apps.orders.models import Order, OrderItem, Invoice, PrintJob, PrinterStation, ReceiptArchive
 
 
 class OrderItemInline(admin.TabularInline):
@@ -31,3 +31,28 @@ class InvoiceAdmin(admin.ModelAdmin):
     list_filter = ['created_at']
     search_fields = ['invoice_number', 'order__order_number']
     readonly_fields = ['invoice_number', 'created_at', 'updated_at']
+
+
+@admin.register(PrinterStation)
+class PrinterStationAdmin(admin.ModelAdmin):
+    list_display = ['name', 'ticket_type', 'host', 'port', 'is_active', 'display_order']
+    list_filter = ['ticket_type', 'is_active']
+    list_editable = ['is_active', 'display_order']
+    search_fields = ['name', 'host']
+    filter_horizontal = ['categories']
+
+
+@admin.register(PrintJob)
+class PrintJobAdmin(admin.ModelAdmin):
+    list_display = ['job_id', 'order', 'station', 'ticket_type', 'printer_host', 'printer_port', 'status', 'attempts', 'next_attempt_at', 'finished_at']
+    list_filter = ['status', 'ticket_type', 'station', 'printer_host', 'created_at']
+    search_fields = ['job_id', 'order__order_number']
+    readonly_fields = ['job_id', 'created_at', 'updated_at', 'started_at', 'finished_at']
+
+
+@admin.register(ReceiptArchive)
+class ReceiptArchiveAdmin(admin.ModelAdmin):
+    list_display = ['order', 'copy_label', 'template', 'image_size', 'last_accessed_at', 'created_at']
+    list_filter = ['template', 'created_at']
+    search_fields = ['order__order_number', 'image_hash']
+    readonly_fields = ['image_hash', 'image_size', 'last_accessed_at', 'created_at', 'updated_at']
@@ -1,15 +1,46 @@
+from django.conf import settings
 from rest_framework import generics, status
 from rest_framework.response import Response
 from apps.orders.api.orders.orders_serializers import (
     OrderSerializer,
-    OrderCreateSerializer
+    OrderCreateSerializer,
+    PaymentJobSerializer,
+    PaymentJobQuerySerializer,
 )
 from apps.orders.services.order_service import OrderService
+from apps.orders.selectors.order_selector import OrderSelector
 from apps.orders.services.receipt_service import ReceiptService
 from apps.core.api.schema import custom_extend_schema
 from apps.core.api.schema import ResponseStatusCodes
 from apps.payment.gateway.exceptions import GatewayException
 from apps.core.exceptions.payment import PaymentFailedException
+from apps.core.exceptions.order import OrderNotFoundException
+from apps.payment.services.payment_job_service import PaymentJobService
+
+
+def build_order_response(order) -> dict:
+    """Order payload with payment status and receipt (shared by create and job status)."""
+    response_data = OrderSerializer(order).data
+    
+    # Add payment information to response (from order itself)
+    if order.transaction_id:
+        response_data['payment'] = {
+            'transaction_id': order.transaction_id,
+            'status': order.payment_status,
+            'gateway_name': order.gateway_name
+        }
+    elif order.error_message:
+        # Add error message if payment gateway was not active or payment failed
+        response_data['payment'] = {
+            'status': order.payment_status,
+            'error': order.error_message
+        }
+    
+    # Add receipt data if payment was successful
+    if order.payment_status == 'paid':
+        response_data['receipt'] = ReceiptService.generate_receipt_data(order)
+    
+    return response_data
 
 
 class OrderCreateAPIView(generics.GenericAPIView):
@@ -33,7 +64,7 @@ class OrderCreateAPIView(generics.GenericAPIView):
             ResponseStatusCodes.SERVER_ERROR,
         ],
         summary="Create Order and Process Payment",
-        description="Create an order from items data and process payment directly through POS device. Payment is processed immediately and stock is decreased if payment is successful.",
+        description="Create an order from items data and process payment directly through POS device. Payment is processed immediately and stock is decreased if payment is successful. In async payment mode the order is returned with HTTP 202 and a `payment_job` handle instead; follow it via the payment-job status endpoint.",
         tags=["Orders"],
         operation_id="orders_create",
     )
@@ -68,37 +99,33 @@ class OrderCreateAPIView(generics.GenericAPIView):
             request.session.create()
             session_key = request.session.session_key
         
+        async_payment = request_data.get('async_payment')
+        if async_payment is None:
+            async_payment = getattr(settings, 'PAYMENT_ASYNC_MODE', False)
+        
         order = None
         try:
             order = OrderService.create_order_from_items(
                 session_key, 
                 request_data['items'],
-                process_payment=True,
+                process_payment=not async_payment,
                 fulfillment_type=request_data.get('fulfillment_type') or 'dine_in',
                 coupon_code=request_data.get('coupon_code') or None,
                 landing_theme=request_data.get('landing_theme') or '',
             )
             
-            response_data = OrderSerializer(order).data
+            if async_payment:
+                # Payment worker drives the POS; kiosk polls the job handle
+                job = OrderService.enqueue_payment(order)
+                response_data = OrderSerializer(order).data
+                response_data['payment'] = {'status': order.payment_status}
+                response_data['payment_job'] = PaymentJobSerializer(job).data
+                return Response(
+                    data=response_data,
+                    status=status.HTTP_202_ACCEPTED
+                )
             
-            # Add payment information to response (from order itself)
-            if order.transaction_id:
-                response_data['payment'] = {
-                    'transaction_id': order.transaction_id,
-                    'status': order.payment_status,
-                    'gateway_name': order.gateway_name
-                }
-            elif order.error_message:
-                # Add error message if payment gateway was not active or payment failed
-                response_data['payment'] = {
-                    'status': order.payment_status,
-                    'error': order.error_message
-                }
-            
-            # Add receipt data if payment was successful
-            if order.payment_status == 'paid':
-                receipt_data = ReceiptService.generate_receipt_data(order)
-                response_data['receipt'] = receipt_data
+            response_data = build_order_response(order)
             
             return Response(
                 data=response_data,
@@ -130,3 +157,63 @@ class OrderCreateAPIView(generics.GenericAPIView):
                 status=status.HTTP_402_PAYMENT_REQUIRED
             )
 
+
+
+class PaymentJobStatusAPIView(generics.GenericAPIView):
+    """
+    API endpoint for following an asynchronous payment job.
+    
+    Supports a short wait with `?wait=<seconds>` (capped by
+    PAYMENT_JOB_LONG_POLL_MAX, a couple of seconds, since the wait holds a
+    sync worker); kiosks poll again until the job is final. Once the job is
+    final the response has the same order/payment/receipt shape as the
+    synchronous create endpoint.
+    """
+    serializer_class = PaymentJobSerializer
+    
+    @custom_extend_schema(
+        resource_name="PaymentJobStatus",
+        parameters=[PaymentJobQuerySerializer],
+        response_serializer=PaymentJobSerializer,
+        status_codes=[
+            ResponseStatusCodes.OK,
+            ResponseStatusCodes.NOT_FOUND,
+        ],
+        summary="Get Payment Job Status",
+        description="Get the status of an asynchronous payment job, optionally waiting until it finishes.",
+        tags=["Orders"],
+        operation_id="orders_payment_job_status",
+    )
+    def get(self, request, job_id):
+        """
+        Get payment job status (long-poll).
+        
+        Args:
+            request: HTTP request object
+            job_id: Payment job UUID returned by order create
+            
+        Returns:
+            Response: Job status with order, payment and receipt data
+            
+        Raises:
+            OrderNotFoundException: If job does not exist
+        """
+        params_serializer = PaymentJobQuerySerializer(data=request.query_params)
+        params_serializer.is_valid(raise_exception=True)
+        wait = min(
+            params_serializer.validated_data['wait'],
+            getattr(settings, 'PAYMENT_JOB_LONG_POLL_MAX', 2),
+        )
+        
+        job = PaymentJobService.get_job(job_id)
+        if job is None:
+            raise OrderNotFoundException('Payment job not found')
+        job = PaymentJobService.wait_for_final(job, wait)
+        
+        order = OrderSelector.get_order_by_id(job.order_id)
+        response_data = PaymentJobSerializer(job).data
+        response_data['order'] = build_order_response(order) if job.is_final else OrderSerializer(order).data
+        return Response(
+            data=response_data,
+            status=status.HTTP_200_OK
+        )
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.utils.translation import gettext_lazy as _
 from apps.orders.models import Order, OrderItem
+from apps.payment.models import PaymentJob
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -78,8 +79,35 @@ class OrderCreateSerializer(serializers.Serializer):
         max_length=20,
         label=_('تم لندینگ'),
     )
+    async_payment = serializers.BooleanField(
+        required=False,
+        allow_null=True,
+        default=None,
+        label=_('پرداخت غیرهمزمان'),
+        help_text=_('true = سفارش فوراً ثبت و شناسه کار پرداخت برگردانده می‌شود؛ خالی = طبق PAYMENT_ASYNC_MODE'),
+    )
     
     def validate_items(self, value):
         if not value:
             raise serializers.ValidationError(_('لیست آیتم‌های سفارش نمی‌تواند خالی باشد.'))
         return value
+
+
+class PaymentJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PaymentJob
+        fields = [
+            'job_id', 'status', 'amount', 'error_message',
+            'started_at', 'finished_at', 'created_at',
+        ]
+        read_only_fields = fields
+
+
+class PaymentJobQuerySerializer(serializers.Serializer):
+    wait = serializers.FloatField(
+        required=False,
+        min_value=0,
+        default=0,
+        label=_('انتظار (ثانیه)'),
+        help_text=_('Long-poll: حداکثر چند ثانیه منتظر پایان پرداخت بماند'),
+    )
@@ -1,7 +1,7 @@
 from django.urls import path
-from apps.orders.api.orders.orders_apis import OrderCreateAPIView
+from apps.orders.api.orders.orders_apis import OrderCreateAPIView, PaymentJobStatusAPIView
 
 urlpatterns = [
     path('create/', OrderCreateAPIView.as_view(), name='order-create'),
+    path('payment-jobs/<uuid:job_id>/', PaymentJobStatusAPIView.as_view(), name='order-payment-job-status'),
 ]
-
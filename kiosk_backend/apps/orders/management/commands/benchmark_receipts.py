@@ -0,0 +1,121 @@
+"""
+Benchmark receipt rendering for every layout template.
+
+Usage:
+    python manage.py benchmark_receipts --json bench.json
+    python manage.py benchmark_receipts --baseline bench.json --threshold 15
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.orders.services.receipt_benchmark import (
+    BENCHMARK_TEMPLATES,
+    DEFAULT_LINE_COUNTS,
+    compare_to_baseline,
+    run_benchmark,
+)
+
+
+def _int_list(value: str):
+    try:
+        return [int(part) for part in value.split(',') if part.strip()]
+    except ValueError:
+        raise CommandError(f'Expected comma-separated integers, got: {value}')
+
+
+class Command(BaseCommand):
+    help = 'Render every receipt template over synthetic orders and report p50/p99 time and peak memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--templates',
+            default=','.join(BENCHMARK_TEMPLATES),
+            help='Comma-separated templates (default: all, including kitchen)',
+        )
+        parser.add_argument(
+            '--lines',
+            default=','.join(str(n) for n in DEFAULT_LINE_COUNTS),
+            help='Comma-separated order sizes in item lines',
+        )
+        parser.add_argument('--iterations', type=int, default=20, help='Timed renders per template and size')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed renders per template and size')
+        parser.add_argument('--seed', type=int, default=1405)
+        parser.add_argument('--cold', action='store_true', help='Clear text caches before every render')
+        parser.add_argument('--encode', action='store_true', help='Include ESC/POS raster encoding')
+        parser.add_argument('--json', default='', help="Write results as JSON to this path ('-' for stdout)")
+        parser.add_argument('--baseline', default='', help='Earlier --json output to compare against')
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=15.0,
+            help='Percent slowdown vs baseline that fails the command',
+        )
+
+    def handle(self, *args, **options):
+        templates = [t.strip() for t in options['templates'].split(',') if t.strip()]
+        unknown = sorted(set(templates) - set(BENCHMARK_TEMPLATES))
+        if unknown:
+            raise CommandError(f'Unknown templates: {", ".join(unknown)}')
+        line_counts = _int_list(options['lines'])
+        if not line_counts or min(line_counts) < 1:
+            raise CommandError('--lines needs positive integers')
+
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline'], encoding='utf-8') as handle:
+                    baseline = json.load(handle)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Cannot read baseline {options["baseline"]}: {e}')
+
+        results = run_benchmark(
+            templates=templates,
+            line_counts=line_counts,
+            iterations=max(options['iterations'], 1),
+            warmup=max(options['warmup'], 0),
+            seed=options['seed'],
+            cold=options['cold'],
+            encode=options['encode'],
+        )
+
+        json_target = options['json']
+        if json_target == '-':
+            self.stdout.write(json.dumps(results, ensure_ascii=False, indent=2))
+        else:
+            self._write_table(results)
+            if json_target:
+                with open(json_target, 'w', encoding='utf-8') as handle:
+                    json.dump(results, handle, ensure_ascii=False, indent=2)
+                self.stdout.write(f'\nResults written to {json_target}')
+
+        if baseline is not None:
+            regressions = compare_to_baseline(results, baseline, options['threshold'])
+            if regressions:
+                for r in regressions:
+                    self.stderr.write(self.style.ERROR(
+                        f'{r["template"]} {r["metric"]}: {r["baseline"]:.2f} → {r["current"]:.2f} ms '
+                        f'(+{r["change_pct"]}%)'
+                    ))
+                raise CommandError(
+                    f'{len(regressions)} metric(s) slower than baseline by more than {options["threshold"]}%'
+                )
+            self.stdout.write(self.style.SUCCESS(
+                f'No template slower than baseline by more than {options["threshold"]}%'
+            ))
+
+    def _write_table(self, results):
+        meta = results['meta']
+        self.stdout.write(
+            f'Receipt render benchmark — lines {meta["line_counts"]}, {meta["iterations"]} iterations, '
+            f'{"cold" if meta["cold"] else "warm"} caches{", with encoding" if meta["encode"] else ""}'
+        )
+        self.stdout.write(
+            f'{"template":<10} {"p50 ms":>9} {"p99 ms":>9} {"max ms":>9} {"peak RSS KiB":>13} {"peak py KiB":>12} {"height":>7}'
+        )
+        for name, row in results['templates'].items():
+            rss = '-' if row['peak_rss_kib'] is None else f'{row["peak_rss_kib"]:,}'
+            self.stdout.write(
+                f'{name:<10} {row["p50_ms"]:>9.2f} {row["p99_ms"]:>9.2f} {row["max_ms"]:>9.2f} '
+                f'{rss:>13} {row["peak_python_kib"]:>12,.1f} {row["max_height_px"]:>7}'
+            )
@@ -0,0 +1,124 @@
+import logging
+import os
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from apps.orders.services.print_job_service import PrintJobService
+from apps.orders.services.print_service import PrintService
+from apps.orders.services.printer_pool import PrinterConnectionPool
+from apps.orders.services.receipt_archive_service import ReceiptArchiveService
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Print queued receipts and kitchen tickets outside the web workers (parallel printers, retries)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=getattr(settings, 'PRINT_WORKER_POLL_INTERVAL', 0.5),
+            help='Seconds to sleep when the queue is empty',
+        )
+        parser.add_argument(
+            '--stale-after',
+            type=int,
+            default=getattr(settings, 'PRINT_JOB_STALE_SECONDS', 120),
+            help='Requeue jobs left in printing longer than this (crashed worker)',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=getattr(settings, 'PRINT_WORKER_CONCURRENCY', 4),
+            help='Jobs printed at the same time (each on a different printer)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Process at most one job and exit (debugging)',
+        )
+
+    def handle(self, *args, **options):
+        poll_interval = max(options['poll_interval'], 0.05)
+        worker_name = f'{socket.gethostname()}:{os.getpid()}'
+
+        PrintJobService.requeue_stale_jobs(options['stale_after'])
+        font_stats = PrintService.warm_up()
+        self.stdout.write(self.style.SUCCESS(
+            f'Print worker {worker_name} started '
+            f'({font_stats["fonts_loaded"]} fonts pre-loaded in {font_stats["load_ms_total"]} ms).'
+        ))
+
+        if options['once']:
+            self._run_once(worker_name)
+            return
+
+        # The loop below closes idle sockets, so reuse them between jobs
+        PrinterConnectionPool.keep_connections_open()
+        concurrency = max(options['concurrency'], 1)
+        in_flight = set()
+        sweep_interval = float(getattr(settings, 'RECEIPT_ARCHIVE_SWEEP_INTERVAL', 3600) or 0)
+        next_sweep = time.monotonic()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='print') as pool:
+            while True:
+                try:
+                    close_old_connections()
+                    # claim_next skips printers that still have an older job
+                    # queued or printing, so parallel jobs never share a printer
+                    while len(in_flight) < concurrency:
+                        job = PrintJobService.claim_next(worker_name)
+                        if job is None:
+                            break
+                        self.stdout.write(
+                            f'Printing job {job.job_id} ({job.ticket_type}, order {job.order_id}, '
+                            f'attempt {job.attempts}) on {job.printer}'
+                        )
+                        in_flight.add(pool.submit(self._run_job, job))
+
+                    if not in_flight:
+                        PrinterConnectionPool.close_idle()
+                        if sweep_interval > 0 and time.monotonic() >= next_sweep:
+                            next_sweep = time.monotonic() + sweep_interval
+                            ReceiptArchiveService.sweep()
+                        time.sleep(poll_interval)
+                        continue
+
+                    done, in_flight = wait(in_flight, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                except KeyboardInterrupt:
+                    self.stdout.write(self.style.WARNING('Stopped by user.'))
+                    break
+                except Exception as exc:
+                    logger.exception('Print worker loop error: %s', exc)
+                    self.stderr.write(self.style.ERROR(f'Worker error: {exc}'))
+                    time.sleep(2)
+
+    def _run_job(self, job):
+        try:
+            job = PrintJobService.run(job)
+            self.stdout.write(f'Print job {job.job_id} → {job.status}')
+        except Exception as exc:
+            logger.exception('Print job %s crashed: %s', job.job_id, exc)
+            self.stderr.write(self.style.ERROR(f'Print job {job.job_id} error: {exc}'))
+        finally:
+            # Each pool thread holds its own DB connection
+            connection.close()
+
+    def _run_once(self, worker_name):
+        """Process at most one job in the main thread (debugging)."""
+        job = PrintJobService.claim_next(worker_name)
+        if job is None:
+            return
+        self.stdout.write(
+            f'Printing job {job.job_id} ({job.ticket_type}, order {job.order_id}, '
+            f'attempt {job.attempts}) on {job.printer}'
+        )
+        job = PrintJobService.run(job)
+        self.stdout.write(f'Print job {job.job_id} → {job.status}')
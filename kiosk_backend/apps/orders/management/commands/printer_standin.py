@@ -0,0 +1,119 @@
+"""
+Local TCP stand-in for an ESC/POS network printer.
+
+Usage:
+    python manage.py printer_standin --port 9100 --save-dir /tmp/receipts
+"""
+import os
+import socket
+import threading
+import time
+
+from PIL import Image
+from django.core.management.base import BaseCommand
+
+from apps.orders.services.escpos_raster import FEED_AND_CUT, GS
+
+
+def decode_stream(data: bytes):
+    """
+    Split a received byte stream into raster images and count cuts.
+
+    Returns:
+        tuple: (list of 1-bit PIL images, number of cuts)
+    """
+    images = []
+    pos = 0
+    while True:
+        start = data.find(GS + b'v0', pos)
+        if start < 0 or start + 8 > len(data):
+            break
+        width_bytes = int.from_bytes(data[start + 4:start + 6], 'little')
+        height = int.from_bytes(data[start + 6:start + 8], 'little')
+        end = start + 8 + width_bytes * height
+        if end > len(data):
+            break
+        images.append(Image.frombytes('1', (width_bytes * 8, height), data[start + 8:end]))
+        pos = end
+    return images, data.count(FEED_AND_CUT)
+
+
+class Command(BaseCommand):
+    help = 'Listen like a port-9100 receipt printer and report (optionally save) received jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='0.0.0.0')
+        parser.add_argument('--port', type=int, default=9100)
+        parser.add_argument('--save-dir', default='', help='Write each received receipt as PNG here')
+        parser.add_argument(
+            '--idle',
+            type=float,
+            default=0.5,
+            help='Seconds of silence on a connection that end one job',
+        )
+
+    def handle(self, *args, **options):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind((options['host'], options['port']))
+        server.listen(5)
+        if options['save_dir']:
+            os.makedirs(options['save_dir'], exist_ok=True)
+        self.stdout.write(self.style.SUCCESS(
+            f'Printer stand-in listening on {options["host"]}:{options["port"]}'
+        ))
+
+        try:
+            while True:
+                conn, addr = server.accept()
+                threading.Thread(
+                    target=self._serve,
+                    args=(conn, addr, options),
+                    daemon=True,
+                ).start()
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Stopped by user.'))
+        finally:
+            server.close()
+
+    def _serve(self, conn, addr, options):
+        self.stdout.write(f'Connection from {addr[0]}:{addr[1]}')
+        conn.settimeout(options['idle'])
+        buffer = bytearray()
+        job_no = 0
+        while True:
+            try:
+                chunk = conn.recv(65536)
+            except socket.timeout:
+                chunk = None
+            if chunk:
+                buffer += chunk
+                continue
+            if buffer:
+                job_no += 1
+                self._report(bytes(buffer), addr, job_no, options['save_dir'])
+                buffer.clear()
+            if chunk == b'':
+                break
+        conn.close()
+        self.stdout.write(f'Connection from {addr[0]}:{addr[1]} closed')
+
+    def _report(self, data: bytes, addr, job_no: int, save_dir: str):
+        images, cuts = decode_stream(data)
+        heights = [img.height for img in images]
+        self.stdout.write(
+            f'Job {job_no} from {addr[0]}: {len(data):,} bytes, '
+            f'{len(images)} raster blocks (rows {sum(heights)}), {cuts} cuts'
+        )
+        if save_dir and images:
+            stamp = time.strftime('%Y%m%d-%H%M%S')
+            width = max(img.width for img in images)
+            sheet = Image.new('1', (width, sum(heights)), 0)
+            y = 0
+            for img in images:
+                sheet.paste(img, (0, y))
+                y += img.height
+            path = os.path.join(save_dir, f'job_{stamp}_{addr[1]}_{job_no}.png')
+            # Raster bits are ink=1; invert for a normal black-on-white preview
+            sheet.point(lambda v: 255 - v).save(path)
+            self.stdout.write(f'   saved {path}')
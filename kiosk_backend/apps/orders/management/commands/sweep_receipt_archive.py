@@ -0,0 +1,32 @@
+"""
+Delete archived receipt images past the retention window.
+
+Usage:
+    python manage.py sweep_receipt_archive
+    python manage.py sweep_receipt_archive --days 7 --dry-run
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.orders.services.receipt_archive_service import ReceiptArchiveService
+
+
+class Command(BaseCommand):
+    help = 'Delete receipt images not accessed within the retention window (receipt data is kept)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=float,
+            default=getattr(settings, 'RECEIPT_ARCHIVE_RETENTION_DAYS', 30),
+            help='Retention in days (default RECEIPT_ARCHIVE_RETENTION_DAYS)',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be deleted')
+
+    def handle(self, *args, **options):
+        stats = ReceiptArchiveService.sweep(options['days'], dry_run=options['dry_run'])
+        prefix = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix} {stats["files_deleted"]} archived and {stats["legacy_deleted"]} legacy images '
+            f'({stats["bytes_freed"] / 1024:,.1f} KB); {stats["rows_cleared"]} receipts left to regenerate on demand.'
+        ))
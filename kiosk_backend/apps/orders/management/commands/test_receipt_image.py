@@ -6,7 +6,8 @@ from apps.orders.models import Order
 from apps.orders.selectors.order_selector import OrderSelector
 from apps.orders.services.receipt_service import ReceiptService
 from apps.orders.services.print_service import PrintService
-from django.conf import settings
+from apps.orders.services.receipt_archive_service import ReceiptArchiveService
+from apps.orders.models import ReceiptArchive
 import os
 
 
@@ -52,7 +53,7 @@ class Command(BaseCommand):
             receipt_image = PrintService.generate_receipt_image(receipt_data, width=576)
             
             # Save image
-            image_url = PrintService.save_receipt_image(receipt_image, order_number)
+            image_url = PrintService.save_receipt_image(receipt_image, order, receipt_data)
             
             # Display info
             self.stdout.write(self.style.SUCCESS('\n✅ Receipt image generated successfully!'))
@@ -62,10 +63,17 @@ class Command(BaseCommand):
             self.stdout.write(f'   Receipt Number: {receipt_data.get("receipt_number", "N/A")}')
             self.stdout.write(f'   Total Amount: {receipt_data.get("total_amount", "N/A")}')
             self.stdout.write(f'   Items Count: {len(receipt_data.get("items", []))}')
+
+            font_stats = PrintService.warm_up()
+            self.stdout.write(f'\n🔤 Font cache:')
+            self.stdout.write(
+                f'   {font_stats["fonts_loaded"]} fonts loaded in {font_stats["load_ms_total"]} ms, '
+                f'{font_stats["cache_hits"]} cache hits (~{font_stats["saved_ms_estimate"]} ms saved)'
+            )
             
-            # File path
-            filename = f"receipt_{order_number}.png"
-            file_path = os.path.join(settings.MEDIA_ROOT, 'receipts', filename)
+            # File path (content-addressed archive file)
+            entry = ReceiptArchive.objects.get(order=order, copy_label='')
+            file_path = ReceiptArchiveService.image_path(entry.image_hash)
             
             self.stdout.write(f'\n📁 File saved to:')
             self.stdout.write(f'   {file_path}')
@@ -80,7 +88,7 @@ class Command(BaseCommand):
             
             self.stdout.write(f'\n💡 To view the image:')
             self.stdout.write(f'   1. Open in browser: {image_url}')
-            self.stdout.write(f'   2. Or use API: GET /api/kiosk/orders/receipt/{order_number}/image/')
+            self.stdout.write(f'   2. Or use API: GET /api/kiosk/admin/orders/receipt/{order_number}/image/?copy=')
             
         except Exception as e:
             self.stdout.write(self.style.ERROR(f'❌ Error generating receipt image: {str(e)}'))
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.16 on 2026-10-18 01:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_dashboard_ab_coupons_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrintJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('job_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name='شناسه کار')),
+                ('printer_host', models.CharField(max_length=100, verbose_name='آدرس چاپگر')),
+                ('printer_port', models.PositiveIntegerField(default=9100, verbose_name='پورت چاپگر')),
+                ('status', models.CharField(choices=[('queued', 'در صف'), ('printing', 'در حال چاپ'), ('printed', 'چاپ شده'), ('failed', 'ناموفق')], default='queued', max_length=20, verbose_name='وضعیت')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='تعداد تلاش')),
+                ('max_attempts', models.PositiveIntegerField(default=5, verbose_name='حداکثر تلاش')),
+                ('next_attempt_at', models.DateTimeField(blank=True, null=True, verbose_name='زمان تلاش بعدی')),
+                ('worker_name', models.CharField(blank=True, default='', max_length=100, verbose_name='نام worker')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='زمان شروع')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='زمان پایان')),
+                ('error_message', models.TextField(blank=True, default='', verbose_name='پیام خطا')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='print_jobs', to='orders.order', verbose_name='سفارش')),
+            ],
+            options={
+                'verbose_name': 'کار چاپ',
+                'verbose_name_plural': 'کارهای چاپ',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'printer_host', 'printer_port', 'id'], name='orders_prin_status_93365a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.16 on 2026-10-18 01:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_stock_revision'),
+        ('orders', '0008_print_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrinterStation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('name', models.CharField(max_length=100, verbose_name='نام')),
+                ('ticket_type', models.CharField(choices=[('receipt', 'فاکتور مشتری'), ('kitchen', 'فیش آشپزخانه')], default='receipt', max_length=20, verbose_name='نوع چاپ')),
+                ('host', models.CharField(max_length=100, verbose_name='آدرس چاپگر')),
+                ('port', models.PositiveIntegerField(default=9100, verbose_name='پورت چاپگر')),
+                ('is_active', models.BooleanField(default=True, verbose_name='فعال')),
+                ('display_order', models.IntegerField(default=0, verbose_name='ترتیب نمایش')),
+            ],
+            options={
+                'verbose_name': 'ایستگاه چاپ',
+                'verbose_name_plural': 'ایستگاه\u200cهای چاپ',
+                'ordering': ['display_order', 'id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='printjob',
+            name='item_ids',
+            field=models.JSONField(blank=True, default=list, help_text='شناسه آیتم\u200cهای سفارش برای فیش آشپزخانه (در زمان ثبت کار)', verbose_name='آیتم\u200cها'),
+        ),
+        migrations.AddField(
+            model_name='printjob',
+            name='ticket_type',
+            field=models.CharField(choices=[('receipt', 'فاکتور مشتری'), ('kitchen', 'فیش آشپزخانه')], default='receipt', max_length=20, verbose_name='نوع چاپ'),
+        ),
+        migrations.AddField(
+            model_name='printerstation',
+            name='categories',
+            field=models.ManyToManyField(blank=True, help_text='خالی = همه آیتم\u200cها', related_name='printer_stations', to='products.category', verbose_name='دسته\u200cبندی\u200cها'),
+        ),
+        migrations.AddField(
+            model_name='printjob',
+            name='station',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='print_jobs', to='orders.printerstation', verbose_name='ایستگاه چاپ'),
+        ),
+        migrations.AddIndex(
+            model_name='printjob',
+            index=models.Index(fields=['station', 'status'], name='orders_prin_station_4bb726_idx'),
+        ),
+    ]
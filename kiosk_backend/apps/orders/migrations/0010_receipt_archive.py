@@ -0,0 +1,39 @@
+# Generated by Django 4.2.16 on 2026-10-18 02:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0009_printer_stations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReceiptArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('copy_label', models.CharField(blank=True, default='', max_length=50, verbose_name='نسخه')),
+                ('template', models.CharField(blank=True, default='', max_length=30, verbose_name='قالب')),
+                ('receipt_data', models.JSONField(blank=True, default=dict, verbose_name='داده رسید')),
+                ('image_hash', models.CharField(blank=True, db_index=True, default='', help_text='خالی = تصویر پاک شده و در صورت نیاز دوباره ساخته می\u200cشود', max_length=64, verbose_name='هش تصویر')),
+                ('image_size', models.PositiveIntegerField(default=0, verbose_name='حجم تصویر (بایت)')),
+                ('last_accessed_at', models.DateTimeField(blank=True, null=True, verbose_name='آخرین دسترسی')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='receipt_archives', to='orders.order', verbose_name='سفارش')),
+            ],
+            options={
+                'verbose_name': 'آرشیو رسید',
+                'verbose_name_plural': 'آرشیو رسیدها',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['last_accessed_at'], name='orders_rece_last_ac_2fdc06_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='receiptarchive',
+            constraint=models.UniqueConstraint(fields=('order', 'copy_label'), name='uniq_receipt_archive_order_copy'),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from apps.core.models import TimeStampedModel
@@ -220,3 +222,184 @@ class Invoice(TimeStampedModel):
     
     def __str__(self):
         return f"Invoice {self.invoice_number}"
+
+
+class PrinterStation(TimeStampedModel):
+    """
+    A network printer the shop prints to (counter, kitchen, bar, ...).
+
+    Receipt stations get the full customer/seller receipt; kitchen stations
+    get a price-less ticket with only the items whose category (or a parent
+    category) is assigned to the station — no categories means every item.
+    When no station is active the single PRINTER_IP/PRINTER_PORT printer is
+    used as a receipt station.
+    """
+
+    TICKET_RECEIPT = 'receipt'
+    TICKET_KITCHEN = 'kitchen'
+    TICKET_CHOICES = [
+        (TICKET_RECEIPT, _('فاکتور مشتری')),
+        (TICKET_KITCHEN, _('فیش آشپزخانه')),
+    ]
+
+    name = models.CharField(max_length=100, verbose_name=_('نام'))
+    ticket_type = models.CharField(
+        max_length=20,
+        choices=TICKET_CHOICES,
+        default=TICKET_RECEIPT,
+        verbose_name=_('نوع چاپ'),
+    )
+    host = models.CharField(max_length=100, verbose_name=_('آدرس چاپگر'))
+    port = models.PositiveIntegerField(default=9100, verbose_name=_('پورت چاپگر'))
+    categories = models.ManyToManyField(
+        'products.Category',
+        blank=True,
+        related_name='printer_stations',
+        verbose_name=_('دسته‌بندی‌ها'),
+        help_text=_('خالی = همه آیتم‌ها'),
+    )
+    is_active = models.BooleanField(default=True, verbose_name=_('فعال'))
+    display_order = models.IntegerField(default=0, verbose_name=_('ترتیب نمایش'))
+
+    class Meta:
+        verbose_name = _('ایستگاه چاپ')
+        verbose_name_plural = _('ایستگاه‌های چاپ')
+        ordering = ['display_order', 'id']
+
+    def __str__(self):
+        return f"{self.name} ({self.host}:{self.port})"
+
+    @property
+    def printer(self) -> str:
+        return f"{self.host}:{self.port}"
+
+
+class PrintJob(TimeStampedModel):
+    """
+    Queued print for a paid order on one printer station.
+
+    Payment completion only inserts these rows (one per station, in the same
+    transaction as the paid transition); the `print_worker` management command
+    renders and sends them, retrying with backoff. Jobs for one printer are
+    printed strictly in creation order; different printers run in parallel.
+    """
+
+    STATUS_QUEUED = 'queued'
+    STATUS_PRINTING = 'printing'
+    STATUS_PRINTED = 'printed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, _('در صف')),
+        (STATUS_PRINTING, _('در حال چاپ')),
+        (STATUS_PRINTED, _('چاپ شده')),
+        (STATUS_FAILED, _('ناموفق')),
+    ]
+    PENDING_STATUSES = (STATUS_QUEUED, STATUS_PRINTING)
+
+    job_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False, verbose_name=_('شناسه کار'))
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='print_jobs',
+        verbose_name=_('سفارش'),
+    )
+    station = models.ForeignKey(
+        PrinterStation,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='print_jobs',
+        verbose_name=_('ایستگاه چاپ'),
+    )
+    ticket_type = models.CharField(
+        max_length=20,
+        choices=PrinterStation.TICKET_CHOICES,
+        default=PrinterStation.TICKET_RECEIPT,
+        verbose_name=_('نوع چاپ'),
+    )
+    item_ids = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name=_('آیتم‌ها'),
+        help_text=_('شناسه آیتم‌های سفارش برای فیش آشپزخانه (در زمان ثبت کار)'),
+    )
+    printer_host = models.CharField(max_length=100, verbose_name=_('آدرس چاپگر'))
+    printer_port = models.PositiveIntegerField(default=9100, verbose_name=_('پورت چاپگر'))
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_QUEUED,
+        verbose_name=_('وضعیت'),
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name=_('تعداد تلاش'))
+    max_attempts = models.PositiveIntegerField(default=5, verbose_name=_('حداکثر تلاش'))
+    next_attempt_at = models.DateTimeField(null=True, blank=True, verbose_name=_('زمان تلاش بعدی'))
+    worker_name = models.CharField(max_length=100, blank=True, default='', verbose_name=_('نام worker'))
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name=_('زمان شروع'))
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name=_('زمان پایان'))
+    error_message = models.TextField(blank=True, default='', verbose_name=_('پیام خطا'))
+
+    class Meta:
+        verbose_name = _('کار چاپ')
+        verbose_name_plural = _('کارهای چاپ')
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'printer_host', 'printer_port', 'id']),
+            models.Index(fields=['station', 'status']),
+        ]
+
+    def __str__(self):
+        return f"PrintJob {self.job_id} ({self.status})"
+
+    @property
+    def printer(self) -> str:
+        return f"{self.printer_host}:{self.printer_port}"
+
+    @property
+    def is_final(self) -> bool:
+        return self.status not in self.PENDING_STATUSES
+
+
+class ReceiptArchive(TimeStampedModel):
+    """
+    Archived receipt image of an order copy.
+
+    Stores the receipt data the image was rendered from, so the image can
+    be regenerated after the retention sweeper deleted it. Images are 1-bit
+    PNGs named by the hash of their bitmap, so identical receipts share one
+    file.
+    """
+
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='receipt_archives',
+        verbose_name=_('سفارش'),
+    )
+    copy_label = models.CharField(max_length=50, blank=True, default='', verbose_name=_('نسخه'))
+    template = models.CharField(max_length=30, blank=True, default='', verbose_name=_('قالب'))
+    receipt_data = models.JSONField(default=dict, blank=True, verbose_name=_('داده رسید'))
+    image_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        db_index=True,
+        verbose_name=_('هش تصویر'),
+        help_text=_('خالی = تصویر پاک شده و در صورت نیاز دوباره ساخته می‌شود'),
+    )
+    image_size = models.PositiveIntegerField(default=0, verbose_name=_('حجم تصویر (بایت)'))
+    last_accessed_at = models.DateTimeField(null=True, blank=True, verbose_name=_('آخرین دسترسی'))
+
+    class Meta:
+        verbose_name = _('آرشیو رسید')
+        verbose_name_plural = _('آرشیو رسیدها')
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['order', 'copy_label'], name='uniq_receipt_archive_order_copy'),
+        ]
+        indexes = [
+            models.Index(fields=['last_accessed_at']),
+        ]
+
+    def __str__(self):
+        return f"Receipt archive {self.order_id} {self.copy_label}".strip()
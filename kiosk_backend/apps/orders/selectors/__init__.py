@@ -1,5 +1,6 @@
 from .order_selector import OrderSelector
 from .invoice_selector import InvoiceSelector
+from .print_selector import PrintSelector
 
-__all__ = ['OrderSelector', 'InvoiceSelector']
+__all__ = ['OrderSelector', 'InvoiceSelector', 'PrintSelector']
 
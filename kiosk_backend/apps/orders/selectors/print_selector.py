@@ -0,0 +1,111 @@
+from datetime import timedelta
+from typing import Any, Dict, List
+
+from django.db.models import Count, Max, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from apps.orders.models import Order, PrintJob, PrinterStation
+
+
+class PrintSelector:
+    """
+    Print queue query selector.
+
+    Per-station and per-order views over PrintJob for the admin panel.
+    """
+
+    @staticmethod
+    def get_station_status(hours: int = 24) -> List[Dict[str, Any]]:
+        """
+        Queue and outcome counters for every printer station (one query).
+
+        A station is 'failing' when it has a job waiting for a retry or its
+        latest finished job failed, 'busy' with jobs queued/printing, 'ok'
+        otherwise and 'inactive' when switched off.
+
+        Args:
+            hours: Window for printed/failed counters
+
+        Returns:
+            List[Dict[str, Any]]: One entry per station in display order
+        """
+        since = timezone.now() - timedelta(hours=hours)
+        latest_final = PrintJob.objects.filter(
+            station=OuterRef('pk'),
+            status__in=[PrintJob.STATUS_PRINTED, PrintJob.STATUS_FAILED],
+        ).order_by('-finished_at', '-id')
+        stations = PrinterStation.objects.annotate(
+            queued=Count('print_jobs', filter=Q(print_jobs__status=PrintJob.STATUS_QUEUED)),
+            retrying=Count(
+                'print_jobs',
+                filter=Q(print_jobs__status=PrintJob.STATUS_QUEUED, print_jobs__attempts__gt=0),
+            ),
+            printing=Count('print_jobs', filter=Q(print_jobs__status=PrintJob.STATUS_PRINTING)),
+            printed_recent=Count(
+                'print_jobs',
+                filter=Q(print_jobs__status=PrintJob.STATUS_PRINTED, print_jobs__finished_at__gte=since),
+            ),
+            failed_recent=Count(
+                'print_jobs',
+                filter=Q(print_jobs__status=PrintJob.STATUS_FAILED, print_jobs__finished_at__gte=since),
+            ),
+            last_printed_at=Max('print_jobs__finished_at', filter=Q(print_jobs__status=PrintJob.STATUS_PRINTED)),
+            last_final_status=Subquery(latest_final.values('status')[:1]),
+            last_error=Subquery(latest_final.values('error_message')[:1]),
+        ).order_by('display_order', 'id')
+
+        result = []
+        for station in stations:
+            if not station.is_active:
+                state = 'inactive'
+            elif station.retrying or station.last_final_status == PrintJob.STATUS_FAILED:
+                state = 'failing'
+            elif station.queued or station.printing:
+                state = 'busy'
+            else:
+                state = 'ok'
+            result.append({
+                'id': station.id,
+                'name': station.name,
+                'ticket_type': station.ticket_type,
+                'printer': station.printer,
+                'is_active': station.is_active,
+                'status': state,
+                'queued': station.queued,
+                'printing': station.printing,
+                'printed_recent': station.printed_recent,
+                'failed_recent': station.failed_recent,
+                'last_printed_at': station.last_printed_at.isoformat() if station.last_printed_at else None,
+                'last_error': (station.last_error or None) if station.last_final_status == PrintJob.STATUS_FAILED else None,
+            })
+        return result
+
+    @staticmethod
+    def get_order_print_status(order: Order) -> List[Dict[str, Any]]:
+        """
+        Latest print job of an order per station (reprints replace earlier rows).
+
+        Args:
+            order: Order instance
+
+        Returns:
+            List[Dict[str, Any]]: One entry per station/printer the order was sent to
+        """
+        latest: Dict[Any, PrintJob] = {}
+        for job in order.print_jobs.select_related('station').order_by('id'):
+            key = job.station_id or (job.ticket_type, job.printer)
+            latest[key] = job
+        return [
+            {
+                'job_id': str(job.job_id),
+                'station_id': job.station_id,
+                'station': job.station.name if job.station else None,
+                'ticket_type': job.ticket_type,
+                'printer': job.printer,
+                'status': job.status,
+                'attempts': job.attempts,
+                'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+                'error': job.error_message or None,
+            }
+            for job in latest.values()
+        ]
@@ -1,5 +1,8 @@
 from .order_service import OrderService
 from .invoice_service import InvoiceService
+from .print_job_service import PrintJobService
+from .printer_station_service import PrinterStationService
+from .receipt_archive_service import ReceiptArchiveService
 
-__all__ = ['OrderService', 'InvoiceService']
+__all__ = ['OrderService', 'InvoiceService', 'PrintJobService', 'PrinterStationService', 'ReceiptArchiveService']
 
@@ -14,7 +14,7 @@ class CouponService:
     def assert_feature_enabled() -> None:
         from apps.core.models.settings import SiteSettings
 
-        settings = SiteSettings.get_settings()
+        settings = SiteSettings.get_cached()
         if not getattr(settings, 'coupons_enabled', True):
             raise ValueError('امکان استفاده از کد تخفیف در حال حاضر غیرفعال است')
 
@@ -0,0 +1,65 @@
+"""
+Direct ESC/POS byte stream for receipt images.
+
+Produces the same bytes python-escpos sends for
+`set(align='center')`, `image(impl='bitImageRaster')`, `text('\\n\\n')`
+and `cut()`, without going through its per-call RGBA/alpha conversion, so
+a rendered receipt can be encoded once and the bytes reused (retries,
+reprints).
+"""
+from typing import Iterable
+
+from PIL import Image, ImageOps
+
+ESC = b'\x1b'
+GS = b'\x1d'
+
+ALIGN_CENTER = ESC + b'a\x01'
+CODEPAGE_PC437 = ESC + b't\x00'  # python-escpos selects it before the first text
+FEED_LINES = b'\n\n'
+FEED_AND_CUT = ESC + b'd\x06' + GS + b'V\x00'
+
+# python-escpos splits tall images into fragments of this many rows
+RASTER_FRAGMENT_HEIGHT = 960
+
+
+def to_1bit(img: Image.Image) -> Image.Image:
+    """Printer-ready 1-bit image (black = ink), Floyd–Steinberg dithered."""
+    if img.mode != 'L':
+        img = img.convert('L')
+    return ImageOps.invert(img).convert('1')
+
+
+def raster_bytes(img: Image.Image, fragment_height: int = RASTER_FRAGMENT_HEIGHT) -> bytes:
+    """
+    `GS v 0` raster commands for an image, one per fragment.
+
+    Fragments are dithered separately, exactly like python-escpos, so the
+    output is byte-identical to `Escpos.image(img, impl='bitImageRaster')`.
+    """
+    chunks = []
+    width = img.width
+    width_bytes = (width + 7) >> 3
+    for top in range(0, img.height, fragment_height):
+        fragment = img.crop((0, top, width, min(top + fragment_height, img.height)))
+        packed = to_1bit(fragment).tobytes()
+        chunks.append(
+            GS + b'v0\x00'
+            + width_bytes.to_bytes(2, 'little')
+            + fragment.height.to_bytes(2, 'little')
+            + packed
+        )
+    return b''.join(chunks)
+
+
+def receipt_job_bytes(images: Iterable[Image.Image]) -> bytes:
+    """Complete print job: each image centered, fed and cut."""
+    chunks = []
+    for index, img in enumerate(images):
+        chunks.append(ALIGN_CENTER)
+        chunks.append(raster_bytes(img))
+        if index == 0:
+            chunks.append(CODEPAGE_PC437)
+        chunks.append(FEED_LINES)
+        chunks.append(FEED_AND_CUT)
+    return b''.join(chunks)
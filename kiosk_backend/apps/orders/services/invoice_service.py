@@ -1,12 +1,12 @@
 from typing import Dict, Any
 from django.db import transaction
-from django.utils import timezone
 from django.core.files.base import ContentFile
 import json
 from apps.orders.models import Invoice
 from apps.orders.selectors.invoice_selector import InvoiceSelector
 from apps.orders.selectors.order_selector import OrderSelector
 from apps.core.invoice.generator import InvoiceGenerator
+from apps.core.utils.number_generator import invoice_numbers
 from apps.logs.services.log_service import LogService
 
 
@@ -22,15 +22,14 @@ class InvoiceService:
         """
         Generate unique invoice number.
         
-        Format: INV-YYYYMMDDHHMMSS-XXXX
-        Where XXXX is microsecond suffix for uniqueness.
+        Format: INV-YYYYMMDDHHMMSS-NNNNPPPPPCCCC
+        Where NNNNPPPPP identifies the node/process and CCCC is a per-process
+        counter (see SequenceNumberGenerator).
         
         Returns:
             str: Unique invoice number
         """
-        timestamp = timezone.now().strftime('%Y%m%d%H%M%S')
-        random_suffix = str(timezone.now().microsecond)[:4]
-        return f"INV-{timestamp}-{random_suffix}"
+        return invoice_numbers.next()
     
     @staticmethod
     @transaction.atomic
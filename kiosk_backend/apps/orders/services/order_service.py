@@ -1,19 +1,25 @@
 from typing import List, Dict, Optional, Any
+from django.conf import settings as django_settings
 from django.db import transaction
-from django.utils import timezone
+from django.db.models import Prefetch
 from apps.orders.models import Order, OrderItem
 from apps.orders.selectors.order_selector import OrderSelector
 from apps.orders.services.receipt_service import ReceiptService
 from apps.orders.services.print_service import PrintService
+from apps.orders.services.print_job_service import PrintJobService
 from apps.orders.services.coupon_service import CouponService
-from apps.products.models import Product, ProductOption
+from apps.products.models import Product, ProductOption, ProductOptionGroup
 from apps.products.services.stock_service import StockService
 from apps.logs.services.log_service import LogService
 from apps.core.exceptions.order import OrderNotFoundException, InsufficientStockException
 from apps.payment.gateway.adapter import PaymentGatewayAdapter
 from apps.payment.gateway.exceptions import GatewayException
 from apps.payment.services.payment_service import PaymentService
+from apps.payment.services.payment_job_service import PaymentJobService
+from apps.payment.tracing import PaymentTracer
+from apps.payment.models import PaymentJob
 from apps.core.models.settings import SiteSettings
+from apps.core.utils.number_generator import order_numbers
 
 
 class OrderService:
@@ -25,9 +31,7 @@ class OrderService:
     
     @staticmethod
     def generate_order_number() -> str:
-        timestamp = timezone.now().strftime('%Y%m%d%H%M%S')
-        random_suffix = str(timezone.now().microsecond)[:4]
-        return f"ORD-{timestamp}-{random_suffix}"
+        return order_numbers.next()
     
     @staticmethod
     def create_order_from_items(
@@ -44,7 +48,7 @@ class OrderService:
         if fulfillment_type not in ('dine_in', 'takeaway'):
             fulfillment_type = 'dine_in'
 
-        settings = SiteSettings.get_settings()
+        settings = SiteSettings.get_cached()
         if not settings.fulfillment_choice_enabled:
             fulfillment_type = 'dine_in'
         elif not settings.is_fulfillment_enabled(fulfillment_type):
@@ -91,43 +95,91 @@ class OrderService:
         
         if process_payment:
             OrderService._process_payment(order, order_number, total_amount)
-            # Consume coupon only after successful payment
-            order.refresh_from_db()
-            if order.payment_status == 'paid' and coupon:
-                try:
-                    CouponService.consume(coupon)
-                except ValueError:
-                    # Race: coupon exhausted after payment — log, keep order paid
-                    LogService.log_warning(
-                        'order',
-                        'coupon_consume_failed',
-                        details={'order_id': order.id, 'coupon': coupon.code},
-                    )
+            OrderService._consume_coupon_if_paid(order)
         
         return order
+
+    @staticmethod
+    def _consume_coupon_if_paid(order: Order) -> None:
+        # Consume coupon only after successful payment
+        order.refresh_from_db()
+        if order.payment_status != 'paid' or not order.coupon_id:
+            return
+        try:
+            CouponService.consume(order.coupon)
+        except ValueError:
+            # Race: coupon exhausted after payment — log, keep order paid
+            LogService.log_warning(
+                'order',
+                'coupon_consume_failed',
+                details={'order_id': order.id, 'coupon': order.coupon_code},
+            )
+
+    @staticmethod
+    def enqueue_payment(order: Order) -> PaymentJob:
+        """
+        Queue payment for an order instead of waiting on the gateway.
+        
+        Args:
+            order: Order created with process_payment=False
+            
+        Returns:
+            PaymentJob: Job handle the kiosk polls for the payment result
+        """
+        return PaymentJobService.enqueue(order, order.total_amount)
+
+    @staticmethod
+    def run_payment_job(job: PaymentJob) -> PaymentJob:
+        """
+        Drive the gateway for a claimed payment job (payment worker only).
+        
+        Args:
+            job: PaymentJob in 'processing' state
+            
+        Returns:
+            PaymentJob: Finished job
+        """
+        order = job.order
+        try:
+            OrderService._process_payment(order, order.order_number, job.amount, requested_at=job.created_at)
+        except GatewayException as e:
+            order.refresh_from_db()
+            status = (
+                PaymentJob.STATUS_CANCELLED
+                if order.payment_status == 'cancelled'
+                else PaymentJob.STATUS_FAILED
+            )
+            return PaymentJobService.finish(job, status, str(e))
+        OrderService._consume_coupon_if_paid(order)
+        return PaymentJobService.finish(job, PaymentJob.STATUS_SUCCEEDED)
     
     @staticmethod
     def _resolve_selected_options(product: Product, option_ids: Optional[List[int]]) -> tuple[List[Dict[str, Any]], int]:
+        """
+        Validate selected options against the product's active option groups.
+        
+        Works in memory on `product.option_groups` / `group.options`; callers
+        validating a whole cart should prefetch them (see _load_cart_products).
+        """
         option_ids = list(option_ids or [])
-        groups = list(
-            product.option_groups.filter(is_active=True).prefetch_related('options')
-        )
+        groups = [g for g in product.option_groups.all() if g.is_active]
         if not groups and not option_ids:
             return [], 0
 
         selected_map: Dict[int, ProductOption] = {}
         if option_ids:
-            opts = ProductOption.objects.filter(
-                id__in=option_ids,
-                is_active=True,
-                group__product=product,
-                group__is_active=True,
-            ).select_related('group')
-            selected_map = {o.id: o for o in opts}
+            available = {
+                o.id: o
+                for group in groups
+                for o in group.options.all()
+                if o.is_active
+            }
+            selected_map = {oid: available[oid] for oid in set(option_ids) if oid in available}
             if len(selected_map) != len(set(option_ids)):
                 raise ValueError(f'آپشن نامعتبر برای محصول {product.name}')
 
         # Validate group constraints
+        groups_by_id = {group.id: group for group in groups}
         for group in groups:
             selected_in_group = [o for o in selected_map.values() if o.group_id == group.id]
             count = len(selected_in_group)
@@ -145,7 +197,7 @@ class OrderService:
                 'id': o.id,
                 'name': o.name,
                 'group_id': o.group_id,
-                'group_name': o.group.name,
+                'group_name': groups_by_id[o.group_id].name,
                 'price_delta': int(o.price_delta or 0),
             }
             for o in selected_map.values()
@@ -153,29 +205,54 @@ class OrderService:
         extra = sum(int(s['price_delta']) for s in snapshot)
         return snapshot, extra
 
+    @staticmethod
+    def _load_cart_products(product_ids) -> Dict[int, Product]:
+        """
+        Load all active cart products with active option groups and options.
+        
+        Constant number of queries (products, groups, options) regardless of
+        cart size.
+        """
+        products = Product.objects.filter(
+            id__in=set(product_ids),
+            is_active=True,
+        ).prefetch_related(
+            Prefetch(
+                'option_groups',
+                queryset=ProductOptionGroup.objects.filter(is_active=True).prefetch_related(
+                    Prefetch('options', queryset=ProductOption.objects.filter(is_active=True))
+                ),
+            )
+        )
+        return {product.id: product for product in products}
+
     @staticmethod
     def _validate_and_prepare_items(items: List[Dict]) -> tuple[List[Dict], int]:
         order_items_data = []
         total_amount = 0
+        products = OrderService._load_cart_products(item['product_id'] for item in items)
         
+        # Same product may appear on several lines (different options)
+        requested: Dict[int, int] = {}
         for item in items:
             product_id = item['product_id']
-            quantity = item['quantity']
-            option_ids = item.get('option_ids') or []
-            
-            try:
-                product = Product.objects.get(id=product_id, is_active=True)
-            except Product.DoesNotExist:
+            if product_id not in products:
                 raise ValueError(f'Product with id {product_id} does not exist or is not active')
-            
+            requested[product_id] = requested.get(product_id, 0) + item['quantity']
+        
+        for product_id, quantity in requested.items():
+            product = products[product_id]
             if product.stock_quantity < quantity:
                 raise InsufficientStockException(
                     f'Insufficient stock for product {product.name}. '
                     f'Available: {product.stock_quantity}, Requested: {quantity}'
                 )
-
+        
+        for item in items:
+            product = products[item['product_id']]
+            quantity = item['quantity']
             selected_options, options_extra = OrderService._resolve_selected_options(
-                product, option_ids
+                product, item.get('option_ids') or []
             )
             unit_price = int(product.price) + int(options_extra)
             total_amount += quantity * unit_price
@@ -215,8 +292,10 @@ class OrderService:
                 fulfillment_type=fulfillment_type or 'dine_in',
             )
             
-            for item_data in order_items_data:
-                OrderItem.objects.create(
+            # Single INSERT for all lines; product_name is snapshotted here
+            # because bulk_create bypasses OrderItem.save().
+            OrderItem.objects.bulk_create([
+                OrderItem(
                     order=order,
                     product=item_data['product'],
                     product_name=item_data['product'].name,
@@ -224,6 +303,8 @@ class OrderService:
                     unit_price=item_data['unit_price'],
                     selected_options=item_data.get('selected_options') or [],
                 )
+                for item_data in order_items_data
+            ])
             
             LogService.log_info(
                 'order',
@@ -242,25 +323,35 @@ class OrderService:
         
         return order
     @staticmethod
-    def _process_payment(order: Order, order_number: str, total_amount: int) -> None:
+    def _process_payment(
+        order: Order, order_number: str, total_amount: int, requested_at=None
+    ) -> None:
         """
         Process payment for an order.
         
         This method handles payment processing outside of the order creation transaction
-        to ensure the order is saved even if payment fails.
+        to ensure the order is saved even if payment fails. The attempt is
+        recorded as a PaymentTrace (phase timings).
         
         Args:
             order: Order instance (already saved in database)
             order_number: Order number
             total_amount: Total order amount
+            requested_at: When a queued payment was requested (payment worker)
             
         Raises:
             GatewayException: If payment gateway is not active or payment fails
         """
+        outcome = 'error'
+        # The gateway may add to it (bridge job id), so it is kept even when it raises
+        order_details = {'order_number': order_number, 'order_id': order.id}
         try:
             gateway = PaymentGatewayAdapter.get_gateway()
-            order_details = {'order_number': order_number, 'order_id': order.id}
+            PaymentTracer.start(order.id, order_number, gateway.__class__.__name__, requested_at)
+            if requested_at is not None:
+                PaymentTracer.mark('dequeue')
             gateway_response = gateway.initiate_payment(amount=total_amount, order_details=order_details)
+            PaymentTracer.mark('final')
             
             LogService.log_info(
                 'payment',
@@ -285,6 +376,8 @@ class OrderService:
             
             if payment_success:
                 OrderService._handle_successful_payment(order, order_number, total_amount, transaction_id)
+                PaymentTracer.mark('db_commit')
+                outcome = 'success'
             else:
                 error_message = gateway_response.get('response_message', 'Payment failed')
                 gateway_status = gateway_response.get('status', '')
@@ -293,6 +386,8 @@ class OrderService:
                     order.status = 'cancelled'
                     order.error_message = error_message
                     order.save()
+                    PaymentTracer.mark('db_commit')
+                    outcome = 'cancelled'
                     LogService.log_warning(
                         'payment',
                         'payment_cancelled_by_user',
@@ -309,9 +404,16 @@ class OrderService:
                     OrderService._mark_order_as_failed(
                         order, order_number, total_amount, transaction_id, error_message
                     )
+                    PaymentTracer.mark('db_commit')
+                    outcome = 'failed'
                 raise GatewayException(f'Payment failed: {error_message}')
                 
         except GatewayException:
+            if order_details.get('bridge_job_id') and order.order_details != order_details:
+                # No result (e.g. timeout): keep the bridge job id for reconciliation
+                order.order_details = order_details
+                order.gateway_request_data = {'amount': total_amount, 'order_details': order_details}
+                order.save(update_fields=['order_details', 'gateway_request_data', 'updated_at'])
             raise
         except (ConnectionError, TimeoutError, OSError) as e:
             # Network-related errors
@@ -343,6 +445,8 @@ class OrderService:
             )
             OrderService._mark_order_as_failed(order, order_number, total_amount, None, str(e))
             raise GatewayException(f'Failed to process payment: {str(e)}')
+        finally:
+            PaymentTracer.finish(outcome)
     
     @staticmethod
     def _determine_payment_success(gateway_response: Dict) -> bool:
@@ -430,11 +534,8 @@ class OrderService:
             total_amount: Total order amount
             transaction_id: Transaction ID
         """
-        # Persistent sequential receipt number (survives restarts)
-        if order.receipt_number is None or order.receipt_number <= 0:
-            order.receipt_number = ReceiptService.allocate_receipt_number()
-            order.save(update_fields=['receipt_number'])
-
+        # Receipt number is allocated inside update_payment_status, in the same
+        # transaction as the paid transition, so failed payments leave no gaps
         OrderService.update_payment_status(order.id, 'paid')
         order.refresh_from_db()
         
@@ -535,7 +636,7 @@ class OrderService:
             order.status = 'paid'
             order.payment_status = payment_status
             order.save()
-            PrintService.print_receipt(order)
+            OrderService._schedule_receipt_print(order)
         else:
             order.payment_status = payment_status
             order.save()
@@ -555,41 +656,38 @@ class OrderService:
         
         return order
     
+    @staticmethod
+    def _schedule_receipt_print(order: Order) -> None:
+        """
+        Hand the receipt to the print queue (or, with PRINT_QUEUE_ENABLED off,
+        print it after commit) so the payment transaction never waits on the printer.
+        """
+        if getattr(django_settings, 'PRINT_QUEUE_ENABLED', True):
+            PrintJobService.enqueue(order)
+            PaymentTracer.mark('print_enqueue')
+        else:
+            transaction.on_commit(lambda: PrintService.print_receipt(order))
+
     @staticmethod
     def _validate_and_decrease_stock(order: Order) -> None:
         """
         Validate stock availability and decrease stock for order items.
         
+        The whole cart is decremented atomically by StockService.decrease_stock_bulk
+        (conditional UPDATE), so concurrent checkouts cannot oversell.
+        
         Args:
-            order: Order instance (must have items prefetched with select_related('product'))
+            order: Order instance
             
         Raises:
             InsufficientStockException: If insufficient stock for any item
         """
-        # Fetch all items with products in one query to avoid N+1
-        items = list(order.items.select_related('product').all())
-        
-        # Validate stock for all items
-        for order_item in items:
-            if not order_item.product:
-                # Product was deleted, skip stock validation
-                continue
-            if order_item.product.stock_quantity < order_item.quantity:
-                raise InsufficientStockException(
-                    f'Insufficient stock for product {order_item.product.name}. '
-                    f'Available: {order_item.product.stock_quantity}, Requested: {order_item.quantity}'
-                )
+        quantities: Dict[int, int] = {}
+        for product_id, quantity in order.items.filter(product__isnull=False).values_list('product_id', 'quantity'):
+            # Product deleted lines have product_id NULL and are skipped
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
         
-        # Decrease stock for all items (reuse the same list to avoid duplicate query)
-        for order_item in items:
-            if not order_item.product:
-                # Product was deleted, skip stock decrease
-                continue
-            StockService.decrease_stock(
-                product_id=order_item.product_id,
-                quantity=order_item.quantity,
-                related_order_id=order.id
-            )
+        StockService.decrease_stock_bulk(quantities, related_order_id=order.id)
     
     @staticmethod
     @transaction.atomic
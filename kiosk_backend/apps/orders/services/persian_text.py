@@ -4,14 +4,26 @@ Persian/Arabic text shaping for Pillow and ESC/POS raster output.
 Pillow draws LTR without BiDi or letter joining, so Persian must be
 reshaped and reordered before measuring or drawing.
 """
+from functools import lru_cache
+
 import arabic_reshaper
 from bidi.algorithm import get_display
 
+# Receipts repeat the same labels, names and prefixes (wrap probes) constantly
+RESHAPE_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=RESHAPE_CACHE_SIZE)
+def _reshape_cached(text: str) -> str:
+    return get_display(arabic_reshaper.reshape(text))
+
 
 def reshape_persian(text: str) -> str:
     """
     Reshape and reorder Persian/Arabic text for correct visual display.
 
+    Results are memoized in a bounded LRU cache (see reshape_cache_info).
+
     Args:
         text: Logical Unicode string (reading order)
 
@@ -20,5 +32,12 @@ def reshape_persian(text: str) -> str:
     """
     if not text:
         return text
-    reshaped = arabic_reshaper.reshape(str(text))
-    return get_display(reshaped)
+    return _reshape_cached(str(text))
+
+
+def reshape_cache_info():
+    return _reshape_cached.cache_info()
+
+
+def clear_reshape_cache() -> None:
+    _reshape_cached.cache_clear()
@@ -0,0 +1,259 @@
+import time
+from datetime import timedelta
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from apps.orders.models import Order, PrintJob, PrinterStation
+from apps.orders.services.print_service import PrintService
+from apps.orders.services.printer_station_service import PrinterStationService
+from apps.logs.services.log_service import LogService
+
+
+class PrintJobService:
+    """
+    Queue operations for receipt printing.
+
+    Payment completion only enqueues one job per printer station; the
+    `print_worker` management command claims jobs, talks to the printers
+    (several at once) and retries failures, so the customer response never
+    waits on rendering or printer I/O.
+    """
+
+    @staticmethod
+    def enqueue(order: Order, ticket_types: Optional[Iterable[str]] = None) -> List[PrintJob]:
+        """
+        Queue printing of a paid order on every matching printer station.
+
+        Meant to be called inside the transaction that marks the order as
+        paid, so the jobs become visible to the worker only on commit.
+
+        Args:
+            order: Paid order instance
+            ticket_types: Restrict to these ticket types (e.g. receipts for a reprint)
+
+        Returns:
+            List[PrintJob]: Created jobs (one per station); empty when printing is disabled
+        """
+        config = PrintService.get_printer_config()
+        if not config.get('enabled', False):
+            LogService.log_info(
+                'print',
+                'printing_disabled',
+                details={'order_id': order.id, 'order_number': order.order_number},
+            )
+            return []
+
+        max_attempts = max(int(getattr(settings, 'PRINT_JOB_MAX_ATTEMPTS', 5) or 1), 1)
+        now = timezone.now()
+        jobs = []
+        for target in PrinterStationService.print_targets(order, ticket_types):
+            job = PrintJob.objects.create(
+                order=order,
+                station=target['station'],
+                ticket_type=target['ticket_type'],
+                item_ids=target['item_ids'],
+                printer_host=target['host'],
+                printer_port=target['port'],
+                max_attempts=max_attempts,
+                next_attempt_at=now,
+            )
+            LogService.log_info(
+                'print',
+                'print_job_enqueued',
+                details={
+                    'job_id': str(job.job_id),
+                    'order_id': order.id,
+                    'order_number': order.order_number,
+                    'station': target['name'] or None,
+                    'ticket_type': job.ticket_type,
+                    'printer': job.printer,
+                }
+            )
+            jobs.append(job)
+        return jobs
+
+    @staticmethod
+    def claim_next(worker_name: str = '') -> Optional[PrintJob]:
+        """
+        Atomically claim the next printable job.
+
+        A job is eligible only when no older job for the same printer is still
+        queued or printing, which keeps per-printer order even with several
+        workers or while an earlier job waits for its retry. SKIP LOCKED lets
+        workers share the queue without picking the same row.
+
+        Returns:
+            Optional[PrintJob]: Claimed job in 'printing' state, or None
+        """
+        now = timezone.now()
+        older_pending = PrintJob.objects.filter(
+            printer_host=OuterRef('printer_host'),
+            printer_port=OuterRef('printer_port'),
+            status__in=PrintJob.PENDING_STATUSES,
+            id__lt=OuterRef('id'),
+        )
+        with transaction.atomic():
+            job = (
+                PrintJob.objects.select_for_update(skip_locked=True)
+                .filter(status=PrintJob.STATUS_QUEUED, next_attempt_at__lte=now)
+                .exclude(Exists(older_pending))
+                .order_by('id')
+                .first()
+            )
+            if job is None:
+                return None
+            job.status = PrintJob.STATUS_PRINTING
+            job.worker_name = (worker_name or '')[:100]
+            job.started_at = now
+            job.attempts += 1
+            job.save(update_fields=['status', 'worker_name', 'started_at', 'attempts', 'updated_at'])
+        return job
+
+    @staticmethod
+    def run(job: PrintJob) -> PrintJob:
+        """
+        Print a claimed job and record the outcome (retry or final state).
+
+        Args:
+            job: Job in 'printing' state
+
+        Returns:
+            PrintJob: Updated job
+        """
+        order = job.order
+        station_name = job.station.name if job.station_id and job.station else ''
+        try:
+            printed_copies = PrintService.send_to_station(
+                order,
+                job.printer_host,
+                job.printer_port,
+                ticket_type=job.ticket_type,
+                item_ids=job.item_ids,
+                station_name=station_name,
+            )
+        except Exception as exc:
+            return PrintJobService._record_failure(job, exc)
+
+        job.status = PrintJob.STATUS_PRINTED
+        job.error_message = ''
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error_message', 'finished_at', 'updated_at'])
+        LogService.log_info(
+            'print',
+            'receipt_printed',
+            details={
+                'job_id': str(job.job_id),
+                'order_id': order.id,
+                'order_number': order.order_number,
+                'receipt_number': order.receipt_number,
+                'station': station_name or None,
+                'ticket_type': job.ticket_type,
+                'copies': printed_copies,
+                'copy_count': len(printed_copies),
+                'fulfillment_type': getattr(order, 'fulfillment_type', None),
+                'printer': job.printer,
+                'attempts': job.attempts,
+            },
+        )
+        return job
+
+    @staticmethod
+    def _record_failure(job: PrintJob, exc: Exception) -> PrintJob:
+        job.error_message = f'{type(exc).__name__}: {exc}'
+        if job.attempts >= job.max_attempts:
+            job.status = PrintJob.STATUS_FAILED
+            job.finished_at = timezone.now()
+        else:
+            backoff = float(getattr(settings, 'PRINT_JOB_RETRY_BACKOFF', 5) or 0)
+            job.status = PrintJob.STATUS_QUEUED
+            job.next_attempt_at = timezone.now() + timedelta(seconds=backoff * (2 ** (job.attempts - 1)))
+        job.save(update_fields=['status', 'error_message', 'finished_at', 'next_attempt_at', 'updated_at'])
+
+        log = LogService.log_error if job.status == PrintJob.STATUS_FAILED else LogService.log_warning
+        log(
+            'print',
+            'print_job_failed' if job.status == PrintJob.STATUS_FAILED else 'print_job_retry_scheduled',
+            details={
+                'job_id': str(job.job_id),
+                'order_id': job.order_id,
+                'station_id': job.station_id,
+                'ticket_type': job.ticket_type,
+                'printer': job.printer,
+                'attempts': job.attempts,
+                'max_attempts': job.max_attempts,
+                'next_attempt_at': job.next_attempt_at.isoformat() if job.status == PrintJob.STATUS_QUEUED else None,
+                'error': job.error_message,
+            },
+        )
+        return job
+
+    @staticmethod
+    def requeue_stale_jobs(older_than_seconds: int) -> int:
+        """
+        Put jobs left in 'printing' by a crashed worker back in the queue.
+
+        Unlike payments these are safe to retry: the worst case is a
+        duplicate paper receipt.
+
+        Returns:
+            int: Number of jobs requeued
+        """
+        now = timezone.now()
+        count = PrintJob.objects.filter(
+            status=PrintJob.STATUS_PRINTING,
+            started_at__lt=now - timedelta(seconds=older_than_seconds),
+        ).update(
+            status=PrintJob.STATUS_QUEUED,
+            next_attempt_at=now,
+            error_message='Print worker stopped while printing this job',
+            updated_at=now,
+        )
+        if count:
+            LogService.log_warning(
+                'print',
+                'print_jobs_stale_requeued',
+                details={'count': count, 'older_than_seconds': older_than_seconds},
+            )
+        return count
+
+    @staticmethod
+    def wait_for_final(job: PrintJob, timeout: float, interval: float = 0.25) -> PrintJob:
+        """
+        Reload the job until it is printed/failed or timeout elapses.
+
+        Returns:
+            PrintJob: Latest job state
+        """
+        deadline = time.monotonic() + max(float(timeout or 0), 0.0)
+        while not job.is_final and time.monotonic() < deadline:
+            time.sleep(min(interval, max(deadline - time.monotonic(), 0.0)))
+            job.refresh_from_db()
+        return job
+
+    @staticmethod
+    def wait_for_all(jobs: List[PrintJob], timeout: float) -> List[PrintJob]:
+        """Wait for several jobs (they print in parallel) sharing one deadline."""
+        deadline = time.monotonic() + max(float(timeout or 0), 0.0)
+        return [
+            PrintJobService.wait_for_final(job, max(deadline - time.monotonic(), 0.0))
+            for job in jobs
+        ]
+
+    @staticmethod
+    def reprint(order: Order) -> List[PrintJob]:
+        """
+        Queue a receipt reprint on the receipt stations (kitchen tickets are
+        not repeated) and wait briefly for the worker, which owns the pooled
+        printer connections and usually has the encoded bytes cached.
+
+        Returns:
+            List[PrintJob]: Latest job states; empty when printing is disabled
+        """
+        jobs = PrintJobService.enqueue(order, ticket_types=[PrinterStation.TICKET_RECEIPT])
+        return PrintJobService.wait_for_all(
+            jobs, float(getattr(settings, 'PRINT_REPRINT_WAIT_SECONDS', 10) or 0)
+        )
@@ -1,15 +1,27 @@
 """
-Print service for sending receipts to network printers using python-escpos.
+Print service for sending receipts to network printers.
+
+Receipts are encoded with the in-house ESC/POS raster encoder
+(escpos_raster.receipt_job_bytes) and sent over PrinterConnectionPool.
 """
-from typing import Dict, Any, List
-import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+import threading
 from PIL import Image, ImageFont
-from escpos.printer import Network
 from django.conf import settings
-from apps.orders.models import Order
+from apps.orders.models import Order, PrinterStation
 from apps.orders.services.receipt_service import ReceiptService
 from apps.orders.services.receipt_constants import ReceiptConstants
-from apps.orders.services.receipt_layouts import render_receipt
+from apps.orders.services.receipt_layouts import (
+    render_kitchen_ticket,
+    render_receipt,
+    render_receipt_copies,
+)
+from apps.orders.services.font_registry import FontRegistry
+from apps.orders.services.escpos_raster import receipt_job_bytes
+from apps.orders.services.printer_pool import PrinterConnectionPool
+from apps.orders.services.receipt_archive_service import ReceiptArchiveService
 from apps.logs.services.log_service import LogService
 
 
@@ -20,11 +32,46 @@ RECEIPT_COPIES_DUAL: List[str] = [
 ]
 
 
+class _ReceiptBytesCache:
+    """Small LRU of encoded print jobs, bounded by total size in bytes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[tuple, bytes]' = OrderedDict()
+        self._size = 0
+
+    def get(self, key: tuple) -> Optional[bytes]:
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+            return payload
+
+    def put(self, key: tuple, payload: bytes) -> None:
+        limit = int(getattr(settings, 'PRINT_RASTER_CACHE_BYTES', 8 * 1024 * 1024) or 0)
+        if len(payload) > limit:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = payload
+            self._size += len(payload)
+            while self._size > limit and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+_RECEIPT_BYTES = _ReceiptBytesCache()
+
+
 class PrintService:
     """
     Service for printing receipts to network printers.
 
-    Uses python-escpos library for ESC/POS commands.
+    Rendered receipts are encoded by escpos_raster.receipt_job_bytes (same
+    bytes as python-escpos, cached for retries) and sent over the pooled
+    connection of PrinterConnectionPool.
     """
 
     @staticmethod
@@ -37,36 +84,13 @@ class PrintService:
 
     @staticmethod
     def _load_fonts() -> Dict[str, ImageFont.ImageFont]:
-        fonts = {
-            'title': None,
-            'ticket': None,
-            'bold': None,
-            'normal': None,
-            'meta': None,
-            'small': None,
-        }
-        vazirmatn_bold_path = ''
-        try:
-            vazirmatn_bold_path = os.path.join(settings.BASE_DIR, 'static', 'Vazirmatn-Bold.ttf')
-            if os.path.exists(vazirmatn_bold_path):
-                fonts['title'] = ImageFont.truetype(vazirmatn_bold_path, ReceiptConstants.FONT_SIZE_TITLE)
-                fonts['ticket'] = ImageFont.truetype(vazirmatn_bold_path, ReceiptConstants.FONT_SIZE_TICKET)
-                fonts['bold'] = ImageFont.truetype(vazirmatn_bold_path, ReceiptConstants.FONT_SIZE_BOLD)
-                fonts['normal'] = ImageFont.truetype(vazirmatn_bold_path, ReceiptConstants.FONT_SIZE_NORMAL)
-                fonts['meta'] = ImageFont.truetype(vazirmatn_bold_path, ReceiptConstants.FONT_SIZE_META)
-                fonts['small'] = ImageFont.truetype(vazirmatn_bold_path, ReceiptConstants.FONT_SIZE_SMALL)
-        except (OSError, IOError) as e:
-            LogService.log_warning(
-                'print',
-                'font_load_failed',
-                details={'error': str(e), 'font_path': vazirmatn_bold_path},
-            )
+        """Receipt fonts from the process-wide FontRegistry (loaded once per process)."""
+        return FontRegistry.receipt_fonts()
 
-        fallback = ImageFont.load_default()
-        for key in fonts:
-            if fonts[key] is None:
-                fonts[key] = fallback
-        return fonts
+    @staticmethod
+    def warm_up() -> Dict[str, float]:
+        """Pre-load receipt fonts (worker boot) and return the font cache counters."""
+        return FontRegistry.warm_up()
 
     @staticmethod
     def generate_receipt_image(receipt_data: Dict[str, Any], width: int = 576) -> Image.Image:
@@ -78,30 +102,32 @@ class PrintService:
         return render_receipt(receipt_data, fonts, width=width, template=template)
 
     @staticmethod
-    def save_receipt_image(receipt_image: Image.Image, order_number: str, request=None, suffix: str = '') -> str:
+    def generate_receipt_images(
+        receipt_data: Dict[str, Any],
+        copy_labels: List[str],
+        width: int = 576,
+    ) -> List[Image.Image]:
         """
-        Save receipt image to media folder and return URL.
+        One image per copy label; the body is rendered once and only the
+        cached copy/fulfillment banner differs between copies.
         """
-        receipts_dir = os.path.join(settings.MEDIA_ROOT, 'receipts')
-        os.makedirs(receipts_dir, exist_ok=True)
-
-        tag = f"_{suffix}" if suffix else ''
-        filename = f"receipt_{order_number}{tag}.png"
-        file_path = os.path.join(receipts_dir, filename)
-        receipt_image.save(file_path, 'PNG')
-
-        if request:
-            return request.build_absolute_uri(f"{settings.MEDIA_URL}receipts/{filename}")
-        return f"{settings.MEDIA_URL}receipts/{filename}"
+        fonts = PrintService._load_fonts()
+        template = (receipt_data.get('receipt_template') or 'modern').strip() or 'modern'
+        return render_receipt_copies(receipt_data, fonts, copy_labels, width=width, template=template)
 
     @staticmethod
-    def _print_image(printer: Network, receipt_image: Image.Image) -> None:
-        printer.set(align='center')
-        if receipt_image.mode != 'RGB':
-            receipt_image = receipt_image.convert('RGB')
-        printer.image(receipt_image, impl='bitImageRaster')
-        printer.text("\n\n")
-        printer.cut()
+    def save_receipt_image(
+        receipt_image: Image.Image,
+        order: Order,
+        receipt_data: Dict[str, Any],
+        request=None,
+        copy_label: str = '',
+    ) -> str:
+        """
+        Archive a receipt image (compact 1-bit PNG, deduplicated by content)
+        and return its URL. See ReceiptArchiveService.
+        """
+        return ReceiptArchiveService.archive(order, receipt_data, receipt_image, copy_label, request)
 
     @staticmethod
     def _receipt_copy_labels() -> List[str]:
@@ -111,16 +137,118 @@ class PrintService:
         """
         from apps.core.models.settings import SiteSettings
 
-        mode = SiteSettings.get_settings().receipt_copy_mode
+        mode = SiteSettings.get_cached().receipt_copy_mode
         if mode == SiteSettings.RECEIPT_COPY_MODE_SINGLE:
             return ['']
         return list(RECEIPT_COPIES_DUAL)
 
     @staticmethod
-    def print_receipt(order: Order) -> bool:
+    def get_receipt_bytes(order: Order, copy_labels: List[str]) -> bytes:
+        """
+        Complete ESC/POS job (all copies) for a paid order.
+
+        Rendered and packed to 1-bit raster once, then served from a
+        process-local cache for retries and reprints. The key includes the
+        settings stamp and the resolved template, so branding edits and the
+        daily template rotation produce fresh bytes.
+        """
+        from apps.core.models.settings import SiteSettings
+
+        site = SiteSettings.get_cached()
+        key = (
+            order.id,
+            order.receipt_number,
+            tuple(copy_labels),
+            site.resolve_receipt_template(),
+            site.updated_at,
+            ReceiptConstants.IMAGE_WIDTH,
+        )
+        payload = _RECEIPT_BYTES.get(key)
+        if payload is None:
+            receipt_data = ReceiptService.generate_receipt_data(order)
+            receipt_images = PrintService.generate_receipt_images(
+                receipt_data, copy_labels, width=ReceiptConstants.IMAGE_WIDTH
+            )
+            payload = receipt_job_bytes(receipt_images)
+            _RECEIPT_BYTES.put(key, payload)
+        return payload
+
+    @staticmethod
+    def get_kitchen_ticket_bytes(order: Order, item_ids: List[int], station_name: str = '') -> bytes:
+        """ESC/POS job for a kitchen/bar ticket, cached like receipt bytes."""
+        key = (
+            'kitchen',
+            order.id,
+            order.receipt_number,
+            tuple(item_ids),
+            station_name,
+            ReceiptConstants.IMAGE_WIDTH,
+        )
+        payload = _RECEIPT_BYTES.get(key)
+        if payload is None:
+            ticket_data = ReceiptService.generate_kitchen_ticket_data(order, item_ids, station_name)
+            ticket_image = render_kitchen_ticket(
+                ticket_data, PrintService._load_fonts(), width=ReceiptConstants.IMAGE_WIDTH
+            )
+            payload = receipt_job_bytes([ticket_image])
+            _RECEIPT_BYTES.put(key, payload)
+        return payload
+
+    @staticmethod
+    def build_payload(
+        order: Order,
+        ticket_type: str = PrinterStation.TICKET_RECEIPT,
+        item_ids: Optional[List[int]] = None,
+        station_name: str = '',
+    ) -> Tuple[bytes, List[str]]:
+        """
+        Encoded job for one station and the labels of what it prints.
+
+        Returns:
+            Tuple[bytes, List[str]]: (ESC/POS bytes, printed copy labels)
+        """
+        if ticket_type == PrinterStation.TICKET_KITCHEN:
+            payload = PrintService.get_kitchen_ticket_bytes(order, list(item_ids or []), station_name)
+            return payload, [station_name or 'kitchen']
+        copy_labels = PrintService._receipt_copy_labels()
+        payload = PrintService.get_receipt_bytes(order, copy_labels)
+        return payload, [copy_label or 'single' for copy_label in copy_labels]
+
+    @staticmethod
+    def send_to_station(
+        order: Order,
+        printer_ip: str,
+        printer_port: int = 9100,
+        ticket_type: str = PrinterStation.TICKET_RECEIPT,
+        item_ids: Optional[List[int]] = None,
+        station_name: str = '',
+    ) -> List[str]:
         """
-        Print receipt(s) for an order according to receipt_copy_mode setting.
+        Render (or reuse) and send one station's job over the pooled
+        connection. Errors are raised so the print worker can retry.
+
+        Returns:
+            List[str]: Printed copy labels
+
+        Raises:
+            OSError: On printer connection or I/O failure
         """
+        payload, printed = PrintService.build_payload(order, ticket_type, item_ids, station_name)
+        PrinterConnectionPool.send(printer_ip, printer_port, payload)
+        return printed
+
+    @staticmethod
+    def print_receipt(order: Order, ticket_types: Optional[List[str]] = None) -> bool:
+        """
+        Print an order on every matching station (receipt and kitchen
+        tickets) without the queue. Jobs are rendered first, then sent to all
+        printers concurrently so no station waits behind another.
+
+        Returns:
+            bool: True when every station printed
+        """
+        from apps.orders.services.printer_station_service import PrinterStationService
+
         config = PrintService.get_printer_config()
 
         if not config.get('enabled', False):
@@ -143,66 +271,66 @@ class PrintService:
             )
             return False
 
-        printer_ip = config.get('ip')
-        printer_port = config.get('port', 9100)
-        copy_labels = PrintService._receipt_copy_labels()
-
-        try:
-            printer = Network(printer_ip, port=printer_port)
-            printer.profile.media['width']['pixel'] = ReceiptConstants.IMAGE_WIDTH
-
-            printed_copies = []
-            for copy_label in copy_labels:
-                receipt_data = ReceiptService.generate_receipt_data_for_copy(order, copy_label)
-                receipt_image = PrintService.generate_receipt_image(
-                    receipt_data, width=ReceiptConstants.IMAGE_WIDTH
+        jobs = []
+        all_printed = True
+        for target in PrinterStationService.print_targets(order, ticket_types):
+            try:
+                payload, printed_copies = PrintService.build_payload(
+                    order, target['ticket_type'], target['item_ids'], target['name']
                 )
-                PrintService._print_image(printer, receipt_image)
-                printed_copies.append(copy_label or 'single')
+            except Exception as e:
+                all_printed = False
+                PrintService._log_print_failure(order, target, e)
+                continue
+            jobs.append((target, payload, printed_copies))
 
-            printer.close()
+        if not jobs:
+            return all_printed
 
-            LogService.log_info(
-                'print',
-                'receipt_printed',
-                details={
-                    'order_id': order.id,
-                    'order_number': order.order_number,
-                    'receipt_number': order.receipt_number,
-                    'copies': printed_copies,
-                    'copy_count': len(printed_copies),
-                    'fulfillment_type': getattr(order, 'fulfillment_type', None),
-                    'printer_ip': printer_ip,
-                    'printer_port': printer_port,
-                },
-            )
-            return True
+        with ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix='print') as pool:
+            futures = [
+                (pool.submit(PrinterConnectionPool.send, target['host'], target['port'], payload), target, copies)
+                for target, payload, copies in jobs
+            ]
+            for future, target, printed_copies in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    all_printed = False
+                    PrintService._log_print_failure(order, target, e)
+                    continue
+                LogService.log_info(
+                    'print',
+                    'receipt_printed',
+                    details={
+                        'order_id': order.id,
+                        'order_number': order.order_number,
+                        'receipt_number': order.receipt_number,
+                        'station': target['name'] or None,
+                        'ticket_type': target['ticket_type'],
+                        'copies': printed_copies,
+                        'copy_count': len(printed_copies),
+                        'fulfillment_type': getattr(order, 'fulfillment_type', None),
+                        'printer_ip': target['host'],
+                        'printer_port': target['port'],
+                    },
+                )
+        return all_printed
 
-        except (ConnectionError, TimeoutError, OSError) as e:
-            LogService.log_error(
-                'print',
-                'print_connection_error',
-                details={
-                    'order_id': order.id,
-                    'order_number': order.order_number,
-                    'error': str(e),
-                    'error_type': type(e).__name__,
-                    'printer_ip': config.get('ip'),
-                    'printer_port': config.get('port'),
-                },
-            )
-            return False
-        except Exception as e:
-            LogService.log_error(
-                'print',
-                'print_error',
-                details={
-                    'order_id': order.id,
-                    'order_number': order.order_number,
-                    'error': str(e),
-                    'error_type': type(e).__name__,
-                    'printer_ip': config.get('ip'),
-                    'printer_port': config.get('port'),
-                },
-            )
-            return False
+    @staticmethod
+    def _log_print_failure(order: Order, target: Dict[str, Any], error: Exception) -> None:
+        connection_error = isinstance(error, (ConnectionError, TimeoutError, OSError))
+        LogService.log_error(
+            'print',
+            'print_connection_error' if connection_error else 'print_error',
+            details={
+                'order_id': order.id,
+                'order_number': order.order_number,
+                'station': target['name'] or None,
+                'ticket_type': target['ticket_type'],
+                'error': str(error),
+                'error_type': type(error).__name__,
+                'printer_ip': target['host'],
+                'printer_port': target['port'],
+            },
+        )
@@ -0,0 +1,167 @@
+"""
+Persistent TCP connections to ESC/POS network printers.
+"""
+import select
+import socket
+import threading
+import time
+from typing import Dict, Tuple
+
+from django.conf import settings
+
+from apps.logs.services.log_service import LogService
+
+
+class _PrinterConnection:
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.lock = threading.Lock()
+        self.sock = None
+        self.last_used = 0.0
+
+    def close(self) -> None:
+        if self.sock is not None:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.sock.close()
+            self.sock = None
+
+    def is_healthy(self, idle_limit: float) -> bool:
+        """
+        Cheap liveness check before reuse: not idle for too long and the peer
+        has not closed the socket (a readable socket that returns b'' is closed;
+        status bytes some printers push are drained).
+        """
+        if self.sock is None:
+            return False
+        if idle_limit and time.monotonic() - self.last_used > idle_limit:
+            return False
+        try:
+            readable, _, errored = select.select([self.sock], [], [self.sock], 0)
+            if errored:
+                return False
+            if readable:
+                return bool(self.sock.recv(1024))
+        except OSError:
+            return False
+        return True
+
+    def finish(self) -> None:
+        """
+        Close after a job: FIN after the queued bytes, and drop status bytes
+        the printer already sent (closing with unread data resets the
+        connection, which can discard the tail of the job).
+        """
+        if self.sock is None:
+            return
+        try:
+            self.sock.shutdown(socket.SHUT_WR)
+            while select.select([self.sock], [], [], 0)[0] and self.sock.recv(1024):
+                pass
+        except OSError:
+            pass
+        self.sock.close()
+        self.sock = None
+
+    def connect(self, timeout: float) -> None:
+        self.close()
+        sock = socket.create_connection((self.host, self.port), timeout=timeout)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock = sock
+
+
+class PrinterConnectionPool:
+    """
+    One kept-alive socket per printer, shared by all threads of a process.
+
+    Port 9100 printers usually accept a single client. Only the print worker
+    keeps sockets open (keep_connections_open(); its loop drops them after
+    PRINTER_POOL_IDLE_SECONDS via close_idle()). Everywhere else, e.g.
+    gunicorn workers printing with PRINT_QUEUE_ENABLED off, the socket is
+    closed after each job so the printer is free for the next process.
+    """
+
+    _lock = threading.Lock()
+    _connections: Dict[Tuple[str, int], _PrinterConnection] = {}
+    _keep_open = False
+
+    @classmethod
+    def keep_connections_open(cls, enabled: bool = True) -> None:
+        """Keep sockets open between jobs (for a process that calls close_idle())."""
+        cls._keep_open = enabled
+
+    @classmethod
+    def _get(cls, host: str, port: int) -> _PrinterConnection:
+        key = (host, int(port))
+        with cls._lock:
+            conn = cls._connections.get(key)
+            if conn is None:
+                conn = cls._connections[key] = _PrinterConnection(host, int(port))
+        return conn
+
+    @classmethod
+    def send(cls, host: str, port: int, payload: bytes) -> None:
+        """
+        Send a complete job over the pooled connection (closed afterwards
+        unless keep_connections_open() was called).
+
+        A reused connection that fails is reconnected and the job resent once;
+        a failure on a fresh connection is raised to the caller (print worker
+        retries with backoff).
+
+        Raises:
+            OSError: Printer unreachable or connection lost
+        """
+        timeout = float(getattr(settings, 'PRINTER_TIMEOUT', 10) or 10)
+        idle_limit = float(getattr(settings, 'PRINTER_POOL_IDLE_SECONDS', 15) or 0)
+        conn = cls._get(host, port)
+        with conn.lock:
+            reused = conn.is_healthy(idle_limit)
+            if not reused:
+                conn.connect(timeout)
+            try:
+                conn.sock.sendall(payload)
+            except OSError as exc:
+                conn.close()
+                if not reused:
+                    raise
+                LogService.log_warning(
+                    'print',
+                    'printer_connection_reset',
+                    details={'printer': f'{host}:{port}', 'error': str(exc)},
+                )
+                conn.connect(timeout)
+                conn.sock.sendall(payload)
+            conn.last_used = time.monotonic()
+            if not cls._keep_open:
+                conn.finish()
+
+    @classmethod
+    def close_idle(cls) -> int:
+        """Close connections idle longer than PRINTER_POOL_IDLE_SECONDS; returns how many."""
+        idle_limit = float(getattr(settings, 'PRINTER_POOL_IDLE_SECONDS', 15) or 0)
+        closed = 0
+        with cls._lock:
+            connections = list(cls._connections.values())
+        for conn in connections:
+            if conn.sock is None or not conn.lock.acquire(blocking=False):
+                continue
+            try:
+                if not conn.is_healthy(idle_limit):
+                    conn.close()
+                    closed += 1
+            finally:
+                conn.lock.release()
+        return closed
+
+    @classmethod
+    def close_all(cls) -> None:
+        with cls._lock:
+            connections = list(cls._connections.values())
+        for conn in connections:
+            with conn.lock:
+                conn.close()
@@ -0,0 +1,112 @@
+"""
+Routing of paid orders to printer stations (counter, kitchen, bar, ...).
+"""
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from apps.orders.models import Order, PrinterStation
+from apps.orders.services.print_service import PrintService
+from apps.products.models import Category
+
+
+class PrinterStationService:
+    """
+    Decides which printers an order goes to and what each one prints.
+
+    A print target is a dict with:
+        - station: PrinterStation or None (the PRINTER_IP fallback)
+        - name: Station name shown on kitchen tickets
+        - ticket_type: 'receipt' or 'kitchen'
+        - host / port: Printer address
+        - item_ids: OrderItem ids routed to a kitchen station ([] for receipts)
+    """
+
+    @staticmethod
+    def active_stations() -> List[PrinterStation]:
+        return list(
+            PrinterStation.objects.filter(is_active=True).prefetch_related('categories')
+        )
+
+    @staticmethod
+    def _default_target() -> Dict[str, Any]:
+        config = PrintService.get_printer_config()
+        return {
+            'station': None,
+            'name': '',
+            'ticket_type': PrinterStation.TICKET_RECEIPT,
+            'host': config.get('ip') or '',
+            'port': int(config.get('port') or 9100),
+            'item_ids': [],
+        }
+
+    @staticmethod
+    def _expand_categories(category_ids: Set[int], parents: Dict[int, Optional[int]]) -> Set[int]:
+        """Station categories plus every descendant, so a parent category routes its children."""
+        if not category_ids:
+            return set()
+        expanded = set(category_ids)
+        for category_id in parents:
+            current = category_id
+            seen = set()
+            while current is not None and current not in seen:
+                if current in category_ids:
+                    expanded.add(category_id)
+                    break
+                seen.add(current)
+                current = parents.get(current)
+        return expanded
+
+    @staticmethod
+    def print_targets(order: Order, ticket_types: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Resolve the printers for an order.
+
+        Receipt stations always get the order. Kitchen stations get the
+        items in their categories and are skipped when none match. With no
+        active station the single configured printer prints the receipt.
+
+        Args:
+            order: Paid order instance
+            ticket_types: Restrict to these ticket types (e.g. reprint receipts only)
+
+        Returns:
+            List[Dict[str, Any]]: Print targets in station display order
+        """
+        wanted = set(ticket_types) if ticket_types else None
+        stations = PrinterStationService.active_stations()
+        if not stations:
+            if wanted is not None and PrinterStation.TICKET_RECEIPT not in wanted:
+                return []
+            return [PrinterStationService._default_target()]
+
+        targets = []
+        items = None
+        parents = None
+        for station in stations:
+            if wanted is not None and station.ticket_type not in wanted:
+                continue
+            target = {
+                'station': station,
+                'name': station.name,
+                'ticket_type': station.ticket_type,
+                'host': station.host,
+                'port': int(station.port),
+                'item_ids': [],
+            }
+            if station.ticket_type == PrinterStation.TICKET_RECEIPT:
+                targets.append(target)
+                continue
+
+            if items is None:
+                items = list(order.items.select_related('product').order_by('id'))
+            category_ids = {category.id for category in station.categories.all()}
+            if category_ids and parents is None:
+                parents = dict(Category.objects.values_list('id', 'parent_id'))
+            allowed = PrinterStationService._expand_categories(category_ids, parents or {})
+            target['item_ids'] = [
+                item.id
+                for item in items
+                if not category_ids or (item.product is not None and item.product.category_id in allowed)
+            ]
+            if target['item_ids']:
+                targets.append(target)
+        return targets
@@ -0,0 +1,242 @@
+"""
+Compact, content-addressed archive of receipt images with retention.
+"""
+import hashlib
+import io
+import os
+import time
+from datetime import timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image
+from django.conf import settings
+from django.utils import timezone
+
+from apps.orders.models import Order, ReceiptArchive
+from apps.logs.services.log_service import LogService
+
+ARCHIVE_SUBDIR = os.path.join('receipts', 'archive')
+# Files written by save_receipt_image before the archive existed
+LEGACY_PREFIX = 'receipt_'
+
+
+class ReceiptArchiveService:
+    """
+    Stores receipt images as 1-bit PNGs under
+    MEDIA_ROOT/receipts/archive/<hh>/<sha256>.png.
+
+    The file name is the hash of the bitmap, so a reprint that renders the
+    same pixels reuses the existing file. Each ReceiptArchive row keeps the
+    receipt data it was rendered from; the sweeper deletes images not
+    accessed for RECEIPT_ARCHIVE_RETENTION_DAYS and get_image_url renders
+    them again on demand.
+    """
+
+    @staticmethod
+    def _archive_root() -> str:
+        return os.path.join(settings.MEDIA_ROOT, ARCHIVE_SUBDIR)
+
+    @staticmethod
+    def _relative_path(image_hash: str) -> str:
+        return f"{ARCHIVE_SUBDIR.replace(os.sep, '/')}/{image_hash[:2]}/{image_hash}.png"
+
+    @staticmethod
+    def image_path(image_hash: str) -> str:
+        """Absolute path of an archived image on disk."""
+        return os.path.join(settings.MEDIA_ROOT, ReceiptArchiveService._relative_path(image_hash))
+
+    @staticmethod
+    def _url(image_hash: str, request=None) -> str:
+        url = f"{settings.MEDIA_URL}{ReceiptArchiveService._relative_path(image_hash)}"
+        return request.build_absolute_uri(url) if request else url
+
+    @staticmethod
+    def store_image(receipt_image: Image.Image) -> Tuple[str, int]:
+        """
+        Write the image as a 1-bit PNG named by its bitmap hash (no-op when
+        that file already exists).
+
+        Returns:
+            Tuple[str, int]: (sha256 hex digest, file size in bytes)
+        """
+        bitmap = receipt_image if receipt_image.mode == '1' else receipt_image.convert('L').convert('1')
+        digest = hashlib.sha256(
+            f'{bitmap.width}x{bitmap.height}:'.encode() + bitmap.tobytes()
+        ).hexdigest()
+        path = ReceiptArchiveService.image_path(digest)
+        if os.path.exists(path):
+            return digest, os.path.getsize(path)
+
+        buffer = io.BytesIO()
+        bitmap.save(buffer, 'PNG', optimize=True)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so a concurrent reader never sees half a file
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as handle:
+            handle.write(buffer.getvalue())
+        os.replace(tmp_path, path)
+        return digest, buffer.tell()
+
+    @staticmethod
+    def archive(
+        order: Order,
+        receipt_data: Dict[str, Any],
+        receipt_image: Image.Image,
+        copy_label: str = '',
+        request=None,
+    ) -> str:
+        """
+        Archive a rendered receipt copy of an order and return its URL.
+
+        Args:
+            order: Order instance
+            receipt_data: Data the image was rendered from (kept for regeneration)
+            receipt_image: Rendered receipt
+            copy_label: Copy label ('' for an unlabeled copy)
+            request: Optional request for an absolute URL
+
+        Returns:
+            str: Image URL
+        """
+        image_hash, image_size = ReceiptArchiveService.store_image(receipt_image)
+        ReceiptArchive.objects.update_or_create(
+            order=order,
+            copy_label=(copy_label or '').strip(),
+            defaults={
+                'template': str(receipt_data.get('receipt_template') or ''),
+                'receipt_data': receipt_data,
+                'image_hash': image_hash,
+                'image_size': image_size,
+                'last_accessed_at': timezone.now(),
+            },
+        )
+        return ReceiptArchiveService._url(image_hash, request)
+
+    @staticmethod
+    def get_image_url(order: Order, copy_label: str = '', request=None) -> Tuple[str, bool]:
+        """
+        URL of an order's archived receipt, regenerating the image when it
+        was swept (from the stored receipt data, so it matches what was
+        archived) or never archived (from the current order data).
+
+        Returns:
+            Tuple[str, bool]: (image URL, whether the image was rendered now)
+        """
+        from apps.orders.services.print_service import PrintService
+        from apps.orders.services.receipt_service import ReceiptService
+
+        copy_label = (copy_label or '').strip()
+        entry = ReceiptArchive.objects.filter(order=order, copy_label=copy_label).first()
+        if entry and entry.image_hash and os.path.exists(ReceiptArchiveService.image_path(entry.image_hash)):
+            ReceiptArchive.objects.filter(pk=entry.pk).update(last_accessed_at=timezone.now())
+            return ReceiptArchiveService._url(entry.image_hash, request), False
+
+        if entry and entry.receipt_data:
+            receipt_data = entry.receipt_data
+        else:
+            receipt_data = ReceiptService.generate_receipt_data_for_copy(order, copy_label)
+        receipt_image = PrintService.generate_receipt_image(receipt_data, width=576)
+        url = ReceiptArchiveService.archive(order, receipt_data, receipt_image, copy_label, request)
+        LogService.log_info(
+            'print',
+            'receipt_image_regenerated',
+            details={
+                'order_id': order.id,
+                'order_number': order.order_number,
+                'copy_label': copy_label,
+                'from_snapshot': bool(entry and entry.receipt_data),
+            },
+        )
+        return url, True
+
+    @staticmethod
+    def sweep(retention_days: Optional[float] = None, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Delete archived images not accessed within the retention window.
+
+        Rows keep their receipt data (only image_hash is cleared), so images
+        can be regenerated. A file is deleted only when no recently used row
+        shares it. Legacy receipt_*.png files and unreferenced archive files
+        older than the window are removed as well.
+
+        Args:
+            retention_days: Days to keep images (default RECEIPT_ARCHIVE_RETENTION_DAYS)
+            dry_run: Only count what would be removed
+
+        Returns:
+            Dict[str, int]: files_deleted, bytes_freed, rows_cleared, legacy_deleted
+        """
+        if retention_days is None:
+            retention_days = float(getattr(settings, 'RECEIPT_ARCHIVE_RETENTION_DAYS', 30) or 0)
+        stats = {'files_deleted': 0, 'bytes_freed': 0, 'rows_cleared': 0, 'legacy_deleted': 0}
+        if retention_days <= 0:
+            return stats
+
+        cutoff = timezone.now() - timedelta(days=retention_days)
+        cutoff_ts = time.time() - retention_days * 86400
+
+        stale = ReceiptArchive.objects.exclude(image_hash='').filter(last_accessed_at__lt=cutoff)
+        stale_hashes = set(stale.values_list('image_hash', flat=True))
+        still_used = set(
+            ReceiptArchive.objects.filter(image_hash__in=stale_hashes, last_accessed_at__gte=cutoff)
+            .values_list('image_hash', flat=True)
+        )
+        for image_hash in stale_hashes - still_used:
+            stats['bytes_freed'] += ReceiptArchiveService._remove(
+                ReceiptArchiveService.image_path(image_hash), dry_run, stats, 'files_deleted'
+            )
+        if dry_run:
+            stats['rows_cleared'] = stale.count()
+        else:
+            stats['rows_cleared'] = stale.update(image_hash='', image_size=0)
+
+        referenced = None
+        archive_root = ReceiptArchiveService._archive_root()
+        for dirpath, _, filenames in os.walk(archive_root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    if os.path.getmtime(path) >= cutoff_ts:
+                        continue
+                except OSError:
+                    continue
+                if referenced is None:
+                    referenced = set(
+                        ReceiptArchive.objects.exclude(image_hash='').values_list('image_hash', flat=True)
+                    )
+                if filename.split('.', 1)[0] not in referenced:
+                    stats['bytes_freed'] += ReceiptArchiveService._remove(path, dry_run, stats, 'files_deleted')
+
+        legacy_root = os.path.join(settings.MEDIA_ROOT, 'receipts')
+        if os.path.isdir(legacy_root):
+            for entry in os.scandir(legacy_root):
+                if not (entry.is_file() and entry.name.startswith(LEGACY_PREFIX) and entry.name.endswith('.png')):
+                    continue
+                if entry.stat().st_mtime < cutoff_ts:
+                    stats['bytes_freed'] += ReceiptArchiveService._remove(entry.path, dry_run, stats, 'legacy_deleted')
+
+        if any(stats.values()):
+            LogService.log_info(
+                'print',
+                'receipt_archive_swept',
+                details={**stats, 'retention_days': retention_days, 'dry_run': dry_run},
+            )
+        return stats
+
+    @staticmethod
+    def _remove(path: str, dry_run: bool, stats: Dict[str, int], counter: str) -> int:
+        try:
+            size = os.path.getsize(path)
+            if not dry_run:
+                os.remove(path)
+        except FileNotFoundError:
+            return 0
+        except OSError as e:
+            LogService.log_warning(
+                'print',
+                'receipt_archive_delete_failed',
+                details={'path': path, 'error': str(e)},
+            )
+            return 0
+        stats[counter] += 1
+        return size
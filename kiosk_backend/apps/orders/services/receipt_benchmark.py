@@ -0,0 +1,313 @@
+"""
+Receipt rendering benchmark over synthetic orders.
+
+Used by the `benchmark_receipts` management command; kept separate so the
+numbers can also be collected from a shell or CI script.
+"""
+import ctypes
+import ctypes.util
+import gc
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, Iterable, List, Optional
+
+import PIL
+from PIL import Image
+from django.utils import timezone
+
+from apps.orders.services.escpos_raster import receipt_job_bytes
+from apps.orders.services.font_registry import FontRegistry
+from apps.orders.services.receipt_constants import ReceiptConstants
+from apps.orders.services.receipt_layouts import (
+    LAYOUT_RENDERERS,
+    clear_text_caches,
+    render_kitchen_ticket,
+    render_receipt,
+)
+
+KITCHEN_TEMPLATE = 'kitchen'
+BENCHMARK_TEMPLATES: List[str] = list(LAYOUT_RENDERERS) + [KITCHEN_TEMPLATE]
+DEFAULT_LINE_COUNTS: List[int] = [1, 5, 10, 25, 50]
+
+_PRODUCTS = [
+    'برگر ذغالی ویژه با نان بریوش',
+    'پیتزا مخصوص سرآشپز خانواده',
+    'ساندویچ مرغ گریل شده با سس پستو',
+    'سالاد سزار با مرغ و پنیر پارمزان',
+    'پاستا آلفردو با قارچ و خامه',
+    'لاته',
+    'کاپوچینو دبل شات',
+    'آیس آمریکانو',
+    'چای ماسالا با شیر بادام',
+    'اسموتی توت‌فرنگی و موز',
+    'سیب‌زمینی سرخ‌کرده با ادویه مخصوص',
+    'کیک شکلاتی خانگی',
+    'هات‌داگ پنیری دودی',
+    'نوشابه',
+    'آب معدنی',
+]
+_OPTIONS = [
+    'پنیر اضافه',
+    'بدون پیاز',
+    'سس قارچ',
+    'نان سبوس‌دار',
+    'شات اضافه',
+    'شیر بدون لاکتوز',
+    'سایز بزرگ',
+    'تند',
+]
+
+
+def synthetic_receipt_data(lines: int, rng: random.Random, template: str) -> Dict[str, Any]:
+    """
+    Receipt data shaped like ReceiptService.generate_receipt_data for a
+    made-up order. Receipt templates show options inside the item name (long
+    names exercise wrapping); the kitchen ticket gets them as a list.
+    """
+    items = []
+    subtotal = 0
+    for _ in range(lines):
+        name = rng.choice(_PRODUCTS)
+        options = rng.sample(_OPTIONS, rng.randint(0, 3))
+        quantity = rng.randint(1, 4)
+        price = rng.randrange(40_000, 2_000_000, 5_000)
+        subtotal += quantity * price
+        items.append({
+            'name': f"{name} ({'، '.join(options)})" if options and template != KITCHEN_TEMPLATE else name,
+            'quantity': quantity,
+            'price': f"{price:,} ریال",
+            'options': options,
+        })
+    takeaway = rng.random() < 0.5
+    return {
+        'store_name': 'کافه رستوران نمونه شعبه مرکزی',
+        'thank_you_message': 'ممنون از خرید شما، منتظر دیدار دوباره‌تان هستیم',
+        'logo_path': '',
+        'receipt_template': template,
+        'station_name': 'آشپزخانه',
+        'date': '1405/07/26',
+        'time': '12:34:56',
+        'receipt_number': rng.randint(1, 999),
+        'order_number': f'ORD-BENCH-{rng.randint(0, 10 ** 8):08d}',
+        'items': items,
+        'service_fee': 0,
+        'items_subtotal': subtotal,
+        'total_amount': f"{subtotal:,} ریال",
+        'fulfillment_type': 'takeaway' if takeaway else 'dine_in',
+        'fulfillment_label': 'بیرون‌بر' if takeaway else 'داخل سالن',
+        'copy_label': 'فاکتور مشتری',
+    }
+
+
+def _render(template: str, data: Dict[str, Any], fonts: Dict, width: int, encode: bool):
+    if template == KITCHEN_TEMPLATE:
+        img = render_kitchen_ticket(data, fonts, width=width)
+    else:
+        img = render_receipt(data, fonts, width=width, template=template)
+    if encode:
+        receipt_job_bytes([img])
+    return img
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(int(-(-pct * len(ordered) // 100)), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class _PeakRSS:
+    """
+    Process peak RSS via /proc (Linux). Pillow allocates image buffers in C,
+    which tracemalloc cannot see, so the resident-set high-water mark is the
+    number that matches what the print worker actually needs.
+    """
+
+    def __init__(self):
+        self.supported = self._reset()
+
+    @staticmethod
+    def _status_kib(field: str) -> Optional[int]:
+        try:
+            with open('/proc/self/status') as status:
+                for line in status:
+                    if line.startswith(field + ':'):
+                        return int(line.split()[1])
+        except OSError:
+            return None
+        return None
+
+    @staticmethod
+    def _reset() -> bool:
+        try:
+            with open('/proc/self/clear_refs', 'w') as clear_refs:
+                clear_refs.write('5')
+            return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def _release_free_memory() -> None:
+        """
+        Return cached heap/arena memory to the OS; otherwise a render reuses
+        pages left resident by the previous template and shows no growth.
+        """
+        gc.collect()
+        Image.core.set_blocks_max(0)
+        libc_name = ctypes.util.find_library('c')
+        if libc_name:
+            try:
+                ctypes.CDLL(libc_name).malloc_trim(0)
+            except (OSError, AttributeError):
+                pass
+
+    def start(self) -> None:
+        self._blocks_max = Image.core.get_blocks_max()
+        self._release_free_memory()
+        if self.supported:
+            self._reset()
+        self.baseline = self._status_kib('VmRSS')
+
+    def stop(self) -> None:
+        Image.core.set_blocks_max(self._blocks_max)
+
+    def peak_delta_kib(self) -> Optional[int]:
+        if not self.supported or self.baseline is None:
+            return None
+        peak = self._status_kib('VmHWM')
+        return None if peak is None else max(peak - self.baseline, 0)
+
+
+def run_benchmark(
+    templates: Optional[Iterable[str]] = None,
+    line_counts: Optional[Iterable[int]] = None,
+    iterations: int = 20,
+    warmup: int = 2,
+    seed: int = 1405,
+    width: int = ReceiptConstants.IMAGE_WIDTH,
+    cold: bool = False,
+    encode: bool = False,
+) -> Dict[str, Any]:
+    """
+    Render every template over synthetic orders and collect timings and memory.
+
+    Args:
+        templates: Template names (default: all receipt templates + kitchen)
+        line_counts: Order sizes in item lines
+        iterations: Timed renders per template and size
+        warmup: Untimed renders per template and size before timing
+        seed: RNG seed, so runs are comparable
+        width: Canvas width in pixels
+        cold: Clear text/fragment caches before every render
+        encode: Include 1-bit ESC/POS raster encoding in the timing
+
+    Returns:
+        Dict[str, Any]: {'meta': {...}, 'templates': {name: {...}}}
+    """
+    templates = list(templates or BENCHMARK_TEMPLATES)
+    line_counts = [int(n) for n in (line_counts or DEFAULT_LINE_COUNTS)]
+    fonts = FontRegistry.receipt_fonts()
+    rss = _PeakRSS()
+    results: Dict[str, Any] = {}
+
+    for template in templates:
+        rng = random.Random(f'{seed}:{template}')
+        samples_ms: List[float] = []
+        by_lines: Dict[str, Dict[str, float]] = {}
+        max_height = 0
+
+        for lines in line_counts:
+            dataset = [synthetic_receipt_data(lines, rng, template) for _ in range(max(iterations, 1))]
+            for data in dataset[:warmup]:
+                _render(template, data, fonts, width, encode)
+
+            size_samples = []
+            for data in dataset:
+                if cold:
+                    clear_text_caches()
+                started = time.perf_counter()
+                img = _render(template, data, fonts, width, encode)
+                size_samples.append((time.perf_counter() - started) * 1000)
+                max_height = max(max_height, img.height)
+            samples_ms.extend(size_samples)
+            by_lines[str(lines)] = {
+                'p50_ms': round(percentile(size_samples, 50), 3),
+                'p99_ms': round(percentile(size_samples, 99), 3),
+            }
+
+        # Memory pass, separate from timing (tracemalloc slows rendering down)
+        rss.start()
+        tracemalloc.start()
+        for lines in line_counts:
+            if cold:
+                clear_text_caches()
+            _render(template, synthetic_receipt_data(lines, rng, template), fonts, width, encode)
+        _, py_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak_rss_kib = rss.peak_delta_kib()
+        rss.stop()
+
+        results[template] = {
+            'samples': len(samples_ms),
+            'p50_ms': round(percentile(samples_ms, 50), 3),
+            'p99_ms': round(percentile(samples_ms, 99), 3),
+            'mean_ms': round(sum(samples_ms) / len(samples_ms), 3) if samples_ms else 0.0,
+            'max_ms': round(max(samples_ms), 3) if samples_ms else 0.0,
+            'peak_rss_kib': peak_rss_kib,
+            'peak_python_kib': round(py_peak / 1024, 1),
+            'max_height_px': max_height,
+            'by_lines': by_lines,
+        }
+
+    return {
+        'meta': {
+            'created_at': timezone.now().isoformat(),
+            'python': sys.version.split()[0],
+            'pillow': PIL.__version__,
+            'platform': platform.platform(),
+            'width': width,
+            'line_counts': line_counts,
+            'iterations': iterations,
+            'warmup': warmup,
+            'seed': seed,
+            'cold': cold,
+            'encode': encode,
+        },
+        'templates': results,
+    }
+
+
+def compare_to_baseline(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold_pct: float = 15.0,
+) -> List[Dict[str, Any]]:
+    """
+    Templates whose p50 or p99 got slower than the baseline by more than
+    threshold_pct percent.
+
+    Returns:
+        List[Dict[str, Any]]: One entry per regressed metric
+    """
+    regressions = []
+    old_templates = (baseline or {}).get('templates') or {}
+    for template, current in (results.get('templates') or {}).items():
+        old = old_templates.get(template)
+        if not old:
+            continue
+        for metric in ('p50_ms', 'p99_ms'):
+            before, after = float(old.get(metric) or 0), float(current.get(metric) or 0)
+            if before > 0 and after > before * (1 + threshold_pct / 100):
+                regressions.append({
+                    'template': template,
+                    'metric': metric,
+                    'baseline': before,
+                    'current': after,
+                    'change_pct': round((after / before - 1) * 100, 1),
+                })
+    return regressions
@@ -2,6 +2,7 @@
 Receipt layout templates for thermal printing.
 Each renderer returns a full PIL RGB image.
 """
+from functools import lru_cache
 from typing import Any, Dict, List, Tuple
 
 from PIL import Image, ImageDraw, ImageFont
@@ -9,12 +10,47 @@ from PIL import Image, ImageDraw, ImageFont
 from apps.orders.services.persian_text import reshape_persian
 from apps.orders.services.receipt_constants import ReceiptConstants
 
+MEASURE_CACHE_SIZE = 8192
 
-def text_size(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.ImageFont) -> Tuple[int, int]:
+# One scratch canvas per image mode; textbbox only depends on font, text and mode
+_MEASURE_DRAWS: Dict[str, ImageDraw.ImageDraw] = {}
+
+
+@lru_cache(maxsize=MEASURE_CACHE_SIZE)
+def _measure_cached(font: ImageFont.ImageFont, text: str, mode: str) -> Tuple[int, int]:
+    draw = _MEASURE_DRAWS.get(mode)
+    if draw is None:
+        draw = _MEASURE_DRAWS.setdefault(mode, ImageDraw.Draw(Image.new(mode, (8, 8))))
     bbox = draw.textbbox((0, 0), text, font=font)
     return bbox[2] - bbox[0], bbox[3] - bbox[1]
 
 
+def text_size(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.ImageFont) -> Tuple[int, int]:
+    """(width, height) of already-shaped text; memoized per (font, text, image mode)."""
+    return _measure_cached(font, text, draw.mode)
+
+
+def text_cache_info() -> Dict[str, Any]:
+    """Hit/miss counters of the reshape and measurement caches (benchmarks)."""
+    from apps.orders.services.persian_text import reshape_cache_info
+
+    return {
+        'reshape': reshape_cache_info()._asdict(),
+        'measure': _measure_cached.cache_info()._asdict(),
+        'fragments': _text_tile.cache_info()._asdict(),
+    }
+
+
+def clear_text_caches() -> None:
+    """Drop reshape/measure/fragment/banner caches (cold-start benchmarks)."""
+    from apps.orders.services.persian_text import clear_reshape_cache
+
+    clear_reshape_cache()
+    _measure_cached.cache_clear()
+    _text_tile.cache_clear()
+    _copy_banner.cache_clear()
+
+
 def draw_centered(
     draw: ImageDraw.ImageDraw,
     y: int,
@@ -58,6 +94,63 @@ def draw_left(
     return th
 
 
+# Static fragments (store header, thank-you footer) repeat on every receipt
+# until an admin edits settings. They are keyed by their own text, so a
+# settings change simply misses the cache and old entries age out.
+FRAGMENT_CACHE_SIZE = 128
+
+
+@lru_cache(maxsize=FRAGMENT_CACHE_SIZE)
+def _text_tile(
+    text: str,
+    font: ImageFont.ImageFont,
+    fill: Tuple[int, int, int],
+    background: Tuple[int, int, int],
+) -> Tuple[Image.Image, int, int]:
+    display = reshape_persian(text)
+    draw = _MEASURE_DRAWS.get('RGB') or _MEASURE_DRAWS.setdefault(
+        'RGB', ImageDraw.Draw(Image.new('RGB', (8, 8)))
+    )
+    left, top, right, bottom = draw.textbbox((0, 0), display, font=font)
+    tile = Image.new('RGB', (max(right - left, 1), max(bottom - top, 1)), background)
+    ImageDraw.Draw(tile).text((-left, -top), display, fill=fill, font=font)
+    return tile, left, top
+
+
+def stamp_text(
+    img: Image.Image,
+    xy: Tuple[int, int],
+    text: str,
+    font: ImageFont.ImageFont,
+    fill=(0, 0, 0),
+    background=(255, 255, 255),
+) -> None:
+    """
+    Paste a cached rendering of draw.text(xy, reshape_persian(text)).
+    Only valid where the area under the text is a flat `background`.
+    """
+    if not text:
+        return
+    tile, left, top = _text_tile(text, font, tuple(fill), tuple(background))
+    img.paste(tile, (int(xy[0]) + left, int(xy[1]) + top))
+
+
+def stamp_centered(
+    img: Image.Image,
+    y: int,
+    text: str,
+    font: ImageFont.ImageFont,
+    width: int,
+    fill=(0, 0, 0),
+    background=(255, 255, 255),
+) -> int:
+    """Cached equivalent of draw_centered for static text on a flat background."""
+    display = reshape_persian(text)
+    tw, th = _measure_cached(font, display, img.mode)
+    stamp_text(img, ((width - tw) // 2, y), text, font, fill=fill, background=background)
+    return th
+
+
 def draw_ornament(draw: ImageDraw.ImageDraw, y: int, width: int, margin: int = 40) -> None:
     """Centered decorative divider for Persian receipts."""
     mid = width // 2
@@ -114,6 +207,33 @@ def _text_pixel_width(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.Imag
     return text_size(draw, reshape_persian(text), font)[0]
 
 
+def _word_window(
+    draw: ImageDraw.ImageDraw,
+    text: str,
+    font: ImageFont.ImageFont,
+    max_width: int,
+) -> Tuple[int, int]:
+    """
+    Estimate where the fit boundary falls using per-word widths.
+
+    Persian letters never join across a space, so the width of a prefix that
+    ends on a word boundary is (nearly) the sum of its word widths plus the
+    spaces. Returns (lo, hi): end of the last word estimated to fit and end
+    of the following word; the exact boundary is searched only in between.
+    """
+    space_w = _text_pixel_width(draw, ' ', font)
+    lo, pos, used = 0, 0, 0
+    for index, word in enumerate(text.split(' ')):
+        end = pos + len(word)
+        if word:
+            used += _text_pixel_width(draw, word, font) + (space_w if index else 0)
+            if used > max_width:
+                return lo, end
+            lo = end
+        pos = end + 1
+    return lo, len(text)
+
+
 def _longest_prefix_fit(
     draw: ImageDraw.ImageDraw,
     text: str,
@@ -124,12 +244,25 @@ def _longest_prefix_fit(
     """Largest character count of text that fits in max_width (optionally with suffix)."""
     if not text or max_width <= 0:
         return 0
+
+    def fits(count: int) -> bool:
+        return count == 0 or _text_pixel_width(draw, text[:count] + suffix, font) <= max_width
+
     lo, hi = 0, len(text)
-    best = 0
+    # Narrow the binary search to one word using the word-width model. Both
+    # bounds are checked exactly, so the result always fits; but widths are
+    # not monotonic in prefix length (letter forms change at the cut), so it
+    # can be a different fitting break than a search over the whole text.
+    suffix_w = _text_pixel_width(draw, suffix, font)
+    guess_lo, guess_hi = _word_window(draw, text, font, max_width - suffix_w)
+    if fits(guess_lo) and (guess_hi >= len(text) or not fits(guess_hi + 1)):
+        lo, hi = guess_lo, guess_hi
+
+    best = lo
+    lo += 1
     while lo <= hi:
         mid = (lo + hi) // 2
-        probe = text[:mid] + suffix
-        if mid == 0 or _text_pixel_width(draw, probe, font) <= max_width:
+        if fits(mid):
             best = mid
             lo = mid + 1
         else:
@@ -281,7 +414,7 @@ def render_modern(receipt_data: Dict[str, Any], fonts: Dict, width: int) -> Imag
     y = ReceiptConstants.TOP_PADDING
 
     if data['store_name']:
-        th = draw_centered(draw, y, data['store_name'], fonts['title'], width)
+        th = stamp_centered(img, y, data['store_name'], fonts['title'], width)
         y += th + 18
 
     draw_rule(draw, y, margin, width - margin, style='double', thickness=2)
@@ -349,7 +482,7 @@ def render_modern(receipt_data: Dict[str, Any], fonts: Dict, width: int) -> Imag
 
     draw_rule(draw, y, margin + 40, width - margin - 40, style='dashed', thickness=2)
     y += 18
-    th = draw_centered(draw, y, data['thank_message'], fonts['normal'], width)
+    th = stamp_centered(img, y, data['thank_message'], fonts['normal'], width)
     y += th
     return crop_receipt(img, y, width)
 
@@ -390,7 +523,7 @@ def render_classic(receipt_data: Dict[str, Any], fonts: Dict, width: int) -> Ima
     y = 32
 
     if data['store_name']:
-        th = draw_centered(draw, y, data['store_name'], fonts['title'], width)
+        th = stamp_centered(img, y, data['store_name'], fonts['title'], width)
         y += th + 12
         draw_ornament(draw, y, width, margin=50)
         y += 22
@@ -491,7 +624,7 @@ def render_classic(receipt_data: Dict[str, Any], fonts: Dict, width: int) -> Ima
 
     draw_ornament(draw, y, width, margin=70)
     y += 16
-    th = draw_centered(draw, y, data['thank_message'], fonts['normal'], width)
+    th = stamp_centered(img, y, data['thank_message'], fonts['normal'], width)
     y += th
     return crop_receipt(img, y, width)
 
@@ -517,7 +650,7 @@ def render_minimal(receipt_data: Dict[str, Any], fonts: Dict, width: int) -> Ima
     y = 44
 
     if data['store_name']:
-        th = draw_centered(draw, y, data['store_name'], fonts['title'], width)
+        th = stamp_centered(img, y, data['store_name'], fonts['title'], width)
         y += th + 14
         draw_rule(draw, y, margin + 80, width - margin - 80, style='solid', thickness=1)
         y += 20
@@ -574,7 +707,7 @@ def render_minimal(receipt_data: Dict[str, Any], fonts: Dict, width: int) -> Ima
     draw.text(((width - tw) // 2, y), total_line, fill=(0, 0, 0), font=fonts['bold'])
     y += th + pad_y + 22
 
-    th = draw_centered(draw, y, data['thank_message'], fonts['normal'], width)
+    th = stamp_centered(img, y, data['thank_message'], fonts['normal'], width)
     y += th
     return crop_receipt(img, y, width)
 
@@ -603,7 +736,10 @@ def render_elegant(receipt_data: Dict[str, Any], fonts: Dict, width: int) -> Ima
     if data['store_name']:
         title = reshape_persian(data['store_name'])
         tw, th = text_size(draw, title, fonts['title'])
-        draw.text(((width - tw) // 2, (header_h - th) // 2), title, fill=(255, 255, 255), font=fonts['title'])
+        stamp_text(
+            img, ((width - tw) // 2, (header_h - th) // 2), data['store_name'], fonts['title'],
+            fill=(255, 255, 255), background=(0, 0, 0),
+        )
     y = header_h + 24
 
     th = draw_centered(draw, y, 'شماره فیش', fonts['small'], width)
@@ -665,7 +801,7 @@ def render_elegant(receipt_data: Dict[str, Any], fonts: Dict, width: int) -> Ima
 
     draw_ornament(draw, y, width, margin=80)
     y += 16
-    th = draw_centered(draw, y, data['thank_message'], fonts['normal'], width)
+    th = stamp_centered(img, y, data['thank_message'], fonts['normal'], width)
     y += th
     return crop_receipt(img, y, width)
 
@@ -688,7 +824,7 @@ def render_bold(receipt_data: Dict[str, Any], fonts: Dict, width: int = 576) ->
     y = 28
 
     if data['store_name']:
-        th = draw_centered(draw, y, data['store_name'], fonts['title'], width)
+        th = stamp_centered(img, y, data['store_name'], fonts['title'], width)
         y += th + 12
 
     draw_rule(draw, y, 0, width, style='solid', thickness=6)
@@ -733,7 +869,7 @@ def render_bold(receipt_data: Dict[str, Any], fonts: Dict, width: int = 576) ->
     draw.text(((width - tw) // 2, y + (band_h - th) // 2), total_line, fill=(255, 255, 255), font=fonts['bold'])
     y += band_h + 18
 
-    th = draw_centered(draw, y, data['thank_message'], fonts['normal'], width)
+    th = stamp_centered(img, y, data['thank_message'], fonts['normal'], width)
     y += th
     return crop_receipt(img, y, width)
 
@@ -763,7 +899,7 @@ def render_ticket(receipt_data: Dict[str, Any], fonts: Dict, width: int = 576) -
     y += 22
 
     if data['store_name']:
-        th = draw_centered(draw, y, data['store_name'], fonts['bold'], width)
+        th = stamp_centered(img, y, data['store_name'], fonts['bold'], width)
         y += th + 10
 
     draw_rule(draw, y, margin, width - margin, style='dashed', thickness=2)
@@ -809,7 +945,7 @@ def render_ticket(receipt_data: Dict[str, Any], fonts: Dict, width: int = 576) -
 
     _draw_perforation(draw, y, width)
     y += 20
-    th = draw_centered(draw, y, data['thank_message'], fonts['normal'], width)
+    th = stamp_centered(img, y, data['thank_message'], fonts['normal'], width)
     y += th
     return crop_receipt(img, y, width)
 
@@ -829,7 +965,7 @@ def render_market(receipt_data: Dict[str, Any], fonts: Dict, width: int = 576) -
     y = 16
 
     if data['store_name']:
-        th = draw_centered(draw, y, data['store_name'], fonts['title'], width)
+        th = stamp_centered(img, y, data['store_name'], fonts['title'], width)
         y += th + 10
 
     draw_rule(draw, y, margin, width - margin, style='solid', thickness=2)
@@ -884,7 +1020,7 @@ def render_market(receipt_data: Dict[str, Any], fonts: Dict, width: int = 576) -
     tw, th = text_size(draw, total_line, fonts['bold'])
     draw.text((width - margin - tw, y), total_line, fill=(0, 0, 0), font=fonts['bold'])
     y += th + 16
-    th = draw_centered(draw, y, data['thank_message'], fonts['meta'], width)
+    th = stamp_centered(img, y, data['thank_message'], fonts['meta'], width)
     y += th
     return crop_receipt(img, y, width)
 
@@ -905,7 +1041,10 @@ def render_banner(receipt_data: Dict[str, Any], fonts: Dict, width: int = 576) -
     title_d = reshape_persian(title) if title else ''
     if title_d:
         tw, th = text_size(draw, title_d, fonts['title'])
-        draw.text(((width - tw) // 2, (banner_h - th) // 2), title_d, fill=(255, 255, 255), font=fonts['title'])
+        stamp_text(
+            img, ((width - tw) // 2, (banner_h - th) // 2), title, fonts['title'],
+            fill=(255, 255, 255), background=(0, 0, 0),
+        )
     y = banner_h + 16
     strip_h = 56
     draw.rectangle([margin, y, width - margin, y + strip_h], fill=(0, 0, 0))
@@ -950,7 +1089,7 @@ def render_banner(receipt_data: Dict[str, Any], fonts: Dict, width: int = 576) -
     draw.text(((width - tw) // 2, y + (band_h - th) // 2), total_line, fill=(255, 255, 255), font=fonts['bold'])
     y += band_h + 16
 
-    th = draw_centered(draw, y, data['thank_message'], fonts['normal'], width)
+    th = stamp_centered(img, y, data['thank_message'], fonts['normal'], width)
     y += th
     return crop_receipt(img, y, width)
 
@@ -967,21 +1106,19 @@ LAYOUT_RENDERERS = {
 }
 
 
-def prepend_copy_and_fulfillment(
-    img: Image.Image,
-    receipt_data: Dict[str, Any],
-    fonts: Dict,
+@lru_cache(maxsize=32)
+def _copy_banner(
+    copy_label: str,
+    fulfillment: str,
+    is_takeaway: bool,
+    width: int,
+    font: ImageFont.ImageFont,
 ) -> Image.Image:
     """
-    Prepend a clear banner for copy type (customer/seller)
-    and fulfillment type (dine-in/takeaway) above any template.
+    Copy/fulfillment banner strip (padding included) for a given width.
+    Only a handful of label combinations exist, so they are rendered once
+    per process; callers must treat the returned image as read-only.
     """
-    copy_label = (receipt_data.get('copy_label') or '').strip()
-    fulfillment = (receipt_data.get('fulfillment_label') or '').strip()
-    if not copy_label and not fulfillment:
-        return img
-
-    width = img.width
     pad_top = 14
     banner_h = 58 if copy_label else 0
     gap = 10 if copy_label and fulfillment else 0
@@ -989,25 +1126,24 @@ def prepend_copy_and_fulfillment(
     pad_bottom = 14
     extra = pad_top + banner_h + gap + fulfill_h + pad_bottom
 
-    out = Image.new('RGB', (width, img.height + extra), 'white')
+    out = Image.new('RGB', (width, extra), 'white')
     draw = ImageDraw.Draw(out)
     y = pad_top
 
     if copy_label:
         draw.rectangle([0, y, width, y + banner_h], fill=(0, 0, 0))
         label = reshape_persian(copy_label)
-        tw, th = text_size(draw, label, fonts['bold'])
+        tw, th = text_size(draw, label, font)
         draw.text(
             ((width - tw) // 2, y + (banner_h - th) // 2),
             label,
             fill=(255, 255, 255),
-            font=fonts['bold'],
+            font=font,
         )
         y += banner_h + gap
 
     if fulfillment:
         # Emphasize takeaway more
-        is_takeaway = (receipt_data.get('fulfillment_type') or '') == 'takeaway'
         box_fill = (0, 0, 0) if is_takeaway else (240, 240, 240)
         text_fill = (255, 255, 255) if is_takeaway else (0, 0, 0)
         margin = ReceiptConstants.SIDE_MARGIN
@@ -1019,16 +1155,132 @@ def prepend_copy_and_fulfillment(
             width=2,
         )
         label = reshape_persian(f'نوع سفارش: {fulfillment}')
-        tw, th = text_size(draw, label, fonts['bold'])
+        tw, th = text_size(draw, label, font)
         draw.text(
             ((width - tw) // 2, y + (fulfill_h - th) // 2),
             label,
             fill=text_fill,
-            font=fonts['bold'],
+            font=font,
+        )
+    return out
+
+
+def render_kitchen_ticket(ticket_data: Dict[str, Any], fonts: Dict, width: int = 576) -> Image.Image:
+    """
+    Price-less preparation ticket for a kitchen/bar station: station band,
+    large receipt number, fulfillment box, then quantity and name per item
+    with the chosen options underneath.
+    """
+    margin = ReceiptConstants.SIDE_MARGIN
+    content_width = width - (margin * 2)
+    items = ticket_data.get('items') or []
+    station_name = (ticket_data.get('station_name') or '').strip() or 'آشپزخانه'
+    fulfillment = (ticket_data.get('fulfillment_label') or '').strip()
+    is_takeaway = (ticket_data.get('fulfillment_type') or '') == 'takeaway'
+
+    bold_h = ReceiptConstants.FONT_SIZE_BOLD + 12
+    meta_h = ReceiptConstants.FONT_SIZE_META + 10
+    height = ReceiptConstants.TOP_PADDING + ReceiptConstants.FONT_SIZE_TITLE * 2 + ReceiptConstants.SECTION_GAP
+    height += ReceiptConstants.FONT_SIZE_SMALL + 8 + ReceiptConstants.FONT_SIZE_TICKET + 24
+    height += 80 + meta_h + ReceiptConstants.SECTION_GAP + 16
+    for item in items:
+        height += 2 * bold_h + (2 * meta_h if item.get('options') else 0) + 24
+    height += ReceiptConstants.SECTION_GAP + 2 * meta_h + ReceiptConstants.BOTTOM_PADDING
+
+    img = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(img)
+    y = ReceiptConstants.TOP_PADDING
+
+    left, top, right, bottom = draw.textbbox((0, 0), reshape_persian(station_name), font=fonts['title'])
+    band_pad = 14
+    band_h = (bottom - top) + band_pad * 2
+    draw.rectangle([0, y, width, y + band_h], fill=(0, 0, 0))
+    stamp_text(
+        img,
+        ((width - (right - left)) // 2 - left, y + band_pad - top),
+        station_name,
+        fonts['title'],
+        fill=(255, 255, 255),
+        background=(0, 0, 0),
+    )
+    y += band_h + ReceiptConstants.SECTION_GAP
+
+    th = stamp_centered(img, y, 'شماره فیش', fonts['small'], width)
+    y += th + 8
+    ticket_value = reshape_persian(str(ticket_data.get('receipt_number', '')))
+    tw, th = text_size(draw, ticket_value, fonts['ticket'])
+    draw.text(((width - tw) // 2, y), ticket_value, fill=(0, 0, 0), font=fonts['ticket'])
+    y += th + 12
+
+    if fulfillment:
+        banner = _copy_banner('', fulfillment, is_takeaway, width, fonts['bold'])
+        img.paste(banner, (0, y))
+        y += banner.height
+
+    th = draw_centered(
+        draw, y, f"{ticket_data.get('date', '')}   |   {ticket_data.get('time', '')}", fonts['meta'], width
+    )
+    y += th + ReceiptConstants.SECTION_GAP
+    draw_rule(draw, y, margin, width - margin, style='double', thickness=2)
+    y += 16
+
+    qty_col = 96
+    name_max = content_width - qty_col - 12
+    total_qty = 0
+    for idx, item in enumerate(items):
+        quantity = int(item.get('quantity') or 0)
+        total_qty += quantity
+        qty_d = reshape_persian(f"{quantity}×")
+        qw, qh = text_size(draw, qty_d, fonts['title'])
+        draw.text((margin, y), qty_d, fill=(0, 0, 0), font=fonts['title'])
+        used = draw_right_wrapped(
+            draw, y, item.get('name', ''), fonts['bold'], width, margin,
+            max_width=name_max, max_lines=2,
         )
-        y += fulfill_h
+        options = item.get('options') or []
+        if options:
+            used += 6 + draw_right_wrapped(
+                draw, y + used + 6, '، '.join(options), fonts['meta'], width, margin,
+                max_width=name_max, max_lines=2,
+            )
+        y += max(used, qh) + 18
+        if idx < len(items) - 1:
+            draw_rule(draw, y - 8, margin + 8, width - margin - 8, style='dashed', thickness=1)
+
+    y += ReceiptConstants.SECTION_GAP // 2
+    draw_rule(draw, y, margin, width - margin, style='solid', thickness=3)
+    y += 14
+    th = draw_centered(draw, y, f'تعداد اقلام: {total_qty}', fonts['bold'], width)
+    y += th + 8
+    th = draw_centered(draw, y, str(ticket_data.get('order_number', '')), fonts['small'], width)
+    y += th
+    return crop_receipt(img, y, width)
+
+
+def prepend_copy_and_fulfillment(
+    img: Image.Image,
+    receipt_data: Dict[str, Any],
+    fonts: Dict,
+) -> Image.Image:
+    """
+    Prepend a clear banner for copy type (customer/seller)
+    and fulfillment type (dine-in/takeaway) above any template.
+    """
+    copy_label = (receipt_data.get('copy_label') or '').strip()
+    fulfillment = (receipt_data.get('fulfillment_label') or '').strip()
+    if not copy_label and not fulfillment:
+        return img
 
-    out.paste(img, (0, extra))
+    banner = _copy_banner(
+        copy_label,
+        fulfillment,
+        (receipt_data.get('fulfillment_type') or '') == 'takeaway',
+        img.width,
+        fonts['bold'],
+    )
+    out = Image.new('RGB', (img.width, img.height + banner.height), 'white')
+    out.paste(banner, (0, 0))
+    out.paste(img, (0, banner.height))
     return out
 
 
@@ -1041,3 +1293,22 @@ def render_receipt(
     renderer = LAYOUT_RENDERERS.get(template) or render_modern
     img = renderer(receipt_data, fonts, width)
     return prepend_copy_and_fulfillment(img, receipt_data, fonts)
+
+
+def render_receipt_copies(
+    receipt_data: Dict[str, Any],
+    fonts: Dict,
+    copy_labels: List[str],
+    width: int = 576,
+    template: str = 'modern',
+) -> List[Image.Image]:
+    """
+    Render the receipt body once and stamp one banner per copy label.
+    The body does not depend on copy_label, so N copies cost one render.
+    """
+    renderer = LAYOUT_RENDERERS.get(template) or render_modern
+    body = renderer(receipt_data, fonts, width)
+    return [
+        prepend_copy_and_fulfillment(body, {**receipt_data, 'copy_label': label}, fonts)
+        for label in copy_labels
+    ]
@@ -1,7 +1,7 @@
 """
 Receipt generation service for customer transaction receipts.
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from django.utils import timezone
 from django.conf import settings
 from jdatetime import datetime as jdatetime
@@ -9,6 +9,7 @@ from apps.orders.models import Order
 from apps.orders.selectors.order_selector import OrderSelector
 from apps.orders.services.receipt_constants import ReceiptConstants
 from apps.core.models.settings import SiteSettings
+from apps.core.models.receipt_counter import ReceiptCounter
 
 
 class ReceiptService:
@@ -22,7 +23,7 @@ class ReceiptService:
     @staticmethod
     def get_receipt_branding() -> Dict[str, Any]:
         """Load store name / receipt header/footer/logo from site settings (DB only)."""
-        site = SiteSettings.get_settings()
+        site = SiteSettings.get_cached()
         site_name = (site.site_name or '').strip()
         # Optional receipt-specific header; otherwise use site name from DB
         header = (site.receipt_header or '').strip() or site_name
@@ -53,10 +54,10 @@ class ReceiptService:
     @staticmethod
     def allocate_receipt_number() -> int:
         """
-        Allocate next persistent receipt number from site settings counter.
-        Continues across restarts; reset only via admin panel.
+        Allocate next persistent receipt number from the dedicated counter.
+        Continues across restarts; reset via admin panel (or daily in automatic mode).
         """
-        return SiteSettings.allocate_next_receipt_number()
+        return ReceiptCounter.allocate()
 
     @staticmethod
     def get_daily_receipt_number(order: Order = None) -> int:
@@ -65,6 +66,22 @@ class ReceiptService:
         """
         return ReceiptService.allocate_receipt_number()
     
+    @staticmethod
+    def _jalali_date_time(order: Order) -> Tuple[str, str]:
+        """Order creation time as Jalali (date, time) strings in local time."""
+        # Convert to local timezone (Tehran) if USE_TZ is enabled
+        if settings.USE_TZ and order.created_at.tzinfo:
+            gregorian_datetime = timezone.localtime(order.created_at)
+        else:
+            gregorian_datetime = order.created_at
+
+        # Convert to naive datetime for jdatetime
+        if gregorian_datetime.tzinfo:
+            gregorian_datetime = gregorian_datetime.replace(tzinfo=None)
+
+        jalali_datetime = jdatetime.fromgregorian(datetime=gregorian_datetime)
+        return jalali_datetime.strftime('%Y/%m/%d'), jalali_datetime.strftime('%H:%M:%S')
+
     @staticmethod
     def generate_receipt_data(order: Order, use_stored_receipt_number: bool = True) -> Dict[str, Any]:
         """
@@ -85,21 +102,7 @@ class ReceiptService:
                     - price: Unit price (formatted)
                 - total_amount: Total amount (formatted)
         """
-        # Convert date to Jalali (Persian) calendar with time
-        # First, convert to local timezone (Tehran) if USE_TZ is enabled
-        if settings.USE_TZ and order.created_at.tzinfo:
-            # Convert to local timezone (Tehran)
-            gregorian_datetime = timezone.localtime(order.created_at)
-        else:
-            gregorian_datetime = order.created_at
-        
-        # Convert to naive datetime for jdatetime
-        if gregorian_datetime.tzinfo:
-            gregorian_datetime = gregorian_datetime.replace(tzinfo=None)
-        
-        jalali_datetime = jdatetime.fromgregorian(datetime=gregorian_datetime)
-        date_str = jalali_datetime.strftime('%Y/%m/%d')
-        time_str = jalali_datetime.strftime('%H:%M:%S')
+        date_str, time_str = ReceiptService._jalali_date_time(order)
         
         # Use stored receipt number; never allocate a new one during reprint
         if use_stored_receipt_number and order.receipt_number is not None and order.receipt_number > 0:
@@ -135,7 +138,7 @@ class ReceiptService:
         else:
             products = [item.product for item in items if item.product_id]
             fulfillment = getattr(order, 'fulfillment_type', None) or 'dine_in'
-            service_fee = SiteSettings.get_settings().resolve_order_service_fee(
+            service_fee = SiteSettings.get_cached().resolve_order_service_fee(
                 products,
                 fulfillment_type=fulfillment,
             )
@@ -183,6 +186,52 @@ class ReceiptService:
         data['copy_label'] = (copy_label or '').strip()
         return data
     
+    @staticmethod
+    def generate_kitchen_ticket_data(
+        order: Order,
+        item_ids: List[int],
+        station_name: str = '',
+    ) -> Dict[str, Any]:
+        """
+        Generate kitchen/bar ticket data for the items routed to one station.
+
+        Args:
+            order: Paid order instance
+            item_ids: OrderItem ids printed on this ticket
+            station_name: Station shown in the ticket header
+
+        Returns:
+            Dict[str, Any]: Ticket data (no prices) containing station_name,
+                receipt_number, order_number, date, time, fulfillment and
+                items (name, quantity, options)
+        """
+        date_str, time_str = ReceiptService._jalali_date_time(order)
+        items = order.items.select_related('product').filter(id__in=list(item_ids or [])).order_by('id')
+        items_data = []
+        for item in items:
+            if item.product:
+                name = item.product.name
+            else:
+                name = item.product_name or 'محصول حذف‌شده'
+            options = [
+                str(option.get('name') or '').strip()
+                for option in (item.selected_options or [])
+                if isinstance(option, dict) and option.get('name')
+            ]
+            items_data.append({'name': name, 'quantity': item.quantity, 'options': options})
+
+        fulfillment = getattr(order, 'fulfillment_type', None) or 'dine_in'
+        return {
+            'station_name': station_name,
+            'receipt_number': order.receipt_number or 0,
+            'order_number': order.order_number,
+            'date': date_str,
+            'time': time_str,
+            'items': items_data,
+            'fulfillment_type': fulfillment,
+            'fulfillment_label': 'بیرون‌بر' if fulfillment == 'takeaway' else 'داخل سالن',
+        }
+
     @staticmethod
     def get_receipt_by_order_number(order_number: str) -> Optional[Dict[str, Any]]:
         """
@@ -1,3 +1,117 @@
-from django.test import TestCase
+import socket
+import threading
 
-# Create your tests here.
+from django.test import SimpleTestCase, override_settings
+from escpos.printer import Dummy
+from PIL import Image, ImageDraw
+
+from apps.orders.services.escpos_raster import raster_bytes, receipt_job_bytes
+from apps.orders.services.printer_pool import PrinterConnectionPool
+
+
+def _receipt_images():
+    """A small 1-bit drawing and a grayscale image taller than one raster fragment."""
+    drawing = Image.new('1', (50, 20), 1)
+    draw = ImageDraw.Draw(drawing)
+    draw.rectangle((3, 2, 30, 12), fill=0)
+    draw.line((0, 19, 49, 0), fill=0)
+    gradient = Image.linear_gradient('L').resize((37, 1000))
+    return [drawing, gradient]
+
+
+def _python_escpos_job(images):
+    """What python-escpos sends for the same receipt (the encoder's reference)."""
+    printer = Dummy()
+    for img in images:
+        printer.set(align='center')
+        printer.image(img, impl='bitImageRaster')
+        printer.text('\n\n')
+        printer.cut()
+    return printer.output
+
+
+class _StandInPrinter:
+    """
+    Local TCP stand-in for a port-9100 printer: one client at a time,
+    records the bytes of every connection until the client closes it.
+    """
+
+    def __init__(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen(1)
+        self.port = self.server.getsockname()[1]
+        self.sessions = []
+        self.closed = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                client, _ = self.server.accept()
+            except OSError:
+                return
+            received = bytearray()
+            self.sessions.append(received)
+            with client:
+                while True:
+                    chunk = client.recv(4096)
+                    if not chunk:
+                        break
+                    received.extend(chunk)
+            self.closed.set()
+
+    def stop(self):
+        self.server.close()
+
+
+class EscposRasterTests(SimpleTestCase):
+    def test_raster_matches_python_escpos(self):
+        for img in _receipt_images():
+            with self.subTest(mode=img.mode, size=img.size):
+                printer = Dummy()
+                printer.image(img, impl='bitImageRaster')
+                self.assertEqual(raster_bytes(img), printer.output)
+
+    def test_receipt_job_matches_python_escpos(self):
+        images = _receipt_images()
+        self.assertEqual(receipt_job_bytes(images), _python_escpos_job(images))
+
+
+@override_settings(PRINTER_TIMEOUT=2, PRINTER_POOL_IDLE_SECONDS=15)
+class PrinterConnectionPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.printer = _StandInPrinter()
+        self.addCleanup(self.printer.stop)
+        self.addCleanup(PrinterConnectionPool.close_all)
+        self.addCleanup(PrinterConnectionPool.keep_connections_open, False)
+
+    def test_web_process_closes_after_each_job(self):
+        job = b'\x1b@' + 'فاکتور'.encode('utf-8') * 2000 + b'\x1dV\x00'
+        PrinterConnectionPool.send('127.0.0.1', self.printer.port, job)
+        # Closed right away, so the single-client printer is free again
+        self.assertTrue(self.printer.closed.wait(2))
+        self.assertEqual(bytes(self.printer.sessions[0]), job)
+
+        self.printer.closed.clear()
+        PrinterConnectionPool.send('127.0.0.1', self.printer.port, b'second')
+        self.assertTrue(self.printer.closed.wait(2))
+        self.assertEqual([bytes(s) for s in self.printer.sessions], [job, b'second'])
+
+    def test_printer_receives_the_encoded_job(self):
+        images = _receipt_images()
+        PrinterConnectionPool.send('127.0.0.1', self.printer.port, receipt_job_bytes(images))
+        self.assertTrue(self.printer.closed.wait(2))
+        self.assertEqual(bytes(self.printer.sessions[0]), _python_escpos_job(images))
+
+    def test_print_worker_reuses_one_connection(self):
+        PrinterConnectionPool.keep_connections_open()
+        PrinterConnectionPool.send('127.0.0.1', self.printer.port, b'first-')
+        PrinterConnectionPool.send('127.0.0.1', self.printer.port, b'second')
+        self.assertFalse(self.printer.closed.wait(0.2))
+
+        PrinterConnectionPool.close_all()
+        self.assertTrue(self.printer.closed.wait(2))
+        self.assertEqual([bytes(s) for s in self.printer.sessions], [b'first-second'])
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from apps.payment.models import Transaction
+from apps.payment.models import Transaction, PaymentJob, PaymentTrace, PaymentWorkerHeartbeat
 
 
 @admin.register(Transaction)
@@ -28,3 +28,28 @@ class TransactionAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at')
         }),
     )
+
+
+@admin.register(PaymentJob)
+class PaymentJobAdmin(admin.ModelAdmin):
+    list_display = ['job_id', 'order', 'amount', 'status', 'worker_name', 'started_at', 'finished_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['job_id', 'order__order_number']
+    readonly_fields = ['job_id', 'created_at', 'updated_at', 'started_at', 'finished_at']
+
+
+@admin.register(PaymentTrace)
+class PaymentTraceAdmin(admin.ModelAdmin):
+    list_display = ['order_number', 'gateway_name', 'outcome', 'total_ms', 'started_at']
+    list_filter = ['gateway_name', 'outcome', 'started_at']
+    search_fields = ['order_number', 'order_id']
+    readonly_fields = [
+        'order_id', 'order_number', 'gateway_name', 'outcome',
+        'started_at', 'total_ms', 'phases', 'attributes',
+    ]
+
+
+@admin.register(PaymentWorkerHeartbeat)
+class PaymentWorkerHeartbeatAdmin(admin.ModelAdmin):
+    list_display = ['worker_name', 'gateway_name', 'busy', 'beat_at']
+    readonly_fields = ['worker_name', 'gateway_name', 'busy', 'connection_state', 'beat_at']
@@ -0,0 +1,71 @@
+from rest_framework import generics, status
+from rest_framework.response import Response
+from apps.payment.api.pos.pos_serializers import POSConnectionStateSerializer
+from apps.payment.services.payment_service import PaymentService
+from apps.core.api.schema import custom_extend_schema
+from apps.core.api.schema import ResponseStatusCodes
+
+
+class POSWarmupAPIView(generics.GenericAPIView):
+    """
+    API endpoint the kiosk calls when a customer session starts checkout.
+    
+    Pre-connects the POS so that, when the customer taps pay, the card
+    prompt is not delayed by TCP setup. Safe to call repeatedly; each call
+    extends how long the connection is kept ready.
+    """
+    serializer_class = POSConnectionStateSerializer
+    
+    @custom_extend_schema(
+        resource_name="POSWarmup",
+        response_serializer=POSConnectionStateSerializer,
+        status_codes=[ResponseStatusCodes.OK],
+        summary="Warm Up POS Connection",
+        description="Pre-connect to the POS device for the coming payment and return the connection state. Does nothing in async payment mode (the payment worker keeps its own connection ready).",
+        tags=["Payment"],
+        operation_id="payment_pos_warmup",
+    )
+    def post(self, request):
+        """
+        Start (or extend) the pre-connection.
+        
+        Args:
+            request: HTTP request object
+            
+        Returns:
+            Response: POS connection state
+        """
+        state = PaymentService.prepare_checkout()
+        return Response(
+            data=state,
+            status=status.HTTP_200_OK
+        )
+
+
+class POSConnectionStateAPIView(generics.GenericAPIView):
+    """API endpoint for the POS connection state of the serving process."""
+    serializer_class = POSConnectionStateSerializer
+    
+    @custom_extend_schema(
+        resource_name="POSConnectionState",
+        response_serializer=POSConnectionStateSerializer,
+        status_codes=[ResponseStatusCodes.OK],
+        summary="Get POS Connection State",
+        description="Get the POS connection state (ready, connecting, in use, error) and connect/reuse counters.",
+        tags=["Payment"],
+        operation_id="payment_pos_connection_state",
+    )
+    def get(self, request):
+        """
+        Get POS connection state.
+        
+        Args:
+            request: HTTP request object
+            
+        Returns:
+            Response: POS connection state
+        """
+        return Response(
+            data=PaymentService.get_connection_state(),
+            status=status.HTTP_200_OK
+        )
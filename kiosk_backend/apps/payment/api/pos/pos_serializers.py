@@ -0,0 +1,19 @@
+from rest_framework import serializers
+from django.utils.translation import gettext_lazy as _
+
+
+class POSConnectionStateSerializer(serializers.Serializer):
+    """Connection state of the payment gateway (POS) in the serving process."""
+    state = serializers.CharField(label=_('وضعیت اتصال'), help_text=_('idle / connecting / ready / in_use / error; stateless or worker for other setups'))
+    host = serializers.CharField(required=False, label=_('آدرس دستگاه'))
+    port = serializers.IntegerField(required=False, label=_('پورت دستگاه'))
+    kept_warm = serializers.BooleanField(required=False, label=_('اتصال آماده نگه داشته می‌شود'))
+    warm_seconds_left = serializers.IntegerField(required=False, allow_null=True, label=_('زمان باقی‌مانده آماده‌باش (ثانیه)'))
+    connected_for = serializers.FloatField(required=False, allow_null=True, label=_('مدت اتصال فعلی (ثانیه)'))
+    last_probe_ago = serializers.FloatField(required=False, allow_null=True, label=_('آخرین بررسی سلامت (ثانیه پیش)'))
+    last_connect_ms = serializers.FloatField(required=False, allow_null=True, label=_('زمان آخرین اتصال (میلی‌ثانیه)'))
+    last_error = serializers.CharField(required=False, allow_blank=True, label=_('آخرین خطا'))
+    connects = serializers.IntegerField(required=False, label=_('تعداد اتصال‌ها'))
+    reconnects = serializers.IntegerField(required=False, label=_('اتصال مجدد پس از قطع'))
+    warm_hits = serializers.IntegerField(required=False, label=_('پرداخت با اتصال آماده'))
+    cold_connects = serializers.IntegerField(required=False, label=_('پرداخت با اتصال جدید'))
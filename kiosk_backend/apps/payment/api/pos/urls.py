@@ -0,0 +1,10 @@
+from django.urls import path
+from apps.payment.api.pos.pos_apis import (
+    POSWarmupAPIView,
+    POSConnectionStateAPIView
+)
+
+urlpatterns = [
+    path('warmup/', POSWarmupAPIView.as_view(), name='pos-warmup'),
+    path('connection/', POSConnectionStateAPIView.as_view(), name='pos-connection-state'),
+]
@@ -4,5 +4,6 @@ app_name = 'payment'
 
 urlpatterns = [
     path('transactions/', include('apps.payment.api.transactions.urls')),
+    path('pos/', include('apps.payment.api.pos.urls')),
 ]
 
@@ -116,4 +116,25 @@ class BasePaymentGateway(ABC):
             GatewayException: If webhook processing fails
         """
         pass
-
+    
+    def prepare_payment(self) -> Dict[str, Any]:
+        """
+        Get ready for a payment that is about to start (kiosk entered checkout).
+        
+        Gateways with a slow connection setup open it here so the customer
+        does not wait for it; the default does nothing.
+        
+        Returns:
+            Dict[str, Any]: Connection state (see connection_state)
+        """
+        return self.connection_state()
+    
+    def connection_state(self) -> Dict[str, Any]:
+        """
+        Current connection state of the gateway in this process.
+        
+        Returns:
+            Dict[str, Any]: Gateway-specific state; 'state' is 'stateless' for
+                gateways without a persistent connection
+        """
+        return {'state': 'stateless'}
@@ -2,13 +2,17 @@
 
 from __future__ import annotations
 
+import threading
+import time
 import uuid
 from typing import Any, Dict
 
 import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
 
 from apps.logs.services.log_service import LogService
+from apps.payment.tracing import PaymentTracer
 from .base import BasePaymentGateway
 from .exceptions import GatewayException
 
@@ -17,8 +21,20 @@ class BridgePaymentGateway(BasePaymentGateway):
     """
     Django talks JSON to PosBridge on Windows.
     PosBridge loads pna.pcpos.dll and drives the POS.
+
+    Requests go through one keep-alive session per bridge URL, shared by
+    every gateway instance of the process (the adapter builds a new gateway
+    per payment), so the TCP connection to the bridge is reused.
     """
 
+    _sessions: Dict[str, requests.Session] = {}
+    _sessions_lock = threading.Lock()
+
+    # Payment job polling (bridge GET /pay/<id>?wait=)
+    POLL_WAIT_SECONDS = 25
+    SUBMIT_ATTEMPTS = 3
+    FINAL_JOB_STATUSES = frozenset({'done', 'cancelled', 'interrupted'})
+
     def __init__(self, config: Dict[str, Any] = None):
         self.config = config or {}
         host = (
@@ -43,6 +59,38 @@ class BridgePaymentGateway(BasePaymentGateway):
             or getattr(settings, 'POS_BRIDGE_TIMEOUT', 130)
             or 130
         )
+        # Terminal pool on the bridge: pin this kiosk's payments to its POS
+        self.terminal_id = (
+            self.config.get('bridge_terminal')
+            or getattr(settings, 'POS_BRIDGE_TERMINAL', '')
+            or ''
+        )
+        self.kiosk_id = (
+            self.config.get('bridge_kiosk_id')
+            or getattr(settings, 'POS_BRIDGE_KIOSK_ID', '')
+            or ''
+        )
+
+    @classmethod
+    def _session_for(cls, base_url: str) -> requests.Session:
+        with cls._sessions_lock:
+            session = cls._sessions.get(base_url)
+            if session is None:
+                session = requests.Session()
+                # No retries: /pay is not idempotent (a resent request may charge twice)
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=int(getattr(settings, 'POS_BRIDGE_POOL_SIZE', 4) or 4),
+                    max_retries=0,
+                )
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                cls._sessions[base_url] = session
+        return session
+
+    @property
+    def session(self) -> requests.Session:
+        return self._session_for(self.base_url)
 
     def _headers(self) -> Dict[str, str]:
         headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
@@ -52,7 +100,7 @@ class BridgePaymentGateway(BasePaymentGateway):
 
     def test_connection(self) -> Dict[str, Any]:
         try:
-            r = requests.get(
+            r = self.session.get(
                 f'{self.base_url}/health',
                 headers=self._headers(),
                 timeout=15,
@@ -76,16 +124,94 @@ class BridgePaymentGateway(BasePaymentGateway):
                 'details': {'error': str(e)},
             }
 
+    def connection_state(self) -> Dict[str, Any]:
+        """
+        Bridge reachability plus the POS health snapshot the bridge keeps
+        (refreshed in the background there, so this never waits for the DLL).
+
+        With a terminal pool the state is this kiosk's terminal when it is
+        pinned (POS_BRIDGE_TERMINAL), else the pool as a whole.
+        """
+        started = time.monotonic()
+        try:
+            r = self.session.get(
+                f'{self.base_url}/health',
+                headers=self._headers(),
+                timeout=float(getattr(settings, 'POS_BRIDGE_HEALTH_TIMEOUT', 3) or 3),
+            )
+            data = r.json() if r.content else {}
+        except (requests.RequestException, ValueError) as e:
+            return {
+                'state': 'unreachable',
+                'bridge_url': self.base_url,
+                'latency_ms': round((time.monotonic() - started) * 1000, 1),
+                'last_error': str(e),
+            }
+        terminals = data.get('terminals') or {}
+        pool = {
+            terminal_id: {
+                'ok': bool(terminal.get('ok')),
+                'busy': bool(terminal.get('busy')),
+                'queued': terminal.get('queued', 0),
+                'payments': terminal.get('payments', 0),
+                'last_duration_seconds': terminal.get('last_duration_seconds'),
+            }
+            for terminal_id, terminal in terminals.items()
+        }
+        if self.terminal_id in terminals:
+            data = terminals[self.terminal_id]
+        test = data.get('test_connection') or {}
+        if r.status_code == 401:
+            error = 'unauthorized (X-Pos-Bridge-Token)'
+        else:
+            error = data.get('error') or ('' if data.get('ok') else test.get('message', ''))
+        return {
+            'state': 'in_use' if data.get('busy') else ('ready' if data.get('ok') else 'error'),
+            'bridge_url': self.base_url,
+            'latency_ms': round((time.monotonic() - started) * 1000, 1),
+            'pos_ok': bool(data.get('ok')),
+            'dll_loaded': bool(data.get('dll_loaded')),
+            'checked_at': data.get('checked_at'),
+            'age_seconds': data.get('age_seconds'),
+            'terminal_id': self.terminal_id,
+            'terminal_count': len(terminals) or 1,
+            'queued': data.get('queued', 0),
+            'terminals': pool,
+            'last_error': error or '',
+        }
+
     def initiate_payment(
         self, amount: int, order_details: Dict[str, Any], **kwargs
     ) -> Dict[str, Any]:
+        """
+        Submit the payment as a bridge job and follow it until it is final.
+
+        The job is submitted with an idempotency key derived from the order
+        (``order_details['idempotency_key']``, else the order id and number),
+        so a resent or re-run submit for the same order gets the bridge job
+        already queued instead of charging again. The result is read by
+        long-poll (GET /pay/<id>), so a dropped poll only costs the next poll.
+        A bridge without jobs answers the submit synchronously and that
+        answer is used.
+
+        As soon as the bridge accepts the job its id is written to
+        ``order_details['bridge_job_id']`` (also when this call raises), so
+        the caller can store it and reconcile the payment with the bridge
+        journal later.
+        """
         order_number = order_details.get('order_number', '')
         payload = {
             'amount': int(amount),
             'order_number': order_number,
             'payment_id': order_details.get('payment_id', '') or '',
             'bill_id': order_details.get('bill_id', '') or '',
+            'async': True,
+            'idempotency_key': self._idempotency_key(order_details),
         }
+        if self.terminal_id:
+            payload['terminal_id'] = self.terminal_id
+        if self.kiosk_id:
+            payload['kiosk_id'] = self.kiosk_id
         LogService.log_info(
             'payment',
             'bridge_payment_request',
@@ -94,53 +220,196 @@ class BridgePaymentGateway(BasePaymentGateway):
                 'amount': amount,
                 'order_number': order_number,
                 'timeout': self.timeout,
+                'idempotency_key': payload['idempotency_key'],
+                'terminal_id': self.terminal_id,
+                'kiosk_id': self.kiosk_id,
             },
         )
-        try:
-            r = requests.post(
-                f'{self.base_url}/pay',
-                json=payload,
-                headers=self._headers(),
-                timeout=self.timeout,
-            )
-        except requests.Timeout as e:
-            LogService.log_error(
-                'payment',
-                'bridge_payment_timeout',
-                details={'error': str(e), 'timeout': self.timeout},
-            )
-            raise GatewayException(
-                f'زمان انتظار بریج پوز تمام شد ({self.timeout:.0f}s).'
-            ) from e
-        except requests.RequestException as e:
-            LogService.log_error(
-                'payment',
-                'bridge_payment_network_error',
-                details={'error': str(e), 'url': self.base_url},
-            )
-            raise GatewayException(
-                f'اتصال به PosBridge برقرار نشد ({self.base_url}): {e}'
-            ) from e
+        deadline = time.monotonic() + self.timeout
+        r = self._submit(payload, deadline)
+        data = self._json(r)
+        if 'job_id' in data and 'result' in data:
+            # Bridge job queued; the DLL runs it (no separate ACK is visible here)
+            order_details['bridge_job_id'] = data['job_id']
+            PaymentTracer.mark('send')
 
-        try:
-            data = r.json() if r.content else {}
-        except ValueError:
-            data = {}
+        if r.status_code == 401:
+            raise GatewayException('PosBridge توکن نامعتبر است (X-Pos-Bridge-Token).')
+
+        if 'job_id' in data and 'result' in data:
+            job = self._follow_job(data, deadline, order_number)
+            data = {
+                **(job.get('result') or {}),
+                'job_id': job.get('job_id', ''),
+                'terminal_id': job.get('terminal_id', ''),
+            }
+            PaymentTracer.mark('final', bridge_terminal=data['terminal_id'])
+            if job.get('status') == 'interrupted':
+                LogService.log_error(
+                    'payment',
+                    'bridge_payment_interrupted',
+                    details={'job_id': job.get('job_id'), 'order_number': order_number},
+                )
+            http_status = 200
+        else:
+            http_status = r.status_code
 
         LogService.log_info(
             'payment',
             'bridge_payment_response',
             details={
-                'http_status': r.status_code,
+                'http_status': http_status,
                 'success': data.get('success'),
                 'status': data.get('status'),
                 'response_code': data.get('response_code'),
+                'terminal_id': data.get('terminal_id', ''),
             },
         )
+        return self._payment_result(data, amount)
 
-        if r.status_code == 401:
-            raise GatewayException('PosBridge توکن نامعتبر است (X-Pos-Bridge-Token).')
+    def _submit(self, payload: Dict[str, Any], deadline: float) -> requests.Response:
+        """POST /pay, resent with the same idempotency key on connection errors."""
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return self.session.post(
+                    f'{self.base_url}/pay',
+                    json=payload,
+                    headers=self._headers(),
+                    # A bridge without jobs holds the request for the whole card wait
+                    timeout=max(deadline - time.monotonic(), 1.0),
+                )
+            except requests.Timeout as e:
+                LogService.log_error(
+                    'payment',
+                    'bridge_payment_timeout',
+                    details={'error': str(e), 'timeout': self.timeout},
+                )
+                raise GatewayException(
+                    f'زمان انتظار بریج پوز تمام شد ({self.timeout:.0f}s).'
+                ) from e
+            except requests.ConnectionError as e:
+                if attempt >= self.SUBMIT_ATTEMPTS or time.monotonic() + 1 >= deadline:
+                    LogService.log_error(
+                        'payment',
+                        'bridge_payment_network_error',
+                        details={'error': str(e), 'url': self.base_url, 'attempts': attempt},
+                    )
+                    raise GatewayException(
+                        f'اتصال به PosBridge برقرار نشد ({self.base_url}): {e}'
+                    ) from e
+                LogService.log_warning(
+                    'payment',
+                    'bridge_payment_submit_retry',
+                    details={'error': str(e), 'attempt': attempt},
+                )
+                time.sleep(1)
+            except requests.RequestException as e:
+                LogService.log_error(
+                    'payment',
+                    'bridge_payment_network_error',
+                    details={'error': str(e), 'url': self.base_url},
+                )
+                raise GatewayException(
+                    f'اتصال به PosBridge برقرار نشد ({self.base_url}): {e}'
+                ) from e
 
+    def _follow_job(self, job: Dict[str, Any], deadline: float, order_number: str) -> Dict[str, Any]:
+        """
+        Long-poll the job until it is final; poll errors are retried.
+
+        ``deadline`` only bounds the wait while the job is queued behind other
+        payments on the bridge. Then it is withdrawn; if it reached the POS in
+        the meantime (cancel answers 409) it is followed like any running job.
+        A running job gets its own full timeout from the moment it is seen
+        running, since the customer may be paying on the device right then.
+        """
+        job_id = job['job_id']
+        url = f'{self.base_url}/pay/{job_id}'
+        running_deadline = None
+        while job.get('status') not in self.FINAL_JOB_STATUSES:
+            if job.get('status') == 'running' and running_deadline is None:
+                running_deadline = time.monotonic() + self.timeout
+            remaining = (running_deadline or deadline) - time.monotonic()
+            if remaining <= 0:
+                if running_deadline is None:
+                    withdrawn = self._cancel_job(url)
+                    if withdrawn is not None:
+                        job = withdrawn
+                        continue
+                LogService.log_error(
+                    'payment',
+                    'bridge_payment_timeout',
+                    details={
+                        'job_id': job_id,
+                        'order_number': order_number,
+                        'status': job.get('status'),
+                        'timeout': self.timeout,
+                    },
+                )
+                raise GatewayException(
+                    f'زمان انتظار بریج پوز تمام شد ({self.timeout:.0f}s).'
+                )
+            wait = min(self.POLL_WAIT_SECONDS, max(remaining, 0.1))
+            try:
+                r = self.session.get(
+                    url,
+                    params={'wait': round(wait, 1)},
+                    headers=self._headers(),
+                    timeout=wait + 10,
+                )
+            except requests.RequestException as e:
+                LogService.log_warning(
+                    'payment',
+                    'bridge_payment_poll_retry',
+                    details={'job_id': job_id, 'order_number': order_number, 'error': str(e)},
+                )
+                time.sleep(min(1.0, max(remaining, 0)))
+                continue
+            if r.status_code == 401:
+                raise GatewayException('PosBridge توکن نامعتبر است (X-Pos-Bridge-Token).')
+            if r.status_code == 404:
+                raise GatewayException(f'تراکنش {job_id} در PosBridge پیدا نشد.')
+            data = self._json(r)
+            if 'status' in data:
+                job = data
+        return job
+
+    def _cancel_job(self, url: str):
+        """
+        Withdraw a queued job; the job state after it, None if the bridge
+        could not be asked (the caller gives up then).
+
+        A job that reached the POS first comes back 409 with status 'running'.
+        """
+        try:
+            r = self.session.post(f'{url}/cancel', headers=self._headers(), timeout=5)
+        except requests.RequestException:
+            return None
+        data = self._json(r)
+        return data if r.status_code in (200, 409) and 'status' in data else None
+
+    @staticmethod
+    def _idempotency_key(order_details: Dict[str, Any]) -> str:
+        """Same key for every submit of one order's payment (random without an order)."""
+        if order_details.get('idempotency_key'):
+            return str(order_details['idempotency_key'])
+        order_id = order_details.get('order_id')
+        order_number = order_details.get('order_number', '')
+        if order_id or order_number:
+            return f'order-{order_id or ""}-{order_number}'
+        return f'pay-{uuid.uuid4().hex[:12]}'
+
+    @staticmethod
+    def _json(r: requests.Response) -> Dict[str, Any]:
+        try:
+            return r.json() if r.content else {}
+        except ValueError:
+            return {}
+
+    @staticmethod
+    def _payment_result(data: Dict[str, Any], amount: int) -> Dict[str, Any]:
         success = bool(data.get('success'))
         status = data.get('status') or ('success' if success else 'failed')
         txn = (
@@ -148,8 +417,7 @@ class BridgePaymentGateway(BasePaymentGateway):
             or data.get('reference_number')
             or f'BRIDGE-{uuid.uuid4().hex[:12].upper()}'
         )
-
-        result = {
+        return {
             'success': success,
             'transaction_id': txn,
             'status': status,
@@ -163,12 +431,6 @@ class BridgePaymentGateway(BasePaymentGateway):
             'amount': amount,
         }
 
-        if not success and status != 'cancelled':
-            # OrderService expects exception on hard failure in some paths —
-            # keep parity with POS gateway: return dict; caller checks success.
-            pass
-        return result
-
     def verify_payment(self, transaction_id: str, **kwargs) -> Dict[str, Any]:
         return {
             'success': True,
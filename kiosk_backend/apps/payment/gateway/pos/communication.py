@@ -8,13 +8,18 @@ import time
 from typing import Optional
 from ..exceptions import GatewayException
 from apps.logs.services.log_service import LogService
+from apps.payment.tracing import PaymentTracer
 from .connection import POSConnection
 from .response_parser import POSResponseParser
+from .framing import POSFrameReader
 
 
 class POSCommunication:
     """Handles socket communication with POS device."""
     
+    # Seconds between 'still waiting' log entries while the customer pays
+    WAIT_LOG_INTERVAL = 5
+    
     def __init__(self, connection: POSConnection, response_parser: POSResponseParser):
         """
         Initialize communication handler.
@@ -79,6 +84,7 @@ class POSCommunication:
             # Send command
             try:
                 bytes_sent = conn.sendall(command)
+                PaymentTracer.mark('send')
                 LogService.log_info(
                     'payment',
                     'pos_data_sent',
@@ -109,269 +115,21 @@ class POSCommunication:
                 )
                 raise GatewayException(f'Failed to send data to POS: {str(e)}')
             
-            # Small delay to ensure data is sent and device processes it
-            time.sleep(0.5)
-            
             if not wait_for_response:
                 # For commands that don't need response
                 return ''
             
-            # Wait for response - POS devices may take time to respond
-            # Especially for payment transactions that require user interaction
-            # IMPORTANT: Keep connection open and wait for response
-            response = ''
-            start_time = time.time()
-            ack_received = False  # Flag to track if we received an ACK
-            
-            # Set socket timeout for reading (will be adjusted if ACK received)
-            conn.settimeout(1.0)
-            
-            # First, try to get immediate response (acknowledgment)
-            try:
-                # Use select() to check if data is available (non-blocking check)
-                ready, _, _ = select.select([conn], [], [], 2.0)
-                if ready:
-                    chunk = conn.recv(4096)
-                    if chunk:
-                        initial_ack = chunk.decode('utf-8', errors='ignore')
-                        LogService.log_info(
-                            'payment',
-                            'pos_initial_response_received',
-                            details={'response_preview': initial_ack[:100] if len(initial_ack) > 100 else initial_ack}
-                        )
-                        
-                        # Use parser to distinguish true ACK from final cancel/error
-                        # e.g. 0018RS013RS00299PD0011 is cancel (99), not ACK
-                        initial_parsed = self.response_parser.parse(initial_ack)
-                        if initial_parsed.get('status') == 'pending':
-                            ack_received = True
-                            LogService.log_info(
-                                'payment',
-                                'pos_ack_received_waiting_for_final',
-                                details={
-                                    'ack_length': len(initial_ack),
-                                    'ack_preview': initial_ack,
-                                    'note': 'Received ACK, waiting for transaction completion (card swipe/PIN/cancel)'
-                                }
-                            )
-                            # Don't add to response yet - wait for actual transaction response
-                        else:
-                            # Final response already (success / failed / cancelled)
-                            response = initial_ack
-                            LogService.log_info(
-                                'payment',
-                                'pos_final_response_received_immediate',
-                                details={
-                                    'response_preview': initial_ack,
-                                    'status': initial_parsed.get('status'),
-                                    'response_code': initial_parsed.get('response_code'),
-                                }
-                            )
-                else:
-                    # No immediate response - that's OK, device might process and respond later
-                    LogService.log_info('payment', 'pos_no_immediate_response', details={
-                        'note': 'Device is processing, waiting for response'
-                    })
-            except (OSError, socket.error) as e:
-                LogService.log_warning(
-                    'payment',
-                    'pos_initial_response_error',
-                    details={'error': str(e), 'error_type': type(e).__name__}
-                )
-                # Don't disconnect - connection might still be valid
-            
-            # Now wait for actual transaction response (user interaction required)
-            # IMPORTANT: Use select() for event-driven I/O instead of polling
-            # select() waits for socket to be ready for reading (event-driven, not polling!)
-            # This is more efficient than recv() with timeout in a loop
-            
-            # Adjust timeout based on whether ACK was received
-            if ack_received:
-                conn.settimeout(0.5)  # Faster polling if ACK received
-            
-            # If we already got full response from initial check, return it
-            if response:
-                LogService.log_info('payment', 'pos_complete_response_received_immediate')
-                return response
-            
-            while time.time() - start_time < max_wait_time:
-                elapsed = int(time.time() - start_time)
-                
-                # IMPORTANT: Wait for actual response from POS device
-                # Don't timeout early - user might be entering PIN or processing payment
-                # Only return cancelled if we actually receive a cancellation response
-                
-                # Use select() to wait for data (event-driven, not polling!)
-                # select() blocks until socket is ready for reading or timeout
-                # This is much more efficient than recv() with timeout in a loop
-                timeout_seconds = 0.5 if ack_received else 1.0  # Faster check if ACK received
-                ready_sockets, _, _ = select.select([conn], [], [], timeout_seconds)
-                
-                if ready_sockets:
-                    # Socket is ready for reading - data is available!
-                    try:
-                        chunk = conn.recv(4096)
-                        if chunk:
-                            chunk_str = chunk.decode('utf-8', errors='ignore')
-                            response += chunk_str
-                            LogService.log_info(
-                                'payment',
-                                'pos_data_chunk_received',
-                                details={
-                                    'chunk_preview': chunk_str[:100] if len(chunk_str) > 100 else chunk_str,
-                                    'total_response_length': len(response)
-                                }
-                            )
-                            
-                            # If we got some data, try to get more data if available (keep connection open)
-                            # Use select() to check if more data is available (non-blocking check)
-                            # IMPORTANT: Only check once to avoid infinite loop
-                            time.sleep(0.1)  # Small delay to allow data to arrive
-                            try:
-                                # Check if more data is available (non-blocking, only once)
-                                ready, _, _ = select.select([conn], [], [], 0.1)
-                                if ready:
-                                    more_chunk = conn.recv(4096)
-                                    if more_chunk:
-                                        more_str = more_chunk.decode('utf-8', errors='ignore')
-                                        response += more_str
-                                        LogService.log_info(
-                                            'payment',
-                                            'pos_additional_data_received',
-                                            details={'chunk_preview': more_str[:100] if len(more_str) > 100 else more_str}
-                                        )
-                            except (OSError, socket.error):
-                                # No more data or error, we're done
-                                # But connection is still open!
-                                pass
-                        else:
-                            # Socket was ready but recv() returned empty - connection may be closed
-                            # Check if connection is still alive
-                            try:
-                                conn.getpeername()
-                                # Connection is alive, just no data - continue waiting
-                                continue
-                            except (OSError, socket.error):
-                                LogService.log_error('payment', 'pos_connection_closed')
-                                raise GatewayException('اتصال به دستگاه POS قطع شد')
-                        
-                        # Check if response is complete (only if we got data)
-                        if response and len(response) > 10:
-                            # Parse to see if it's ACK or final response
-                            temp_parsed = self.response_parser.parse(response)
-                            
-                            # Log the parsed result for debugging
-                            LogService.log_info(
-                                'payment',
-                                'pos_response_parsed_check',
-                                details={
-                                    'response_length': len(response),
-                                    'response_preview': response[:200],
-                                    'parsed_status': temp_parsed.get('status'),
-                                    'parsed_response_code': temp_parsed.get('response_code'),
-                                    'parsed_success': temp_parsed.get('success'),
-                                    'is_pending': temp_parsed.get('status') == 'pending'
-                                }
-                            )
-                            
-                            if temp_parsed.get('status') == 'pending':
-                                # This is still just an ACK, not final response
-                                # Mark that we received an ACK
-                                ack_received = True
-                                LogService.log_info(
-                                    'payment',
-                                    'pos_ack_received_waiting_for_final',
-                                    details={
-                                        'response_length': len(response),
-                                        'response_preview': response[:100],
-                                        'note': 'Still waiting for transaction completion (card swipe/PIN/cancel). ACK received but no SR/RN/PN tags found.'
-                                    }
-                                )
-                                # Clear response and continue waiting for actual transaction response
-                                response = ''
-                                # Break from "get more data" loop and continue main loop
-                                break
-                            else:
-                                # This is the final response (success, failed, or cancelled)
-                                LogService.log_info(
-                                    'payment',
-                                    'pos_complete_response_received',
-                                    details={
-                                        'response_length': len(response),
-                                        'response_preview': response[:200],
-                                        'status': temp_parsed.get('status'),
-                                        'response_code': temp_parsed.get('response_code'),
-                                        'success': temp_parsed.get('success'),
-                                        'is_cancelled': temp_parsed.get('status') == 'cancelled'
-                                    }
-                                )
-                                break
-                    except (OSError, socket.error) as e:
-                        LogService.log_error(
-                            'payment',
-                            'pos_receive_error',
-                            details={'error': str(e), 'elapsed': elapsed}
-                        )
-                        raise GatewayException(f'خطا در دریافت داده از POS: {str(e)}')
-                else:
-                    # select() timeout - no data available yet, continue waiting
-                    # This is NOT polling - select() blocks until data is available or timeout
-                    # Connection is still alive, just no data yet
-                    elapsed = int(time.time() - start_time)
-                    
-                    # Log periodically to show we're still waiting
-                    log_interval = 5  # Log every 5 seconds
-                    if elapsed % log_interval == 0 and elapsed > 0:
-                        LogService.log_info(
-                            'payment',
-                            'pos_waiting_for_response',
-                            details={
-                                'elapsed': elapsed,
-                                'max_wait_time': max_wait_time,
-                                'ack_received': ack_received,
-                                'note': f'Waiting for response from POS (event-driven with select()). ACK received: {ack_received}. Will wait up to {max_wait_time} seconds for actual response.'
-                            }
-                        )
-                    # Check if connection is still alive
-                    try:
-                        conn.getpeername()  # This will raise if connection is dead
-                    except (OSError, socket.error) as e:
-                        LogService.log_error(
-                            'payment',
-                            'pos_connection_lost',
-                            details={'error': str(e), 'elapsed': elapsed}
-                        )
-                        raise GatewayException('اتصال به دستگاه POS قطع شد')
-                    continue
-            
-            if not response:
-                elapsed = int(time.time() - start_time)
-                LogService.log_error(
-                    'payment',
-                    'pos_no_response_received',
-                    details={
-                        'elapsed_seconds': elapsed,
-                        'max_wait_time': max_wait_time,
-                        'ack_received': ack_received,
-                        'note': 'No response received from POS device after waiting. Device may have timed out or user cancelled.'
-                    }
-                )
-                # Raise exception if no response received
-                raise GatewayException(
-                    f'پاسخ از دستگاه POS دریافت نشد. '
-                    f'لطفاً بررسی کنید که تراکنش روی دستگاه انجام شده باشد. '
-                    f'(زمان انتظار: {elapsed} ثانیه از {max_wait_time} ثانیه)'
-                )
-            else:
-                LogService.log_info(
-                    'payment',
-                    'pos_full_response_received',
-                    details={
-                        'response_length': len(response),
-                        'response_preview': response[:200] if len(response) > 200 else response
-                    }
-                )
-            
+            # Wait for the final response - POS devices may take time to respond
+            # (user interaction: card swipe, PIN entry or cancel)
+            response = self._read_final_response(conn, max_wait_time)
+            LogService.log_info(
+                'payment',
+                'pos_full_response_received',
+                details={
+                    'response_length': len(response),
+                    'response_preview': response[:200] if len(response) > 200 else response
+                }
+            )
             return response
         except GatewayException:
             # Re-raise GatewayException as is
@@ -394,4 +152,157 @@ class POSCommunication:
             )
             # Don't disconnect immediately - connection might still be valid
             raise GatewayException(f'Failed to communicate with POS: {str(e)}')
-
+    
+    def _read_final_response(self, conn, max_wait_time: int) -> str:
+        """
+        Read frames from the POS until a final (non-ACK) response arrives.
+        
+        Bytes are collected by POSFrameReader and each frame is handled the
+        moment its declared length is complete, so there is no fixed delay;
+        select() only waits for the next bytes, the flush window of an
+        unframed/stalled response, or the periodic wait log.
+        
+        Args:
+            conn: Connected socket
+            max_wait_time: Maximum time to wait for the final response in seconds
+            
+        Returns:
+            str: Final response frame (length prefix included, if any)
+            
+        Raises:
+            GatewayException: On timeout, connection loss or receive error
+        """
+        reader = POSFrameReader()
+        started = time.monotonic()
+        deadline = started + max_wait_time
+        last_data_at = started
+        next_wait_log = started + self.WAIT_LOG_INTERVAL
+        ack_received = False
+        
+        # select() decides when to read, so recv() never blocks for long
+        conn.settimeout(1.0)
+        
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            wait = min(deadline, next_wait_log) - now
+            flush_after = reader.flush_after()
+            if flush_after is not None:
+                wait = min(wait, last_data_at + flush_after - now)
+            
+            try:
+                ready, _, _ = select.select([conn], [], [], max(wait, 0))
+                chunk = conn.recv(4096) if ready else None
+            except (OSError, socket.error) as e:
+                LogService.log_error(
+                    'payment',
+                    'pos_receive_error',
+                    details={'error': str(e), 'elapsed': round(time.monotonic() - started, 3)}
+                )
+                raise GatewayException(f'خطا در دریافت داده از POS: {str(e)}')
+            now = time.monotonic()
+            
+            if chunk == b'':
+                # Peer closed; whatever is buffered is the last thing it sent
+                leftover = reader.flush()
+                if leftover:
+                    response = leftover.decode('utf-8', errors='ignore')
+                    if self.response_parser.parse(response).get('status') != 'pending':
+                        return response
+                LogService.log_error(
+                    'payment',
+                    'pos_connection_closed',
+                    details={'elapsed': round(now - started, 3), 'ack_received': ack_received}
+                )
+                raise GatewayException('اتصال به دستگاه POS قطع شد')
+            
+            if chunk:
+                last_data_at = now
+                frames = reader.feed(chunk)
+                LogService.log_info(
+                    'payment',
+                    'pos_data_chunk_received',
+                    details={
+                        'chunk_length': len(chunk),
+                        'chunk_preview': chunk[:100].decode('utf-8', errors='ignore'),
+                        'frames_completed': len(frames),
+                        'buffered_bytes': reader.pending,
+                    }
+                )
+            else:
+                frames = []
+                flush_after = reader.flush_after()
+                if flush_after is not None and now - last_data_at >= flush_after:
+                    if reader.is_framed:
+                        LogService.log_warning(
+                            'payment',
+                            'pos_frame_incomplete_flushed',
+                            details={
+                                'buffered_bytes': reader.pending,
+                                'note': 'Length prefix larger than the data received; using data as is'
+                            }
+                        )
+                    frames = [reader.flush()]
+                if now >= next_wait_log:
+                    next_wait_log = now + self.WAIT_LOG_INTERVAL
+                    LogService.log_info(
+                        'payment',
+                        'pos_waiting_for_response',
+                        details={
+                            'elapsed': int(now - started),
+                            'max_wait_time': max_wait_time,
+                            'ack_received': ack_received,
+                        }
+                    )
+            
+            for frame in frames:
+                response = frame.decode('utf-8', errors='ignore')
+                parsed = self.response_parser.parse(response)
+                if parsed.get('status') == 'pending':
+                    # ACK only; the transaction result follows in a later frame
+                    ack_received = True
+                    PaymentTracer.mark('ack')
+                    LogService.log_info(
+                        'payment',
+                        'pos_ack_received_waiting_for_final',
+                        details={
+                            'ack_preview': response[:100],
+                            'elapsed': round(now - started, 3),
+                            'note': 'Received ACK, waiting for transaction completion (card swipe/PIN/cancel)'
+                        }
+                    )
+                    continue
+                
+                LogService.log_info(
+                    'payment',
+                    'pos_complete_response_received',
+                    details={
+                        'response_length': len(response),
+                        'response_preview': response[:200],
+                        'status': parsed.get('status'),
+                        'response_code': parsed.get('response_code'),
+                        'success': parsed.get('success'),
+                        'elapsed': round(now - started, 3),
+                        'trailing_bytes': reader.pending,
+                    }
+                )
+                return response
+        
+        elapsed = int(time.monotonic() - started)
+        LogService.log_error(
+            'payment',
+            'pos_no_response_received',
+            details={
+                'elapsed_seconds': elapsed,
+                'max_wait_time': max_wait_time,
+                'ack_received': ack_received,
+                'buffered_bytes': reader.pending,
+                'note': 'No response received from POS device after waiting. Device may have timed out or user cancelled.'
+            }
+        )
+        raise GatewayException(
+            f'پاسخ از دستگاه POS دریافت نشد. '
+            f'لطفاً بررسی کنید که تراکنش روی دستگاه انجام شده باشد. '
+            f'(زمان انتظار: {elapsed} ثانیه از {max_wait_time} ثانیه)'
+        )
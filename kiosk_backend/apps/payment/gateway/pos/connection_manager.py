@@ -0,0 +1,263 @@
+"""
+Warm (pre-connected) TCP connection to a POS device.
+
+Without it the socket is opened only when the payment starts, so TCP setup
+(and a slow or sleeping device accepting it) is added to the time the
+customer waits for the card prompt. The manager opens the connection ahead
+of time, checks it while idle and reconnects in the background, and the
+payment takes the ready socket.
+"""
+
+import math
+import select
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+
+from apps.logs.services.log_service import LogService
+from apps.payment.tracing import PaymentTracer
+from ..exceptions import GatewayException
+from .connection import POSConnection
+
+
+class POSConnectionManager:
+    """
+    One POS connection per device, shared by all gateway instances of a process.
+
+    States: ``idle`` (not kept warm, no socket), ``connecting``, ``ready``
+    (connected and idle), ``in_use`` (a transaction owns the socket) and
+    ``error`` (last connect failed; retried with backoff while warm).
+
+    The socket is closed after every transaction (the device must start the
+    next one on a clean stream); while the connection is kept warm a new one
+    is opened right away in the background.
+    """
+
+    _lock = threading.Lock()
+    _managers: Dict[Tuple[str, int], 'POSConnectionManager'] = {}
+
+    # Device closes idle clients on its own; probing finds that early
+    PROBE_INTERVAL = 5.0
+    RECONNECT_MIN_BACKOFF = 1.0
+    RECONNECT_MAX_BACKOFF = 30.0
+
+    def __init__(self, tcp_host: str, tcp_port: int, timeout: int = 30):
+        self.connection = POSConnection(tcp_host, tcp_port, timeout)
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._state = 'idle'
+        self._warm_until = 0.0
+        self._backoff = 0.0
+        self._next_attempt_at = 0.0
+        self._connected_at: Optional[float] = None
+        self._last_probe_at: Optional[float] = None
+        self._last_error = ''
+        self._last_connect_ms: Optional[float] = None
+        self._stats = {'connects': 0, 'reconnects': 0, 'warm_hits': 0, 'cold_connects': 0}
+
+    @classmethod
+    def for_device(cls, tcp_host: str, tcp_port: int, timeout: int = 30) -> 'POSConnectionManager':
+        """Return the process-wide manager of a device (created on first use)."""
+        key = (tcp_host, int(tcp_port))
+        with cls._lock:
+            manager = cls._managers.get(key)
+            if manager is None:
+                manager = cls._managers[key] = cls(tcp_host, int(tcp_port), timeout)
+        return manager
+
+    @staticmethod
+    def probe_interval() -> float:
+        return max(float(getattr(settings, 'POS_PROBE_INTERVAL', POSConnectionManager.PROBE_INTERVAL) or 0), 0.5)
+
+    def warm(self, hold_seconds: Optional[float] = None, persistent: bool = False) -> Dict[str, Any]:
+        """
+        Connect in the background and keep the connection ready.
+
+        Args:
+            hold_seconds: How long to keep it ready (default POS_WARM_HOLD_SECONDS);
+                a later call extends the window
+            persistent: Keep it ready until the process exits (payment worker)
+
+        Returns:
+            Dict[str, Any]: Connection state after the request (see state())
+        """
+        if hold_seconds is None:
+            hold_seconds = float(getattr(settings, 'POS_WARM_HOLD_SECONDS', 120) or 0)
+        with self._cond:
+            until = math.inf if persistent else time.monotonic() + max(hold_seconds, 0)
+            self._warm_until = max(self._warm_until, until)
+            # A checkout request is a good reason to retry a failed device now
+            self._next_attempt_at = 0.0
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name=f'pos-warm-{self.connection.tcp_host}:{self.connection.tcp_port}',
+                    daemon=True,
+                )
+                self._thread.start()
+            self._cond.notify_all()
+        return self.state()
+
+    def acquire(self) -> POSConnection:
+        """
+        Take the connection for one transaction, connecting if it is not ready.
+
+        Waits for a background connect already in progress instead of
+        starting a second one, and gives up if it is still running after
+        the connection timeout.
+
+        Returns:
+            POSConnection: Connected POS connection (release() it afterwards)
+
+        Raises:
+            GatewayException: Device busy in this process, still connecting or cannot be reached
+        """
+        with self._cond:
+            deadline = time.monotonic() + self.connection.timeout
+            while self._state == 'connecting' and time.monotonic() < deadline:
+                self._cond.wait(deadline - time.monotonic())
+            if self._state == 'connecting':
+                # The background connect still owns the socket; connecting here
+                # too would race it and leave the state 'ready' under a payment
+                raise GatewayException('POS connection is still being opened; try again')
+            if self._state == 'in_use':
+                raise GatewayException('POS connection is already in use')
+            warm = self._state == 'ready' and self._is_healthy()
+            if not warm:
+                self.connection.disconnect()
+            self._state = 'in_use'
+
+        if warm:
+            self._stats['warm_hits'] += 1
+            PaymentTracer.mark('connect', pos_warm=True)
+            LogService.log_info('payment', 'pos_warm_connection_used', details={
+                'host': self.connection.tcp_host,
+                'port': self.connection.tcp_port,
+                'connected_for': round(time.monotonic() - (self._connected_at or time.monotonic()), 1),
+            })
+            return self.connection
+
+        try:
+            self._connect()
+        except GatewayException:
+            with self._cond:
+                self._state = 'error'
+                self._cond.notify_all()
+            raise
+        self._stats['cold_connects'] += 1
+        PaymentTracer.mark('connect', pos_warm=False, pos_connect_ms=self._last_connect_ms)
+        return self.connection
+
+    def release(self) -> None:
+        """Close the transaction's socket; reconnect in the background while warm."""
+        self.connection.disconnect()
+        with self._cond:
+            self._connected_at = None
+            self._state = 'idle'
+            self._next_attempt_at = 0.0
+            self._cond.notify_all()
+
+    def state(self) -> Dict[str, Any]:
+        """Snapshot for health/admin views."""
+        now = time.monotonic()
+        with self._cond:
+            warm_remaining = self._warm_until - now
+            return {
+                'host': self.connection.tcp_host,
+                'port': self.connection.tcp_port,
+                'state': self._state,
+                'kept_warm': warm_remaining > 0,
+                'warm_seconds_left': None if math.isinf(warm_remaining) else max(round(warm_remaining), 0),
+                'connected_for': round(now - self._connected_at, 1) if self._connected_at else None,
+                'last_probe_ago': round(now - self._last_probe_at, 1) if self._last_probe_at else None,
+                'last_connect_ms': self._last_connect_ms,
+                'last_error': self._last_error,
+                **self._stats,
+            }
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                now = time.monotonic()
+                if now >= self._warm_until and self._state != 'in_use':
+                    # Not wanted any more: give the device back to other clients
+                    if self._state == 'ready':
+                        self.connection.disconnect()
+                        self._connected_at = None
+                    self._state = 'idle'
+                    self._thread = None
+                    return
+                action = None
+                if self._state == 'ready':
+                    self._last_probe_at = now
+                    if not self._is_healthy():
+                        self.connection.disconnect()
+                        self._connected_at = None
+                        self._state = 'idle'
+                        self._stats['reconnects'] += 1
+                        LogService.log_warning('payment', 'pos_warm_connection_lost', details={
+                            'host': self.connection.tcp_host,
+                            'port': self.connection.tcp_port,
+                        })
+                        action = 'connect'
+                elif self._state in ('idle', 'error') and now >= self._next_attempt_at:
+                    action = 'connect'
+                if action == 'connect':
+                    self._state = 'connecting'
+                else:
+                    wait = self.probe_interval()
+                    if self._state == 'error':
+                        wait = min(wait, max(self._next_attempt_at - now, 0))
+                    if now < self._warm_until:
+                        wait = min(wait, self._warm_until - now)
+                    self._cond.wait(wait)
+                    continue
+
+            try:
+                self._connect()
+            except GatewayException:
+                with self._cond:
+                    self._backoff = min(
+                        max(self._backoff * 2, self.RECONNECT_MIN_BACKOFF),
+                        float(getattr(settings, 'POS_RECONNECT_MAX_BACKOFF', self.RECONNECT_MAX_BACKOFF)),
+                    )
+                    self._next_attempt_at = time.monotonic() + self._backoff
+                    self._state = 'error'
+                    self._cond.notify_all()
+                continue
+            with self._cond:
+                self._backoff = 0.0
+                self._state = 'ready'
+                self._cond.notify_all()
+
+    def _connect(self) -> None:
+        started = time.monotonic()
+        try:
+            self.connection.connect()
+        except GatewayException as e:
+            self._last_error = str(e)
+            raise
+        now = time.monotonic()
+        self._connected_at = now
+        self._last_error = ''
+        self._last_connect_ms = round((now - started) * 1000, 1)
+        self._stats['connects'] += 1
+
+    def _is_healthy(self) -> bool:
+        """
+        Idle socket check: the peer has not closed it and sent nothing.
+
+        The device does not talk unprompted, so readable data on an idle
+        socket is either EOF or leftovers that would be mixed into the next
+        response; both mean reconnect.
+        """
+        sock = self.connection.socket
+        if sock is None:
+            return False
+        try:
+            readable, _, errored = select.select([sock], [], [sock], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable and not errored
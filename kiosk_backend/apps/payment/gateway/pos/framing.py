@@ -0,0 +1,96 @@
+"""
+Frame reader for POS device responses.
+
+Pardakht Novin responses carry a 4-digit length prefix counting the bytes
+after it, e.g. ``0018RS013RS00299PD0011``. TCP may split one frame over
+several reads or merge the ACK and the final response into one read, so
+bytes are accumulated here and complete frames are cut off by length.
+"""
+
+from typing import List, Optional
+
+LENGTH_PREFIX_SIZE = 4
+
+
+class POSFrameReader:
+    """
+    Incremental splitter of a POS byte stream into response frames.
+
+    Bytes that do not start with a length prefix (devices answering in
+    ``dll_exact`` mode) have no declared end; they are returned as one frame
+    by ``flush`` once the line has been quiet for ``idle_seconds``.
+    """
+
+    # Quiet time after which unframed bytes are taken as a complete response
+    IDLE_SECONDS = 0.3
+    # Quiet time after which a prefixed frame that never reached its declared
+    # length is returned anyway (device counting its length differently)
+    STALLED_FRAME_SECONDS = 1.0
+
+    def __init__(self, idle_seconds: Optional[float] = None, stalled_frame_seconds: Optional[float] = None):
+        self.idle_seconds = self.IDLE_SECONDS if idle_seconds is None else idle_seconds
+        self.stalled_frame_seconds = (
+            self.STALLED_FRAME_SECONDS if stalled_frame_seconds is None else stalled_frame_seconds
+        )
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """
+        Add received bytes and return every frame completed by them.
+
+        Args:
+            data: Bytes from one recv()
+
+        Returns:
+            List[bytes]: Complete frames (length prefix included), in order
+        """
+        self._buffer.extend(data)
+        frames = []
+        while True:
+            declared = self._declared_length()
+            if declared is None:
+                break
+            end = LENGTH_PREFIX_SIZE + declared
+            if len(self._buffer) < end:
+                break
+            frames.append(bytes(self._buffer[:end]))
+            del self._buffer[:end]
+        return frames
+
+    def _declared_length(self) -> Optional[int]:
+        """Length declared by the prefix at the buffer start, None if not (yet) known."""
+        head = bytes(self._buffer[:LENGTH_PREFIX_SIZE])
+        if len(head) < LENGTH_PREFIX_SIZE or not head.isdigit():
+            return None
+        declared = int(head)
+        return declared if declared > 0 else None
+
+    @property
+    def pending(self) -> int:
+        """Number of buffered bytes not yet returned as a frame."""
+        return len(self._buffer)
+
+    @property
+    def is_framed(self) -> bool:
+        """Whether the buffered bytes start with a length prefix."""
+        return self._declared_length() is not None
+
+    def flush_after(self) -> Optional[float]:
+        """
+        Quiet time after which ``flush`` should be called, None when nothing
+        is buffered.
+        """
+        if not self._buffer:
+            return None
+        if self.is_framed:
+            return self.stalled_frame_seconds
+        if len(self._buffer) < LENGTH_PREFIX_SIZE and bytes(self._buffer).isdigit():
+            # Possibly the first bytes of a prefix; give the rest the longer window
+            return self.stalled_frame_seconds
+        return self.idle_seconds
+
+    def flush(self) -> bytes:
+        """Return and clear whatever is buffered (unframed or stalled frame)."""
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
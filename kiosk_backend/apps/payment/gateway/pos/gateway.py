@@ -7,6 +7,7 @@ from typing import Dict, Any
 from ..base import BasePaymentGateway
 from ..exceptions import GatewayException
 from .connection import POSConnection
+from .connection_manager import POSConnectionManager
 from .message_builder import POSMessageBuilder
 from .communication import POSCommunication
 from .response_parser import POSResponseParser
@@ -26,6 +27,7 @@ class POSPaymentGateway(BasePaymentGateway):
     - Tag-based message format (same as DLL)
     - Payment ID and Bill ID support
     - Connection keep-alive during transaction
+    - Pre-connection at checkout start (POSConnectionManager)
     - Thread-safe concurrent transaction handling
     """
     
@@ -51,13 +53,15 @@ class POSPaymentGateway(BasePaymentGateway):
         self.merchant_id = self.config.get('merchant_id', '')
         self.terminal_id = self.config.get('terminal_id', '')
         
-        # Initialize components
-        self.connection = POSConnection(self.tcp_host, self.tcp_port, self.timeout)
+        # Initialize components; the connection is shared per device so a
+        # socket pre-connected at checkout start is the one the payment uses
+        self.connection_manager = POSConnectionManager.for_device(self.tcp_host, self.tcp_port, self.timeout)
+        self.connection = self.connection_manager.connection
         self.message_builder = POSMessageBuilder(self.config, self.terminal_id, self.merchant_id)
         self.response_parser = POSResponseParser()
         self.communication = POSCommunication(self.connection, self.response_parser)
         self.payment_operations = POSPaymentOperations(
-            self.connection,
+            self.connection_manager,
             self.message_builder,
             self.communication,
             self.response_parser
@@ -74,7 +78,34 @@ class POSPaymentGateway(BasePaymentGateway):
                 - connection_type: str - Type of connection used
                 - details: dict - Additional connection details
         """
-        return self.connection.test_connection()
+        state = self.connection_manager.state()
+        if state['state'] in ('ready', 'in_use'):
+            # Opening a second socket may be refused while the device has a client
+            return {
+                'success': True,
+                'message': f'اتصال TCP/IP برقرار است (IP: {self.tcp_host}, Port: {self.tcp_port})',
+                'connection_type': 'tcp',
+                'details': state,
+            }
+        return POSConnection(self.tcp_host, self.tcp_port, self.timeout).test_connection()
+    
+    def prepare_payment(self) -> Dict[str, Any]:
+        """
+        Pre-connect to the POS so the coming payment skips TCP setup.
+        
+        Returns:
+            Dict[str, Any]: Connection state (see POSConnectionManager.state)
+        """
+        return self.connection_manager.warm()
+    
+    def connection_state(self) -> Dict[str, Any]:
+        """
+        Current state of the POS connection in this process.
+        
+        Returns:
+            Dict[str, Any]: Connection state (see POSConnectionManager.state)
+        """
+        return self.connection_manager.state()
     
     def initiate_payment(self, amount: int, order_details: Dict[str, Any], **kwargs) -> Dict[str, Any]:
         """
@@ -130,19 +161,6 @@ class POSPaymentGateway(BasePaymentGateway):
                 }
             )
             
-            # Ensure connection is clean before starting new transaction
-            # Disconnect any existing connection to start fresh
-            if self.connection.is_connected():
-                LogService.log_info(
-                    'payment',
-                    'pos_cleaning_connection_before_transaction',
-                    details={
-                        'order_number': order_number,
-                        'note': 'Disconnecting existing connection to start fresh transaction'
-                    }
-                )
-                self.connection.disconnect()
-            
             # Process payment
             result = self.payment_operations.initiate_payment(amount, order_details)
             
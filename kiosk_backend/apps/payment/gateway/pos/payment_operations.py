@@ -3,12 +3,11 @@ Payment operations for POS gateway.
 """
 
 import socket
-import time
 from typing import Dict, Any
 from django.utils import timezone
 from ..exceptions import GatewayException
 from apps.logs.services.log_service import LogService
-from .connection import POSConnection
+from .connection_manager import POSConnectionManager
 from .message_builder import POSMessageBuilder
 from .communication import POSCommunication
 from .response_parser import POSResponseParser
@@ -17,18 +16,19 @@ from .response_parser import POSResponseParser
 class POSPaymentOperations:
     """Handles payment operations for POS gateway."""
     
-    def __init__(self, connection: POSConnection, message_builder: POSMessageBuilder,
+    def __init__(self, connection_manager: POSConnectionManager, message_builder: POSMessageBuilder,
                  communication: POSCommunication, response_parser: POSResponseParser):
         """
         Initialize payment operations.
         
         Args:
-            connection: Connection manager
+            connection_manager: Shared (possibly pre-connected) device connection
             message_builder: Message builder
             communication: Communication handler
             response_parser: Response parser
         """
-        self.connection = connection
+        self.connection_manager = connection_manager
+        self.connection = connection_manager.connection
         self.message_builder = message_builder
         self.communication = communication
         self.response_parser = response_parser
@@ -38,7 +38,7 @@ class POSPaymentOperations:
         Initiate payment transaction with POS device.
         
         This method follows the exact same flow as the DLL:
-        1. Test connection first (like DLL's TestConnection())
+        1. Take the (pre-)connected socket (like DLL's TestConnection())
         2. Build payment request message
         3. Send transaction (like DLL's send_transaction())
         4. Wait for response with connection alive
@@ -59,56 +59,23 @@ class POSPaymentOperations:
         payment_id = order_details.get('payment_id', '')
         bill_id = order_details.get('bill_id', '')
         
-        # IMPORTANT: Follow DLL's exact flow
-        # Step 1: Test connection first (like DLL's TestConnection())
-        LogService.log_info('payment', 'pos_testing_connection', details={
+        # Step 1: Take the connection (like DLL's TestConnection()); the
+        # manager hands over a pre-connected socket when the kiosk warmed it
+        # at checkout start, otherwise it connects here
+        LogService.log_info('payment', 'pos_acquiring_connection', details={
             'host': self.connection.tcp_host,
-            'port': self.connection.tcp_port
+            'port': self.connection.tcp_port,
+            'connection_state': self.connection_manager.state()['state'],
         })
         try:
-            connection_test = self.connection.test_connection()
-            if not connection_test.get('success', False):
-                LogService.log_error('payment', 'pos_connection_test_failed', details={
-                    'host': self.connection.tcp_host,
-                    'port': self.connection.tcp_port,
-                    'test_result': connection_test
-                })
-                raise GatewayException('اتصال به دستگاه POS برقرار نشد. لطفاً IP و Port را بررسی کنید.')
-            LogService.log_info('payment', 'pos_connection_test_success', details={
+            self.connection_manager.acquire()
+        except GatewayException as e:
+            LogService.log_error('payment', 'pos_connection_test_failed', details={
                 'host': self.connection.tcp_host,
-                'port': self.connection.tcp_port
+                'port': self.connection.tcp_port,
+                'error': str(e),
             })
-        except GatewayException:
-            raise
-        except (socket.error, ConnectionError, TimeoutError) as e:
-            LogService.log_warning(
-                'payment',
-                'pos_connection_test_error',
-                details={'error': str(e), 'error_type': type(e).__name__}
-            )
-            # Try to reconnect
-            try:
-                if self.connection.is_connected():
-                    self.connection.disconnect()
-                time.sleep(1)
-                self.connection.connect()
-                LogService.log_info('payment', 'pos_reconnection_success', details={
-                    'host': self.connection.tcp_host,
-                    'port': self.connection.tcp_port
-                })
-            except Exception as reconnect_error:
-                LogService.log_error('payment', 'pos_reconnection_failed', details={
-                    'error': str(reconnect_error),
-                    'error_type': type(reconnect_error).__name__
-                })
-                raise GatewayException(f'اتصال به دستگاه POS برقرار نشد: {str(reconnect_error)}')
-        except Exception as e:
-            LogService.log_error(
-                'payment',
-                'pos_connection_test_unexpected_error',
-                details={'error': str(e), 'error_type': type(e).__name__}
-            )
-            raise GatewayException(f'خطای غیرمنتظره در تست اتصال: {str(e)}')
+            raise GatewayException('اتصال به دستگاه POS برقرار نشد. لطفاً IP و Port را بررسی کنید.')
         
         # Step 2: Build additional_data dictionary (like DLL sets properties)
         additional_data = {}
@@ -119,15 +86,15 @@ class POSPaymentOperations:
         if bill_id:
             additional_data['bill_id'] = bill_id
         
-        # Step 3: Build payment request message (DLL builds this internally)
-        # We build it explicitly to match DLL's format
-        request_bytes = self.message_builder.build_payment_request(
-            amount=amount,
-            order_number=order_number,
-            additional_data=additional_data if additional_data else None
-        )
-        
         try:
+            # Step 3: Build payment request message (DLL builds this internally)
+            # We build it explicitly to match DLL's format
+            request_bytes = self.message_builder.build_payment_request(
+                amount=amount,
+                order_number=order_number,
+                additional_data=additional_data if additional_data else None
+            )
+            
             # Step 4: Send transaction (like DLL's send_transaction())
             # Payment transactions require user interaction (card swipe, PIN entry)
             # So we need to wait longer (up to 2 minutes)
@@ -192,20 +159,11 @@ class POSPaymentOperations:
             )
             raise GatewayException(f'Failed to initiate payment: {str(e)}')
         finally:
-            # IMPORTANT: Disconnect after transaction to ensure clean state for next transaction
-            # This prevents response mixing and connection conflicts when next transaction starts
-            # The lock in gateway.py ensures transactions are sequential, so it's safe to disconnect
+            # IMPORTANT: Close the socket after the transaction so the next one
+            # starts on a clean stream (no response mixing); a kept-warm
+            # connection is reopened in the background right away
             try:
-                if self.connection.is_connected():
-                    LogService.log_info(
-                        'payment',
-                        'pos_disconnecting_after_transaction',
-                        details={
-                            'order_number': order_number,
-                            'note': 'Disconnecting after transaction to ensure clean state for next transaction'
-                        }
-                    )
-                    self.connection.disconnect()
+                self.connection_manager.release()
             except Exception as e:
                 LogService.log_warning(
                     'payment',
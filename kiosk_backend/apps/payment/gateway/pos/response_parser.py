@@ -3,7 +3,7 @@ Response parser for POS device responses.
 """
 
 from typing import Dict, Any, List, Optional
-from apps.logs.services.log_service import LogService
+from .tag_tokenizer import POSTagTokenizer, POSTokens
 
 
 class POSResponseParser:
@@ -12,29 +12,14 @@ class POSResponseParser:
     # User cancel on some Pardakht Novin devices returns 99 instead of 81
     CANCEL_CODES = {'81', '99'}
 
+    # First RS code values treated as success when no RS00XX code is present
+    # (RS136 / RS013 wrap the full response; RS01 / RS1 seen in device logs)
+    SUCCESS_RS_CODES = {'136', '013', '01', '1'}
+
     @staticmethod
     def extract_rs_codes(response: str) -> List[str]:
         """Extract all RS numeric codes from a POS response payload."""
-        all_rs_codes = []
-        idx = 0
-        while idx < len(response):
-            rs_idx = response.find('RS', idx)
-            if rs_idx == -1:
-                break
-
-            code_start = rs_idx + 2
-            code_str = ''
-            for i in range(code_start, min(code_start + 5, len(response))):
-                if response[i].isdigit():
-                    code_str += response[i]
-                else:
-                    break
-
-            if code_str:
-                all_rs_codes.append(code_str)
-
-            idx = rs_idx + 1
-        return all_rs_codes
+        return POSTagTokenizer.tokenize(response).rs_codes
 
     @staticmethod
     def extract_status_code_from_rs00(code: str) -> Optional[str]:
@@ -69,11 +54,24 @@ class POSResponseParser:
         
         Based on Pardakht Novin protocol:
         - Simple format: 0018RS013RS00299PD0011 (with length prefix)
-        - Full format: RS{response_code}SR{serial}RN{reference}TI{terminal}PN{pan}...
+        - Full format: RS{len}RS{len}{code}SR{len}{serial}RN{len}{reference}TM{len}{terminal}PN{len}{pan}...
         
         Args:
             response: Response string from POS
             
+        Returns:
+            Dict[str, Any]: Parsed response data
+        """
+        return self.parse_tokens(POSTagTokenizer.tokenize(response or ''), response)
+    
+    def parse_tokens(self, tokens: POSTokens, response: str) -> Dict[str, Any]:
+        """
+        Build the parse result from already tokenized response.
+        
+        Args:
+            tokens: Output of POSTagTokenizer for the response
+            response: The raw response (kept as raw_response)
+            
         Returns:
             Dict[str, Any]: Parsed response data
         """
@@ -92,196 +90,32 @@ class POSResponseParser:
         if not response:
             return result
         
-        # Check if response starts with length prefix (4 digits)
-        # Example: 0018RS013RS00299PD0011
-        if len(response) >= 4 and response[:4].isdigit():
-            length_prefix = response[:4]
-            response = response[4:]  # Remove length prefix
-            LogService.log_info(
-                'payment',
-                'pos_response_length_prefix_detected',
-                details={
-                    'length_prefix': length_prefix,
-                    'actual_response': response
-                }
-            )
+        rs_codes = tokens.rs_codes
         
-        # Short cancel payloads (with or without ACK tag RS013):
-        # RS00281, RS00299, RS013RS00299PD0011
-        all_rs_codes_early = self.extract_rs_codes(response)
-        for code in all_rs_codes_early:
+        # Final error/cancel: any RS00XX code other than 00, wherever it is
+        # (RS00281, RS00299, RS013RS00299PD0011, RS136RS00255...)
+        for code in rs_codes:
             status_code = self.extract_status_code_from_rs00(code)
             if status_code is not None and status_code != '00':
                 self.apply_response_code_status(result, status_code)
-                LogService.log_info(
-                    'payment',
-                    'pos_final_error_or_cancel_detected',
-                    details={
-                        'response': response,
-                        'response_code': status_code,
-                        'status': result['status'],
-                        'all_rs_codes': all_rs_codes_early,
-                        'note': 'Short/final POS error-cancel response; do not wait for more data'
-                    }
-                )
                 return result
-
-        # Bare cancel tags without RS00 prefix
-        if (
-            response.strip() in ('RS00281', 'RS00299')
-            or response.endswith('RS00281')
-            or response.endswith('RS00299')
-        ):
-            cancel_code = '99' if '99' in response else '81'
-            self.apply_response_code_status(result, cancel_code)
-            LogService.log_info(
-                'payment',
-                'pos_cancelled_response_detected',
-                details={
-                    'response': response,
-                    'response_code': cancel_code,
-                    'note': 'User cancelled transaction on POS device'
-                }
-            )
-            return result
         
-        # True ACK only: short message with no final error/cancel RS00XXX
+        # True ACK only: short message with no final error/cancel RS00XX
         # Example: RS013 / RS013PD0011 (no card info, no error code)
-        if len(response) < 30:
-            LogService.log_warning(
-                'payment',
-                'pos_response_too_short_likely_ack',
-                details={
-                    'response_length': len(response),
-                    'response': response,
-                    'note': 'Ignoring - waiting for full transaction response'
-                }
-            )
+        if len(tokens.body) < 30:
             result['status'] = 'pending'
             result['response_message'] = 'Waiting for transaction completion'
             return result
         
-        # Parse response code (RS tag)
-        # IMPORTANT: Response may contain multiple RS codes!
-        # Example from official DLL: RS136RS00200...
-        # - RS136 = success (code 00) - first RS code is the main status
-        # - RS00200 = additional status code (can be ignored)
-        # - RS013 = success (code 00) - alternative format
-        # - RS00281 / RS00299 = cancelled by user
-        # - RS00202 = insufficient funds (code 02)
-        # Format: RS + 3-5 digit code
-        
         response_code = None
-        all_rs_codes = all_rs_codes_early or self.extract_rs_codes(response)
-        
-        # IMPORTANT: Check ALL RS codes, not just the first one!
-        # Priority: Error codes (RS00XXX) > Specific errors (RS133) > Success codes (RS136, RS013)
-        # Example: RS136RS00255 → RS00255 (error code 55) should take priority over RS136
-        if all_rs_codes:
-            # First, check if there's an error code (RS00XXX format) in ANY position
-            # Error codes have higher priority than success codes
-            error_code_found = None
-            for code in all_rs_codes:
-                if code.startswith('00') and len(code) >= 3:
-                    error_code_found = code
-                    break
-            
-            # If error code found, use it (even if success code exists)
-            # BUT: RS00200 means code 00 (success), not error!
-            if error_code_found:
-                first_code = error_code_found
-                response_code = self.extract_status_code_from_rs00(first_code)
-                
-                LogService.log_info('payment', 'pos_error_code_extracted', details={
-                    'raw_code': first_code,
-                    'extracted_code': response_code,
-                    'all_rs_codes': all_rs_codes,
-                    'note': 'RS00XXX code found, checking if it\'s success (00) or error'
-                })
-                
+        if rs_codes:
+            # RS00XX has priority over the first RS code (RS00200 = code 00)
+            rs00_code = next((c for c in rs_codes if c.startswith('00') and len(c) >= 3), None)
+            if rs00_code:
+                response_code = self.extract_status_code_from_rs00(rs00_code)
                 self.apply_response_code_status(result, response_code)
-            
-            # No error code found, check first code for specific errors or success
             else:
-                first_code = all_rs_codes[0]
-                
-                LogService.log_info('payment', 'pos_response_code_extracted', details={
-                    'all_rs_codes': all_rs_codes,
-                    'first_code': first_code,
-                    'note': 'No error code found, using first RS code as main status'
-                })
-                
-                # RS133 → رمز اشتباه (PIN wrong) - code 03
-                if first_code == '133':
-                    response_code = '03'
-                    result['success'] = False
-                    result['status'] = 'failed'
-                    result['response_message'] = 'تراکنش ناموفق - رمز اشتباه'
-                
-                # RS136 or RS013 or RS01 → success (code 00)
-                # IMPORTANT: Only use codes that are confirmed in documentation/logs
-                elif first_code in ['136', '013', '01', '1']:
-                    response_code = '00'
-                    result['success'] = True
-                    result['status'] = 'success'
-                    result['response_message'] = 'تراکنش موفق'
-                
-                # RS00XYZ → error/cancel codes (fallback, should not reach here if error_code_found worked)
-                elif first_code.startswith('00') and len(first_code) >= 3:
-                    # Extract error code from RS00XYZ
-                    # RS00281 → extract '281', then get last 2 digits '81'
-                    # RS00202 → extract '202', then get last 2 digits '02'
-                    if len(first_code) >= 4:
-                        # RS00281 → get last 2 digits
-                        response_code = first_code[-2:]
-                    else:
-                        # RS002 → get last digit
-                        response_code = first_code[-1]
-                    
-                    LogService.log_info('payment', 'pos_error_code_extracted', details={
-                        'raw_code': first_code,
-                        'extracted_code': response_code
-                    })
-                    
-                    self.apply_response_code_status(result, response_code)
-                
-                # Other RS codes (like RS081, RS81, RS00200)
-                else:
-                    # Try to extract error code from various formats
-                    # RS081 → code 81, RS81 → code 81, RS00200 → code 00
-                    if len(first_code) >= 2:
-                        # Check if it ends with cancel codes
-                        if first_code.endswith('81') or first_code.endswith('99'):
-                            response_code = '99' if first_code.endswith('99') else '81'
-                            self.apply_response_code_status(result, response_code)
-                        # Check if it's a 3-digit code starting with 0
-                        elif len(first_code) == 3 and first_code.startswith('0'):
-                            # RS002 → code 02, RS081 → code 81
-                            response_code = first_code[1:]  # Remove leading 0
-                            self.apply_response_code_status(result, response_code)
-                        # Check if it's a success code
-                        # IMPORTANT: Only use codes that are confirmed in documentation/logs
-                        # - RS136 = success (confirmed)
-                        # - RS013 = success (confirmed)
-                        # - RS01 = success (confirmed)
-                        # - RS1 = success (confirmed)
-                        # NOTE: RS13 (without leading zero) is NOT confirmed - removed
-                        elif first_code in ['136', '013', '01', '1']:
-                            response_code = '00'
-                            result['success'] = True
-                            result['status'] = 'success'
-                            result['response_message'] = 'تراکنش موفق'
-                        else:
-                            response_code = first_code
-                            result['status'] = 'failed'
-                            result['success'] = False
-                            result['response_message'] = self.get_error_message(response_code)
-                    else:
-                        response_code = first_code
-                        result['status'] = 'failed'
-                        result['success'] = False
-                        result['response_message'] = self.get_error_message(response_code)
-            
+                response_code = self._apply_first_rs_code(result, rs_codes[0])
             result['response_code'] = response_code
         
         # No RS tag found
@@ -290,128 +124,60 @@ class POSResponseParser:
             result['status'] = 'failed'
             result['response_message'] = 'خطای نامشخص - کد پاسخ یافت نشد'
         
-        # Extract reference number (RN tag) - 12 digits
-        # Format: RN012748932407357 (length=12, value=748932407357)
-        if 'RN' in response:
-            idx = response.find('RN')
-            if idx != -1:
-                # RN is followed by length (2 digits) then value (12 digits)
-                end_idx = idx + 2
-                # Skip length digits (2 digits)
-                while end_idx < len(response) and response[end_idx].isdigit() and end_idx - idx - 2 < 2:
-                    end_idx += 1
-                # Now read the actual value (12 digits)
-                value_start = end_idx
-                while end_idx < len(response) and response[end_idx].isdigit() and end_idx - value_start < 12:
-                    end_idx += 1
-                if end_idx > value_start:
-                    result['reference_number'] = response[value_start:end_idx].strip()
-        
-        # Extract transaction serial (SR tag) - 6 digits
-        # Format: SR006005608 (length=6, value=005608)
-        if 'SR' in response:
-            idx = response.find('SR')
-            if idx != -1:
-                # SR is followed by length (2 digits) then value (6 digits)
-                end_idx = idx + 2
-                # Skip length digits (2 digits)
-                while end_idx < len(response) and response[end_idx].isdigit() and end_idx - idx - 2 < 2:
-                    end_idx += 1
-                # Now read the actual value (6 digits)
-                value_start = end_idx
-                while end_idx < len(response) and response[end_idx].isdigit() and end_idx - value_start < 6:
-                    end_idx += 1
-                if end_idx > value_start:
-                    result['transaction_id'] = response[value_start:end_idx].strip()
-        
-        # Extract transaction reference (TR tag) - 6 digits
-        if 'TR' in response:
-            idx = response.find('TR')
-            if idx != -1:
-                # TR is followed by length (2 digits) then value (6 digits)
-                # Format: TR006727358
-                end_idx = idx + 2
-                # Skip length digits (2 digits)
-                while end_idx < len(response) and response[end_idx].isdigit() and end_idx - idx - 2 < 2:
-                    end_idx += 1
-                # Now read the actual value (6 digits)
-                value_start = end_idx
-                while end_idx < len(response) and response[end_idx].isdigit() and end_idx - value_start < 6:
-                    end_idx += 1
-                if end_idx > value_start:
-                    result['transaction_reference'] = response[value_start:end_idx].strip()
-        
-        # Extract terminal ID (TM tag) - 8 digits
-        # IMPORTANT: In official DLL response, TM = Terminal ID (not time!)
-        if 'TM' in response:
-            idx = response.find('TM')
-            if idx != -1:
-                # TM is followed by length (2 digits) then value (8 digits)
-                # Format: TM00898194184
-                end_idx = idx + 2
-                # Skip length digits (2 digits)
-                while end_idx < len(response) and response[end_idx].isdigit() and end_idx - idx - 2 < 2:
-                    end_idx += 1
-                # Now read the actual value (8 digits)
-                value_start = end_idx
-                while end_idx < len(response) and response[end_idx].isdigit() and end_idx - value_start < 8:
-                    end_idx += 1
-                if end_idx > value_start:
-                    result['terminal_id'] = response[value_start:end_idx].strip()
-        
-        # Extract transaction info (TI tag) - date/time
-        # Format: TI0191404/10/15-20:20:15
-        if 'TI' in response:
-            idx = response.find('TI')
-            if idx != -1:
-                # TI is followed by length (2 digits) then value
-                end_idx = idx + 2
-                # Skip length digits (2 digits)
-                while end_idx < len(response) and response[end_idx].isdigit() and end_idx - idx - 2 < 2:
-                    end_idx += 1
-                # Now read the actual value (date/time string)
-                value_start = end_idx
-                # Read until next tag (uppercase letters) or end of string
-                while end_idx < len(response):
-                    if end_idx < len(response) - 1 and response[end_idx].isupper() and response[end_idx+1].isupper():
-                        # Found next tag
-                        break
-                    end_idx += 1
-                if end_idx > value_start:
-                    ti_value = response[value_start:end_idx].strip()
-                    result['transaction_info'] = ti_value
-                    # Try to parse date/time from format: 1404/10/15-20:20:15
-                    if '/' in ti_value and '-' in ti_value:
-                        parts = ti_value.split('-')
-                        if len(parts) == 2:
-                            result['transaction_date'] = parts[0]  # 1404/10/15
-                            result['transaction_time'] = parts[1]  # 20:20:15
-        
-        # Extract card number (PN tag - PAN)
-        if 'PN' in response:
-            idx = response.find('PN')
-            if idx != -1:
-                # PN is followed by length (2 digits) then value
-                # Format: PN012621986**1236
-                end_idx = idx + 2
-                # Skip length digits (2 digits)
-                while end_idx < len(response) and response[end_idx].isdigit() and end_idx - idx - 2 < 2:
-                    end_idx += 1
-                # Now read the actual value (card number, may contain *)
-                value_start = end_idx
-                while end_idx < len(response) and (response[end_idx].isdigit() or response[end_idx] == '*'):
-                    end_idx += 1
-                if end_idx > value_start:
-                    result['card_number'] = response[value_start:end_idx].strip()
-        
-        # Extract date/time (DS tag) - alternative format
-        if 'DS' in response:
-            idx = response.find('DS')
-            if idx != -1:
-                result['transaction_date'] = response[idx+2:idx+8].strip()  # YYMMDD
+        tags = tokens.tags
+        # RN012748932407357 → reference 748932407357
+        if tags.get('RN'):
+            result['reference_number'] = tags['RN'].strip()
+        # SR006005608 → transaction serial 005608
+        if tags.get('SR'):
+            result['transaction_id'] = tags['SR'].strip()
+        # TR006727358 → transaction reference 727358
+        if tags.get('TR'):
+            result['transaction_reference'] = tags['TR'].strip()
+        # TM00898194184 → terminal ID 98194184 (in DLL responses TM is the terminal, not time)
+        if tags.get('TM'):
+            result['terminal_id'] = tags['TM'].strip()
+        # TI0191404/10/15-20:20:15 → date 1404/10/15, time 20:20:15
+        if tags.get('TI'):
+            ti_value = tags['TI'].strip()
+            result['transaction_info'] = ti_value
+            if '/' in ti_value and '-' in ti_value:
+                parts = ti_value.split('-')
+                if len(parts) == 2:
+                    result['transaction_date'] = parts[0]
+                    result['transaction_time'] = parts[1]
+        # PN012621986**1236 → masked PAN 621986**1236
+        if tags.get('PN'):
+            result['card_number'] = tags['PN'].strip()
+        # DS006YYMMDD (alternative date format)
+        if tags.get('DS'):
+            result['transaction_date'] = tags['DS'].strip()
         
         return result
     
+    def _apply_first_rs_code(self, result: Dict[str, Any], first_code: str) -> str:
+        """Status from the first RS code when no RS00XX code is present; returns the response code."""
+        if first_code == '133':
+            # RS133 → رمز اشتباه (PIN wrong)
+            self.apply_response_code_status(result, '03')
+            return '03'
+        if first_code in self.SUCCESS_RS_CODES:
+            self.apply_response_code_status(result, '00')
+            return '00'
+        if len(first_code) >= 2 and first_code[-2:] in self.CANCEL_CODES:
+            # RS081 / RS81 / RS099
+            self.apply_response_code_status(result, first_code[-2:])
+            return first_code[-2:]
+        if len(first_code) == 3 and first_code.startswith('0'):
+            # RS045 → code 45
+            self.apply_response_code_status(result, first_code[1:])
+            return first_code[1:]
+        # Unknown code (a bare RS00 included)
+        result['success'] = False
+        result['status'] = 'failed'
+        result['response_message'] = self.get_error_message(first_code)
+        return first_code
+    
     def get_error_message(self, error_code: str) -> str:
         """Get human-readable error message from error code."""
         error_messages = {
@@ -0,0 +1,131 @@
+"""
+Single-pass tag tokenizer for POS device responses.
+
+Pardakht Novin fields are TLV: a 2-letter tag, a 3-digit length and the
+value, e.g. ``SR006005608`` → SR = ``005608``. RS may wrap other fields
+(``RS013RS00299PD0011``: an RS container of 13 characters holding the
+response code RS002 ``99`` and PD001 ``1``).
+"""
+
+import re
+from typing import Dict, List, NamedTuple, Optional
+
+from .framing import LENGTH_PREFIX_SIZE
+
+TAG_LENGTH_SIZE = 3
+
+# Tags read from responses; RS is followed by the digits the status
+# decision uses (up to 5, e.g. RS00299 → '00299', RS136 → '136')
+KNOWN_TAGS = frozenset({'RS', 'SR', 'RN', 'TR', 'TM', 'TI', 'PN', 'DS'})
+RS_CODE_MAX_DIGITS = 5
+# Tags are looked up inside runs of capitals, so overlapping tags
+# (e.g. RS and SR in 'RSR') are all seen, like str.find would
+CAPITALS_RUN = re.compile(r'([A-Z]{2,})(\d{0,%d})' % RS_CODE_MAX_DIGITS)
+TAG_IN_RUN = re.compile(r'(?=(RS|SR|RN|TR|TM|TI|PN|DS))')
+
+
+class POSTokens(NamedTuple):
+    """Result of tokenizing one response."""
+
+    # Response without its 4-digit length prefix
+    body: str
+    # The length prefix, '' when the response had none
+    length_prefix: str
+    # Digits following every RS tag, in order of appearance
+    rs_codes: List[str]
+    # First TLV value of every other tag found
+    tags: Dict[str, str]
+
+
+class POSTagTokenizer:
+    """
+    Collects tags of a response in one regex pass.
+
+    Text can be fed in chunks as it arrives; only the tail that may still be
+    extended by the next chunk (a tag split in two, or digits that may
+    continue) is scanned again.
+    """
+
+    def __init__(self):
+        self._text = ''
+        self._body_start: Optional[int] = None
+        self._scan_from = 0
+        self._rs_codes: List[str] = []
+        self._positions: Dict[str, int] = {}
+
+    @classmethod
+    def tokenize(cls, response: str) -> POSTokens:
+        """Tokenize a complete response (one scan, nothing held back)."""
+        tokenizer = cls()
+        tokenizer._text = response
+        return tokenizer.finish()
+
+    def feed(self, text: str) -> 'POSTagTokenizer':
+        """
+        Add the next part of the response.
+
+        Args:
+            text: Decoded chunk
+
+        Returns:
+            POSTagTokenizer: self, for chaining
+        """
+        self._text += text
+        self._scan(final=False)
+        return self
+
+    def finish(self) -> POSTokens:
+        """Scan what is left and return the tokens of everything fed."""
+        self._scan(final=True)
+        body_start = self._body_start or 0
+        return POSTokens(
+            body=self._text[body_start:],
+            length_prefix=self._text[:body_start],
+            rs_codes=list(self._rs_codes),
+            tags={tag: self._value_at(position) for tag, position in self._positions.items()},
+        )
+
+    def _scan(self, final: bool) -> None:
+        text = self._text
+        if self._body_start is None:
+            if len(text) < LENGTH_PREFIX_SIZE and not final:
+                return
+            has_prefix = len(text) >= LENGTH_PREFIX_SIZE and text[:LENGTH_PREFIX_SIZE].isdigit()
+            self._body_start = LENGTH_PREFIX_SIZE if has_prefix else 0
+            self._scan_from = self._body_start
+
+        text_length = len(text)
+        for run in CAPITALS_RUN.finditer(text, self._scan_from):
+            letters, digits = run.groups()
+            if not final and run.end() >= text_length and len(digits) < RS_CODE_MAX_DIGITS:
+                # The run or its digits may continue in the next chunk
+                self._scan_from = run.start()
+                return
+            if len(letters) == 2:
+                # Common case: one tag followed by its length digits
+                self._add(letters, run.start(), digits)
+                continue
+            run_start = run.start()
+            run_end = run_start + len(letters)
+            for match in TAG_IN_RUN.finditer(text, run_start, run_end):
+                position = match.start()
+                # Only the tag ending the run is followed by digits
+                self._add(match.group(1), position, digits if position + 2 == run_end else '')
+        # A tag may start with the last character of this chunk
+        self._scan_from = max(len(text) - 1, self._body_start)
+
+    def _add(self, tag: str, position: int, digits: str) -> None:
+        if tag == 'RS':
+            if digits:
+                self._rs_codes.append(digits)
+        elif tag in KNOWN_TAGS:
+            self._positions.setdefault(tag, position)
+
+    def _value_at(self, position: int) -> str:
+        """TLV value of the tag at position ('' without a 3-digit length)."""
+        start = position + 2
+        length = self._text[start:start + TAG_LENGTH_SIZE]
+        if len(length) != TAG_LENGTH_SIZE or not (length.isascii() and length.isdigit()):
+            return ''
+        value_start = start + TAG_LENGTH_SIZE
+        return self._text[value_start:value_start + int(length)]
@@ -0,0 +1,98 @@
+"""
+Check POSResponseParser against the recorded response corpus and time it.
+
+Every corpus response is parsed whole and fed to the tokenizer in random
+chunks; both must give the recorded result. Then the corpus is parsed
+--iterations times and per-parse latency is reported.
+
+Usage:
+    python manage.py benchmark_pos_parser
+    python manage.py benchmark_pos_parser --iterations 2000 --corpus /app/logs/pos-responses.json
+"""
+import json
+import os
+import random
+import time
+from typing import Any, Dict, List
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.payment.gateway.pos.response_parser import POSResponseParser
+from apps.payment.gateway.pos.tag_tokenizer import POSTagTokenizer
+
+DEFAULT_CORPUS = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'gateway', 'pos', 'response_corpus.json',
+)
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    rank = max(int(-(-pct * len(ordered) // 100)), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class Command(BaseCommand):
+    help = 'بررسی برابری parser پاسخ پوز با نمونه‌های ثبت‌شده و اندازه‌گیری زمان parse'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corpus', default=DEFAULT_CORPUS, help='فایل JSON نمونه پاسخ‌ها')
+        parser.add_argument('--iterations', type=int, default=500, help='تعداد دور parse کل نمونه‌ها')
+        parser.add_argument('--chunk-runs', type=int, default=20, help='تعداد تقسیم تصادفی هر پاسخ به تکه')
+        parser.add_argument('--seed', type=int, default=1405)
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['corpus'], encoding='utf-8') as handle:
+                corpus: List[Dict[str, Any]] = json.load(handle)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read corpus {options["corpus"]}: {e}')
+
+        parser = POSResponseParser()
+        rng = random.Random(options['seed'])
+        mismatches = self._check(parser, corpus, rng, max(options['chunk_runs'], 0))
+        samples = self._time(parser, corpus, max(options['iterations'], 1))
+
+        self.stdout.write(
+            f'{len(corpus)} responses, {len(samples)} parses: '
+            f'p50 {_percentile(samples, 50):.1f} µs, p99 {_percentile(samples, 99):.1f} µs, '
+            f'max {max(samples):.1f} µs'
+        )
+        if mismatches:
+            for line in mismatches:
+                self.stderr.write(self.style.ERROR(line))
+            raise CommandError(f'{len(mismatches)} mismatch(es) against the corpus')
+        self.stdout.write(self.style.SUCCESS('All corpus responses parse to the recorded results.'))
+
+    @staticmethod
+    def _check(parser, corpus, rng, chunk_runs) -> List[str]:
+        mismatches = []
+        for entry in corpus:
+            response, expected = entry['response'], entry['expected']
+            whole = parser.parse(response)
+            diff = {k: (v, whole.get(k)) for k, v in expected.items() if whole.get(k) != v}
+            if diff:
+                mismatches.append(f'{entry["name"]}: {diff}')
+                continue
+            for _ in range(chunk_runs):
+                tokenizer = POSTagTokenizer()
+                pos = 0
+                while pos < len(response):
+                    size = rng.randint(1, 8)
+                    tokenizer.feed(response[pos:pos + size])
+                    pos += size
+                if parser.parse_tokens(tokenizer.finish(), response) != whole:
+                    mismatches.append(f'{entry["name"]}: chunked parse differs from whole parse')
+                    break
+        return mismatches
+
+    @staticmethod
+    def _time(parser, corpus, iterations) -> List[float]:
+        responses = [entry['response'] for entry in corpus]
+        samples = []
+        for _ in range(iterations):
+            for response in responses:
+                started = time.perf_counter()
+                parser.parse(response)
+                samples.append((time.perf_counter() - started) * 1_000_000)
+        return samples
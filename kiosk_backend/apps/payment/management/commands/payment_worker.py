@@ -0,0 +1,123 @@
+import logging
+import os
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.orders.services.order_service import OrderService
+from apps.payment.gateway.adapter import PaymentGatewayAdapter
+from apps.payment.gateway.pos import POSPaymentGateway
+from apps.payment.services.payment_job_service import PaymentJobService
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Process queued card payments (async payment mode) outside the web workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=getattr(settings, 'PAYMENT_WORKER_POLL_INTERVAL', 0.5),
+            help='Seconds to sleep when the queue is empty',
+        )
+        parser.add_argument(
+            '--stale-after',
+            type=int,
+            default=getattr(settings, 'PAYMENT_JOB_STALE_SECONDS', 300),
+            help='Fail jobs left in processing longer than this (crashed worker)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Process at most one job and exit (debugging)',
+        )
+
+    def handle(self, *args, **options):
+        poll_interval = max(options['poll_interval'], 0.05)
+        worker_name = f'{socket.gethostname()}:{os.getpid()}'
+
+        PaymentJobService.fail_stale_jobs(options['stale_after'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Payment worker {worker_name} started '
+            f'(gateway={settings.PAYMENT_GATEWAY_CONFIG.get("gateway_name")}).'
+        ))
+        self._gateway = self._keep_pos_warm()
+        heartbeat_interval = float(getattr(settings, 'PAYMENT_WORKER_HEARTBEAT_SECONDS', 5) or 5)
+        next_heartbeat = 0.0
+
+        try:
+            while True:
+                try:
+                    close_old_connections()
+                    if time.monotonic() >= next_heartbeat:
+                        self._heartbeat(worker_name)
+                        next_heartbeat = time.monotonic() + heartbeat_interval
+                    job = PaymentJobService.claim_next(worker_name)
+                    if job is None:
+                        if options['once']:
+                            break
+                        time.sleep(poll_interval)
+                        continue
+
+                    self.stdout.write(f'Processing payment job {job.job_id} (order {job.order_id})')
+                    self._heartbeat(worker_name, busy=True)
+                    try:
+                        job = OrderService.run_payment_job(job)
+                    except Exception as exc:
+                        logger.exception('Payment job %s crashed: %s', job.job_id, exc)
+                        job = PaymentJobService.finish(job, job.STATUS_FAILED, str(exc))
+                    self.stdout.write(f'Payment job {job.job_id} → {job.status}')
+                    next_heartbeat = 0.0
+                    if options['once']:
+                        break
+                except KeyboardInterrupt:
+                    self.stdout.write(self.style.WARNING('Stopped by user.'))
+                    break
+                except Exception as exc:
+                    logger.exception('Payment worker loop error: %s', exc)
+                    self.stderr.write(self.style.ERROR(f'Worker error: {exc}'))
+                    time.sleep(2)
+        finally:
+            try:
+                PaymentJobService.clear_heartbeat(worker_name)
+            except Exception:
+                pass
+
+    def _heartbeat(self, worker_name: str, busy: bool = False) -> None:
+        """Publish liveness and the POS connection state for the dashboard health."""
+        connection_state = None
+        if isinstance(self._gateway, POSPaymentGateway):
+            connection_state = self._gateway.connection_manager.state()
+        try:
+            PaymentJobService.record_heartbeat(
+                worker_name,
+                gateway_name=settings.PAYMENT_GATEWAY_CONFIG.get('gateway_name', ''),
+                busy=busy,
+                connection_state=connection_state,
+            )
+        except Exception as exc:
+            logger.warning('Payment worker heartbeat failed: %s', exc)
+
+    def _keep_pos_warm(self):
+        """
+        This process is the only one paying in async mode, so it keeps the
+        POS connected for the whole run (probed and reconnected in the
+        background) instead of connecting when a job arrives.
+
+        Returns:
+            The gateway whose connection state the heartbeat reports, or None
+        """
+        try:
+            gateway = PaymentGatewayAdapter.get_gateway()
+        except Exception as exc:
+            self.stderr.write(self.style.WARNING(f'POS pre-connect skipped: {exc}'))
+            return None
+        if isinstance(gateway, POSPaymentGateway) and getattr(settings, 'POS_PRECONNECT', True):
+            gateway.connection_manager.warm(persistent=True)
+            self.stdout.write(f'Keeping POS {gateway.tcp_host}:{gateway.tcp_port} connected.')
+        return gateway
@@ -0,0 +1,339 @@
+"""
+Local TCP POS terminal speaking the Pardakht Novin framing, for load tests.
+
+Accepts the requests POSMessageBuilder produces (every pos_message_format)
+and answers like the device: an ACK frame, then after the "customer" delay
+the final success / cancel / failure frame. Delays, split packets, dropped
+connections and missing final responses are configurable, and every
+connection is served on its own thread so many kiosks (or one load-test
+process per port) can pay at once.
+
+Usage:
+    python manage.py pos_simulator --port 1362
+    python manage.py pos_simulator --port 1362 --port-count 8 --final-delay 3 --jitter 0.5
+    python manage.py pos_simulator --cancel-rate 0.1 --fail-rate 0.05 --disconnect-rate 0.02 --split 7
+"""
+import random
+import re
+import socket
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.payment.gateway.pos.framing import LENGTH_PREFIX_SIZE, POSFrameReader
+from apps.payment.gateway.pos.response_parser import POSResponseParser
+
+# Endings of requests sent with_stx_etx / with_terminator / with_null
+REQUEST_TERMINATORS = (b'\x03', b'\r\n', b'\x00')
+
+AMOUNT_TAG = re.compile(r'AM(\d{3})')
+ORDER_TAG = re.compile(r'SO(.{1,20})')
+SIMPLE_COUNTER = re.compile(r'PR00(\d{7})')
+
+
+def parse_request(data: bytes) -> Dict[str, Any]:
+    """
+    Strip the framing of one payment request and read its amount.
+
+    Returns:
+        dict: format, amount (None if no AM tag), order and the bare message
+    """
+    message = data
+    fmt = 'dll_exact'
+    if message.startswith(b'\x02') and message.endswith(b'\x03'):
+        message, fmt = message[1:-1], 'with_stx_etx'
+    elif message.endswith(b'\r\n'):
+        message, fmt = message[:-2], 'with_terminator'
+    elif message.endswith(b'\x00'):
+        message, fmt = message[:-1], 'with_null'
+    if b'\n' in message:
+        message, fmt = message.rsplit(b'\n', 1)[1], 'with_rq_and_banner'
+    text = message.decode('ascii', errors='replace')
+    if text[:LENGTH_PREFIX_SIZE].isdigit():
+        text = text[LENGTH_PREFIX_SIZE:]
+        fmt = 'with_length' if fmt == 'dll_exact' else fmt
+    if text.startswith('RQ') and text[2:5].isdigit():
+        text = text[5:]
+        fmt = 'pardakht_novin_official' if fmt == 'with_length' else fmt
+
+    amount = None
+    match = AMOUNT_TAG.search(text)
+    if match:
+        digits = text[match.end():match.end() + int(match.group(1))]
+        amount = int(digits) if digits.isdigit() else None
+    order = ORDER_TAG.search(text) or SIMPLE_COUNTER.search(text)
+    return {
+        'format': fmt,
+        'amount': amount,
+        'order': order.group(1).strip() if order else '',
+        'message': text,
+    }
+
+
+class Command(BaseCommand):
+    help = 'شبیه‌ساز پوز پرداخت نوین روی TCP برای تست بار و تأخیر درگاه pos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='0.0.0.0')
+        parser.add_argument('--port', type=int, default=1362)
+        parser.add_argument(
+            '--port-count',
+            type=int,
+            default=1,
+            help='تعداد پورت‌های متوالی (هر پورت یک پوز جدا؛ هر پروسه جنگو به هر پوز یک اتصال دارد)',
+        )
+        parser.add_argument('--ack-delay', type=float, default=0.05, help='ثانیه تا ارسال ACK')
+        parser.add_argument('--final-delay', type=float, default=2.0, help='ثانیه از ACK تا پاسخ نهایی (زمان مشتری)')
+        parser.add_argument('--jitter', type=float, default=0.0, help='تغییر تصادفی تأخیرها (0.5 = ±50٪)')
+        parser.add_argument('--no-ack', action='store_true', help='بدون ACK، فقط پاسخ نهایی')
+        parser.add_argument('--merge', action='store_true', help='ACK و پاسخ نهایی در یک بسته')
+        parser.add_argument('--split', type=int, default=0, help='ارسال هر frame در تکه‌های N بایتی')
+        parser.add_argument('--split-gap', type=float, default=0.01, help='ثانیه بین تکه‌ها')
+        parser.add_argument('--unframed', action='store_true', help='پاسخ بدون پیشوند طول ۴ رقمی')
+        parser.add_argument('--cancel-rate', type=float, default=0.0, help='سهم تراکنش‌های لغوشده')
+        parser.add_argument('--cancel-code', default='99', choices=['81', '99'])
+        parser.add_argument('--fail-rate', type=float, default=0.0, help='سهم تراکنش‌های ناموفق')
+        parser.add_argument('--fail-code', default='51', help='کد خطای دو رقمی تراکنش ناموفق')
+        parser.add_argument('--disconnect-rate', type=float, default=0.0, help='سهم اتصال‌هایی که قطع می‌شوند')
+        parser.add_argument(
+            '--disconnect-after',
+            default='ack',
+            choices=['request', 'ack'],
+            help='قطع اتصال بلافاصله پس از دریافت درخواست یا پس از ACK',
+        )
+        parser.add_argument(
+            '--silent-rate',
+            type=float,
+            default=0.0,
+            help='سهم تراکنش‌هایی که پس از ACK هیچ پاسخ نهایی ندارند (تست timeout)',
+        )
+        parser.add_argument(
+            '--request-idle',
+            type=float,
+            default=POSFrameReader.IDLE_SECONDS,
+            help='ثانیه سکوت که پایان درخواست بدون قاب (dll_exact) حساب می‌شود',
+        )
+        parser.add_argument('--terminal-id', default='98194184')
+        parser.add_argument('--report-interval', type=float, default=10.0, help='ثانیه بین گزارش‌ها (0 = فقط در پایان)')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        rates = {
+            'disconnect': options['disconnect_rate'],
+            'silent': options['silent_rate'],
+            'cancelled': options['cancel_rate'],
+            'failed': options['fail_rate'],
+        }
+        if any(rate < 0 for rate in rates.values()) or sum(rates.values()) > 1:
+            raise CommandError('Outcome rates must be >= 0 and add up to at most 1')
+        if options['port_count'] < 1:
+            raise CommandError('--port-count must be at least 1')
+        self.options = options
+        self.rates = rates
+        self.rng = random.Random(options['seed'])
+        self.lock = threading.Lock()
+        self.stats = Counter()
+        self.open_sessions = 0
+        self.peak_sessions = 0
+        self._check_frames()
+
+        ports = range(options['port'], options['port'] + options['port_count'])
+        servers = []
+        for port in ports:
+            server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            try:
+                server.bind((options['host'], port))
+            except OSError as e:
+                raise CommandError(f'Cannot listen on {options["host"]}:{port}: {e}')
+            server.listen(128)
+            servers.append(server)
+            threading.Thread(target=self._accept, args=(server, port), daemon=True).start()
+        self.stdout.write(self.style.SUCCESS(
+            f'POS simulator listening on {options["host"]}:{ports.start}'
+            + (f'-{ports.stop - 1}' if len(ports) > 1 else '')
+            + f' (ack {options["ack_delay"]}s, final {options["final_delay"]}s, jitter ±{options["jitter"]:.0%})'
+        ))
+
+        interval = options['report_interval']
+        try:
+            while True:
+                time.sleep(interval if interval > 0 else 3600)
+                if interval > 0:
+                    self._report()
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Stopped by user.'))
+        finally:
+            for server in servers:
+                server.close()
+            self._report()
+
+    def _check_frames(self):
+        """The frames sent must mean to the gateway what the simulator intends."""
+        parser = POSResponseParser()
+        expected = {
+            self._ack(): 'pending',
+            self._final('success'): 'success',
+            self._final('cancelled'): 'cancelled',
+            self._final('failed'): 'failed',
+        }
+        for frame, status in expected.items():
+            parsed = parser.parse(frame.decode('ascii'))['status']
+            if parsed != status:
+                raise CommandError(f'{frame!r} parses as {parsed!r}, not {status!r} (check --fail-code)')
+
+    def _accept(self, server, port):
+        while True:
+            try:
+                conn, addr = server.accept()
+            except OSError:
+                return
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._serve, args=(conn, addr, port), daemon=True).start()
+
+    def _serve(self, conn, addr, port):
+        with self.lock:
+            self.stats['sessions'] += 1
+            self.open_sessions += 1
+            self.peak_sessions = max(self.peak_sessions, self.open_sessions)
+        reader = POSFrameReader(idle_seconds=self.options['request_idle'])
+        last_data_at = time.monotonic()
+        try:
+            while True:
+                flush_after = reader.flush_after()
+                # Idle (kept-warm) connections wait for the next request without limit
+                conn.settimeout(None if flush_after is None else max(last_data_at + flush_after - time.monotonic(), 0))
+                try:
+                    chunk = conn.recv(4096)
+                except socket.timeout:
+                    chunk = None
+                if chunk == b'':
+                    return
+                if chunk:
+                    last_data_at = time.monotonic()
+                    requests = reader.feed(chunk)
+                    if not requests and not reader.is_framed and chunk.endswith(REQUEST_TERMINATORS):
+                        requests = [reader.flush()]
+                else:
+                    requests = [reader.flush()]
+                for request in requests:
+                    if not self._answer(conn, request, addr, port):
+                        return
+        except OSError:
+            # Client went away mid-response
+            with self.lock:
+                self.stats['client_aborts'] += 1
+        finally:
+            conn.close()
+            with self.lock:
+                self.open_sessions -= 1
+
+    def _answer(self, conn, raw: bytes, addr, port) -> bool:
+        """Reply to one request; False when the connection was dropped on purpose."""
+        request = parse_request(raw)
+        outcome = self._pick_outcome()
+        with self.lock:
+            self.stats['requests'] += 1
+            self.stats[f'format {request["format"]}'] += 1
+            if request['amount'] is None:
+                self.stats['no_amount'] += 1
+        if self.options['verbosity'] >= 2:
+            self.stdout.write(
+                f'{addr[0]}:{addr[1]} → :{port} {request["format"]} amount={request["amount"]} '
+                f'order={request["order"] or "-"} → {outcome}'
+            )
+
+        if outcome == 'disconnect' and self.options['disconnect_after'] == 'request':
+            self._count(outcome)
+            return False
+        time.sleep(self._delay(self.options['ack_delay']))
+        ack = b'' if self.options['no_ack'] else self._ack()
+        if ack and not self.options['merge']:
+            self._send(conn, ack)
+            ack = b''
+        if outcome == 'disconnect':
+            self._count(outcome)
+            return False
+        if outcome == 'silent':
+            # The gateway times out (or gives up) and closes the connection
+            self._count(outcome)
+            return True
+        time.sleep(self._delay(self.options['final_delay']))
+        self._send(conn, ack + self._final(outcome))
+        self._count(outcome)
+        return True
+
+    def _pick_outcome(self) -> str:
+        with self.lock:
+            draw = self.rng.random()
+        for outcome, rate in self.rates.items():
+            if draw < rate:
+                return outcome
+            draw -= rate
+        return 'success'
+
+    def _delay(self, seconds: float) -> float:
+        jitter = self.options['jitter']
+        if seconds <= 0 or jitter <= 0:
+            return max(seconds, 0)
+        with self.lock:
+            factor = self.rng.uniform(1 - jitter, 1 + jitter)
+        return max(seconds * factor, 0)
+
+    def _send(self, conn, payload: bytes):
+        size = self.options['split']
+        if size <= 0:
+            conn.sendall(payload)
+            return
+        for start in range(0, len(payload), size):
+            if start:
+                time.sleep(self.options['split_gap'])
+            conn.sendall(payload[start:start + size])
+
+    def _frame(self, body: str) -> bytes:
+        if self.options['unframed']:
+            return body.encode('ascii')
+        return f'{len(body):0{LENGTH_PREFIX_SIZE}d}{body}'.encode('ascii')
+
+    def _ack(self) -> bytes:
+        return self._frame('RS013PD0011')
+
+    def _final(self, outcome: str) -> bytes:
+        if outcome == 'cancelled':
+            return self._frame(f'RS013RS002{self.options["cancel_code"]}PD0011')
+        if outcome == 'failed':
+            return self._frame(f'RS013RS002{self.options["fail_code"][:2].zfill(2)}PD0011')
+        with self.lock:
+            serial = self.stats['success'] % 1000000
+            reference = self.rng.randrange(10 ** 12)
+        terminal_id = str(self.options['terminal_id'])[:8].zfill(8)
+        stamp = time.strftime('%Y/%m/%d-%H:%M:%S')
+        return self._frame(
+            f'RS136RS00200SR006{serial:06d}RN012{reference:012d}'
+            f'TM008{terminal_id}PN012621986**1236TI019{stamp}'
+        )
+
+    def _count(self, outcome: str):
+        with self.lock:
+            self.stats[outcome] += 1
+
+    def _report(self):
+        with self.lock:
+            stats = dict(self.stats)
+            open_sessions, peak = self.open_sessions, self.peak_sessions
+        outcomes = ', '.join(
+            f'{name} {stats.get(name, 0)}'
+            for name in ('success', 'cancelled', 'failed', 'silent', 'disconnect')
+            if stats.get(name)
+        ) or 'none'
+        formats = ', '.join(f'{k[7:]} {v}' for k, v in sorted(stats.items()) if k.startswith('format '))
+        self.stdout.write(
+            f'sessions {stats.get("sessions", 0)} (open {open_sessions}, peak {peak}), '
+            f'requests {stats.get("requests", 0)}: {outcomes}'
+            + (f' | formats: {formats}' if formats else '')
+            + (f' | without amount {stats["no_amount"]}' if stats.get('no_amount') else '')
+            + (f' | client aborts {stats["client_aborts"]}' if stats.get('client_aborts') else '')
+        )
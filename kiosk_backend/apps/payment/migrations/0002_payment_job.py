@@ -0,0 +1,38 @@
+# Generated by Django 4.2.16 on 2026-10-18 01:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_dashboard_ab_coupons_options'),
+        ('payment', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('job_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name='شناسه کار')),
+                ('amount', models.IntegerField(verbose_name='مبلغ')),
+                ('status', models.CharField(choices=[('queued', 'در صف'), ('processing', 'در حال پردازش'), ('succeeded', 'موفق'), ('failed', 'ناموفق'), ('cancelled', 'لغو شده')], default='queued', max_length=20, verbose_name='وضعیت')),
+                ('worker_name', models.CharField(blank=True, default='', max_length=100, verbose_name='نام worker')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='زمان شروع')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='زمان پایان')),
+                ('error_message', models.TextField(blank=True, default='', verbose_name='پیام خطا')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payment_jobs', to='orders.order', verbose_name='سفارش')),
+            ],
+            options={
+                'verbose_name': 'کار پرداخت',
+                'verbose_name_plural': 'کارهای پرداخت',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='payment_pay_status_d491e1_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.16 on 2026-10-18 02:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payment', '0002_payment_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentTrace',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_id', models.IntegerField(blank=True, null=True, verbose_name='شناسه سفارش')),
+                ('order_number', models.CharField(blank=True, default='', max_length=50, verbose_name='شماره سفارش')),
+                ('gateway_name', models.CharField(max_length=50, verbose_name='نام Gateway')),
+                ('outcome', models.CharField(choices=[('success', 'موفق'), ('failed', 'ناموفق'), ('cancelled', 'لغو شده'), ('error', 'خطا')], max_length=20, verbose_name='نتیجه')),
+                ('started_at', models.DateTimeField(verbose_name='زمان شروع')),
+                ('total_ms', models.PositiveIntegerField(verbose_name='مدت کل (میلی\u200cثانیه)')),
+                ('phases', models.JSONField(blank=True, default=dict, verbose_name='زمان مراحل')),
+                ('attributes', models.JSONField(blank=True, default=dict, verbose_name='جزئیات')),
+            ],
+            options={
+                'verbose_name': 'ردیابی پرداخت',
+                'verbose_name_plural': 'ردیابی\u200cهای پرداخت',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['started_at', 'gateway_name'], name='payment_pay_started_9cd2c7_idx'), models.Index(fields=['order_id'], name='payment_pay_order_i_d250fb_idx')],
+            },
+        ),
+    ]
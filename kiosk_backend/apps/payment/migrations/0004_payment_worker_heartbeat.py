@@ -0,0 +1,29 @@
+# Generated by Django 4.2.16 on 2026-10-18 02:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payment', '0003_payment_trace'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentWorkerHeartbeat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('worker_name', models.CharField(max_length=100, unique=True, verbose_name='نام worker')),
+                ('gateway_name', models.CharField(blank=True, default='', max_length=50, verbose_name='نام Gateway')),
+                ('busy', models.BooleanField(default=False, verbose_name='در حال پرداخت')),
+                ('connection_state', models.JSONField(blank=True, default=dict, verbose_name='وضعیت اتصال')),
+                ('beat_at', models.DateTimeField(verbose_name='آخرین heartbeat')),
+            ],
+            options={
+                'verbose_name': 'heartbeat worker پرداخت',
+                'verbose_name_plural': 'heartbeatهای worker پرداخت',
+                'ordering': ['-beat_at'],
+            },
+        ),
+    ]
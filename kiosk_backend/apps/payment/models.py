@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from apps.core.models import TimeStampedModel
@@ -39,3 +41,125 @@ class Transaction(TimeStampedModel):
     
     def __str__(self):
         return f"Transaction {self.transaction_id}"
+
+
+class PaymentJob(TimeStampedModel):
+    """
+    Queued card payment for an order.
+
+    Created by the order API in async payment mode and driven by the
+    `payment_worker` management command, so web workers never block on
+    POS I/O. The kiosk follows the result through the payment-job status API.
+    """
+
+    STATUS_QUEUED = 'queued'
+    STATUS_PROCESSING = 'processing'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, _('در صف')),
+        (STATUS_PROCESSING, _('در حال پردازش')),
+        (STATUS_SUCCEEDED, _('موفق')),
+        (STATUS_FAILED, _('ناموفق')),
+        (STATUS_CANCELLED, _('لغو شده')),
+    ]
+    FINAL_STATUSES = (STATUS_SUCCEEDED, STATUS_FAILED, STATUS_CANCELLED)
+
+    job_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False, verbose_name=_('شناسه کار'))
+    order = models.ForeignKey(
+        'orders.Order',
+        on_delete=models.CASCADE,
+        related_name='payment_jobs',
+        verbose_name=_('سفارش'),
+    )
+    amount = models.IntegerField(verbose_name=_('مبلغ'))
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_QUEUED,
+        verbose_name=_('وضعیت'),
+    )
+    worker_name = models.CharField(max_length=100, blank=True, default='', verbose_name=_('نام worker'))
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name=_('زمان شروع'))
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name=_('زمان پایان'))
+    error_message = models.TextField(blank=True, default='', verbose_name=_('پیام خطا'))
+
+    class Meta:
+        verbose_name = _('کار پرداخت')
+        verbose_name_plural = _('کارهای پرداخت')
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"PaymentJob {self.job_id} ({self.status})"
+
+    @property
+    def is_final(self) -> bool:
+        return self.status in self.FINAL_STATUSES
+
+
+class PaymentTrace(models.Model):
+    """
+    Phase timings of one payment attempt, recorded by PaymentTracer.
+
+    One small row per attempt: `phases` maps phase name to milliseconds
+    since the payment was requested (e.g. {"connect": 4, "send": 6,
+    "ack": 180, "final": 14210, "db_commit": 14262}), so slowness can be
+    split between the terminal, the network and the kiosk backend.
+    """
+
+    OUTCOME_CHOICES = [
+        ('success', _('موفق')),
+        ('failed', _('ناموفق')),
+        ('cancelled', _('لغو شده')),
+        ('error', _('خطا')),
+    ]
+
+    order_id = models.IntegerField(null=True, blank=True, verbose_name=_('شناسه سفارش'))
+    order_number = models.CharField(max_length=50, blank=True, default='', verbose_name=_('شماره سفارش'))
+    gateway_name = models.CharField(max_length=50, verbose_name=_('نام Gateway'))
+    outcome = models.CharField(max_length=20, choices=OUTCOME_CHOICES, verbose_name=_('نتیجه'))
+    started_at = models.DateTimeField(verbose_name=_('زمان شروع'))
+    total_ms = models.PositiveIntegerField(verbose_name=_('مدت کل (میلی‌ثانیه)'))
+    phases = models.JSONField(default=dict, blank=True, verbose_name=_('زمان مراحل'))
+    # Context that explains a timing: warm POS connection, bridge terminal, ...
+    attributes = models.JSONField(default=dict, blank=True, verbose_name=_('جزئیات'))
+
+    class Meta:
+        verbose_name = _('ردیابی پرداخت')
+        verbose_name_plural = _('ردیابی‌های پرداخت')
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['started_at', 'gateway_name']),
+            models.Index(fields=['order_id']),
+        ]
+
+    def __str__(self):
+        return f"PaymentTrace {self.order_number or self.order_id} ({self.total_ms} ms)"
+
+
+class PaymentWorkerHeartbeat(models.Model):
+    """
+    Liveness and POS connection state of one `payment_worker` process.
+
+    In async mode only the worker talks to the POS, so the web process reads
+    this row for the dashboard health check instead of probing the device.
+    """
+
+    worker_name = models.CharField(max_length=100, unique=True, verbose_name=_('نام worker'))
+    gateway_name = models.CharField(max_length=50, blank=True, default='', verbose_name=_('نام Gateway'))
+    busy = models.BooleanField(default=False, verbose_name=_('در حال پرداخت'))
+    # POSConnectionManager.state() of the worker (empty for other gateways)
+    connection_state = models.JSONField(default=dict, blank=True, verbose_name=_('وضعیت اتصال'))
+    beat_at = models.DateTimeField(verbose_name=_('آخرین heartbeat'))
+
+    class Meta:
+        verbose_name = _('heartbeat worker پرداخت')
+        verbose_name_plural = _('heartbeatهای worker پرداخت')
+        ordering = ['-beat_at']
+
+    def __str__(self):
+        return f"PaymentWorkerHeartbeat {self.worker_name}"
@@ -1,4 +1,4 @@
 from .transaction_selector import TransactionSelector
+from .payment_trace_selector import PaymentTraceSelector
 
-__all__ = ['TransactionSelector']
-
+__all__ = ['TransactionSelector', 'PaymentTraceSelector']
@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import Optional
+
+from django.db.models import QuerySet
+from apps.payment.models import PaymentTrace
+
+
+class PaymentTraceSelector:
+    """
+    Payment trace query selector.
+    """
+
+    @staticmethod
+    def get_traces_since(since: datetime, gateway_name: Optional[str] = None) -> QuerySet:
+        """
+        Timing fields of traces started at or after a moment.
+
+        Args:
+            since: Earliest started_at
+            gateway_name: Only this gateway (class name), all when None
+
+        Returns:
+            QuerySet: Dicts with started_at, gateway_name, outcome, total_ms, phases
+        """
+        qs = PaymentTrace.objects.filter(started_at__gte=since)
+        if gateway_name:
+            qs = qs.filter(gateway_name=gateway_name)
+        return qs.order_by('started_at').values('started_at', 'gateway_name', 'outcome', 'total_ms', 'phases')
@@ -1,4 +1,4 @@
 from .payment_service import PaymentService
+from .payment_job_service import PaymentJobService
 
-__all__ = ['PaymentService']
-
+__all__ = ['PaymentService', 'PaymentJobService']
@@ -0,0 +1,199 @@
+import time
+from datetime import timedelta
+from typing import Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.orders.models import Order
+from apps.payment.models import PaymentJob, PaymentWorkerHeartbeat
+from apps.logs.services.log_service import LogService
+
+
+class PaymentJobService:
+    """
+    Queue operations for asynchronous card payments.
+
+    The web process only enqueues and reads jobs; the `payment_worker`
+    management command claims them and drives the gateway.
+    """
+
+    @staticmethod
+    def enqueue(order, amount: int) -> PaymentJob:
+        """
+        Queue a payment for an already-saved order.
+
+        Args:
+            order: Order instance
+            amount: Payment amount in Rial
+
+        Returns:
+            PaymentJob: Created job in 'queued' state
+        """
+        job = PaymentJob.objects.create(order=order, amount=int(amount))
+        LogService.log_info(
+            'payment',
+            'payment_job_enqueued',
+            details={
+                'job_id': str(job.job_id),
+                'order_id': order.id,
+                'order_number': order.order_number,
+                'amount': amount,
+            }
+        )
+        return job
+
+    @staticmethod
+    def get_job(job_id) -> Optional[PaymentJob]:
+        return PaymentJob.objects.select_related('order').filter(job_id=job_id).first()
+
+    @staticmethod
+    def claim_next(worker_name: str = '') -> Optional[PaymentJob]:
+        """
+        Atomically claim the oldest queued job.
+
+        Uses SKIP LOCKED so several workers can share the queue without
+        picking the same job.
+
+        Returns:
+            Optional[PaymentJob]: Claimed job in 'processing' state, or None
+        """
+        with transaction.atomic():
+            job = (
+                PaymentJob.objects.select_for_update(skip_locked=True)
+                .filter(status=PaymentJob.STATUS_QUEUED)
+                .order_by('created_at')
+                .first()
+            )
+            if job is None:
+                return None
+            job.status = PaymentJob.STATUS_PROCESSING
+            job.worker_name = (worker_name or '')[:100]
+            job.started_at = timezone.now()
+            job.save(update_fields=['status', 'worker_name', 'started_at', 'updated_at'])
+        return job
+
+    @staticmethod
+    def finish(job: PaymentJob, status: str, error_message: str = '') -> PaymentJob:
+        job.status = status
+        job.error_message = error_message or ''
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error_message', 'finished_at', 'updated_at'])
+        LogService.log_info(
+            'payment',
+            'payment_job_finished',
+            details={
+                'job_id': str(job.job_id),
+                'order_id': job.order_id,
+                'status': status,
+                'error': error_message or None,
+            }
+        )
+        return job
+
+    @staticmethod
+    def fail_stale_jobs(older_than_seconds: int) -> int:
+        """
+        Fail jobs left in 'processing' by a crashed worker, with their orders.
+
+        They are not retried: the card may already have been charged, so the
+        operator has to reconcile them with the terminal report. The order is
+        failed in the same transaction so it never stays 'pending' behind a
+        final job.
+
+        Returns:
+            int: Number of jobs marked as failed
+        """
+        cutoff = timezone.now() - timedelta(seconds=older_than_seconds)
+        error_message = 'Payment worker stopped while processing this job'
+        with transaction.atomic():
+            stale = list(
+                PaymentJob.objects.select_for_update()
+                .filter(status=PaymentJob.STATUS_PROCESSING, started_at__lt=cutoff)
+                .values_list('id', 'order_id')
+            )
+            if not stale:
+                return 0
+            now = timezone.now()
+            PaymentJob.objects.filter(id__in=[job_id for job_id, _ in stale]).update(
+                status=PaymentJob.STATUS_FAILED,
+                error_message=error_message,
+                finished_at=now,
+                updated_at=now,
+            )
+            # Orders the worker had not settled yet; a paid one keeps its result
+            Order.objects.filter(
+                id__in=[order_id for _, order_id in stale],
+                payment_status='pending',
+            ).update(
+                payment_status='failed',
+                status='cancelled',
+                error_message=f'{error_message}; check the terminal report before charging again',
+                updated_at=now,
+            )
+        LogService.log_warning(
+            'payment',
+            'payment_jobs_stale_failed',
+            details={
+                'count': len(stale),
+                'order_ids': [order_id for _, order_id in stale],
+                'older_than_seconds': older_than_seconds,
+            },
+        )
+        return len(stale)
+
+    @staticmethod
+    def wait_for_final(job: PaymentJob, timeout: float, interval: float = 0.25) -> PaymentJob:
+        """
+        Short long-poll: reload the job until it is final or timeout elapses.
+
+        The wait holds a sync Gunicorn worker, so callers cap timeout with
+        PAYMENT_JOB_LONG_POLL_MAX (a couple of seconds) and clients poll again.
+
+        Args:
+            job: PaymentJob instance
+            timeout: Maximum seconds to wait (0 = return immediately)
+            interval: Seconds between reloads
+
+        Returns:
+            PaymentJob: Latest job state
+        """
+        deadline = time.monotonic() + max(float(timeout or 0), 0.0)
+        while not job.is_final and time.monotonic() < deadline:
+            time.sleep(min(interval, max(deadline - time.monotonic(), 0.0)))
+            job.refresh_from_db()
+        return job
+
+    @staticmethod
+    def record_heartbeat(
+        worker_name: str,
+        gateway_name: str = '',
+        busy: bool = False,
+        connection_state: Optional[dict] = None,
+    ) -> None:
+        """
+        Store the worker's liveness and POS connection state.
+
+        Args:
+            worker_name: `host:pid` of the payment worker
+            gateway_name: Active gateway name
+            busy: True while a payment job is running
+            connection_state: POSConnectionManager.state() (direct POS only)
+        """
+        PaymentWorkerHeartbeat.objects.update_or_create(
+            worker_name=(worker_name or '')[:100],
+            defaults={
+                'gateway_name': gateway_name or '',
+                'busy': busy,
+                'connection_state': connection_state or {},
+                'beat_at': timezone.now(),
+            },
+        )
+
+    @staticmethod
+    def clear_heartbeat(worker_name: str) -> None:
+        PaymentWorkerHeartbeat.objects.filter(worker_name=(worker_name or '')[:100]).delete()
+
+    @staticmethod
+    def latest_heartbeat() -> Optional[PaymentWorkerHeartbeat]:
+        return PaymentWorkerHeartbeat.objects.order_by('-beat_at').first()
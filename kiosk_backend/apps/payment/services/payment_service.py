@@ -1,4 +1,5 @@
 from typing import Dict, Any
+from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
 from apps.payment.models import Transaction
@@ -98,6 +99,42 @@ class PaymentService:
             )
             raise PaymentFailedException(f'Failed to initiate payment: {str(e)}')
     
+    @staticmethod
+    def prepare_checkout() -> Dict[str, Any]:
+        """
+        Warm the payment gateway up when a kiosk session enters checkout.
+        
+        The POS gateway pre-connects to the device so the card prompt shows
+        without waiting for TCP setup. In async payment mode the payment
+        worker owns the device connection (kept warm there), so nothing is
+        opened in the web process.
+        
+        Returns:
+            Dict[str, Any]: Connection state of the gateway
+        """
+        if getattr(settings, 'PAYMENT_ASYNC_MODE', False):
+            return {'state': 'worker'}
+        if not getattr(settings, 'POS_PRECONNECT', True):
+            return PaymentService.get_connection_state()
+        try:
+            return PaymentGatewayAdapter.get_gateway().prepare_payment()
+        except GatewayException as e:
+            LogService.log_warning('payment', 'payment_prepare_failed', details={'error': str(e)})
+            return {'state': 'error', 'last_error': str(e)}
+    
+    @staticmethod
+    def get_connection_state() -> Dict[str, Any]:
+        """
+        Connection state of the configured gateway in this process.
+        
+        Returns:
+            Dict[str, Any]: Gateway connection state
+        """
+        try:
+            return PaymentGatewayAdapter.get_gateway().connection_state()
+        except GatewayException as e:
+            return {'state': 'error', 'last_error': str(e)}
+    
     @staticmethod
     @transaction.atomic
     def verify_payment(transaction_id: str) -> Transaction:
@@ -1,3 +1,183 @@
-from django.test import TestCase
+import json
+import random
+import socket
+import threading
+import time
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from apps.payment.gateway.exceptions import GatewayException
+from apps.payment.gateway.pos.communication import POSCommunication
+from apps.payment.gateway.pos.connection import POSConnection
+from apps.payment.gateway.pos.framing import POSFrameReader
+from apps.payment.gateway.pos.response_parser import POSResponseParser
+from apps.payment.gateway.pos.tag_tokenizer import POSTagTokenizer
+from apps.payment.management.commands.benchmark_pos_parser import DEFAULT_CORPUS
+
+
+def _frame(body: str) -> bytes:
+    return f'{len(body):04d}{body}'.encode('ascii')
+
+
+ACK_BODY = 'RS013PD0011'
+SUCCESS_BODY = (
+    'RS136RS00200SR006000042RN012123456789012'
+    'TM00898194184PN012621986**1236TI0191405/07/27-10:15:00'
+)
+DECLINED_BODY = 'RS013RS00251PD0011'
+
+
+class _FakePOS:
+    """
+    Local TCP stand-in for the terminal: reads the payment request, then
+    plays a script of (delay seconds, bytes) sends; None closes the socket.
+    """
+
+    def __init__(self, script):
+        self.script = script
+        self.requests = []
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen(1)
+        self.port = self.server.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        try:
+            conn, _ = self.server.accept()
+        except OSError:
+            return
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            self.requests.append(conn.recv(4096))
+            for delay, data in self.script:
+                time.sleep(delay)
+                if data is None:
+                    break
+                conn.sendall(data)
+            else:
+                # Keep the line open until the client is done
+                conn.recv(1)
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+    def stop(self):
+        self.server.close()
+
+
+class POSCommunicationTests(SimpleTestCase):
+    def _pay(self, script, max_wait_time=5):
+        device = _FakePOS(script)
+        self.addCleanup(device.stop)
+        connection = POSConnection('127.0.0.1', device.port, timeout=2)
+        self.addCleanup(connection.disconnect)
+        communication = POSCommunication(connection, POSResponseParser())
+        started = time.monotonic()
+        response = communication.send_command(_frame('PR00AM00510000'), max_wait_time=max_wait_time)
+        self.assertEqual(device.requests, [_frame('PR00AM00510000')])
+        return response, time.monotonic() - started
+
+    def test_split_packets_are_joined_into_one_frame(self):
+        final = _frame(SUCCESS_BODY)
+        script = [(0.01, _frame(ACK_BODY))]
+        script += [(0.02, final[i:i + 7]) for i in range(0, len(final), 7)]
+        response, _ = self._pay(script)
+        self.assertEqual(response, final.decode('ascii'))
+        self.assertEqual(POSResponseParser().parse(response)['status'], 'success')
+
+    def test_prefix_split_across_reads(self):
+        final = _frame(DECLINED_BODY)
+        response, _ = self._pay([(0.01, final[:2]), (0.05, final[2:6]), (0.05, final[6:])])
+        self.assertEqual(response, final.decode('ascii'))
+
+    def test_merged_ack_and_final_in_one_packet(self):
+        final = _frame(SUCCESS_BODY)
+        response, elapsed = self._pay([(0.01, _frame(ACK_BODY) + final)])
+        self.assertEqual(response, final.decode('ascii'))
+        # Complete frames are handled at once, without waiting for a quiet line
+        self.assertLess(elapsed, POSFrameReader.IDLE_SECONDS)
+
+    def test_unframed_response_after_quiet_line(self):
+        response, elapsed = self._pay([(0.01, DECLINED_BODY[:8].encode()), (0.02, DECLINED_BODY[8:].encode())])
+        self.assertEqual(response, DECLINED_BODY)
+        self.assertEqual(POSResponseParser().parse(response)['response_code'], '51')
+        self.assertGreaterEqual(elapsed, POSFrameReader.IDLE_SECONDS)
+
+    def test_peer_close_after_ack_raises(self):
+        with self.assertRaises(GatewayException):
+            self._pay([(0.01, _frame(ACK_BODY)), (0.05, None)])
+
+    def test_peer_close_returns_buffered_final(self):
+        response, elapsed = self._pay([(0.01, DECLINED_BODY.encode()), (0, None)])
+        self.assertEqual(response, DECLINED_BODY)
+        # EOF ends the response without the unframed idle wait
+        self.assertLess(elapsed, POSFrameReader.IDLE_SECONDS)
+
+    def test_no_final_response_times_out(self):
+        with self.assertRaises(GatewayException):
+            self._pay([(0.01, _frame(ACK_BODY)), (3, None)], max_wait_time=1)
+
+
+class POSFrameReaderTests(SimpleTestCase):
+    def test_byte_by_byte_feed(self):
+        stream = _frame(ACK_BODY) + _frame(SUCCESS_BODY)
+        reader = POSFrameReader()
+        frames = []
+        for i in range(len(stream)):
+            frames += reader.feed(stream[i:i + 1])
+        self.assertEqual(frames, [_frame(ACK_BODY), _frame(SUCCESS_BODY)])
+        self.assertEqual(reader.pending, 0)
+        self.assertIsNone(reader.flush_after())
+
+    def test_flush_windows(self):
+        reader = POSFrameReader(idle_seconds=0.1, stalled_frame_seconds=1.0)
+        self.assertEqual(reader.feed(b'00'), [])
+        # Maybe the start of a length prefix: wait longer
+        self.assertEqual(reader.flush_after(), 1.0)
+        reader.flush()
+        self.assertEqual(reader.feed(b'RS013'), [])
+        self.assertFalse(reader.is_framed)
+        self.assertEqual(reader.flush_after(), 0.1)
+        self.assertEqual(reader.flush(), b'RS013')
+        # Declared length never reached: stalled frame
+        self.assertEqual(reader.feed(b'0099RS013'), [])
+        self.assertTrue(reader.is_framed)
+        self.assertEqual(reader.flush_after(), 1.0)
+
+
+class POSResponseCorpusTests(SimpleTestCase):
+    """Recorded device responses (response_corpus.json) and their parse results."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with open(DEFAULT_CORPUS, encoding='utf-8') as handle:
+            cls.corpus = json.load(handle)
+        cls.parser = POSResponseParser()
+
+    def test_corpus_parses_to_recorded_results(self):
+        self.assertTrue(self.corpus)
+        for entry in self.corpus:
+            with self.subTest(entry['name']):
+                parsed = self.parser.parse(entry['response'])
+                self.assertEqual({key: parsed.get(key) for key in entry['expected']}, entry['expected'])
+
+    def test_chunked_feed_matches_tokenize(self):
+        rng = random.Random(1405)
+        for entry in self.corpus:
+            response = entry['response']
+            whole = POSTagTokenizer.tokenize(response)
+            for run in range(20):
+                tokenizer = POSTagTokenizer()
+                pos = 0
+                while pos < len(response):
+                    size = rng.randint(1, 8)
+                    tokenizer.feed(response[pos:pos + size])
+                    pos += size
+                tokens = tokenizer.finish()
+                with self.subTest(entry['name'], run=run):
+                    self.assertEqual(tokens, whole)
+                    self.assertEqual(self.parser.parse_tokens(tokens, response), self.parser.parse(response))
@@ -0,0 +1,196 @@
+"""
+Per-phase timing of payments.
+
+The order service opens a trace when it asks the gateway for a payment and
+saves it as one PaymentTrace row when the attempt is over. Code on the way
+(POS connection manager, socket communication, bridge client, print queue)
+marks the phases it reaches with PaymentTracer.mark(); the active
+trace lives in a context variable, so gateways need no extra arguments and
+a mark outside a traced payment (preflight, management commands) is a no-op.
+
+Lives outside apps.payment.services (which imports the gateway adapter) so
+gateway modules can import it.
+"""
+
+import time
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from apps.logs.services.log_service import LogService
+from apps.payment.models import PaymentTrace
+
+
+class _ActiveTrace:
+    def __init__(self, order_id: Optional[int], order_number: str, gateway_name: str,
+                 requested_at: Optional[datetime]):
+        now = timezone.now()
+        started_at = min(requested_at, now) if requested_at else now
+        self.order_id = order_id
+        self.order_number = order_number
+        self.gateway_name = gateway_name
+        self.started_at = started_at
+        # Monotonic origin; a queued payment starts when it was queued
+        self.origin = time.monotonic() - (now - started_at).total_seconds()
+        self.phases: Dict[str, int] = {}
+        self.attributes: Dict[str, Any] = {}
+
+    def elapsed_ms(self) -> int:
+        return max(int(round((time.monotonic() - self.origin) * 1000)), 0)
+
+
+_active: ContextVar[Optional[_ActiveTrace]] = ContextVar('payment_trace', default=None)
+
+
+class PaymentTracer:
+    """
+    Record payment phase timestamps.
+
+    Phases in order of a card payment; a segment is the time from the
+    previous recorded phase to this one (see PHASE_GROUPS for what each
+    segment mostly measures):
+        dequeue        payment worker picked the queued payment up
+        connect        POS socket ready (warm or freshly connected)
+        send           payment request written / accepted by PosBridge
+        ack            POS acknowledged the request (card prompt shown)
+        final          gateway returned the final result
+        print_enqueue  receipt print job queued (inside the paid transaction)
+        db_commit      order payment state committed
+    """
+
+    PHASES = ('dequeue', 'connect', 'send', 'ack', 'final', 'print_enqueue', 'db_commit')
+
+    # Where the time of each segment goes ('finish' = after the last phase)
+    PHASE_GROUPS = {
+        'backend': ('dequeue', 'print_enqueue', 'db_commit', 'finish'),
+        'network': ('connect', 'send', 'ack'),
+        'terminal': ('final',),
+    }
+
+    # Old traces are deleted at most this often per process
+    PRUNE_INTERVAL = 3600
+    _last_prune: Optional[float] = None
+
+    @staticmethod
+    def enabled() -> bool:
+        return bool(getattr(settings, 'PAYMENT_TRACE_ENABLED', True))
+
+    @staticmethod
+    def start(order_id: Optional[int], order_number: str, gateway_name: str,
+              requested_at: Optional[datetime] = None) -> None:
+        """
+        Open the trace of a payment attempt in the current context.
+
+        Args:
+            order_id: Order being paid
+            order_number: Order number
+            gateway_name: Gateway class name
+            requested_at: When the payment was requested, if earlier than now
+                (queued payment job); defaults to now
+        """
+        if not PaymentTracer.enabled():
+            _active.set(None)
+            return
+        _active.set(_ActiveTrace(order_id, order_number, gateway_name, requested_at))
+
+    @staticmethod
+    def mark(phase: str, **attributes: Any) -> None:
+        """
+        Record that the active payment reached a phase (first mark wins).
+
+        Args:
+            phase: One of PHASES
+            **attributes: Context saved with the trace (e.g. warm=True)
+        """
+        trace = _active.get()
+        if trace is None:
+            return
+        trace.phases.setdefault(phase, trace.elapsed_ms())
+        if attributes:
+            trace.attributes.update(attributes)
+
+    @staticmethod
+    def finish(outcome: str) -> Optional[PaymentTrace]:
+        """
+        Close the active trace and save it; never raises.
+
+        Args:
+            outcome: success / failed / cancelled / error
+
+        Returns:
+            Optional[PaymentTrace]: Saved trace, None without an active trace
+        """
+        trace = _active.get()
+        if trace is None:
+            return None
+        _active.set(None)
+        try:
+            saved = PaymentTrace.objects.create(
+                order_id=trace.order_id,
+                order_number=(trace.order_number or '')[:50],
+                gateway_name=(trace.gateway_name or '')[:50],
+                outcome=outcome,
+                started_at=trace.started_at,
+                total_ms=trace.elapsed_ms(),
+                phases=trace.phases,
+                attributes=trace.attributes,
+            )
+        except Exception as e:
+            LogService.log_warning('payment', 'payment_trace_save_failed', details={
+                'order_id': trace.order_id,
+                'error': str(e),
+            })
+            return None
+        PaymentTracer._prune_if_due()
+        return saved
+
+    @staticmethod
+    def segments(phases: Dict[str, int], total_ms: int) -> Dict[str, int]:
+        """
+        Split a trace into segment durations (ms), keyed by the phase that ends them.
+
+        A missing phase is skipped, so its time counts toward the next one.
+        """
+        result: Dict[str, int] = {}
+        previous = 0
+        for phase in PaymentTracer.PHASES:
+            if phase in phases:
+                at = int(phases[phase])
+                result[phase] = max(at - previous, 0)
+                previous = max(at, previous)
+        result['finish'] = max(int(total_ms) - previous, 0)
+        return result
+
+    @staticmethod
+    def prune(retention_days: Optional[float] = None) -> int:
+        """
+        Delete traces older than the retention window.
+
+        Args:
+            retention_days: Days to keep (default PAYMENT_TRACE_RETENTION_DAYS; 0 = keep all)
+
+        Returns:
+            int: Deleted traces
+        """
+        if retention_days is None:
+            retention_days = float(getattr(settings, 'PAYMENT_TRACE_RETENTION_DAYS', 90) or 0)
+        if retention_days <= 0:
+            return 0
+        cutoff = timezone.now() - timedelta(days=retention_days)
+        deleted, _ = PaymentTrace.objects.filter(started_at__lt=cutoff).delete()
+        return deleted
+
+    @staticmethod
+    def _prune_if_due() -> None:
+        now = time.monotonic()
+        last = PaymentTracer._last_prune
+        if last is not None and now - last < PaymentTracer.PRUNE_INTERVAL:
+            return
+        PaymentTracer._last_prune = now
+        try:
+            PaymentTracer.prune()
+        except Exception as e:
+            LogService.log_warning('payment', 'payment_trace_prune_failed', details={'error': str(e)})
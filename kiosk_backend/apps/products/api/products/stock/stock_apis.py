@@ -0,0 +1,47 @@
+from rest_framework import generics, status
+from rest_framework.response import Response
+from apps.products.api.products.stock.stock_serializers import ProductStockSnapshotSerializer
+from apps.products.models import StockRevision
+from apps.products.selectors.product_selector import ProductSelector
+from apps.core.api.schema import custom_extend_schema
+from apps.core.api.schema import ResponseStatusCodes
+
+
+class ProductStockAPIView(generics.GenericAPIView):
+    """
+    API endpoint for current stock levels of active products.
+    
+    Kiosks call this when `stock_revision` in public settings changes, so
+    sales refresh stock badges without reloading the whole menu.
+    """
+    serializer_class = ProductStockSnapshotSerializer
+    
+    @custom_extend_schema(
+        resource_name="ProductStock",
+        response_serializer=ProductStockSnapshotSerializer,
+        status_codes=[ResponseStatusCodes.OK],
+        summary="Product Stock Levels",
+        description="Get id/stock pairs for all active products together with the current stock revision.",
+        tags=["Products"],
+        operation_id="products_stock",
+    )
+    def get(self, request):
+        """
+        Get stock levels of active products.
+        
+        Args:
+            request: HTTP request object
+            
+        Returns:
+            Response: Stock revision and id/stock_quantity list
+        """
+        # Read the revision first: a bump racing with this request only
+        # makes the kiosk fetch once more, never miss a change.
+        snapshot = {
+            'stock_revision': StockRevision.current(),
+            'items': list(ProductSelector.get_stock_levels()),
+        }
+        return Response(
+            data=ProductStockSnapshotSerializer(snapshot).data,
+            status=status.HTTP_200_OK
+        )
@@ -0,0 +1,16 @@
+from rest_framework import serializers
+from django.utils.translation import gettext_lazy as _
+
+
+class ProductStockLevelSerializer(serializers.Serializer):
+    id = serializers.IntegerField(label=_('شناسه محصول'))
+    stock_quantity = serializers.IntegerField(label=_('موجودی'))
+    is_in_stock = serializers.SerializerMethodField(label=_('موجود'))
+
+    def get_is_in_stock(self, obj) -> bool:
+        return obj['stock_quantity'] > 0
+
+
+class ProductStockSnapshotSerializer(serializers.Serializer):
+    stock_revision = serializers.IntegerField(label=_('نسخه موجودی'))
+    items = ProductStockLevelSerializer(many=True, label=_('موجودی محصولات'))
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.16 on 2026-10-18 01:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_dashboard_ab_coupons_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('revision', models.PositiveBigIntegerField(default=0, verbose_name='نسخه موجودی')),
+            ],
+            options={
+                'verbose_name': 'نسخه موجودی',
+                'verbose_name_plural': 'نسخه موجودی',
+            },
+        ),
+    ]
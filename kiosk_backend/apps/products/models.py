@@ -181,3 +181,35 @@ class StockHistory(TimeStampedModel):
     
     def __str__(self):
         return f"{self.product.name} - {self.change_type} - {self.created_at}"
+
+
+class StockRevision(models.Model):
+    """
+    Singleton counter bumped after every committed stock movement.
+
+    Kept apart from SiteSettings.catalog_revision so sales neither lock the
+    settings row nor force kiosks to reload the whole menu; kiosks only
+    refetch stock levels when this number changes.
+    """
+
+    revision = models.PositiveBigIntegerField(default=0, verbose_name=_('نسخه موجودی'))
+
+    class Meta:
+        verbose_name = _('نسخه موجودی')
+        verbose_name_plural = _('نسخه موجودی')
+
+    def __str__(self):
+        return f'stock revision {self.revision}'
+
+    @classmethod
+    def current(cls) -> int:
+        value = cls.objects.filter(pk=1).values_list('revision', flat=True).first()
+        return int(value or 0)
+
+    @classmethod
+    def bump(cls) -> None:
+        """Increment with a single UPDATE (no select_for_update round-trip)."""
+        if not cls.objects.filter(pk=1).update(revision=models.F('revision') + 1):
+            obj, created = cls.objects.get_or_create(pk=1, defaults={'revision': 1})
+            if not created:
+                cls.objects.filter(pk=1).update(revision=models.F('revision') + 1)
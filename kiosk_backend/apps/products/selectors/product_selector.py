@@ -76,3 +76,8 @@ class ProductSelector:
     def get_all_products() -> QuerySet[Product]:
         return Product.objects.all().select_related('category')
 
+    
+    @staticmethod
+    def get_stock_levels() -> QuerySet:
+        """Lightweight id/stock rows for active products (kiosk stock refresh)."""
+        return Product.objects.filter(is_active=True).values('id', 'stock_quantity').order_by('id')
@@ -1,7 +1,11 @@
-from typing import Optional
+from typing import Dict, Optional
 from django.contrib.auth import get_user_model
-from apps.products.models import Product, StockHistory
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from apps.products.models import Product, StockHistory, StockRevision
 from apps.logs.services.log_service import LogService
+from apps.core.exceptions.order import InsufficientStockException
 
 User = get_user_model()
 
@@ -44,7 +48,8 @@ class StockService:
         previous_quantity = product.stock_quantity
         
         product.stock_quantity = new_quantity
-        product.save()
+        # Stock-only save: signal bumps stock revision, not catalog revision
+        product.save(update_fields=['stock_quantity', 'updated_at'])
         
         StockHistory.objects.create(
             product=product,
@@ -87,27 +92,137 @@ class StockService:
             Product.DoesNotExist: If product does not exist
             ValueError: If insufficient stock available
         """
-        product = Product.objects.get(id=product_id)
-        new_quantity = product.stock_quantity - quantity
-        
-        if new_quantity < 0:
-            LogService.log_error(
-                'product',
-                'stock_decrease_failed',
-                details={
-                    'product_id': product_id,
-                    'current_stock': product.stock_quantity,
-                    'requested_decrease': quantity
-                }
-            )
+        if not Product.objects.filter(id=product_id).exists():
+            raise Product.DoesNotExist(f'Product {product_id} does not exist')
+        try:
+            StockService.decrease_stock_bulk({product_id: quantity}, related_order_id=related_order_id)
+        except InsufficientStockException:
             raise ValueError('Insufficient stock')
+        return Product.objects.get(id=product_id)
+    
+    @staticmethod
+    def decrease_stock_bulk(
+        quantities: Dict[int, int],
+        related_order_id: Optional[int] = None
+    ) -> Dict[int, int]:
+        """
+        Atomically decrease stock for a whole cart (all-or-nothing).
         
-        return StockService.update_stock(
-            product_id=product_id,
-            new_quantity=new_quantity,
-            change_type='sale',
-            notes=f'Decreased by {quantity}',
-            related_order_id=related_order_id
+        Each product is decremented with a conditional
+        `stock = stock - q WHERE stock >= q`, so concurrent checkouts can never
+        oversell. On PostgreSQL the whole cart is a single statement that locks
+        rows in id order (deadlock-free); other backends issue one conditional
+        UPDATE per product. History rows are bulk-inserted.
+        
+        Args:
+            quantities: Mapping of product_id -> quantity to decrease
+            related_order_id: Related order ID if applicable (optional)
+            
+        Returns:
+            Dict[int, int]: Mapping of product_id -> new stock quantity
+            
+        Raises:
+            InsufficientStockException: If any product lacks stock (nothing is decreased)
+        """
+        lines = {int(pid): int(qty) for pid, qty in quantities.items() if int(qty) > 0}
+        if not lines:
+            return {}
+        
+        now = timezone.now()
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                new_quantities = StockService._decrease_stock_single_statement(lines, now)
+            else:
+                new_quantities = StockService._decrease_stock_per_row(lines, now)
+            
+            missing = sorted(set(lines) - set(new_quantities))
+            if missing:
+                # Raising inside atomic() rolls back the rows already decremented
+                StockService._raise_insufficient(missing, lines)
+            
+            StockHistory.objects.bulk_create([
+                StockHistory(
+                    product_id=pid,
+                    previous_quantity=new_quantities[pid] + qty,
+                    new_quantity=new_quantities[pid],
+                    change_type='sale',
+                    notes=f'Decreased by {qty}',
+                    related_order_id=related_order_id,
+                )
+                for pid, qty in lines.items()
+            ])
+            
+            # Queryset updates bypass post_save; notify kiosks via the stock
+            # channel only (no catalog_revision bump / settings row lock).
+            transaction.on_commit(StockRevision.bump)
+        
+        LogService.log_info(
+            'product',
+            'stock_decreased',
+            details={
+                'related_order_id': related_order_id,
+                'lines': {str(pid): qty for pid, qty in lines.items()},
+                'new_quantities': {str(pid): qty for pid, qty in new_quantities.items()},
+            }
+        )
+        return new_quantities
+    
+    @staticmethod
+    def _decrease_stock_single_statement(lines: Dict[int, int], now) -> Dict[int, int]:
+        opts = Product._meta
+        table = connection.ops.quote_name(opts.db_table)
+        pk = connection.ops.quote_name(opts.pk.column)
+        stock = connection.ops.quote_name(opts.get_field('stock_quantity').column)
+        updated = connection.ops.quote_name(opts.get_field('updated_at').column)
+        values_sql = ', '.join(['(%s::bigint, %s::integer)'] * len(lines))
+        sql = (
+            f'WITH locked AS ('
+            f'SELECT {pk} AS id FROM {table} WHERE {pk} = ANY(%s) ORDER BY {pk} FOR UPDATE'
+            f') '
+            f'UPDATE {table} AS p SET {stock} = p.{stock} - v.qty, {updated} = %s '
+            f'FROM (VALUES {values_sql}) AS v(id, qty) JOIN locked ON locked.id = v.id '
+            f'WHERE p.{pk} = v.id AND p.{stock} >= v.qty '
+            f'RETURNING p.{pk}, p.{stock}'
+        )
+        params = [sorted(lines), now]
+        for pid, qty in lines.items():
+            params.extend([pid, qty])
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return {row[0]: row[1] for row in cursor.fetchall()}
+    
+    @staticmethod
+    def _decrease_stock_per_row(lines: Dict[int, int], now) -> Dict[int, int]:
+        decreased = []
+        for pid in sorted(lines):
+            if Product.objects.filter(id=pid, stock_quantity__gte=lines[pid]).update(
+                stock_quantity=F('stock_quantity') - lines[pid],
+                updated_at=now,
+            ):
+                decreased.append(pid)
+        return dict(
+            Product.objects.filter(id__in=decreased).values_list('id', 'stock_quantity')
+        )
+    
+    @staticmethod
+    def _raise_insufficient(product_ids, lines: Dict[int, int]) -> None:
+        products = {p.id: p for p in Product.objects.filter(id__in=product_ids)}
+        pid = product_ids[0]
+        product = products.get(pid)
+        LogService.log_error(
+            'product',
+            'stock_decrease_failed',
+            details={
+                'product_ids': product_ids,
+                'current_stock': {str(p.id): p.stock_quantity for p in products.values()},
+                'requested_decrease': {str(i): lines[i] for i in product_ids},
+            }
+        )
+        if product is None:
+            raise InsufficientStockException(f'Product with id {pid} does not exist')
+        raise InsufficientStockException(
+            f'Insufficient stock for product {product.name}. '
+            f'Available: {product.stock_quantity}, Requested: {lines[pid]}'
         )
     
     @staticmethod
@@ -1,7 +1,21 @@
-from django.db.models.signals import post_delete, post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
-from apps.products.models import Category, Product
+from apps.products.models import Category, Product, StockRevision
+
+# Fields the kiosk menu renders; a change here needs a full menu reload.
+MENU_FIELDS = (
+    'name',
+    'description',
+    'price',
+    'category_id',
+    'image',
+    'is_active',
+    'service_fee_applicable',
+)
+# Fields that only move stock; these go to the cheap stock-revision channel.
+STOCK_FIELDS = {'stock_quantity', 'updated_at'}
 
 
 def _bump_catalog():
@@ -10,9 +24,50 @@ def _bump_catalog():
     SiteSettings.bump_catalog_revision()
 
 
+def bump_stock_revision():
+    """Signal kiosks to refetch stock levels once the current transaction commits."""
+    transaction.on_commit(StockRevision.bump)
+
+
+def _is_stock_only_save(update_fields) -> bool:
+    return bool(update_fields) and set(update_fields) <= STOCK_FIELDS
+
+
+@receiver(pre_save, sender=Product)
+def product_snapshot_menu_fields(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or not instance.pk or _is_stock_only_save(update_fields):
+        return
+    instance._menu_snapshot = (
+        Product.objects.filter(pk=instance.pk)
+        .values(*MENU_FIELDS, 'stock_quantity')
+        .first()
+    )
+
+
 @receiver(post_save, sender=Product)
+def product_catalog_changed(sender, instance, created=False, update_fields=None, **kwargs):
+    if _is_stock_only_save(update_fields):
+        bump_stock_revision()
+        return
+
+    snapshot = getattr(instance, '_menu_snapshot', None)
+    instance._menu_snapshot = None
+    if created or snapshot is None:
+        _bump_catalog()
+        return
+
+    menu_changed = any(
+        str(snapshot[field] or '') != str(getattr(instance, field) or '')
+        for field in MENU_FIELDS
+    )
+    if menu_changed:
+        _bump_catalog()
+    elif snapshot['stock_quantity'] != instance.stock_quantity:
+        bump_stock_revision()
+
+
 @receiver(post_delete, sender=Product)
-def product_catalog_changed(sender, **kwargs):
+def product_catalog_deleted(sender, **kwargs):
     _bump_catalog()
 
 
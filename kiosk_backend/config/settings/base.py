@@ -238,6 +238,13 @@ POS_BRIDGE_HOST = _env('POS_BRIDGE_HOST', 'host.docker.internal') or 'host.docke
 POS_BRIDGE_PORT = int(_env('POS_BRIDGE_PORT', '9000') or 9000)
 POS_BRIDGE_TOKEN = _env('POS_BRIDGE_TOKEN', '')
 POS_BRIDGE_TIMEOUT = float(_env('POS_BRIDGE_TIMEOUT', '130') or 130)
+# Keep-alive connections to the bridge per process; /health read timeout (admin health)
+POS_BRIDGE_POOL_SIZE = int(_env('POS_BRIDGE_POOL_SIZE', '4') or 4)
+POS_BRIDGE_HEALTH_TIMEOUT = float(_env('POS_BRIDGE_HEALTH_TIMEOUT', '3') or 3)
+# Bridge with several POS terminals: this kiosk's terminal id (BRIDGE_TERMINALS on the
+# bridge) or its kiosk id (BRIDGE_KIOSK_TERMINALS); both empty = first free terminal
+POS_BRIDGE_TERMINAL = _env('POS_BRIDGE_TERMINAL', '')
+POS_BRIDGE_KIOSK_ID = _env('POS_BRIDGE_KIOSK_ID', '')
 
 PAYMENT_GATEWAY_CONFIG = {
     'gateway_name': _PAYMENT_GATEWAY_NAME,
@@ -255,13 +262,72 @@ PAYMENT_GATEWAY_CONFIG = {
     'bridge_port': POS_BRIDGE_PORT,
     'bridge_token': POS_BRIDGE_TOKEN,
     'bridge_timeout': POS_BRIDGE_TIMEOUT,
+    'bridge_terminal': POS_BRIDGE_TERMINAL,
+    'bridge_kiosk_id': POS_BRIDGE_KIOSK_ID,
 }
 
+# Async payment mode: order create returns a payment-job handle and the
+# `payment_worker` process drives the gateway (kiosk polls the job status).
+PAYMENT_ASYNC_MODE = _env('PAYMENT_ASYNC_MODE', 'False').lower() in ('1', 'true', 'yes', 'on')
+PAYMENT_WORKER_POLL_INTERVAL = float(_env('PAYMENT_WORKER_POLL_INTERVAL', '0.5') or 0.5)
+PAYMENT_JOB_STALE_SECONDS = int(_env('PAYMENT_JOB_STALE_SECONDS', '300') or 300)
+# payment_worker writes its POS state this often; the dashboard health reads it
+PAYMENT_WORKER_HEARTBEAT_SECONDS = float(_env('PAYMENT_WORKER_HEARTBEAT_SECONDS', '5') or 5)
+# Upper bound for ?wait= on the payment-job status endpoint. A waiting poll holds
+# a sync Gunicorn worker (3 in entrypoint.sh), so keep it to a couple of seconds
+PAYMENT_JOB_LONG_POLL_MAX = float(_env('PAYMENT_JOB_LONG_POLL_MAX', '2') or 0)
+# Per-phase payment timings (PaymentTrace) for the admin latency report; days kept (0 = forever)
+PAYMENT_TRACE_ENABLED = _env('PAYMENT_TRACE_ENABLED', 'True').lower() in ('1', 'true', 'yes', 'on')
+PAYMENT_TRACE_RETENTION_DAYS = float(_env('PAYMENT_TRACE_RETENTION_DAYS', '90') or 0)
+
+# Direct POS (gateway=pos): keep the device connected so the card prompt is not
+# delayed by TCP setup. Defaults to on only in async mode, where payment_worker is
+# the one process paying; in sync mode the checkout warm-up lands on a random
+# Gunicorn worker that then holds the device from the others (single-worker only)
+POS_PRECONNECT = (_env('POS_PRECONNECT') or str(PAYMENT_ASYNC_MODE)).lower() in ('1', 'true', 'yes', 'on')
+# Seconds a checkout warm-up keeps the POS connected (device is held meanwhile)
+POS_WARM_HOLD_SECONDS = float(_env('POS_WARM_HOLD_SECONDS', '120') or 120)
+# Idle connection health check interval and reconnect backoff cap (seconds)
+POS_PROBE_INTERVAL = float(_env('POS_PROBE_INTERVAL', '5') or 5)
+POS_RECONNECT_MAX_BACKOFF = float(_env('POS_RECONNECT_MAX_BACKOFF', '30') or 30)
+
+# Order/invoice numbers: node tag (up to 4 base36 chars) embedded in every
+# generated number. Empty = derived from the host name; set distinct values when several
+# backend hosts share one database.
+NUMBER_GENERATOR_NODE_ID = _env('NUMBER_GENERATOR_NODE_ID', '')
+
+# SiteSettings process cache: seconds between cheap updated_at checks
+SITE_SETTINGS_CACHE_TTL = float(_env('SITE_SETTINGS_CACHE_TTL', '5') or 5)
+
 # Printer Configuration
 PRINTER_ENABLED = _env('PRINTER_ENABLED', 'False').lower() in ('1', 'true', 'yes', 'on')
 PRINTER_IP = _env('PRINTER_IP', '192.168.1.100')
 PRINTER_PORT = int(_env('PRINTER_PORT', '9100') or 9100)
 
+# Print queue: payment completion enqueues a PrintJob and `print_worker` prints it.
+# False = print in the web process right after the payment transaction commits.
+PRINT_QUEUE_ENABLED = _env('PRINT_QUEUE_ENABLED', 'True').lower() in ('1', 'true', 'yes', 'on')
+PRINT_WORKER_POLL_INTERVAL = float(_env('PRINT_WORKER_POLL_INTERVAL', '0.5') or 0.5)
+# Jobs the print worker sends at once (always on different printers/stations)
+PRINT_WORKER_CONCURRENCY = int(_env('PRINT_WORKER_CONCURRENCY', '4') or 4)
+PRINT_JOB_MAX_ATTEMPTS = int(_env('PRINT_JOB_MAX_ATTEMPTS', '5') or 5)
+# Retry delay in seconds, doubled after each failed attempt
+PRINT_JOB_RETRY_BACKOFF = float(_env('PRINT_JOB_RETRY_BACKOFF', '5') or 5)
+PRINT_JOB_STALE_SECONDS = int(_env('PRINT_JOB_STALE_SECONDS', '120') or 120)
+# Seconds the admin reprint API waits for the queued reprint before answering
+PRINT_REPRINT_WAIT_SECONDS = float(_env('PRINT_REPRINT_WAIT_SECONDS', '10') or 10)
+PRINTER_TIMEOUT = float(_env('PRINTER_TIMEOUT', '10') or 10)
+# print_worker keeps printer sockets open between jobs and closes them after this idle
+# time (9100 printers accept one client); web processes close after every job
+PRINTER_POOL_IDLE_SECONDS = float(_env('PRINTER_POOL_IDLE_SECONDS', '15') or 15)
+# Encoded ESC/POS jobs kept in memory for retries/reprints
+PRINT_RASTER_CACHE_BYTES = int(_env('PRINT_RASTER_CACHE_BYTES', str(8 * 1024 * 1024)) or 0)
+# Archived receipt images unused for this many days are deleted (0 = keep forever);
+# they are rendered again from the stored receipt data when requested
+RECEIPT_ARCHIVE_RETENTION_DAYS = float(_env('RECEIPT_ARCHIVE_RETENTION_DAYS', '30') or 0)
+# Seconds between archive sweeps run by the idle print worker (0 = only via sweep_receipt_archive)
+RECEIPT_ARCHIVE_SWEEP_INTERVAL = float(_env('RECEIPT_ARCHIVE_SWEEP_INTERVAL', '3600') or 0)
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
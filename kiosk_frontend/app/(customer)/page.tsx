@@ -13,6 +13,7 @@ import { PaymentModal } from "@/components/customer/PaymentModal";
 import { KioskAttractScreen } from "@/components/customer/KioskAttractScreen";
 import { productsApi } from "@/lib/api/products";
 import { ordersApi } from "@/lib/api/orders";
+import { paymentApi } from "@/lib/api/payment";
 import {
   settingsApi,
   resolveCopyright,
@@ -40,6 +41,7 @@ import {
   CategoryFilterSkeleton,
   ProductGridSkeleton,
 } from "@/components/customer/CustomerMenuSkeleton";
+import type { ApiResponse, PaginatedResponse, Product } from "@/types";
 
 /** Return to attract screen after this much idle time on the menu */
 const KIOSK_IDLE_MS = 90_000;
@@ -71,6 +73,7 @@ export default function CustomerPage() {
   const paymentModalTimeoutRef = useRef<NodeJS.Timeout | null>(null);
   const idleTimeoutRef = useRef<NodeJS.Timeout | null>(null);
   const lastCatalogRevisionRef = useRef<number | null>(null);
+  const lastStockRevisionRef = useRef<number | null>(null);
   const landingThemeRef = useRef("cinema");
   const router = useRouter();
   const queryClient = useQueryClient();
@@ -135,6 +138,22 @@ export default function CustomerPage() {
     clearStorage();
   }, []);
 
+  // Pre-connect the card reader once the session heads to checkout, so
+  // tapping pay does not wait for the POS connection; renewed while the
+  // cart stays filled (backend holds it POS_WARM_HOLD_SECONDS)
+  const hasCartItems = items.length > 0;
+  useEffect(() => {
+    if (!hasCartItems) return;
+    const warmUp = () => {
+      paymentApi.warmUpPos().catch(() => {
+        /* best effort; payment connects on its own */
+      });
+    };
+    warmUp();
+    const timer = setInterval(warmUp, 60000);
+    return () => clearInterval(timer);
+  }, [hasCartItems]);
+
   useEffect(() => {
     // Cleanup timeout on unmount
     return () => {
@@ -430,6 +449,49 @@ export default function CustomerPage() {
     }
   }, [settingsData?.result?.catalog_revision, cachedSettings?.catalog_revision, queryClient]);
 
+  // Sales bump stock_revision only → patch stock on cached products, no menu reload
+  useEffect(() => {
+    const revision = Number(settingsData?.result?.stock_revision);
+    if (!Number.isFinite(revision)) return;
+    if (lastStockRevisionRef.current === null || lastStockRevisionRef.current === revision) {
+      lastStockRevisionRef.current = revision;
+      return;
+    }
+    lastStockRevisionRef.current = revision;
+
+    let cancelled = false;
+    void productsApi
+      .getStockLevels()
+      .then((data) => {
+        const items = data?.result?.items;
+        if (cancelled || !Array.isArray(items)) return;
+        const stockById = new Map(items.map((item) => [item.id, item]));
+        queryClient.setQueryData<ApiResponse<PaginatedResponse<Product>>>(["products"], (prev) => {
+          if (!prev?.result?.results) return prev;
+          const next = {
+            ...prev,
+            result: {
+              ...prev.result,
+              results: prev.result.results.map((product) => {
+                const level = stockById.get(product.id);
+                return level
+                  ? { ...product, stock_quantity: level.stock_quantity, is_in_stock: level.is_in_stock }
+                  : product;
+              }),
+            },
+          };
+          writeCachedProducts(next);
+          return next;
+        });
+      })
+      .catch(() => {
+        // Next settings poll retries with the following revision
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [settingsData?.result?.stock_revision, queryClient]);
+
   // Admin tab writes localStorage — sync instantly without waiting for poll
   useEffect(() => {
     const onStorage = (e: StorageEvent) => {
@@ -558,7 +620,15 @@ export default function CustomerPage() {
             : undefined,
         landing_theme: landingThemeRef.current || undefined,
       };
-      return await ordersApi.createOrder(orderData);
+      const response = await ordersApi.createOrder(orderData);
+      const jobId = response.result?.payment_job?.job_id;
+      if (!jobId) {
+        return response;
+      }
+      // حالت پرداخت غیرهمزمان (202): سفارش ثبت شده و پرداخت در payment_worker است؛
+      // تا نهایی شدن کار پرداخت صبر می‌کنیم و سفارش نهایی را مثل حالت همزمان برمی‌گردانیم
+      const job = await ordersApi.followPaymentJob(jobId);
+      return { ...response, result: job.order ?? response.result };
     },
     onSuccess: (response) => {
       // پاک کردن timeout قبلی اگر وجود داشته باشد
@@ -1,5 +1,9 @@
 import { apiClient } from './client'
-import type { ApiResponse, Order, OrderCreateRequest } from '@/types'
+import type { ApiResponse, Order, OrderCreateRequest, PaymentJob } from '@/types'
+
+const PAYMENT_JOB_FINAL = ['succeeded', 'failed', 'cancelled']
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms))
 
 export const ordersApi = {
   createOrder: async (data: OrderCreateRequest): Promise<ApiResponse<Order>> => {
@@ -14,6 +18,44 @@ export const ordersApi = {
     return response.data
   },
 
+  // Async payment mode: job returned by createOrder (payment_job.job_id).
+  // The server waits at most PAYMENT_JOB_LONG_POLL_MAX (a couple of seconds).
+  getPaymentJob: async (jobId: string, wait = 2): Promise<ApiResponse<PaymentJob>> => {
+    const response = await apiClient.get<ApiResponse<PaymentJob>>(
+      `/kiosk/orders/orders/payment-jobs/${jobId}/`,
+      {
+        params: { wait },
+        timeout: (wait + 10) * 1000,
+      }
+    )
+    return response.data
+  },
+
+  // Poll a payment job until it is final; resolves with the job (and its order).
+  // Network errors are retried until timeoutMs: the payment keeps running on the worker.
+  followPaymentJob: async (
+    jobId: string,
+    { intervalMs = 1000, timeoutMs = 300000 } = {}
+  ): Promise<PaymentJob> => {
+    const deadline = Date.now() + timeoutMs
+    for (;;) {
+      try {
+        const job = (await ordersApi.getPaymentJob(jobId)).result
+        if (PAYMENT_JOB_FINAL.includes(job.status)) {
+          return job
+        }
+      } catch (error: any) {
+        if (error.response?.status === 404 || Date.now() >= deadline) {
+          throw error
+        }
+      }
+      if (Date.now() >= deadline) {
+        throw new Error('timeout waiting for payment job')
+      }
+      await sleep(intervalMs)
+    }
+  },
+
   getOrderItems: async (orderId: number): Promise<ApiResponse<import('@/types').OrderItem[]>> => {
     const response = await apiClient.get<ApiResponse<import('@/types').OrderItem[]>>(
       `/kiosk/orders/order-items/order/${orderId}/items/`
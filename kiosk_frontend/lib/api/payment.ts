@@ -23,5 +23,13 @@ export const paymentApi = {
     )
     return response.data
   },
+
+  // Checkout started: backend pre-connects the POS for the coming payment
+  warmUpPos: async (): Promise<ApiResponse<{ state: string }>> => {
+    const response = await apiClient.post<ApiResponse<{ state: string }>>(
+      '/kiosk/payment/pos/warmup/'
+    )
+    return response.data
+  },
 }
 
@@ -1,5 +1,5 @@
 import { apiClient } from './client'
-import type { ApiResponse, Product, Category, PaginatedResponse } from '@/types'
+import type { ApiResponse, Product, Category, PaginatedResponse, ProductStockSnapshot } from '@/types'
 
 export const productsApi = {
   getProducts: async (params?: {
@@ -19,6 +19,14 @@ export const productsApi = {
     return response.data
   },
 
+  /** Stock levels only — used when settings.stock_revision changes after a sale */
+  getStockLevels: async (): Promise<ApiResponse<ProductStockSnapshot>> => {
+    const response = await apiClient.get<ApiResponse<ProductStockSnapshot>>(
+      '/kiosk/products/products/stock/'
+    )
+    return response.data
+  },
+
   getProduct: async (id: number): Promise<ApiResponse<Product>> => {
     const response = await apiClient.get<ApiResponse<Product>>(
       `/kiosk/products/products/${id}/`
@@ -29,6 +29,8 @@ export interface Settings {
   cart_layout?: 'side' | 'bottom' | string
   /** Bumps when products/categories change — kiosk refreshes menu cache. */
   catalog_revision?: number
+  /** Bumps on every sale/stock edit — kiosk refetches stock levels only. */
+  stock_revision?: number
   [key: string]: any
 }
 
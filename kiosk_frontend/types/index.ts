@@ -112,6 +112,22 @@ export interface Order {
   items: OrderItem[]
   created_at: string
   updated_at: string
+  // Async payment mode only (HTTP 202 from order create)
+  payment_job?: PaymentJob
+}
+
+export type PaymentJobStatus = 'queued' | 'processing' | 'succeeded' | 'failed' | 'cancelled'
+
+export interface PaymentJob {
+  job_id: string
+  status: PaymentJobStatus
+  amount: number
+  error_message: string
+  started_at: string | null
+  finished_at: string | null
+  created_at: string
+  // Job status endpoint: the order (with payment/receipt once final)
+  order?: Order
 }
 
 export type OrderStatus = 'pending' | 'processing' | 'paid' | 'completed' | 'cancelled'
@@ -255,6 +271,11 @@ export interface ReportItem {
   total_amount: number
 }
 
+export interface ProductStockSnapshot {
+  stock_revision: number
+  items: Array<{ id: number; stock_quantity: number; is_in_stock: boolean }>
+}
+
 export interface PaginatedResponse<T> {
   count: number
   next: string | null
@@ -303,6 +324,7 @@ export interface Settings {
   takeaway_enabled?: boolean
   cart_layout?: 'side' | 'bottom' | string
   catalog_revision?: number
+  stock_revision?: number
   receipt_number_mode?: 'manual' | 'automatic' | string
   last_receipt_number?: number
   next_receipt_number?: number
@@ -2,9 +2,14 @@
 PosBridge — Windows HTTP service that drives official pna.pcpos.dll.
 
 Endpoints:
-  GET  /health
-  POST /pay     JSON { "amount": 10000, "order_number": "K-1", ... }
-  POST /test    force TestConnection
+  GET  /health           latest background TestConnection snapshot per terminal (no DLL call)
+  POST /pay              JSON { "amount": 10000, "order_number": "K-1", ... }
+                         "async": true → 202 with a job at once (else waits for the result)
+                         "idempotency_key": resubmits return the same job
+                         "terminal_id" / "kiosk_id": run on that POS (else first free one)
+  GET  /pay/<id>?wait=N  job status, long-poll up to N seconds
+  POST /pay/<id>/cancel  cancel a job not yet sent to the POS
+  POST /test             force TestConnection (?terminal=<id>, default all)
 
 Run (Windows):
   run.bat
@@ -22,6 +27,8 @@ from flask_cors import CORS
 
 import config
 from dll_client import PosDllClient
+from pay_jobs import PayJobStore
+from terminal_pool import TerminalPool
 
 _LOG_DIR = Path(__file__).resolve().parent / 'logs'
 _LOG_DIR.mkdir(parents=True, exist_ok=True)
@@ -40,11 +47,26 @@ logger = logging.getLogger('pos_bridge')
 app = Flask(__name__)
 CORS(app, resources={r'/*': {'origins': '*'}})
 
-client = PosDllClient(
-    dll_path=config.POS_DLL_PATH,
-    pos_ip=config.POS_IP,
-    pos_port=config.POS_PORT,
-    timeout_seconds=config.POS_TIMEOUT_SECONDS,
+
+def _make_client(pos_ip: str, pos_port: int):
+    if config.FAKE_DLL:
+        from fake_dll import FakePosDllClient
+
+        return FakePosDllClient(pos_ip, pos_port, delay_seconds=config.FAKE_DLL_DELAY)
+    return PosDllClient(
+        dll_path=config.POS_DLL_PATH,
+        pos_ip=pos_ip,
+        pos_port=pos_port,
+        timeout_seconds=config.POS_TIMEOUT_SECONDS,
+    )
+
+
+jobs = PayJobStore(config.JOB_JOURNAL_PATH, retention_hours=config.JOB_RETENTION_HOURS)
+pool = TerminalPool(
+    {terminal_id: _make_client(ip, port) for terminal_id, (ip, port) in config.TERMINALS.items()},
+    jobs,
+    health_interval_seconds=config.HEALTH_INTERVAL_SECONDS,
+    kiosk_terminals=config.KIOSK_TERMINALS,
 )
 
 
@@ -63,34 +85,40 @@ def require_token(fn):
 @app.get('/health')
 @require_token
 def health():
-    try:
-        client.ensure_loaded()
-        test = client.test_connection()
-        return jsonify(
-            {
-                'ok': True,
-                'dll_loaded': True,
-                'dll_path': str(config.POS_DLL_PATH),
-                'pos_ip': config.POS_IP,
-                'pos_port': config.POS_PORT,
-                'timeout_seconds': config.POS_TIMEOUT_SECONDS,
-                'test_connection': test,
-            }
-        ), 200 if test.get('success') else 503
-    except Exception as e:
-        logger.exception('health failed')
-        return jsonify({'ok': False, 'dll_loaded': False, 'error': str(e)}), 503
+    pool.start()
+    snapshot = pool.health()
+    body = {
+        **snapshot,
+        'dll_path': str(config.POS_DLL_PATH),
+        'timeout_seconds': config.POS_TIMEOUT_SECONDS,
+    }
+    return jsonify(body), 200 if snapshot.get('ok') else 503
 
 
 @app.post('/test')
 @require_token
 def test():
-    try:
-        result = client.test_connection()
-        return jsonify(result), 200 if result.get('success') else 503
-    except Exception as e:
-        logger.exception('test failed')
-        return jsonify({'success': False, 'message': str(e)}), 500
+    terminal_id = request.args.get('terminal', '')
+    if terminal_id and terminal_id not in pool.terminals:
+        return jsonify({'success': False, 'error': f'unknown terminal {terminal_id!r}'}), 404
+    results = {
+        tid: snapshot.get('test_connection') or {
+            'success': False,
+            'message': snapshot.get('error') or 'TestConnection failed',
+        }
+        for tid, snapshot in pool.refresh(terminal_id).items()
+    }
+    result = dict(next(iter(results.values())))
+    if len(pool.terminals) > 1:
+        result['success'] = all(r.get('success') for r in results.values())
+        result['terminals'] = results
+    return jsonify(result), 200 if result.get('success') else 503
+
+
+def _result_status(result: dict) -> int:
+    if result.get('status') == 'cancelled':
+        return 409
+    return 200 if result.get('success') else 402
 
 
 @app.post('/pay')
@@ -105,6 +133,13 @@ def pay():
     order_number = str(data.get('order_number') or data.get('orderNumber') or '')
     payment_id = str(data.get('payment_id') or data.get('paymentId') or '')
     bill_id = str(data.get('bill_id') or data.get('billId') or '')
+    idempotency_key = str(data.get('idempotency_key') or request.headers.get('Idempotency-Key') or '')
+    terminal_id, error = pool.resolve(
+        terminal_id=str(data.get('terminal_id') or ''),
+        kiosk_id=str(data.get('kiosk_id') or ''),
+    )
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
 
     # Allow one-off IP override (rare; prefer .env)
     if data.get('pos_ip') or data.get('pos_port'):
@@ -115,39 +150,90 @@ def pay():
             }
         ), 400
 
-    logger.info('pay request amount=%s order=%s', amount, order_number)
-    result = client.pay(
+    pool.start()
+    job, created = jobs.submit(
         amount=amount,
         order_number=order_number,
         payment_id=payment_id,
         bill_id=bill_id,
+        idempotency_key=idempotency_key,
+        terminal_id=terminal_id,
+    )
+    logger.info(
+        'pay request amount=%s order=%s terminal=%s job=%s%s',
+        amount, order_number, terminal_id or 'any', job.job_id, '' if created else ' (existing)',
     )
-    body = result.as_dict()
-    status = 200 if result.success else 402
-    if result.status == 'cancelled':
-        status = 409
-    return jsonify(body), status
+
+    if data.get('async'):
+        return jsonify(job.as_dict()), 202 if created else 200
+
+    # Synchronous callers (older Django, curl): wait for the result as before
+    job = jobs.wait(job.job_id, timeout=config.POS_TIMEOUT_SECONDS + 30)
+    if not job.is_final:
+        # Nobody waits for it any more: a job still queued must not reach the POS later
+        job, cancelled = jobs.cancel(job.job_id)
+        if cancelled:
+            logger.warning('job %s: sync wait timed out while queued; cancelled', job.job_id)
+            return jsonify({**job.result, 'job_id': job.job_id}), 504
+    if not job.is_final:
+        return jsonify({
+            'success': False,
+            'status': 'failed',
+            'response_code': '68',
+            'response_message': 'پاسخ پوز در زمان مقرر نیامد',
+            'job_id': job.job_id,
+        }), 504
+    return jsonify({**job.result, 'job_id': job.job_id, 'terminal_id': job.terminal_id}), _result_status(job.result)
+
+
+@app.get('/pay/<job_id>')
+@require_token
+def pay_status(job_id):
+    try:
+        wait = min(max(float(request.args.get('wait', 0)), 0), config.JOB_LONG_POLL_MAX)
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'wait must be seconds'}), 400
+    job = jobs.wait(job_id, timeout=wait)
+    if job is None:
+        return jsonify({'success': False, 'error': 'job not found'}), 404
+    return jsonify(job.as_dict()), 200
+
+
+@app.post('/pay/<job_id>/cancel')
+@require_token
+def pay_cancel(job_id):
+    job, _ = jobs.cancel(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'job not found'}), 404
+    if job.status == 'running':
+        return jsonify({
+            **job.as_dict(),
+            'error': 'already on the POS; the customer can cancel on the device',
+        }), 409
+    return jsonify(job.as_dict()), 200
 
 
 def main():
     logger.info(
-        'PosBridge starting on %s:%s dll=%s pos=%s:%s',
+        'PosBridge starting on %s:%s dll=%s terminals=%s',
         config.BRIDGE_HOST,
         config.BRIDGE_PORT,
         config.POS_DLL_PATH,
-        config.POS_IP,
-        config.POS_PORT,
+        ', '.join(f'{tid}={ip}:{port}' for tid, (ip, port) in config.TERMINALS.items()),
     )
     try:
-        client.ensure_loaded()
+        pool.ensure_loaded()
     except Exception as e:
         logger.error('DLL preload failed (will retry on first request): %s', e)
+    pool.start()
 
     # waitress is production WSGI for Windows
     try:
         from waitress import serve
 
-        serve(app, host=config.BRIDGE_HOST, port=config.BRIDGE_PORT, threads=4)
+        # Sync /pay and long-polls hold a thread each: two per terminal plus /health
+        threads = max(4, 2 * len(pool.terminals) + 2)
+        serve(app, host=config.BRIDGE_HOST, port=config.BRIDGE_PORT, threads=threads)
     except ImportError:
         app.run(host=config.BRIDGE_HOST, port=config.BRIDGE_PORT, threaded=True)
 
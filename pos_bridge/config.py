@@ -12,6 +12,7 @@ from __future__ import annotations
 
 import os
 from pathlib import Path
+from typing import Dict, Tuple
 
 from dotenv import load_dotenv
 
@@ -61,5 +62,55 @@ POS_TIMEOUT_SECONDS = int(
     _first('POS_TIMEOUT_SECONDS', 'POS_BRIDGE_TIMEOUT', default='120') or 120
 )
 
+
+def _terminals(spec: str) -> Dict[str, Tuple[str, int]]:
+    """"pos1=192.168.1.100:1362,pos2=192.168.1.101" → {id: (ip, port)}; port defaults to POS_PORT."""
+    if not spec:
+        return {'default': (POS_IP, POS_PORT)}
+    terminals: Dict[str, Tuple[str, int]] = {}
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        terminal_id, sep, address = item.partition('=')
+        host, _, port = address.strip().partition(':')
+        if not sep or not terminal_id.strip() or not host:
+            raise ValueError(f'BRIDGE_TERMINALS: expected id=ip[:port], got {item!r}')
+        terminals[terminal_id.strip()] = (host, int(port or POS_PORT))
+    return terminals
+
+
+def _pairs(spec: str) -> Dict[str, str]:
+    """"kiosk-1=pos1,kiosk-2=pos2" → dict."""
+    pairs: Dict[str, str] = {}
+    for item in spec.split(','):
+        key, sep, value = item.partition('=')
+        if sep and key.strip() and value.strip():
+            pairs[key.strip()] = value.strip()
+    return pairs
+
+
+# Several POS devices behind one bridge, each with its own DLL lock and worker.
+# Empty → one terminal "default" at POS_IP:POS_PORT.
+TERMINALS = _terminals(_first('BRIDGE_TERMINALS'))
+# Kiosk → terminal affinity for POST /pay {"kiosk_id": ...}; other payments go
+# to whichever healthy terminal is free first
+KIOSK_TERMINALS = _pairs(_first('BRIDGE_KIOSK_TERMINALS'))
+
+# Seconds between background TestConnection() runs behind GET /health
+HEALTH_INTERVAL_SECONDS = float(_first('BRIDGE_HEALTH_INTERVAL', default='15') or 15)
+
+# Payment job journal (results survive dropped connections and restarts)
+_journal = _first('BRIDGE_JOB_JOURNAL')
+JOB_JOURNAL_PATH = Path(_journal).expanduser().resolve() if _journal else _ROOT / 'data' / 'pay_jobs.jsonl'
+# Finished jobs kept for status lookups / idempotent retries (0 = keep all)
+JOB_RETENTION_HOURS = float(_first('BRIDGE_JOB_RETENTION_HOURS', default='24') or 0)
+# Upper bound for GET /pay/<id>?wait= (keeps waitress threads free)
+JOB_LONG_POLL_MAX = float(_first('BRIDGE_JOB_LONG_POLL_MAX', default='30') or 30)
+
+# Linux development / tests without pna.pcpos.dll (see fake_dll.py)
+FAKE_DLL = _bool(os.getenv('BRIDGE_FAKE_DLL'), False)
+FAKE_DLL_DELAY = float(_first('FAKE_DLL_DELAY', default='3') or 0)
+
 BRIDGE_TOKEN = _first('BRIDGE_TOKEN', 'POS_BRIDGE_TOKEN')
 DEBUG = _bool(os.getenv('BRIDGE_DEBUG'), False)
@@ -56,7 +56,15 @@ class PayResult:
 
 
 class PosDllClient:
-    """Thread-safe wrapper: one POS transaction at a time."""
+    """
+    Thread-safe wrapper: one POS transaction at a time.
+
+    One client per POS device; clients of different devices (terminal pool)
+    run transactions in parallel, each on its own PCPOS instance.
+    """
+
+    # Assembly load is process-wide; several terminals may start at once
+    _load_lock = threading.Lock()
 
     def __init__(
         self,
@@ -77,6 +85,11 @@ class PosDllClient:
     def ensure_loaded(self) -> None:
         if self._clr_ready:
             return
+        with self._load_lock:
+            if not self._clr_ready:
+                self._load()
+
+    def _load(self) -> None:
         if not self.dll_path.is_file():
             raise FileNotFoundError(
                 f'PNA DLL not found: {self.dll_path}. '
@@ -109,8 +122,16 @@ class PosDllClient:
         pos.Port = int(self.pos_port)
         return pos
 
-    def test_connection(self) -> Dict[str, Any]:
-        with self._lock:
+    @property
+    def busy(self) -> bool:
+        """True while a transaction (or TestConnection) holds the DLL."""
+        return self._lock.locked()
+
+    def test_connection(self, blocking: bool = True) -> Optional[Dict[str, Any]]:
+        """TestConnection(); with blocking=False returns None instead of waiting for a payment."""
+        if not self._lock.acquire(blocking=blocking):
+            return None
+        try:
             pos = self._new_pcpos()
             ok = bool(pos.TestConnection())
             return {
@@ -124,6 +145,8 @@ class PosDllClient:
                 'pos_port': self.pos_port,
                 'dll': str(self.dll_path),
             }
+        finally:
+            self._lock.release()
 
     def pay(
         self,
@@ -0,0 +1,65 @@
+"""
+Stand-in for PosDllClient when pna.pcpos.dll / pythonnet are not available
+(Linux development and tests): BRIDGE_FAKE_DLL=True in .env.
+
+The "customer" answers after FAKE_DLL_DELAY seconds; the result follows the
+amount so every path can be driven from Django:
+  amount ending in 81 → cancelled on the device
+  amount ending in 51 → declined (code 51)
+  anything else       → success
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from dll_client import PayResult
+
+
+class FakePosDllClient:
+    def __init__(self, pos_ip: str = 'fake', pos_port: int = 1362, delay_seconds: float = 3.0):
+        self.pos_ip = pos_ip
+        self.pos_port = int(pos_port)
+        self.dll_path = Path('fake-pna.pcpos.dll')
+        self.timeout_seconds = 120
+        self.delay_seconds = float(delay_seconds)
+        self._lock = threading.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    def ensure_loaded(self) -> None:
+        return None
+
+    def test_connection(self, blocking: bool = True) -> Optional[Dict[str, Any]]:
+        if not self._lock.acquire(blocking=blocking):
+            return None
+        try:
+            return {
+                'success': True,
+                'message': f'TestConnection OK (fake {self.pos_ip}:{self.pos_port})',
+                'pos_ip': self.pos_ip,
+                'pos_port': self.pos_port,
+                'dll': str(self.dll_path),
+            }
+        finally:
+            self._lock.release()
+
+    def pay(self, amount: int, order_number: str = '', payment_id: str = '', bill_id: str = '') -> PayResult:
+        with self._lock:
+            time.sleep(self.delay_seconds)
+            if amount % 100 == 81:
+                return PayResult(False, 'cancelled', '81', 'تراکنش توسط کاربر لغو شد', raw='0018RS013RS00281PD0011')
+            if amount % 100 == 51:
+                return PayResult(False, 'failed', '51', 'تراکنش ناموفق (کد 51)', raw='0018RS013RS00251PD0011')
+            rrn = uuid.uuid4().hex[:12]
+            return PayResult(
+                True, 'success', '00', 'تراکنش موفق',
+                reference_number=rrn, card_number='****1236', transaction_id=rrn,
+                raw='RS00200', parsed='00',
+            )
@@ -0,0 +1,109 @@
+"""
+Background POS health prober for PosBridge.
+
+`GET /health` used to load the DLL and run TestConnection() on every call,
+which opens a LAN session to the POS and waits for the DLL lock behind a
+running payment. The prober runs TestConnection() every
+HEALTH_INTERVAL_SECONDS (skipping rounds while a payment holds the DLL)
+and /health only returns the latest snapshot.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from dll_client import PayResult, PosDllClient
+
+logger = logging.getLogger('pos_bridge.health')
+
+
+class HealthProber:
+    """Keeps a health snapshot of DLL + POS fresh in a daemon thread."""
+
+    def __init__(self, client: PosDllClient, interval_seconds: float = 15.0):
+        self.client = client
+        self.interval_seconds = max(float(interval_seconds), 1.0)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._snapshot: Dict[str, Any] = {
+            'ok': False,
+            'dll_loaded': False,
+            'test_connection': None,
+            'error': 'not checked yet',
+            'checked_at': None,
+        }
+        self._checked_monotonic: Optional[float] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name='pos-health-prober', daemon=True)
+        self._thread.start()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Latest result plus its age; never touches the DLL."""
+        with self._lock:
+            data = dict(self._snapshot)
+            checked = self._checked_monotonic
+        data['age_seconds'] = round(time.monotonic() - checked, 1) if checked is not None else None
+        data['busy'] = self.client.busy
+        data['interval_seconds'] = self.interval_seconds
+        return data
+
+    def refresh(self, blocking: bool = True) -> Dict[str, Any]:
+        """
+        Run TestConnection() now and store the result.
+
+        With blocking=False a round that finds a payment in progress keeps
+        the previous result.
+        """
+        try:
+            self.client.ensure_loaded()
+        except Exception as e:
+            logger.error('health: DLL load failed: %s', e)
+            self._store({'ok': False, 'dll_loaded': False, 'test_connection': None, 'error': str(e)})
+            return self.snapshot()
+        try:
+            test = self.client.test_connection(blocking=blocking)
+        except Exception as e:
+            logger.exception('health: TestConnection failed')
+            self._store({'ok': False, 'dll_loaded': True, 'test_connection': None, 'error': str(e)})
+            return self.snapshot()
+        if test is not None:
+            self._store({'ok': bool(test.get('success')), 'dll_loaded': True, 'test_connection': test, 'error': None})
+        return self.snapshot()
+
+    def record_payment(self, result: PayResult) -> None:
+        """A finished payment proves the POS answered (or not) just now."""
+        if result.response_code in ('91', '68', '96') and not result.success:
+            # Connect/timeout/DLL error: re-check on the next round instead of guessing
+            self._wake.set()
+            return
+        self._store({
+            'ok': True,
+            'dll_loaded': True,
+            'test_connection': {
+                'success': True,
+                'message': f'POS answered payment ({result.status})',
+                'pos_ip': self.client.pos_ip,
+                'pos_port': self.client.pos_port,
+                'dll': str(self.client.dll_path),
+            },
+            'error': None,
+        })
+
+    def _store(self, values: Dict[str, Any]) -> None:
+        with self._lock:
+            self._snapshot = {**values, 'checked_at': datetime.now(timezone.utc).isoformat()}
+            self._checked_monotonic = time.monotonic()
+
+    def _run(self) -> None:
+        while True:
+            self.refresh(blocking=False)
+            self._wake.wait(self.interval_seconds)
+            self._wake.clear()
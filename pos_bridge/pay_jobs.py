@@ -0,0 +1,342 @@
+"""
+Payment jobs for PosBridge.
+
+`POST /pay` with ``"async": true`` queues a job and answers with its id at
+once; one runner thread per terminal drives its DLL client job by job and
+clients follow the job with `GET /pay/<id>?wait=N` (long-poll). Every state change is appended to a
+JSONL journal, so a result survives a dropped HTTP connection and a bridge
+restart, and a retried submit with the same ``idempotency_key`` gets the
+existing job instead of charging again.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger('pos_bridge.jobs')
+
+# queued → running → done; queued → cancelled; running at restart → interrupted
+FINAL_STATUSES = frozenset({'done', 'cancelled', 'interrupted'})
+
+
+@dataclass
+class PayJob:
+    job_id: str
+    amount: int
+    order_number: str = ''
+    payment_id: str = ''
+    bill_id: str = ''
+    idempotency_key: str = ''
+    # Pinned terminal, or '' for any; set to the terminal that ran it once started
+    terminal_id: str = ''
+    status: str = 'queued'
+    # PayResult.as_dict() of the transaction (also set for cancelled/interrupted)
+    result: Optional[Dict[str, Any]] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def is_final(self) -> bool:
+        return self.status in FINAL_STATUSES
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class PayJobStore:
+    """In-memory jobs backed by an append-only journal file."""
+
+    def __init__(self, journal_path: Path, retention_hours: float = 24.0):
+        self.journal_path = Path(journal_path)
+        self.retention_seconds = max(float(retention_hours), 0.0) * 3600
+        self._cond = threading.Condition()
+        self._jobs: Dict[str, PayJob] = {}
+        self._by_key: Dict[str, str] = {}
+        self._load()
+
+    def submit(
+        self,
+        amount: int,
+        order_number: str = '',
+        payment_id: str = '',
+        bill_id: str = '',
+        idempotency_key: str = '',
+        terminal_id: str = '',
+    ) -> Tuple[PayJob, bool]:
+        """
+        Queue a payment, or return the job already queued under the same key.
+
+        Returns:
+            (job, created)
+        """
+        with self._cond:
+            self._prune()
+            if idempotency_key and idempotency_key in self._by_key:
+                return self._jobs[self._by_key[idempotency_key]], False
+            job = PayJob(
+                job_id=uuid.uuid4().hex,
+                amount=int(amount),
+                order_number=order_number,
+                payment_id=payment_id,
+                bill_id=bill_id,
+                idempotency_key=idempotency_key,
+                terminal_id=terminal_id,
+            )
+            self._jobs[job.job_id] = job
+            if idempotency_key:
+                self._by_key[idempotency_key] = job.job_id
+            self._write(job)
+            self._cond.notify_all()
+            return job, True
+
+    def get(self, job_id: str) -> Optional[PayJob]:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id: str, timeout: float) -> Optional[PayJob]:
+        """Block until the job is final or timeout passes; None if unknown."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is not None and timeout > 0:
+                self._cond.wait_for(lambda: job.is_final, timeout)
+            return job
+
+    def cancel(self, job_id: str) -> Tuple[Optional[PayJob], bool]:
+        """
+        Cancel a job that has not reached the POS yet.
+
+        Returns:
+            (job, cancelled): cancelled is False when it is already running
+            (only the customer can cancel on the device) or final.
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != 'queued':
+                return job, False
+            self._finish(job, 'cancelled', {
+                'success': False,
+                'status': 'cancelled',
+                'response_code': '',
+                'response_message': 'پرداخت پیش از ارسال به پوز لغو شد',
+            })
+            return job, True
+
+    def next_queued(self, terminal_id: str, timeout: float, accept_unpinned: bool = True) -> Optional[PayJob]:
+        """
+        Oldest job for a terminal marked running, waiting up to timeout for one.
+
+        Args:
+            terminal_id: Terminal asking for work (takes jobs pinned to it)
+            timeout: Seconds to wait when there is nothing to run
+            accept_unpinned: Also take jobs for any terminal
+        """
+        with self._cond:
+            job = self._oldest_queued(terminal_id, accept_unpinned)
+            if job is None:
+                self._cond.wait(timeout)
+                job = self._oldest_queued(terminal_id, accept_unpinned)
+            if job is None:
+                return None
+            job.status = 'running'
+            job.terminal_id = terminal_id
+            job.started_at = time.time()
+            self._write(job)
+            self._cond.notify_all()
+            return job
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Queue depth and running job per terminal ('' = jobs for any terminal).
+        """
+        with self._cond:
+            load: Dict[str, Dict[str, Any]] = {}
+            for job in self._jobs.values():
+                if job.status == 'queued':
+                    entry = load.setdefault(job.terminal_id, {'queued': 0, 'running_job': None})
+                    entry['queued'] += 1
+                elif job.status == 'running':
+                    entry = load.setdefault(job.terminal_id, {'queued': 0, 'running_job': None})
+                    entry['running_job'] = job.job_id
+            return load
+
+    def finish(self, job: PayJob, result: Dict[str, Any]) -> None:
+        with self._cond:
+            self._finish(job, 'done', result)
+
+    def _finish(self, job: PayJob, status: str, result: Dict[str, Any]) -> None:
+        job.status = status
+        job.result = result
+        job.finished_at = time.time()
+        self._write(job)
+        self._cond.notify_all()
+
+    def _prune(self) -> None:
+        """Forget final jobs older than the retention (0 = keep all)."""
+        if not self.retention_seconds:
+            return
+        cutoff = time.time() - self.retention_seconds
+        for job_id, job in list(self._jobs.items()):
+            if job.is_final and (job.finished_at or job.created_at) < cutoff:
+                del self._jobs[job_id]
+                if self._by_key.get(job.idempotency_key) == job_id:
+                    del self._by_key[job.idempotency_key]
+
+    def _oldest_queued(self, terminal_id: str, accept_unpinned: bool) -> Optional[PayJob]:
+        wanted = {terminal_id, ''} if accept_unpinned else {terminal_id}
+        queued = [
+            job for job in self._jobs.values()
+            if job.status == 'queued' and job.terminal_id in wanted
+        ]
+        return min(queued, key=lambda job: job.created_at) if queued else None
+
+    def _write(self, job: PayJob) -> None:
+        line = json.dumps(job.as_dict(), ensure_ascii=False)
+        try:
+            with open(self.journal_path, 'a', encoding='utf-8') as handle:
+                handle.write(line + '\n')
+                handle.flush()
+                os.fsync(handle.fileno())
+        except OSError as e:
+            # The job still runs; only restart recovery is lost
+            logger.error('journal write failed (%s): %s', self.journal_path, e)
+
+    def _load(self) -> None:
+        """Replay the journal, settle jobs cut off by a restart and compact it."""
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.journal_path.is_file():
+            with open(self.journal_path, encoding='utf-8') as handle:
+                for line in handle:
+                    try:
+                        data = json.loads(line)
+                        job = PayJob(**data)
+                    except (ValueError, TypeError):
+                        continue
+                    self._jobs[job.job_id] = job
+
+        self._prune()
+        for job in self._jobs.values():
+            if job.status == 'queued':
+                # Never reached the POS: safe to drop
+                job.status = 'cancelled'
+                job.finished_at = time.time()
+                job.result = {
+                    'success': False,
+                    'status': 'cancelled',
+                    'response_code': '',
+                    'response_message': 'بریج پیش از ارسال به پوز ری‌استارت شد',
+                }
+            elif job.status == 'running':
+                # The card may have been charged; the outcome must be checked by hand
+                job.status = 'interrupted'
+                job.finished_at = time.time()
+                job.result = {
+                    'success': False,
+                    'status': 'failed',
+                    'response_code': '',
+                    'response_message': (
+                        'بریج حین تراکنش ری‌استارت شد؛ نتیجه را روی رسید پوز یا گزارش بانک بررسی کنید'
+                    ),
+                }
+                logger.warning('job %s (order %s) interrupted by restart', job.job_id, job.order_number)
+            if job.idempotency_key:
+                self._by_key[job.idempotency_key] = job.job_id
+
+        tmp_path = self.journal_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as handle:
+            for job in sorted(self._jobs.values(), key=lambda job: job.created_at):
+                handle.write(json.dumps(job.as_dict(), ensure_ascii=False) + '\n')
+        os.replace(tmp_path, self.journal_path)
+
+
+class PayJobRunner:
+    """Thread that runs one terminal's queued jobs on its DLL client, oldest first."""
+
+    def __init__(
+        self,
+        client,
+        store: PayJobStore,
+        on_result: Optional[Callable[[Any], None]] = None,
+        terminal_id: str = 'default',
+        accepts_unpinned: Optional[Callable[[], bool]] = None,
+    ):
+        self.client = client
+        self.store = store
+        self.on_result = on_result
+        self.terminal_id = terminal_id
+        # Asked before each job: may this terminal take jobs for any terminal?
+        self.accepts_unpinned = accepts_unpinned or (lambda: True)
+        self._thread: Optional[threading.Thread] = None
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, Any] = {
+            'payments': 0,
+            'succeeded': 0,
+            'cancelled': 0,
+            'failed': 0,
+            'last_duration_seconds': None,
+            'last_finished_at': None,
+        }
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self._run, name=f'pos-pay-runner-{self.terminal_id}', daemon=True,
+        )
+        self._thread.start()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _run(self) -> None:
+        while True:
+            job = self.store.next_queued(self.terminal_id, timeout=5.0, accept_unpinned=self.accepts_unpinned())
+            if job is None:
+                continue
+            logger.info(
+                'job %s: pay amount=%s order=%s terminal=%s',
+                job.job_id, job.amount, job.order_number, self.terminal_id,
+            )
+            started = time.monotonic()
+            try:
+                result = self.client.pay(
+                    amount=job.amount,
+                    order_number=job.order_number,
+                    payment_id=job.payment_id,
+                    bill_id=job.bill_id,
+                )
+            except Exception as e:
+                logger.exception('job %s: pay raised', job.job_id)
+                self.store.finish(job, {
+                    'success': False,
+                    'status': 'failed',
+                    'response_code': '96',
+                    'response_message': f'خطای بریج: {e}',
+                })
+                self._count('failed', started)
+                continue
+            self.store.finish(job, result.as_dict())
+            self._count('succeeded' if result.success else result.status, started)
+            logger.info('job %s: %s (%s)', job.job_id, result.status, result.response_code)
+            if self.on_result is not None:
+                try:
+                    self.on_result(result)
+                except Exception:
+                    logger.exception('job %s: result hook failed', job.job_id)
+
+    def _count(self, outcome: str, started: float) -> None:
+        with self._stats_lock:
+            self._stats['payments'] += 1
+            key = outcome if outcome in ('succeeded', 'cancelled') else 'failed'
+            self._stats[key] += 1
+            self._stats['last_duration_seconds'] = round(time.monotonic() - started, 1)
+            self._stats['last_finished_at'] = time.time()
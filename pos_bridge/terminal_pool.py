@@ -0,0 +1,136 @@
+"""
+POS terminal pool for PosBridge.
+
+A shop with several POS devices runs them behind one bridge. Every terminal
+has its own DLL client (and so its own transaction lock), health prober and
+job runner thread, so payments on different devices run side by side.
+
+Dispatch: a payment pinned to a terminal (``terminal_id``, or ``kiosk_id``
+mapped by BRIDGE_KIOSK_TERMINALS) waits for that device; any other payment
+is taken by the first healthy terminal that is free (least busy). Unhealthy
+terminals only take unpinned payments when no terminal is healthy.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from health_probe import HealthProber
+from pay_jobs import PayJobRunner, PayJobStore
+
+logger = logging.getLogger('pos_bridge.terminals')
+
+
+class Terminal:
+    """One POS device: DLL client + health prober + job runner."""
+
+    def __init__(self, terminal_id: str, client, prober: HealthProber, runner: PayJobRunner):
+        self.terminal_id = terminal_id
+        self.client = client
+        self.prober = prober
+        self.runner = runner
+
+    @property
+    def healthy(self) -> bool:
+        return bool(self.prober.snapshot().get('ok'))
+
+
+class TerminalPool:
+    def __init__(
+        self,
+        clients: Dict[str, Any],
+        store: PayJobStore,
+        health_interval_seconds: float = 15.0,
+        kiosk_terminals: Optional[Dict[str, str]] = None,
+    ):
+        if not clients:
+            raise ValueError('TerminalPool needs at least one terminal')
+        self.store = store
+        self.kiosk_terminals = dict(kiosk_terminals or {})
+        self.terminals: Dict[str, Terminal] = {}
+        for terminal_id, client in clients.items():
+            prober = HealthProber(client, interval_seconds=health_interval_seconds)
+            runner = PayJobRunner(
+                client,
+                store,
+                on_result=prober.record_payment,
+                terminal_id=terminal_id,
+                accepts_unpinned=self._accepts_unpinned(terminal_id),
+            )
+            self.terminals[terminal_id] = Terminal(terminal_id, client, prober, runner)
+
+        unknown = {k: v for k, v in self.kiosk_terminals.items() if v not in self.terminals}
+        if unknown:
+            raise ValueError(f'BRIDGE_KIOSK_TERMINALS points at unknown terminals: {unknown}')
+
+    @property
+    def default(self) -> Terminal:
+        return next(iter(self.terminals.values()))
+
+    def start(self) -> None:
+        for terminal in self.terminals.values():
+            terminal.prober.start()
+            terminal.runner.start()
+
+    def ensure_loaded(self) -> None:
+        for terminal in self.terminals.values():
+            terminal.client.ensure_loaded()
+
+    def resolve(self, terminal_id: str = '', kiosk_id: str = '') -> Tuple[str, Optional[str]]:
+        """
+        Terminal a payment must run on ('' = any).
+
+        Returns:
+            (terminal_id, error): error is set for an unknown terminal_id
+        """
+        if terminal_id:
+            if terminal_id not in self.terminals:
+                return '', f'unknown terminal_id {terminal_id!r} (known: {", ".join(self.terminals)})'
+            return terminal_id, None
+        return self.kiosk_terminals.get(kiosk_id, ''), None
+
+    def refresh(self, terminal_id: str = '') -> Dict[str, Dict[str, Any]]:
+        """Run TestConnection() now on one terminal (or all); snapshots by terminal."""
+        targets = [self.terminals[terminal_id]] if terminal_id else list(self.terminals.values())
+        return {terminal.terminal_id: terminal.prober.refresh() for terminal in targets}
+
+    def health(self) -> Dict[str, Any]:
+        """
+        Pool snapshot for GET /health (never touches the DLL).
+
+        The top level keeps the single-terminal fields (from the first
+        healthy terminal) with ``ok`` = any terminal healthy and ``busy`` =
+        every terminal busy; ``terminals`` has each device with its queue.
+        """
+        load = self.store.load()
+        terminals = {}
+        for terminal_id, terminal in self.terminals.items():
+            own = load.get(terminal_id, {})
+            terminals[terminal_id] = {
+                **terminal.prober.snapshot(),
+                'pos_ip': terminal.client.pos_ip,
+                'pos_port': terminal.client.pos_port,
+                'queued': own.get('queued', 0),
+                'running_job': own.get('running_job'),
+                **terminal.runner.stats(),
+            }
+        lead = next((t for t in terminals.values() if t.get('ok')), terminals[self.default.terminal_id])
+        return {
+            **lead,
+            'ok': any(t.get('ok') for t in terminals.values()),
+            'busy': all(t.get('busy') for t in terminals.values()),
+            # Jobs any terminal may take
+            'queued': load.get('', {}).get('queued', 0),
+            'terminal_count': len(terminals),
+            'terminals': terminals,
+        }
+
+    def _accepts_unpinned(self, terminal_id: str) -> Callable[[], bool]:
+        def accepts() -> bool:
+            if self.terminals[terminal_id].healthy:
+                return True
+            # Nothing healthy: let every terminal try rather than strand the queue
+            return not any(t.healthy for t in self.terminals.values())
+
+        return accepts
@@ -0,0 +1,174 @@
+"""
+Tests for the payment job store and runner (no DLL, no Flask needed).
+
+Run from this directory:
+    python -m unittest test_pay_jobs
+"""
+
+import json
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from fake_dll import FakePosDllClient
+from pay_jobs import PayJobRunner, PayJobStore
+
+
+class PayJobStoreTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.journal = Path(self._tmp.name) / 'jobs.jsonl'
+        self.store = PayJobStore(self.journal)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_resubmit_with_same_key_returns_existing_job(self):
+        job, created = self.store.submit(10000, order_number='K-1', idempotency_key='order-1')
+        again, created_again = self.store.submit(10000, order_number='K-1', idempotency_key='order-1')
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(again.job_id, job.job_id)
+
+    def test_submit_without_key_always_creates(self):
+        first, _ = self.store.submit(10000)
+        second, created = self.store.submit(10000)
+        self.assertTrue(created)
+        self.assertNotEqual(first.job_id, second.job_id)
+
+    def test_cancel_queued_job(self):
+        job, _ = self.store.submit(10000)
+        job, cancelled = self.store.cancel(job.job_id)
+        self.assertTrue(cancelled)
+        self.assertEqual(job.status, 'cancelled')
+        self.assertTrue(job.is_final)
+        self.assertEqual(job.result['status'], 'cancelled')
+        # A cancelled job is never handed to a terminal
+        self.assertIsNone(self.store.next_queued('default', timeout=0))
+
+    def test_cancel_running_job_is_refused(self):
+        job, _ = self.store.submit(10000)
+        self.assertIs(self.store.next_queued('default', timeout=0), job)
+        job, cancelled = self.store.cancel(job.job_id)
+        self.assertFalse(cancelled)
+        self.assertEqual(job.status, 'running')
+
+    def test_cancel_unknown_job(self):
+        self.assertEqual(self.store.cancel('missing'), (None, False))
+
+    def test_pinned_job_waits_for_its_terminal(self):
+        pinned, _ = self.store.submit(10000, terminal_id='pos2')
+        anyone, _ = self.store.submit(20000)
+        self.assertIs(self.store.next_queued('pos1', timeout=0), anyone)
+        self.assertIsNone(self.store.next_queued('pos1', timeout=0))
+        self.assertIs(self.store.next_queued('pos2', timeout=0), pinned)
+
+    def test_unpinned_jobs_skipped_when_not_accepted(self):
+        self.store.submit(10000)
+        self.assertIsNone(self.store.next_queued('pos1', timeout=0, accept_unpinned=False))
+
+    def test_wait_returns_when_job_finishes(self):
+        job, _ = self.store.submit(10000)
+        running = self.store.next_queued('default', timeout=0)
+        timer = threading.Timer(0.1, self.store.finish, args=(running, {'success': True, 'status': 'success'}))
+        timer.start()
+        started = time.monotonic()
+        waited = self.store.wait(job.job_id, timeout=5)
+        timer.join()
+        self.assertEqual(waited.status, 'done')
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_journal_replay_settles_unfinished_jobs(self):
+        done, _ = self.store.submit(10000, idempotency_key='order-1')
+        self.store.finish(self.store.next_queued('default', timeout=0), {'success': True, 'status': 'success'})
+        running, _ = self.store.submit(20000, idempotency_key='order-2')
+        self.store.next_queued('default', timeout=0)
+        queued, _ = self.store.submit(30000, idempotency_key='order-3')
+
+        restarted = PayJobStore(self.journal)
+        self.assertEqual(restarted.get(done.job_id).status, 'done')
+        self.assertEqual(restarted.get(done.job_id).result['status'], 'success')
+        # Running at restart: the card may have been charged
+        self.assertEqual(restarted.get(running.job_id).status, 'interrupted')
+        # Never reached the POS: dropped
+        self.assertEqual(restarted.get(queued.job_id).status, 'cancelled')
+        # Keys survive the restart, so a resubmit finds the old job
+        again, created = restarted.submit(20000, idempotency_key='order-2')
+        self.assertFalse(created)
+        self.assertEqual(again.job_id, running.job_id)
+
+    def test_journal_is_compacted_on_load(self):
+        job, _ = self.store.submit(10000)
+        self.store.cancel(job.job_id)
+        PayJobStore(self.journal)
+        lines = self.journal.read_text(encoding='utf-8').splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['status'], 'cancelled')
+
+    def test_corrupt_journal_lines_are_skipped(self):
+        job, _ = self.store.submit(10000)
+        with open(self.journal, 'a', encoding='utf-8') as handle:
+            handle.write('{not json\n')
+        restarted = PayJobStore(self.journal)
+        self.assertEqual(restarted.get(job.job_id).status, 'cancelled')
+
+    def test_old_final_jobs_are_pruned(self):
+        store = PayJobStore(self.journal, retention_hours=1)
+        job, _ = store.submit(10000, idempotency_key='old')
+        store.cancel(job.job_id)
+        job.finished_at = time.time() - 7200
+        store.submit(10000)
+        self.assertIsNone(store.get(job.job_id))
+        _, created = store.submit(10000, idempotency_key='old')
+        self.assertTrue(created)
+
+
+class PayJobRunnerTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.store = PayJobStore(Path(self._tmp.name) / 'jobs.jsonl')
+        self.results = []
+        self.runner = PayJobRunner(
+            FakePosDllClient(delay_seconds=0),
+            self.store,
+            on_result=self.results.append,
+            terminal_id='pos1',
+        )
+        self.runner.start()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _pay(self, amount):
+        job, _ = self.store.submit(amount)
+        job = self.store.wait(job.job_id, timeout=5)
+        self.assertTrue(job.is_final)
+        return job
+
+    def test_fake_dll_outcomes(self):
+        success = self._pay(10000)
+        cancelled = self._pay(10081)
+        declined = self._pay(10051)
+        self.assertEqual(success.status, 'done')
+        self.assertEqual(success.terminal_id, 'pos1')
+        self.assertEqual(success.result['status'], 'success')
+        self.assertEqual(cancelled.result['status'], 'cancelled')
+        self.assertEqual((declined.result['status'], declined.result['response_code']), ('failed', '51'))
+        stats = self.runner.stats()
+        self.assertEqual((stats['payments'], stats['succeeded'], stats['cancelled'], stats['failed']), (3, 1, 1, 1))
+        self.assertEqual(len(self.results), 3)
+
+    def test_client_exception_finishes_job_as_failed(self):
+        def boom(**kwargs):
+            raise RuntimeError('DLL crashed')
+
+        self.runner.client.pay = boom
+        job = self._pay(10000)
+        self.assertEqual(job.result['status'], 'failed')
+        self.assertIn('DLL crashed', job.result['response_message'])
+
+
+if __name__ == '__main__':
+    unittest.main()